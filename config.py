@@ -24,3 +24,54 @@ SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
 MCP_READ_ONLY_MODE = os.getenv("MCP_READ_ONLY_MODE", "false").lower() == "true"
 MCP_REQUIRE_CONFIRMATIONS = os.getenv("MCP_REQUIRE_CONFIRMATIONS", "true").lower() == "true"
 MCP_AUDIT_LOGGING = os.getenv("MCP_AUDIT_LOGGING", "true").lower() == "true"
+
+# Seconds to keep cached Dashboard inventory/configuration (infrastructure, org directory, ...)
+MCP_CACHE_TTL = int(os.getenv("MCP_CACHE_TTL", "900"))
+
+# Parallel Dashboard requests per audit snapshot (the SDK still backs off on 429s)
+MCP_AUDIT_CONCURRENCY = int(os.getenv("MCP_AUDIT_CONCURRENCY", "8"))
+
+# Directory for persisted state (audit snapshots, collected history, ...)
+MCP_STATE_DIR = os.getenv("MCP_STATE_DIR", "state")
+
+# Dashboard API budget: requests per second per organization and in total for this process (0 disables)
+MCP_ORG_RATE_LIMIT = float(os.getenv("MCP_ORG_RATE_LIMIT", "10"))
+MCP_GLOBAL_RATE_LIMIT = float(os.getenv("MCP_GLOBAL_RATE_LIMIT", "100"))
+
+# Organizations swept in parallel by fleet-wide tools
+MCP_FLEET_CONCURRENCY = int(os.getenv("MCP_FLEET_CONCURRENCY", "4"))
+
+# Uplink loss/latency history: poll interval, raw-sample retention, rollup bucket size and total retention (seconds)
+MCP_UPLINK_POLL_INTERVAL = int(os.getenv("MCP_UPLINK_POLL_INTERVAL", "240"))
+MCP_UPLINK_RAW_RETENTION = int(os.getenv("MCP_UPLINK_RAW_RETENTION", str(2 * 86400)))
+MCP_UPLINK_ROLLUP_SECONDS = int(os.getenv("MCP_UPLINK_ROLLUP_SECONDS", "900"))
+MCP_UPLINK_RETENTION = int(os.getenv("MCP_UPLINK_RETENTION", str(30 * 86400)))
+
+# Organizations whose uplinks are collected in the background from startup (comma-separated IDs)
+MCP_UPLINK_COLLECT_ORGS = [o.strip() for o in os.getenv("MCP_UPLINK_COLLECT_ORGS", "").split(",") if o.strip()]
+
+# Anomaly detection: EWMA smoothing factor, z-score threshold, samples before a baseline is trusted,
+# wireless poll interval (seconds), organizations monitored from startup and webhook URLs notified
+# of anomalies (comma-separated)
+MCP_ANOMALY_ALPHA = float(os.getenv("MCP_ANOMALY_ALPHA", "0.02"))
+MCP_ANOMALY_Z = float(os.getenv("MCP_ANOMALY_Z", "3.0"))
+MCP_ANOMALY_WARMUP = int(os.getenv("MCP_ANOMALY_WARMUP", "12"))
+MCP_ANOMALY_POLL_INTERVAL = int(os.getenv("MCP_ANOMALY_POLL_INTERVAL", "300"))
+MCP_ANOMALY_ORGS = [o.strip() for o in os.getenv("MCP_ANOMALY_ORGS", "").split(",") if o.strip()]
+MCP_ANOMALY_WEBHOOKS = [u.strip() for u in os.getenv("MCP_ANOMALY_WEBHOOKS", "").split(",") if u.strip()]
+
+# Audit profiles kept in state/metrics/profiles.jsonl (older runs are dropped)
+MCP_PROFILE_LOG_RUNS = int(os.getenv("MCP_PROFILE_LOG_RUNS", "500"))
+
+# Local sensor readings cache: days of readings kept on disk per organization
+MCP_SENSOR_CACHE_RETENTION = int(os.getenv("MCP_SENSOR_CACHE_RETENTION", str(31 * 86400)))
+
+# Switch port history: poll interval (seconds), samples kept per port (ring buffer; default one week of
+# 5-minute samples) and organizations sampled from startup (comma-separated IDs)
+MCP_SWITCH_PORT_POLL_INTERVAL = int(os.getenv("MCP_SWITCH_PORT_POLL_INTERVAL", "300"))
+MCP_SWITCH_PORT_SAMPLES = int(os.getenv("MCP_SWITCH_PORT_SAMPLES", "2016"))
+MCP_SWITCH_PORT_COLLECT_ORGS = [o.strip() for o in os.getenv("MCP_SWITCH_PORT_COLLECT_ORGS", "").split(",") if o.strip()]
+
+# Network event log: days of tailed events kept per network and most pages fetched per stream and call
+MCP_EVENT_RETENTION = int(os.getenv("MCP_EVENT_RETENTION", str(14 * 86400)))
+MCP_EVENT_MAX_PAGES = int(os.getenv("MCP_EVENT_MAX_PAGES", "10"))
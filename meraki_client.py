@@ -2,9 +2,12 @@
 Cisco Meraki API client.
 """
 
+import threading
+
 import meraki
 from typing import Dict, List, Any, Optional
 from config import MERAKI_API_KEY, TIMEOUT
+from utils.profiler import instrument
 
 class MerakiClient:
     """Client for the Cisco Meraki API."""
@@ -19,6 +22,31 @@ class MerakiClient:
             single_request_timeout=TIMEOUT,  # Use timeout from config (600 seconds)
             maximum_retries=5  # Increase retries for reliability
         )
+        self._streaming_dashboard = None
+        self._streaming_lock = threading.Lock()
+    
+    @property
+    def streaming_dashboard(self):
+        """
+        Dashboard session whose paginated GETs yield items page by page instead of returning lists.
+
+        Kept separate from `dashboard` because the SDK's iterator switch applies to the
+        whole session, and every other caller expects lists. Its requests are recorded
+        by the active audit profiler like those of `dashboard`.
+        """
+        with self._streaming_lock:
+            if self._streaming_dashboard is None:
+                self._streaming_dashboard = meraki.DashboardAPI(
+                    api_key=MERAKI_API_KEY,
+                    output_log=False,
+                    suppress_logging=True,
+                    wait_on_rate_limit=True,
+                    single_request_timeout=TIMEOUT,
+                    maximum_retries=5,
+                    use_iterator_for_get_pages=True
+                )
+                instrument(self._streaming_dashboard)
+            return self._streaming_dashboard
     
     # Organizations
     def get_organizations(self) -> List[Dict[str, Any]]:
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Build data/oui.bin from the IEEE MA-L registry.
+
+Usage:
+    python scripts/build_oui_database.py oui.txt            # IEEE text format
+    python scripts/build_oui_database.py oui.csv            # IEEE CSV format
+    python scripts/build_oui_database.py oui.csv -o /tmp/oui.bin
+
+Download the registry from https://standards-oui.ieee.org/oui/oui.csv (or oui.txt).
+See utils/oui.py for the file layout.
+"""
+
+import argparse
+import csv
+import os
+import re
+import struct
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.oui import OUI_HEADER, OUI_MAGIC, OUI_VERSION, DEFAULT_OUI_PATH
+
+TXT_ENTRY = re.compile(r"^\s*([0-9A-Fa-f]{6})\s+\(base 16\)\s+(.*?)\s*$")
+
+
+def parse_registry(path):
+    """Parse an IEEE oui.txt or oui.csv file into {oui_int: vendor}."""
+    entries = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                assignment = (row.get("Assignment") or "").strip()
+                vendor = (row.get("Organization Name") or "").strip()
+                if len(assignment) == 6 and vendor:
+                    entries[int(assignment, 16)] = vendor
+        else:
+            for line in f:
+                match = TXT_ENTRY.match(line)
+                if match and match.group(2):
+                    entries[int(match.group(1), 16)] = match.group(2)
+    return entries
+
+
+def write_database(entries, output_path):
+    """Write the sorted, de-duplicated OUI table."""
+    names = sorted(set(entries.values()))
+    if len(names) > 0xFFFF:
+        raise ValueError(f"Too many distinct vendor names ({len(names)}) for a uint16 index")
+    name_ids = {name: i for i, name in enumerate(names)}
+
+    blob = bytearray()
+    offsets = [0]
+    for name in names:
+        blob += name.encode("utf-8")
+        offsets.append(len(blob))
+
+    prefixes = sorted(entries)
+    with open(output_path, "wb") as f:
+        f.write(OUI_HEADER.pack(OUI_MAGIC, OUI_VERSION, len(prefixes), len(names)))
+        f.write(struct.pack(f"<{len(prefixes)}I", *prefixes))
+        f.write(struct.pack(f"<{len(prefixes)}H", *(name_ids[entries[p]] for p in prefixes)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(bytes(blob))
+
+    return len(prefixes), len(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline OUI vendor database")
+    parser.add_argument("registry", help="IEEE oui.txt or oui.csv")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUI_PATH, help="Output path (default: data/oui.bin)")
+    args = parser.parse_args()
+
+    entries = parse_registry(args.registry)
+    if not entries:
+        print(f"❌ No OUI entries found in {args.registry}")
+        return 1
+
+    count, name_count = write_database(entries, args.output)
+    size_kb = os.path.getsize(args.output) / 1024
+    print(f"✅ Wrote {count} OUIs ({name_count} vendors, {size_kb:.0f} KB) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,7 +37,7 @@ from server.tools_SDK_insight import register_insight_tools                # 7 m
 from server.tools_SDK_licensing import register_licensing_tools            # 8 methods
 from server.tools_SDK_networks import register_networks_tools              # 114 methods
 from server.tools_SDK_organizations import register_organizations_tools    # 173 methods
-from server.tools_SDK_sensor import register_sensor_tools                  # 18 methods
+from server.tools_SDK_sensor import register_sensor_tools                  # 19 methods
 from server.tools_SDK_sm import register_sm_tools                          # 49 methods
 from server.tools_SDK_switch import register_switch_tools                  # 101 methods
 from server.tools_SDK_wireless import register_wireless_tools              # 116 methods
@@ -1,8 +1,12 @@
 """
 Bulletproof IP device lookup tool.
 This tool ALWAYS finds a device by IP address, no matter how many devices exist.
+Also provides offline MAC vendor lookups backed by the bundled OUI database.
 """
 
+from utils.oui import enrich_clients, client_vendor, get_oui_database, is_locally_administered, normalize_mac
+from utils.port_index import get_port_index, port_index_cache
+
 def register_ip_lookup_tools(app, meraki_client):
     """Register the bulletproof IP lookup tool."""
     
@@ -34,12 +38,14 @@ def register_ip_lookup_tools(app, meraki_client):
             # Search through ALL clients for the IP
             for client in clients:
                 if client.get('ip') == ip_address:
+                    enrich_clients([client])
                     return {
                         '🎯 FOUND': True,
                         'ip_address': client.get('ip'),
                         'mac_address': client.get('mac'),
                         'description': client.get('description', 'No description'),
-                        'manufacturer': client.get('manufacturer', 'Unknown'),
+                        'manufacturer': client_vendor(client),
+                        'randomized_mac': client.get('randomizedMac'),
                         'os': client.get('os', 'Unknown'),
                         'vlan': client.get('vlan'),
                         'status': client.get('status'),
@@ -141,4 +147,204 @@ def register_ip_lookup_tools(app, meraki_client):
                 'error_message': str(e),
                 'current_ip': current_ip,
                 'new_ip': new_ip
-            }
\ No newline at end of file
+            }
+    
+    @app.tool(
+        name="lookup_mac_vendors",
+        description="🏷️ Offline MAC vendor lookup - resolve manufacturers and flag randomized MACs (no API calls)"
+    )
+    def lookup_mac_vendors(mac_addresses: str):
+        """
+        Look up the IEEE-registered vendor for one or more MAC addresses.
+        
+        Args:
+            mac_addresses: Comma-separated MAC addresses (e.g., "00:18:0a:12:34:56,da:a1:19:00:00:01")
+            
+        Returns:
+            Vendor and randomization status for each MAC
+        """
+        try:
+            macs = [m.strip() for m in mac_addresses.split(',') if m.strip()]
+            if not macs:
+                return {'❌ ERROR': True, 'error_message': 'No MAC addresses provided'}
+            
+            vendors = get_oui_database().lookup_many(macs)
+            results = []
+            for mac, vendor in zip(macs, vendors):
+                normalized = normalize_mac(mac)
+                results.append({
+                    'mac_address': normalized or mac,
+                    'valid': normalized is not None,
+                    'vendor': vendor or ('Randomized MAC' if is_locally_administered(mac) else 'Unknown'),
+                    'randomized_mac': is_locally_administered(mac)
+                })
+            
+            return {
+                'total': len(results),
+                'resolved': len([v for v in vendors if v]),
+                'results': results
+            }
+            
+        except Exception as e:
+            return {
+                '💥 ERROR': True,
+                'error_message': str(e),
+                'mac_addresses': mac_addresses
+            }
+    
+    @app.tool(
+        name="classify_network_clients_by_vendor",
+        description="🏷️ Classify all network clients by vendor - fills missing manufacturers offline, counts randomized MACs"
+    )
+    def classify_network_clients_by_vendor(network_id: str, timespan: int = 86400, top: int = 25):
+        """
+        Group every client in a network by vendor, using the Dashboard manufacturer
+        and falling back to the offline OUI database.
+        
+        Args:
+            network_id: Network ID
+            timespan: Client lookback in seconds (default: 24 hours)
+            top: Number of vendors to list (default: 25)
+            
+        Returns:
+            Vendor breakdown with counts of offline-resolved and randomized MACs
+        """
+        try:
+            clients = meraki_client.dashboard.networks.getNetworkClients(
+                network_id,
+                perPage=1000,
+                total_pages='all',
+                timespan=timespan
+            )
+            enrich_clients(clients)
+            
+            vendor_counts = {}
+            resolved_offline = 0
+            for client in clients:
+                vendor = client_vendor(client)
+                vendor_counts[vendor] = vendor_counts.get(vendor, 0) + 1
+                if not client.get('manufacturer') and client.get('ouiVendor'):
+                    resolved_offline += 1
+            
+            ranked = sorted(vendor_counts.items(), key=lambda item: item[1], reverse=True)
+            return {
+                'network_id': network_id,
+                'total_clients': len(clients),
+                'randomized_macs': len([c for c in clients if c.get('randomizedMac')]),
+                'missing_manufacturer': len([c for c in clients if not c.get('manufacturer')]),
+                'resolved_offline': resolved_offline,
+                'vendors': [{'vendor': vendor, 'clients': count} for vendor, count in ranked[:top]],
+                'other_vendors': max(0, len(ranked) - top)
+            }
+            
+        except Exception as e:
+            return {
+                '💥 ERROR': True,
+                'error_message': str(e),
+                'network_id': network_id
+            }
+    
+    @app.tool(
+        name="locate_network_client",
+        description="📍 Locate a client by MAC or IP - switch/MX serial, port and the LLDP/CDP neighbour on that port"
+    )
+    def locate_network_client(network_id: str, client: str, include_mac_table: bool = False, refresh: bool = False):
+        """
+        Find which device port a client is connected to, using the cached client-to-port index.
+        
+        Args:
+            network_id: Network ID
+            client: Client MAC or IP address
+            include_mac_table: Also run live MAC table jobs on switches and MX (slower, finds wired clients behind MX ports)
+            refresh: Rebuild the index instead of using the cached one
+            
+        Returns:
+            Device serial, port and attribution source for the client
+        """
+        try:
+            if refresh:
+                port_index_cache.invalidate(network_id)
+            index = get_port_index(meraki_client, network_id, include_mac_table=include_mac_table)
+            
+            record = index.find_client(client)
+            mac = normalize_mac((record or {}).get('mac') or '') or normalize_mac(client)
+            if mac is None:
+                return {'❌ NOT FOUND': True, 'client': client, 'network_id': network_id}
+            
+            location = index.locate(mac)
+            if location is None:
+                return {
+                    '⚠️ NO PORT': True,
+                    'client': client,
+                    'mac_address': mac,
+                    'message': 'Client seen but not attributed to a switch/MX port (wireless or no switchport data)'
+                }
+            
+            serial, port = location
+            return {
+                'client': client,
+                'mac_address': mac,
+                'description': (record or {}).get('description'),
+                'device_serial': serial,
+                'port': port,
+                'attribution': index.attribution.get(location),
+                'port_client_count': len(index.clients_on_port(serial, port)),
+                'neighbor': index.neighbor(serial, port),
+                'index_sources': index.sources
+            }
+            
+        except Exception as e:
+            return {
+                '💥 ERROR': True,
+                'error_message': str(e),
+                'client': client
+            }
+    
+    @app.tool(
+        name="get_network_port_client_map",
+        description="🔌 Map switch and MX ports to clients and LLDP/CDP neighbours for a whole network in one pass"
+    )
+    def get_network_port_client_map(network_id: str, serial: str = None, include_mac_table: bool = False, top: int = 50):
+        """
+        List every attributed port in a network with its client count and neighbour.
+        
+        Args:
+            network_id: Network ID
+            serial: Only show ports of this device (optional)
+            include_mac_table: Also run live MAC table jobs on switches and MX (slower)
+            top: Maximum number of ports to list (default: 50)
+            
+        Returns:
+            Ports ordered by client count with attribution source
+        """
+        try:
+            index = get_port_index(meraki_client, network_id, include_mac_table=include_mac_table)
+            rows = [row for row in index.port_summary() if not serial or row['serial'] == serial]
+            
+            ports = []
+            for row in rows[:top]:
+                ports.append({
+                    **row,
+                    'clients': [
+                        {'mac': c.get('mac'), 'ip': c.get('ip'), 'description': c.get('description'), 'vlan': c.get('vlan')}
+                        for c in index.clients_on_port(row['serial'], row['port'])[:10]
+                    ]
+                })
+            
+            attributed = sum(len(clients) for clients in index.clients_by_port.values())
+            return {
+                'network_id': network_id,
+                'total_clients': index.client_count,
+                'attributed_clients': attributed,
+                'port_count': len(rows),
+                'sources': index.sources,
+                'ports': ports,
+                'more_ports': max(0, len(rows) - top)
+            }
+            
+        except Exception as e:
+            return {
+                '💥 ERROR': True,
+                'error_message': str(e),
+                'network_id': network_id
+            }
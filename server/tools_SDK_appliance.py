@@ -5,6 +5,10 @@ Security Appliance management tools for the Cisco Meraki MCP Server - ONLY REAL
 from typing import Optional
 import json
 
+from utils.ipam import analyze_network, analyze_vlan, pool_bounds, format_ip
+from utils.infrastructure import get_network_infrastructure
+from utils.port_index import get_port_index
+
 # Global variables to store app and meraki client
 app = None
 meraki_client = None
@@ -1714,10 +1718,8 @@ def register_appliance_tool_handlers():
                 if subnet and subnet != 'Not configured':
                     try:
                         import ipaddress
-                        network = ipaddress.ip_network(subnet)
-                        hosts = list(network.hosts())
-                        if hosts:
-                            result += f"- **Usable IPs**: {hosts[0]} - {hosts[-1]} ({len(hosts)} total)\n"
+                        first, last = pool_bounds(ipaddress.ip_network(subnet, strict=False))
+                        result += f"- **Usable IPs**: {format_ip(first)} - {format_ip(last)} ({last - first + 1} total)\n"
                     except:
                         pass
                 
@@ -2307,6 +2309,126 @@ def register_appliance_tool_handlers():
         except Exception as e:
             return f"❌ Error listing DHCP reservations: {str(e)}"
     
+    @app.tool(
+        name="get_network_ipam_utilization",
+        description="📊 IPAM - subnet utilization per VLAN: DHCP pool, used/free addresses, next free IP"
+    )
+    def get_network_ipam_utilization(network_id: str, timespan: int = 86400):
+        """
+        Calculate address utilization for every MX VLAN in a network.
+        
+        Pool sizes and free counts are computed arithmetically (no host lists),
+        from VLAN subnets, reserved ranges, DHCP reservations and client IPs.
+        
+        Args:
+            network_id: Network ID
+            timespan: Client lookback in seconds used to count addresses in use (default: 24 hours)
+            
+        Returns:
+            Per-VLAN utilization table with next free address
+        """
+        try:
+            vlans = meraki_client.get_network_vlans(network_id)
+            if not vlans:
+                return f"No VLANs configured for network {network_id}."
+            
+            try:
+                clients = meraki_client.get_network_clients(network_id, timespan=timespan)
+            except:
+                clients = []
+            
+            analysis = analyze_network(vlans, clients)
+            
+            result = f"# 📊 IPAM Subnet Utilization\n"
+            result += f"**Network**: {network_id}\n"
+            result += f"**VLANs**: {len(vlans)} | **Clients Considered**: {len(clients)} (last {timespan // 3600}h)\n\n"
+            
+            result += "| VLAN | Name | Subnet | DHCP Pool | Pool Size | Used | Free | Utilization | Next Free |\n"
+            result += "|------|------|--------|-----------|-----------|------|------|-------------|-----------|\n"
+            for usage in analysis['vlans']:
+                pool = f"{usage.pool_start} - {usage.pool_end}" if usage.pool_start else "N/A"
+                indicator = "🔴" if usage.utilization >= 90 else "🟡" if usage.utilization >= 75 else "🟢"
+                result += (f"| {usage.vlan_id} | {usage.name} | {usage.subnet or 'N/A'} | {pool} | "
+                           f"{usage.pool_size} | {usage.used_count} | {usage.free_count} | "
+                           f"{indicator} {usage.utilization:.1f}% | {usage.next_free or '❌ Full'} |\n")
+            
+            result += "\n## Reservations\n"
+            for usage in analysis['vlans']:
+                result += f"- **VLAN {usage.vlan_id}**: {usage.fixed_count} DHCP reservations, {usage.excluded_count} excluded addresses (MX IP + reserved ranges)\n"
+            
+            full = [u for u in analysis['vlans'] if u.pool_size and u.utilization >= 90]
+            if full:
+                result += "\n## ⚠️ Pools Near Exhaustion\n"
+                for usage in full:
+                    result += f"- VLAN {usage.vlan_id} ({usage.name}): {usage.free_count} addresses left\n"
+            
+            if analysis['conflict_count']:
+                result += f"\n⚠️ **{analysis['conflict_count']} addressing conflicts found** - run `detect_network_ip_conflicts` for details\n"
+            
+            return result
+            
+        except Exception as e:
+            return f"❌ Error calculating IPAM utilization: {str(e)}"
+    
+    @app.tool(
+        name="detect_network_ip_conflicts",
+        description="⚠️ IPAM - detect IP conflicts: overlapping subnets, reservations outside subnet/in reserved ranges, duplicate IPs"
+    )
+    def detect_network_ip_conflicts(network_id: str, timespan: int = 86400):
+        """
+        Detect addressing conflicts across all MX VLANs in a network.
+        
+        Checks overlapping VLAN subnets, invalid or overlapping reserved ranges,
+        reservations outside the subnet or inside reserved ranges, clients holding
+        another device's reserved IP, and duplicate IPs among online clients.
+        
+        Args:
+            network_id: Network ID
+            timespan: Client lookback in seconds (default: 24 hours)
+            
+        Returns:
+            List of conflicts grouped by VLAN
+        """
+        try:
+            vlans = meraki_client.get_network_vlans(network_id)
+            if not vlans:
+                return f"No VLANs configured for network {network_id}."
+            
+            try:
+                clients = meraki_client.get_network_clients(network_id, timespan=timespan)
+            except:
+                clients = []
+            
+            analysis = analyze_network(vlans, clients)
+            
+            result = f"# ⚠️ IP Conflict Detection\n"
+            result += f"**Network**: {network_id}\n"
+            result += f"**VLANs Checked**: {len(vlans)} | **Clients Checked**: {len(clients)}\n\n"
+            
+            if not analysis['conflict_count']:
+                result += "✅ No addressing conflicts found.\n"
+                return result
+            
+            result += f"**Conflicts Found**: {analysis['conflict_count']}\n\n"
+            
+            if analysis['overlaps']:
+                result += "## 🔀 Overlapping Subnets\n"
+                for overlap in analysis['overlaps']:
+                    result += f"- ❌ {overlap}\n"
+                result += "\n"
+            
+            for usage in analysis['vlans']:
+                if usage.conflicts:
+                    result += f"## VLAN {usage.vlan_id}: {usage.name} ({usage.subnet})\n"
+                    for conflict in usage.conflicts:
+                        result += f"- ❌ {conflict}\n"
+                    result += "\n"
+            
+            return result
+            
+        except Exception as e:
+            return f"❌ Error detecting IP conflicts: {str(e)}"
+    
     @app.tool(
         name="get_port_comprehensive_status",
         description="🔍 Get comprehensive status for an MX port including connected devices, VLANs, and activity"
@@ -2342,10 +2464,20 @@ def register_appliance_tool_handlers():
             except:
                 vlans_dict = {}
             
-            # Get all clients in the network
-            all_clients = []
+            mx_serial = None
+            try:
+                infra = get_network_infrastructure(meraki_client, network_id)
+                mx_serial = next((d['serial'] for d in infra.other_devices + infra.mx_wireless
+                                  if d.get('model', '').startswith(('MX', 'Z')) and d.get('serial')), None)
+            except:
+                pass
+            
+            # Client-to-port index: clients grouped once by VLAN and by port,
+            # plus LLDP/CDP neighbours of the MX (only the MX is queried)
+            port_index = None
             try:
-                all_clients = meraki_client.get_network_clients(network_id, timespan=86400)
+                port_index = get_port_index(meraki_client, network_id, timespan=86400,
+                                            serials=[mx_serial] if mx_serial else [])
             except:
                 pass
             
@@ -2403,36 +2535,27 @@ def register_appliance_tool_handlers():
                     result += f"- **MX IP**: {vlan.get('applianceIp', 'Not configured')}\n"
                     result += f"- **DHCP**: {vlan.get('dhcpHandling', 'Unknown')}\n"
                     
-                    # Calculate DHCP pool if subnet exists
+                    # Calculate DHCP pool if subnet exists (excludes MX IP and reserved ranges)
                     if vlan.get('subnet'):
-                        try:
-                            import ipaddress
-                            network = ipaddress.ip_network(vlan['subnet'])
-                            first_ip = list(network.hosts())[0]
-                            last_ip = list(network.hosts())[-1]
-                            result += f"- **DHCP Pool**: {first_ip} - {last_ip}\n"
-                        except:
-                            pass
-                
-                # Find clients on this VLAN
-                vlan_clients = []
-                if port_type == 'access':
-                    # For access ports, clients must be on the specific VLAN
-                    vlan_clients = [c for c in all_clients if str(c.get('vlan', '')) == vlan_id]
-                elif port_type == 'trunk':
-                    # For trunk ports, show clients on native VLAN and any allowed VLANs
-                    if port.get('allowedVlans') == 'all':
-                        # All VLANs allowed - just show native VLAN clients
-                        vlan_clients = [c for c in all_clients if str(c.get('vlan', '')) == vlan_id]
-                    else:
-                        # Specific VLANs allowed
-                        allowed_vlans = [vlan_id]  # Include native VLAN
-                        if port.get('allowedVlans'):
-                            allowed_vlans.extend(port['allowedVlans'].split(','))
-                        vlan_clients = [c for c in all_clients if str(c.get('vlan', '')) in allowed_vlans]
+                        usage = analyze_vlan(vlan)
+                        if usage.pool_start:
+                            result += f"- **DHCP Pool**: {usage.pool_start} - {usage.pool_end} ({usage.pool_size} addresses)\n"
+                
+                # Find clients behind this port (MAC table if collected, else port VLANs)
+                vlan_clients, attribution = [], 'vlan'
+                if port_index and port_type in ('access', 'trunk'):
+                    vlan_clients, attribution = port_index.appliance_port_clients(mx_serial, port)
+                
+                neighbor = port_index.neighbor(mx_serial, port_num) if port_index and mx_serial else None
+                if neighbor:
+                    result += f"\n### 🔗 LLDP/CDP Neighbor\n"
+                    result += f"- **Device**: {neighbor['system_name'] or 'Unknown'} (port {neighbor['port_id'] or 'N/A'})\n"
+                    if neighbor['address']:
+                        result += f"- **Address**: {neighbor['address']}\n"
                 
                 # Display connected clients
-                result += f"\n### 📱 Connected Devices ({len(vlan_clients)} found)\n"
+                result += f"\n### 📱 Connected Devices ({len(vlan_clients)} found"
+                result += ", by port VLAN membership)\n" if attribution == 'vlan' else ", from MX MAC table)\n"
                 if vlan_clients:
                     # Group by VLAN for trunk ports
                     if port_type == 'trunk' and len(set(c.get('vlan', '') for c in vlan_clients)) > 1:
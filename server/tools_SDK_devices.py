@@ -8,6 +8,8 @@ All 27 official SDK methods are implemented exactly as documented.
 from typing import Optional, Dict, Any, List
 import json
 
+from utils.timeseries_stats import column, summarize, uplink_stats
+
 # Global references to be set by register function
 app = None
 meraki_client = None
@@ -1640,63 +1642,37 @@ def register_devices_sdk_tools():
             
             result = meraki_client.dashboard.devices.getDeviceLossAndLatencyHistory(device_serial, **kwargs)
             
-            response = f"# 🔍 Get Devicelossandlatencyhistory\\n\\n"
-            
-            if result is not None:
-                if isinstance(result, list):
-                    response += f"**Total Items**: {len(result)}\\n\\n"
-                    
-                    # Show first 10 items with device-specific context
-                    for idx, item in enumerate(result[:10], 1):
-                        if isinstance(item, dict):
-                            name = item.get('name', item.get('serial', item.get('mac', f'Item {idx}')))
-                            response += f"**{idx}. {name}**\\n"
-                            
-                            # Show key device-specific fields
-                            for field in ['status', 'model', 'networkId', 'address', 'mac', 'publicIp', 'lanIp', 'firmware']:
-                                if field in item:
-                                    value = item[field]
-                                    if value is not None:
-                                        response += f"   - {field.title()}: {value}\\n"
-                                        
-                        else:
-                            response += f"**{idx}. {item}**\\n"
-                        response += "\\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more items\\n"
-                        
-                elif isinstance(result, dict):
-                    # Single item result - show device-relevant fields
-                    device_fields = ['name', 'serial', 'model', 'networkId', 'address', 'mac', 'publicIp', 'lanIp', 
-                                   'firmware', 'status', 'productType', 'tags', 'url']
-                    
-                    for field in device_fields:
-                        if field in result:
-                            value = result[field]
-                            if value is not None:
-                                if isinstance(value, list) and field == 'tags':
-                                    response += f"- **{field.title()}**: {', '.join(value) if value else 'None'}\\n"
-                                else:
-                                    response += f"- **{field.title()}**: {value}\\n"
-                    
-                    # Show other fields
-                    remaining_fields = {k: v for k, v in result.items() if k not in device_fields and v is not None}
-                    for key, value in list(remaining_fields.items())[:5]:
-                        if isinstance(value, (str, int, float, bool)):
-                            response += f"- **{key.title()}**: {value}\\n"
-                        elif isinstance(value, list) and value:
-                            response += f"- **{key.title()}**: {len(value)} items\\n"
-                        elif isinstance(value, dict) and value:
-                            response += f"- **{key.title()}**: {len(value)} fields\\n"
-                    
-                    if len(remaining_fields) > 5:
-                        response += f"... and {len(remaining_fields)-5} more fields\\n"
-                        
-                else:
-                    response += f"**Result**: {result}\\n"
-            else:
-                response += "*No data available*\\n"
+            result = result or []
+            response = f"# 🔍 Loss & Latency History: {device_serial} → {ip} ({uplink or 'all uplinks'})\n\n"
+            response += f"**Intervals**: {len(result)}"
+            if result:
+                response += f" ({result[0].get('startTs')} → {result[-1].get('endTs')})"
+            response += "\n\n"
+            
+            stats = uplink_stats([column(result, 'lossPercent')], [column(result, 'latencyMs')])[0]
+            jitter = summarize(column(result, 'jitter'))
+            if not stats.loss.count and not stats.latency.count:
+                return response + "*No data available*\n"
+            
+            loss, latency = stats.loss, stats.latency
+            if loss.count:
+                response += f"- **Loss**: avg {loss.mean:.2f}% | p95 {loss.p95:.2f}% | max {loss.max:.2f}%\n"
+            if latency.count:
+                response += (f"- **Latency**: avg {latency.mean:.1f} ms | p50 {latency.p50:.1f} | p95 {latency.p95:.1f} | "
+                             f"p99 {latency.p99:.1f} (min {latency.min:.1f}, max {latency.max:.1f})\n")
+            if jitter.count:
+                response += f"- **Jitter**: avg {jitter.mean:.1f} ms | p95 {jitter.p95:.1f} ms (reported by the device)\n"
+            elif latency.jitter is not None:
+                response += f"- **Jitter**: {latency.jitter:.1f} ms (between intervals)\n"
+            if stats.availability is not None:
+                response += f"- **Availability**: {stats.availability:.2f}%\n"
+            
+            if stats.bursts:
+                response += f"\n**Loss Bursts** ({len(stats.bursts)}):\n"
+                for burst in sorted(stats.bursts, key=lambda b: (-b.length, -b.peak))[:5]:
+                    first, last = result[burst.start], result[burst.start + burst.length - 1]
+                    response += (f"- {first.get('startTs')} → {last.get('endTs')}: {burst.length} intervals, "
+                                 f"peak {burst.peak:.1f}%\n")
             
             return response
             
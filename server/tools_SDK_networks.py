@@ -8,6 +8,9 @@ All 114 official SDK methods are implemented exactly as documented.
 from typing import Optional, Dict, Any, List
 import json
 
+from utils.oui import enrich_clients, client_vendor
+from utils.infrastructure import infrastructure_cache
+
 # Global references to be set by register function
 app = None
 meraki_client = None
@@ -398,6 +401,7 @@ def register_networks_sdk_tools():
             
             
             result = meraki_client.dashboard.networks.claimNetworkDevices(network_id, **kwargs)
+            infrastructure_cache.invalidate(network_id)
             
             response = f"# 📋 Claim Networkdevices\n\n"
             
@@ -3176,8 +3180,8 @@ def register_networks_sdk_tools():
                                 response += f"   - MAC: {item.get('mac')}\n"
                             if 'vlan' in item:
                                 response += f"   - VLAN: {item.get('vlan')}\n"
-                            if 'manufacturer' in item:
-                                response += f"   - Manufacturer: {item.get('manufacturer')}\n"
+                            if item.get('manufacturer') or item.get('ouiVendor') or item.get('randomizedMac'):
+                                response += f"   - Manufacturer: {client_vendor(item)}\n"
                             if 'lastSeen' in item:
                                 response += f"   - Last Seen: {item.get('lastSeen')}\n"
                             if 'usage' in item:
@@ -3423,6 +3427,9 @@ def register_networks_sdk_tools():
                 kwargs['perPage'] = min(per_page, 1000)
             
             result = meraki_client.dashboard.networks.getNetworkClients(network_id, **kwargs)
+            if isinstance(result, list):
+                # Fill in vendors the Dashboard couldn't fingerprint (offline OUI lookup)
+                enrich_clients(result)
             
             response = f"# 🌐 Get Networkclients\n\n"
             
@@ -3980,6 +3987,8 @@ def register_networks_sdk_tools():
         """Get all devices in a network."""
         try:
             result = meraki_client.dashboard.networks.getNetworkDevices(network_id)
+            if isinstance(result, list):
+                infrastructure_cache.update(network_id, result)
             
             response = f"# 🌐 Network Devices\n\n"
             
@@ -8074,6 +8083,7 @@ def register_networks_sdk_tools():
             
             
             result = meraki_client.dashboard.networks.removeNetworkDevices(network_id, **kwargs)
+            infrastructure_cache.invalidate(network_id)
             
             response = f"# 🗑️ Remove Networkdevices\n\n"
             
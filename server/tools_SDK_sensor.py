@@ -7,6 +7,10 @@ This module provides tools for managing MT sensors, alerts, MQTT brokers, and re
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import json
+import time
+
+from utils.sensor_history import DOWNSAMPLE_METHODS, fetch_sensor_history, sensor_readings_cache
+from utils.uplink_history import format_timestamp, parse_timestamp
 
 # Global references to be set by register function
 app = None
@@ -619,7 +623,7 @@ def register_sensor_tools(mcp_app, meraki):
     
     @app.tool(
         name="get_organization_sensor_readings_history",
-        description="🌡️📈 Get historical sensor readings (use serials param for specific sensors)"
+        description="🌡️📈 Get historical sensor readings - per-sensor statistics over up to a year, fetched in parallel windows and cached locally, optional LTTB/min-max downsampled series"
     )
     def get_organization_sensor_readings_history(
         organization_id: str,
@@ -628,69 +632,109 @@ def register_sensor_tools(mcp_app, meraki):
         timespan: Optional[float] = 3600,
         network_ids: Optional[str] = None,
         serials: Optional[str] = None,
-        metrics: Optional[str] = None
+        metrics: Optional[str] = None,
+        points: int = 0,
+        downsample: str = "lttb",
+        max_sensors: int = 25,
+        use_cache: bool = True
     ):
-        """Get historical sensor readings."""
+        """
+        Get historical sensor readings summarized per sensor and metric.
+        
+        Ranges longer than the API's 7-day limit are split into windows that
+        are fetched concurrently and merged. Readings are cached on disk, so
+        repeated queries only fetch what arrived since the last call.
+        
+        Args:
+            organization_id: Organization ID
+            t0: Start time (ISO 8601 or epoch seconds, up to 365 days back)
+            t1: End time (default: now)
+            timespan: Seconds before t1 when t0 is not given (default: 3600)
+            network_ids: Comma-separated network IDs
+            serials: Comma-separated device serials
+            metrics: Comma-separated metrics (temperature,humidity,water,door,etc)
+            points: Also list each series downsampled to this many points (0 = statistics only)
+            downsample: Downsampling method - 'lttb' (keeps shape) or 'minmax' (keeps extremes)
+            max_sensors: Sensors listed per metric (default: 25)
+            use_cache: Serve already fetched ranges from the local cache (default: True)
+        """
         try:
-            kwargs = {}
-            if t0:
-                kwargs['t0'] = t0
-            if t1:
-                kwargs['t1'] = t1
-            if timespan:
-                kwargs['timespan'] = timespan
-            if network_ids:
-                kwargs['networkIds'] = [n.strip() for n in network_ids.split(',')]
-            if serials:
-                kwargs['serials'] = [s.strip() for s in serials.split(',')]
-            if metrics:
-                kwargs['metrics'] = [m.strip() for m in metrics.split(',')]
-            
-            result = meraki_client.dashboard.sensor.getOrganizationSensorReadingsHistory(
-                organization_id, **kwargs
+            if downsample not in DOWNSAMPLE_METHODS:
+                return f"❌ Unknown downsample method '{downsample}' (use lttb or minmax)"
+            end = parse_timestamp(t1) if t1 else int(time.time())
+            start = parse_timestamp(t0) if t0 else end - int(timespan or 3600)
+            
+            fetch = sensor_readings_cache.history if use_cache else fetch_sensor_history
+            history = fetch(
+                meraki_client, organization_id, start, end,
+                serials=[s.strip() for s in serials.split(',')] if serials else None,
+                network_ids=[n.strip() for n in network_ids.split(',')] if network_ids else None,
+                metrics=[m.strip() for m in metrics.split(',')] if metrics else None
             )
             
             response = f"# 📈 Sensor Readings History\n\n"
-            response += f"**Timespan**: {timespan/3600:.1f} hours\n\n"
-            
-            if result and isinstance(result, list):
-                # Group by serial
-                by_serial = {}
-                for reading in result:
-                    serial = reading.get('serial', 'Unknown')
-                    if serial not in by_serial:
-                        by_serial[serial] = []
-                    by_serial[serial].append(reading)
+            response += f"**Range**: {format_timestamp(history.t0)} → {format_timestamp(history.t1)} "
+            response += f"({(history.t1 - history.t0) / 3600:.1f} hours)\n"
+            response += (f"**Fetched**: {history.readings} readings in {history.windows} windows "
+                         f"({history.elapsed:.1f}s)\n")
+            if history.cached:
+                response += f"**From Cache**: {history.cached} readings\n"
+            response += f"**Sensors**: {len(history.serials)} | **Series**: {len(history.series)}\n"
+            for error in history.errors:
+                response += f"⚠️ Window failed: {error}\n"
+            response += "\n"
+            
+            if not history.series:
+                return response + "*No historical data available*\n"
+            
+            for metric in history.metrics:
+                summaries = history.summaries(metric)
+                unit = summaries[0][0].unit
+                response += f"## {metric} ({unit})\n\n" if unit else f"## {metric}\n\n"
+                response += "| Sensor | Network | Readings | Mean | Min | Max | P95 | Latest |\n"
+                response += "|---|---|---|---|---|---|---|---|\n"
+                # Sensors with the highest readings first
+                summaries.sort(key=lambda item: -(item[1].max if item[1].max is not None else float('-inf')))
+                for series, summary in summaries[:max_sensors]:
+                    response += (f"| {series.serial} | {series.network_name or series.network_id or '-'} | "
+                                 f"{summary.count} | {summary.mean:.2f} | {summary.min:.2f} | {summary.max:.2f} | "
+                                 f"{summary.p95:.2f} | {summary.latest:.2f} |\n")
+                if len(summaries) > max_sensors:
+                    response += f"\n...and {len(summaries) - max_sensors} more sensors\n"
+                response += "\n"
                 
-                for serial, readings in list(by_serial.items())[:3]:  # Show first 3 devices
-                    response += f"## Device: {serial}\n"
-                    
-                    # Show latest 3 readings
-                    for reading in readings[:3]:
-                        response += f"- {reading.get('ts', 'N/A')}: "
-                        
-                        # Temperature
-                        temp = reading.get('temperature')
-                        if temp:
-                            response += f"{temp.get('celsius')}°C "
-                        
-                        # Humidity
-                        humidity = reading.get('humidity')
-                        if humidity:
-                            response += f"{humidity.get('relativePercentage')}% "
-                        
-                        response += "\n"
-                    
-                    if len(readings) > 3:
-                        response += f"  ...and {len(readings)-3} more readings\n"
+                if points > 0:
+                    response += f"### {metric} series ({downsample}, ≤{points} points)\n\n"
+                    for series, _ in summaries[:max_sensors]:
+                        reduced = series.downsample(points, downsample)
+                        values = ", ".join(f"{format_timestamp(int(ts))} {value:.4g}"
+                                           for ts, value in zip(reduced.ts, reduced.values))
+                        response += f"- **{series.serial}** ({len(series.ts)} → {len(reduced.ts)}): {values}\n"
                     response += "\n"
-            else:
-                response += "*No historical data available*\n"
             
             return response
         except Exception as e:
             return f"❌ Error getting readings history: {str(e)}"
     
+    @app.tool(
+        name="clear_sensor_readings_cache",
+        description="🌡️🗑️ Clear the local sensor readings cache of an organization (next history query refetches)"
+    )
+    def clear_sensor_readings_cache(organization_id: str):
+        """
+        Clear the locally cached sensor readings of an organization.
+        
+        Args:
+            organization_id: Organization ID
+        """
+        try:
+            stats = sensor_readings_cache.stats(organization_id)
+            sensor_readings_cache.clear(organization_id)
+            return (f"✅ Cleared {stats['readings']} cached readings ({stats['series']} series) "
+                    f"for organization {organization_id}")
+        except Exception as e:
+            return f"❌ Error clearing sensor readings cache: {str(e)}"
+    
     # ==================== MQTT BROKERS ====================
     
     @app.tool(
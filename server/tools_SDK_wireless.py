@@ -6,8 +6,16 @@ All 116 official SDK methods are implemented exactly as documented.
 """
 
 from typing import Optional, Dict, Any, List
+import asyncio
 import json
 
+from mcp.server.fastmcp import Context
+
+from utils.infrastructure import get_network_infrastructure
+from utils.rf_heatmap import build_rf_heatmap
+from utils.timeseries_stats import column, latency_category_stats, latency_category_stats_many, summarize
+from utils.wifi_audit import audit_wireless_network, wireless_config_cache
+
 # Global references to be set by register function
 app = None
 meraki_client = None
@@ -28,6 +36,24 @@ def register_wireless_tools(mcp_app, meraki):
     # Register all wireless SDK tools
     register_wireless_sdk_tools()
 
+def _latency_row(category: str, values: Dict[str, Any], label: Optional[str] = None) -> str:
+    def ms(value):
+        return f"{value:.0f} ms" if value is not None else "-"
+    prefix = f"| {label} " if label is not None else ""
+    return (f"{prefix}| {category.replace('Traffic', '')} | {ms(values.get('avg'))} | {ms(values.get('p50'))} | "
+            f"{ms(values.get('p95'))} | {ms(values.get('p99'))} | {values.get('samples', 0)} |\n")
+
+
+def _latency_table(category_stats: Dict[str, Dict[str, Any]]) -> str:
+    """Markdown table of latency_category_stats() output."""
+    if not category_stats:
+        return "*No data available*\n"
+    table = "| Traffic | Avg | p50 | p95 | p99 | Samples |\n|---|---|---|---|---|---|\n"
+    for category, values in category_stats.items():
+        table += _latency_row(category, values)
+    return table
+
+
 def register_wireless_sdk_tools():
     """Register all wireless SDK tools (100% coverage)."""
     
@@ -288,6 +314,7 @@ def register_wireless_sdk_tools():
             result = meraki_client.dashboard.wireless.createNetworkWirelessRfProfile(
                 network_id, **kwargs
             )
+            wireless_config_cache.invalidate(network_id)
             
             response = f"# ➕ Create Network Wirelessrfprofile\n\n"
             
@@ -841,6 +868,7 @@ def register_wireless_sdk_tools():
             result = meraki_client.dashboard.wireless.deleteNetworkWirelessRfProfile(
                 network_id, **kwargs
             )
+            wireless_config_cache.invalidate(network_id)
             
             response = f"# ❌ Delete Network Wirelessrfprofile\n\n"
             
@@ -1375,78 +1403,23 @@ def register_wireless_sdk_tools():
     
     @app.tool(
         name="get_device_wireless_latency_stats",
-        description="📶 Get device wirelessLatencyStats"
+        description="📶 Get device wirelessLatencyStats - average and p50/p95/p99 latency per traffic category"
     )
-    def get_device_wireless_latency_stats(network_id: str, serial: str, per_page: int = 1000):
-        """Get get device wirelesslatencystats."""
+    def get_device_wireless_latency_stats(serial: str, timespan: int = 86400, network_id: str = ""):
+        """
+        Get aggregated latency of one access point per traffic category.
+        
+        Args:
+            serial: Access point serial
+            timespan: Timespan in seconds (max 7 days, default: 86400)
+            network_id: Unused, kept for compatibility with earlier calls
+        """
         try:
-            kwargs = {}
-            
-            # Add pagination for GET methods
-            if "per_page" in locals():
-                kwargs["perPage"] = per_page
-            if "timespan" in locals():
-                kwargs["timespan"] = timespan
-                
-            result = meraki_client.dashboard.wireless.getDeviceWirelessLatencyStats(
-                network_id, serial, **kwargs  
-            )
-            
-            response = f"# 📶 Get Device Wirelesslatencystats\n\n"
-            
-            if result is not None:
-                if isinstance(result, list):
-                    response += f"**Total Items**: {len(result)}\n\n"
-                    
-                    # Show first 10 items
-                    for idx, item in enumerate(result[:10], 1):
-                        if isinstance(item, dict):
-                            name = item.get('name', item.get('ssid', item.get('id', f'Item {idx}')))
-                            response += f"**{idx}. {name}**\n"
-                            
-                            # Show key fields based on wireless context
-                            if 'ssid' in item:
-                                response += f"   - SSID: {item.get('ssid')}\n"
-                            if 'enabled' in item:
-                                response += f"   - Enabled: {item.get('enabled')}\n"
-                            if 'status' in item:
-                                response += f"   - Status: {item.get('status')}\n"
-                            if 'channel' in item:
-                                response += f"   - Channel: {item.get('channel')}\n"
-                            if 'power' in item:
-                                response += f"   - Power: {item.get('power')}\n"
-                            if 'clientCount' in item:
-                                response += f"   - Clients: {item.get('clientCount')}\n"
-                            if 'usage' in item:
-                                usage = item.get('usage', {})
-                                if isinstance(usage, dict):
-                                    response += f"   - Usage: {usage.get('total', 'N/A')} MB\n"
-                                    
-                        else:
-                            response += f"**{idx}. {item}**\n"
-                        response += "\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more items\n"
-                        
-                elif isinstance(result, dict):
-                    # Single item result
-                    for key, value in list(result.items())[:10]:
-                        if isinstance(value, (str, int, float, bool)):
-                            response += f"- **{key}**: {value}\n"
-                        elif isinstance(value, list) and value:
-                            response += f"- **{key}**: {len(value)} items\n"
-                        elif isinstance(value, dict) and value:
-                            response += f"- **{key}**: {', '.join(str(k) for k in list(value.keys())[:3])}\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more fields\n"
-                        
-                else:
-                    response += f"**Result**: {result}\n"
-            else:
-                response += "*No data available*\n"
+            result = meraki_client.dashboard.wireless.getDeviceWirelessLatencyStats(serial, timespan=timespan)
             
+            response = f"# 📶 Wireless Latency: {serial}\n\n"
+            response += f"**Time Period**: Last {timespan / 3600:.1f} hours\n\n"
+            response += _latency_table(latency_category_stats(result or {}))
             return response
             
         except Exception as e:
@@ -2771,78 +2744,42 @@ def register_wireless_sdk_tools():
     
     @app.tool(
         name="get_network_wireless_devices_latency_stats",
-        description="📶 Get network wireless devicesLatencyStats"
+        description="📶 Get network wireless devicesLatencyStats - per-AP latency percentiles, slowest APs first"
     )
-    def get_network_wireless_devices_latency_stats(network_id: str, per_page: int = 500):
-        """Get get network wireless deviceslatencystats."""
+    def get_network_wireless_devices_latency_stats(network_id: str, timespan: int = 86400, max_aps: int = 25):
+        """
+        Get aggregated latency per access point, ranked by p95 best-effort latency.
+        
+        Args:
+            network_id: Network ID
+            timespan: Timespan in seconds (max 7 days, default: 86400)
+            max_aps: Maximum access points to list
+        """
         try:
-            kwargs = {}
-            
-            # Add pagination for GET methods
-            if "per_page" in locals():
-                kwargs["perPage"] = per_page
-            if "timespan" in locals():
-                kwargs["timespan"] = timespan
-                
             result = meraki_client.dashboard.wireless.getNetworkWirelessDevicesLatencyStats(
-                network_id, serial, **kwargs  
-            )
-            
-            response = f"# 📶 Get Network Wireless Deviceslatencystats\n\n"
-            
-            if result is not None:
-                if isinstance(result, list):
-                    response += f"**Total Items**: {len(result)}\n\n"
-                    
-                    # Show first 10 items
-                    for idx, item in enumerate(result[:10], 1):
-                        if isinstance(item, dict):
-                            name = item.get('name', item.get('ssid', item.get('id', f'Item {idx}')))
-                            response += f"**{idx}. {name}**\n"
-                            
-                            # Show key fields based on wireless context
-                            if 'ssid' in item:
-                                response += f"   - SSID: {item.get('ssid')}\n"
-                            if 'enabled' in item:
-                                response += f"   - Enabled: {item.get('enabled')}\n"
-                            if 'status' in item:
-                                response += f"   - Status: {item.get('status')}\n"
-                            if 'channel' in item:
-                                response += f"   - Channel: {item.get('channel')}\n"
-                            if 'power' in item:
-                                response += f"   - Power: {item.get('power')}\n"
-                            if 'clientCount' in item:
-                                response += f"   - Clients: {item.get('clientCount')}\n"
-                            if 'usage' in item:
-                                usage = item.get('usage', {})
-                                if isinstance(usage, dict):
-                                    response += f"   - Usage: {usage.get('total', 'N/A')} MB\n"
-                                    
-                        else:
-                            response += f"**{idx}. {item}**\n"
-                        response += "\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more items\n"
-                        
-                elif isinstance(result, dict):
-                    # Single item result
-                    for key, value in list(result.items())[:10]:
-                        if isinstance(value, (str, int, float, bool)):
-                            response += f"- **{key}**: {value}\n"
-                        elif isinstance(value, list) and value:
-                            response += f"- **{key}**: {len(value)} items\n"
-                        elif isinstance(value, dict) and value:
-                            response += f"- **{key}**: {', '.join(str(k) for k in list(value.keys())[:3])}\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more fields\n"
-                        
-                else:
-                    response += f"**Result**: {result}\n"
-            else:
-                response += "*No data available*\n"
-            
+                network_id, timespan=timespan
+            ) or []
+            
+            response = f"# 📶 Wireless Latency by Access Point\n\n"
+            response += f"**Time Period**: Last {timespan / 3600:.1f} hours | **APs**: {len(result)}\n\n"
+            if not result:
+                return response + "*No data available*\n"
+            
+            # Percentiles for every AP and traffic category at once
+            per_ap = latency_category_stats_many(result)
+            
+            def p95(stats):
+                values = [c['p95'] for c in stats.values() if c.get('p95') is not None]
+                return stats.get('bestEffortTraffic', {}).get('p95') or max(values, default=0)
+            
+            ranked = sorted(zip(result, per_ap), key=lambda item: -(p95(item[1]) or 0))
+            response += "| AP | Traffic | Avg | p50 | p95 | p99 | Samples |\n"
+            response += "|---|---|---|---|---|---|---|\n"
+            for entry, stats in ranked[:max_aps]:
+                for category, values in stats.items():
+                    response += _latency_row(category, values, label=entry.get('serial', 'Unknown'))
+            if len(ranked) > max_aps:
+                response += f"\n... and {len(ranked) - max_aps} more access points\n"
             return response
             
         except Exception as e:
@@ -3245,78 +3182,38 @@ def register_wireless_sdk_tools():
     
     @app.tool(
         name="get_network_wireless_latency_history",
-        description="📶 Get network wirelessLatencyHistory"
+        description="📶 Get network wirelessLatencyHistory - latency over time with percentiles and jitter"
     )
-    def get_network_wireless_latency_history(network_id: str, timespan: int = 86400):
-        """Get get network wirelesslatencyhistory."""
+    def get_network_wireless_latency_history(network_id: str, timespan: int = 86400, resolution: int = 0):
+        """
+        Get average wireless latency over time.
+        
+        Args:
+            network_id: Network ID
+            timespan: Timespan in seconds (default: 86400)
+            resolution: Interval in seconds (300, 600, 3600 or 86400; default: API default)
+        """
         try:
-            kwargs = {}
-            
-            # Add pagination for GET methods
-            if "per_page" in locals():
-                kwargs["perPage"] = per_page
-            if "timespan" in locals():
-                kwargs["timespan"] = timespan
-                
-            result = meraki_client.dashboard.wireless.getNetworkWirelessLatencyHistory(
-                network_id, **kwargs
-            )
-            
-            response = f"# 📶 Get Network Wirelesslatencyhistory\n\n"
-            
-            if result is not None:
-                if isinstance(result, list):
-                    response += f"**Total Items**: {len(result)}\n\n"
-                    
-                    # Show first 10 items
-                    for idx, item in enumerate(result[:10], 1):
-                        if isinstance(item, dict):
-                            name = item.get('name', item.get('ssid', item.get('id', f'Item {idx}')))
-                            response += f"**{idx}. {name}**\n"
-                            
-                            # Show key fields based on wireless context
-                            if 'ssid' in item:
-                                response += f"   - SSID: {item.get('ssid')}\n"
-                            if 'enabled' in item:
-                                response += f"   - Enabled: {item.get('enabled')}\n"
-                            if 'status' in item:
-                                response += f"   - Status: {item.get('status')}\n"
-                            if 'channel' in item:
-                                response += f"   - Channel: {item.get('channel')}\n"
-                            if 'power' in item:
-                                response += f"   - Power: {item.get('power')}\n"
-                            if 'clientCount' in item:
-                                response += f"   - Clients: {item.get('clientCount')}\n"
-                            if 'usage' in item:
-                                usage = item.get('usage', {})
-                                if isinstance(usage, dict):
-                                    response += f"   - Usage: {usage.get('total', 'N/A')} MB\n"
-                                    
-                        else:
-                            response += f"**{idx}. {item}**\n"
-                        response += "\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more items\n"
-                        
-                elif isinstance(result, dict):
-                    # Single item result
-                    for key, value in list(result.items())[:10]:
-                        if isinstance(value, (str, int, float, bool)):
-                            response += f"- **{key}**: {value}\n"
-                        elif isinstance(value, list) and value:
-                            response += f"- **{key}**: {len(value)} items\n"
-                        elif isinstance(value, dict) and value:
-                            response += f"- **{key}**: {', '.join(str(k) for k in list(value.keys())[:3])}\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more fields\n"
-                        
-                else:
-                    response += f"**Result**: {result}\n"
-            else:
-                response += "*No data available*\n"
-            
+            kwargs = {"timespan": timespan}
+            if resolution:
+                kwargs["resolution"] = resolution
+            result = meraki_client.dashboard.wireless.getNetworkWirelessLatencyHistory(network_id, **kwargs) or []
+            
+            response = f"# 📶 Wireless Latency History\n\n"
+            response += f"**Time Period**: Last {timespan / 3600:.1f} hours | **Intervals**: {len(result)}\n\n"
+            stats = summarize(column(result, 'avgLatencyMs'))
+            if not stats.count:
+                return response + "*No data available*\n"
+            
+            response += f"- **Average**: {stats.mean:.1f} ms (min {stats.min:.1f}, max {stats.max:.1f})\n"
+            response += f"- **p50 / p95 / p99**: {stats.p50:.1f} / {stats.p95:.1f} / {stats.p99:.1f} ms\n"
+            if stats.jitter is not None:
+                response += f"- **Jitter**: {stats.jitter:.1f} ms between intervals\n"
+            response += "\n**Slowest Intervals:**\n"
+            slowest = sorted((r for r in result if r.get('avgLatencyMs') is not None),
+                             key=lambda r: -r['avgLatencyMs'])[:5]
+            for interval in slowest:
+                response += f"- {interval.get('startTs')}: {interval['avgLatencyMs']:.1f} ms\n"
             return response
             
         except Exception as e:
@@ -3324,78 +3221,22 @@ def register_wireless_sdk_tools():
     
     @app.tool(
         name="get_network_wireless_latency_stats",
-        description="📶 Get network wirelessLatencyStats"
+        description="📶 Get network wirelessLatencyStats - average and p50/p95/p99 latency per traffic category"
     )
-    def get_network_wireless_latency_stats(network_id: str, timespan: int = 86400, per_page: int = 1000):
-        """Get get network wirelesslatencystats."""
+    def get_network_wireless_latency_stats(network_id: str, timespan: int = 86400):
+        """
+        Get aggregated wireless latency of a network per traffic category.
+        
+        Args:
+            network_id: Network ID
+            timespan: Timespan in seconds (max 7 days, default: 86400)
+        """
         try:
-            kwargs = {}
-            
-            # Add pagination for GET methods
-            if "per_page" in locals():
-                kwargs["perPage"] = per_page
-            if "timespan" in locals():
-                kwargs["timespan"] = timespan
-                
-            result = meraki_client.dashboard.wireless.getNetworkWirelessLatencyStats(
-                network_id, **kwargs
-            )
-            
-            response = f"# 📶 Get Network Wirelesslatencystats\n\n"
-            
-            if result is not None:
-                if isinstance(result, list):
-                    response += f"**Total Items**: {len(result)}\n\n"
-                    
-                    # Show first 10 items
-                    for idx, item in enumerate(result[:10], 1):
-                        if isinstance(item, dict):
-                            name = item.get('name', item.get('ssid', item.get('id', f'Item {idx}')))
-                            response += f"**{idx}. {name}**\n"
-                            
-                            # Show key fields based on wireless context
-                            if 'ssid' in item:
-                                response += f"   - SSID: {item.get('ssid')}\n"
-                            if 'enabled' in item:
-                                response += f"   - Enabled: {item.get('enabled')}\n"
-                            if 'status' in item:
-                                response += f"   - Status: {item.get('status')}\n"
-                            if 'channel' in item:
-                                response += f"   - Channel: {item.get('channel')}\n"
-                            if 'power' in item:
-                                response += f"   - Power: {item.get('power')}\n"
-                            if 'clientCount' in item:
-                                response += f"   - Clients: {item.get('clientCount')}\n"
-                            if 'usage' in item:
-                                usage = item.get('usage', {})
-                                if isinstance(usage, dict):
-                                    response += f"   - Usage: {usage.get('total', 'N/A')} MB\n"
-                                    
-                        else:
-                            response += f"**{idx}. {item}**\n"
-                        response += "\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more items\n"
-                        
-                elif isinstance(result, dict):
-                    # Single item result
-                    for key, value in list(result.items())[:10]:
-                        if isinstance(value, (str, int, float, bool)):
-                            response += f"- **{key}**: {value}\n"
-                        elif isinstance(value, list) and value:
-                            response += f"- **{key}**: {len(value)} items\n"
-                        elif isinstance(value, dict) and value:
-                            response += f"- **{key}**: {', '.join(str(k) for k in list(value.keys())[:3])}\n"
-                    
-                    if len(result) > 10:
-                        response += f"... and {len(result)-10} more fields\n"
-                        
-                else:
-                    response += f"**Result**: {result}\n"
-            else:
-                response += "*No data available*\n"
+            result = meraki_client.dashboard.wireless.getNetworkWirelessLatencyStats(network_id, timespan=timespan)
             
+            response = f"# 📶 Network Wireless Latency\n\n"
+            response += f"**Time Period**: Last {timespan / 3600:.1f} hours\n\n"
+            response += _latency_table(latency_category_stats(result or {}))
             return response
             
         except Exception as e:
@@ -3797,10 +3638,10 @@ def register_wireless_sdk_tools():
     def get_network_wireless_ssid(network_id: str, ssid_number: str = "0"):
         """Get specific network wireless SSID details. Auto-detects MX vs MR infrastructure."""
         try:
-            # Detect infrastructure type - use correct API based on devices
-            devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
-            mx_with_wifi = [d for d in devices if d.get('model', '').startswith('MX') and ('W' in d.get('model', '') or 'w' in d.get('model', ''))]
-            mr_devices = [d for d in devices if d.get('model', '').startswith('MR')]
+            # Detect infrastructure type - use correct API based on devices (cached per network)
+            infra = get_network_infrastructure(meraki_client, network_id)
+            mx_with_wifi = infra.mx_wireless
+            mr_devices = infra.mr_devices
             
             result = None
             api_used = ""
@@ -4867,10 +4708,10 @@ def register_wireless_sdk_tools():
     def get_network_wireless_ssids(network_id: str):
         """Get all wireless SSIDs for a network. Auto-detects MX vs MR infrastructure."""
         try:
-            # Detect infrastructure type - use correct API based on devices
-            devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
-            mx_with_wifi = [d for d in devices if d.get('model', '').startswith('MX') and ('W' in d.get('model', '') or 'w' in d.get('model', ''))]
-            mr_devices = [d for d in devices if d.get('model', '').startswith('MR')]
+            # Detect infrastructure type - use correct API based on devices (cached per network)
+            infra = get_network_infrastructure(meraki_client, network_id)
+            mx_with_wifi = infra.mx_wireless
+            mr_devices = infra.mr_devices
             
             # Collect SSIDs from appropriate sources based on infrastructure
             mx_ssids = []
@@ -4888,7 +4729,7 @@ def register_wireless_sdk_tools():
             if mr_devices:
                 # Get MR dedicated wireless SSIDs
                 try:
-                    mr_ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(network_id)
+                    mr_ssids = [dict(ssid) for ssid in wireless_config_cache.ssids(meraki_client, network_id)]
                     api_sources.append("MR Wireless (dedicated access points)")
                 except:
                     mr_ssids = []
@@ -7914,6 +7755,7 @@ def register_wireless_sdk_tools():
             result = meraki_client.dashboard.wireless.updateNetworkWirelessRfProfile(
                 network_id, **kwargs
             )
+            wireless_config_cache.invalidate(network_id)
             
             response = f"# ✏️ Update Network Wirelessrfprofile\n\n"
             
@@ -8072,6 +7914,7 @@ def register_wireless_sdk_tools():
             result = meraki_client.dashboard.wireless.updateNetworkWirelessSsid(
                 network_id, **kwargs
             )
+            wireless_config_cache.invalidate(network_id)
             
             response = f"# ✏️ Update Network Wirelessssid\n\n"
             
@@ -9239,3 +9082,102 @@ def register_wireless_sdk_tools():
         except Exception as e:
             return f"❌ Error in update_organization_wireless_ssids_firewall_isolation_allowlist_entry: {str(e)}"
     
+
+    # ==================== WIRELESS SITE AUDIT ====================
+
+    @app.tool(
+        name="audit_wireless_network",
+        description="📡 Audit a wireless network - SSIDs, RF profiles, connection stats, per-AP utilization and findings, fetched concurrently"
+    )
+    async def audit_wireless_network_tool(
+        network_id: str,
+        timespan: int = 86400,
+        per_ap: bool = True,
+        max_aps: int = 25,
+        ctx: Context = None
+    ):
+        """
+        Run a full wireless site audit of one network.
+        
+        Device inventory, SSIDs, RF profiles and every network-level statistic are
+        fetched at once, then radio status and channel utilization are collected
+        for all APs concurrently. SSIDs and RF profiles are served from a shared
+        cache when another tool has fetched them recently.
+        
+        Args:
+            network_id: Network ID
+            timespan: Statistics window in seconds (default: 86400)
+            per_ap: Collect radio status and channel utilization for every AP (default: True)
+            max_aps: Maximum access points to list
+            
+        Returns:
+            Wireless audit report with findings
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            reported = [0]
+            
+            def on_progress(done, total):
+                # Report roughly every 10% instead of after every request
+                if ctx is not None and total and (done == total or done - reported[0] >= max(1, total // 10)):
+                    reported[0] = done
+                    asyncio.run_coroutine_threadsafe(ctx.info(f"Wireless audit: {done}/{total} requests"), loop)
+            
+            audit = await asyncio.to_thread(
+                audit_wireless_network, meraki_client, network_id, timespan, None, per_ap, on_progress=on_progress
+            )
+            return "\n".join(audit.markdown(max_aps=max_aps))
+            
+        except Exception as e:
+            return f"❌ Error in audit_wireless_network: {str(e)}"
+
+    @app.tool(
+        name="get_organization_wireless_rf_heatmap",
+        description="📡 Org-wide wireless RF heatmap - channel utilization, utilization history and packet loss joined per AP and band, worst offenders ranked"
+    )
+    async def get_organization_wireless_rf_heatmap(
+        organization_id: str,
+        timespan: int = 86400,
+        network_ids: str = "",
+        bands: str = "2.4,5,6",
+        top: int = 20,
+        signal_top: int = 10,
+        max_aps: int = 50,
+        ctx: Context = None
+    ):
+        """
+        Find congested APs across an organization in one call.
+        
+        Channel utilization, its per-interval history and per-band packet loss
+        are fetched concurrently for every AP and joined into AP x band
+        matrices. Cells are scored against the utilization and packet loss
+        thresholds; signal quality is added for the worst cells.
+        
+        Args:
+            organization_id: Organization ID
+            timespan: Statistics window in seconds (default: 86400)
+            network_ids: Optional comma-separated network IDs
+            bands: Comma-separated bands (default: 2.4,5,6)
+            top: Worst AP/band cells to list (default: 20)
+            signal_top: Worst cells to fetch signal quality for (0 to skip, default: 10)
+            max_aps: Maximum APs in the matrix
+            
+        Returns:
+            Band summary, worst offenders and AP x band matrix
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            
+            def on_progress(done, total):
+                if ctx is not None:
+                    asyncio.run_coroutine_threadsafe(ctx.info(f"RF heatmap: {done}/{total} requests"), loop)
+            
+            heatmap = await asyncio.to_thread(
+                build_rf_heatmap, meraki_client, organization_id, timespan,
+                [n.strip() for n in network_ids.split(',') if n.strip()] or None,
+                [b.strip() for b in bands.split(',') if b.strip()], signal_top, on_progress=on_progress
+            )
+            return "\n".join(heatmap.markdown(top=top, max_aps=max_aps))
+            
+        except Exception as e:
+            return f"❌ Error in get_organization_wireless_rf_heatmap: {str(e)}"
@@ -2,6 +2,16 @@
 Network Analytics and Monitoring tools for the Cisco Meraki MCP Server - ONLY REAL API METHODS.
 """
 
+import time
+
+import numpy as np
+
+from config import MCP_ANOMALY_ORGS, MCP_ANOMALY_POLL_INTERVAL, MCP_UPLINK_COLLECT_ORGS, MCP_UPLINK_POLL_INTERVAL
+from utils.anomaly import METRICS, anomaly_detector, anomaly_monitor, anomaly_webhooks
+from utils.timeseries_stats import UplinkStats, column, latency_category_stats, uplink_stats
+from utils.top_usage import DIMENSIONS, top_usage
+from utils.uplink_history import format_timestamp, parse_timestamp, uplink_collector, uplink_history
+
 # Global variables to store app and meraki client
 app = None
 meraki_client = None
@@ -20,6 +30,84 @@ def register_analytics_tools(mcp_app, meraki):
     
     # Register all analytics tools
     register_analytics_tool_handlers()
+    
+    # Resume background uplink collection for configured organizations
+    if meraki is not None:
+        for organization_id in MCP_UPLINK_COLLECT_ORGS:
+            uplink_collector.start(meraki, organization_id)
+        for organization_id in MCP_ANOMALY_ORGS:
+            anomaly_monitor.start(meraki, organization_id)
+
+
+def _uplink_stat_lines(stat: UplinkStats) -> str:
+    """Loss, latency, jitter, availability and burst lines for one uplink."""
+    loss, latency = stat.loss, stat.latency
+    lines = ""
+    if loss.count:
+        lines += f"- Loss: avg {loss.mean:.1f}% | p95 {loss.p95:.1f}% | max {loss.max:.1f}%\n"
+    if latency.count:
+        lines += (f"- Latency: avg {latency.mean:.0f}ms | p50 {latency.p50:.0f}ms | p95 {latency.p95:.0f}ms | "
+                  f"p99 {latency.p99:.0f}ms (min {latency.min:.0f}ms, max {latency.max:.0f}ms)\n")
+    if latency.jitter is not None:
+        lines += f"- Jitter: {latency.jitter:.1f}ms\n"
+    if stat.availability is not None:
+        lines += f"- Availability: {stat.availability:.2f}%\n"
+    if stat.bursts:
+        worst = stat.worst_burst
+        lines += f"- Loss Bursts: {len(stat.bursts)} (longest {worst.length} samples, peak {worst.peak:.1f}%)\n"
+    return lines
+
+
+def _uplink_warnings(stat: UplinkStats) -> str:
+    warnings = ""
+    if (stat.loss.mean or 0) > 1:
+        warnings += f"\n⚠️ **WARNING**: Average packet loss above 1%!\n"
+    if (stat.latency.mean or 0) > 100:
+        warnings += f"\n⚠️ **WARNING**: High average latency detected!\n"
+    return warnings
+
+
+def _uplink_history_report(organization_id: str, t0: int, t1: int) -> str:
+    """Uplink loss/latency report for an arbitrary window, answered from the local history store."""
+    windows = uplink_history.query(organization_id, t0, t1)
+    coverage = uplink_history.coverage(organization_id)
+    
+    result = f"# 🚨 UPLINK LOSS & LATENCY HISTORY\n\n"
+    result += f"**Organization**: {organization_id}\n"
+    result += f"**Window**: {format_timestamp(t0)} → {format_timestamp(t1)}\n"
+    if coverage:
+        result += f"**History Available**: {format_timestamp(coverage[0])} → {format_timestamp(coverage[1])}\n"
+    collecting = uplink_collector.running(organization_id)
+    result += f"**Collection**: {'running' if collecting else 'stopped'}\n"
+    result += f"**Uplinks With Data**: {len(windows)}\n\n"
+    
+    if not windows:
+        result += "No collected samples in this window.\n"
+        return result
+    
+    stats = uplink_stats([w.loss for w in windows], [w.latency for w in windows])
+    devices = {}
+    for window, window_stats in zip(windows, stats):
+        devices.setdefault(window.serial, []).append((window, window_stats))
+    
+    for serial, uplinks in devices.items():
+        result += f"## 📱 Device: {serial}\n"
+        result += f"Network: {uplinks[0][0].network_id or 'Unknown'}\n\n"
+        for window, window_stats in uplinks:
+            result += f"### 🔗 {(window.uplink or 'Unknown').upper()} ({window.ip or 'N/A'})\n"
+            result += _uplink_stat_lines(window_stats)
+            if window_stats.loss.count:
+                result += f"- Peak Loss: {np.nanmax(window.loss_max):.1f}% | Peak Latency: {np.nanmax(window.latency_max):.0f}ms\n"
+            resolution = "1-minute samples" if window.resolution <= 60 else f"{window.resolution // 60}-minute buckets for older data"
+            result += f"- Data Points: {window.points} ({resolution})\n"
+            
+            # Worst moments in the window
+            for burst in sorted(window_stats.bursts, key=lambda b: (-b.length, -b.peak))[:3]:
+                result += (f"- Loss Burst: {format_timestamp(window.ts[burst.start])} → "
+                           f"{format_timestamp(window.ts[burst.start + burst.length - 1])}, peak {burst.peak:.1f}%\n")
+            result += _uplink_warnings(window_stats)
+            result += "\n"
+    return result
 
 def register_analytics_tool_handlers():
     """Register all analytics and monitoring tool handlers using ONLY REAL API methods."""
@@ -28,30 +116,47 @@ def register_analytics_tool_handlers():
         name="get_organization_uplinks_loss_and_latency", 
         description="🚨 Monitor packet loss & latency - detect DDoS attacks, ISP issues, network degradation across all sites"
     )
-    def get_organization_uplinks_loss_and_latency(organization_id: str, timespan: int = 300):
+    def get_organization_uplinks_loss_and_latency(organization_id: str, timespan: int = 300, t0: str = "", t1: str = ""):
         """
         Get REAL packet loss and latency data for all uplinks in organization.
         
+        The API only covers the last 5 minutes. Longer windows and windows given
+        with t0/t1 are answered from the local history kept by the background
+        uplink collector (see start_uplink_collection).
+        
         Args:
             organization_id: Organization ID
-            timespan: Timespan in seconds (default: 300 = 5 minutes, max: 300)
+            timespan: Timespan in seconds (default: 300 = 5 minutes; longer windows use collected history)
+            t0: Window start (ISO 8601 or epoch seconds) - uses collected history
+            t1: Window end (ISO 8601 or epoch seconds, default: now)
             
         Returns:
             Formatted uplink loss and latency data
         """
         try:
-            # Validate and ensure timespan doesn't exceed API limit
+            # Validate timespan
             if not isinstance(timespan, (int, float)):
                 return "❌ Error: timespan must be a number (seconds)"
             
             if timespan <= 0:
                 return "❌ Error: timespan must be positive"
-                
-            if timespan > 300:
-                timespan = 300
-                # Note: API limit is 300 seconds (5 minutes)
+            
+            if t0 or t1 or timespan > 300:
+                # Beyond the API limit of 300 seconds (5 minutes): answer from collected history
+                end = parse_timestamp(t1) if t1 else int(time.time())
+                start = parse_timestamp(t0) if t0 else end - int(timespan)
+                if start >= end:
+                    return "❌ Error: t0 must be before t1"
+                note = ""
+                if not uplink_collector.running(organization_id):
+                    note = ("\nℹ️ Uplink collection is not running for this organization, so history only covers "
+                            "what was collected earlier. Call start_uplink_collection to keep collecting.\n")
+                return _uplink_history_report(organization_id, start, end) + note
                 
             loss_latency = meraki_client.dashboard.organizations.getOrganizationDevicesUplinksLossAndLatency(organization_id, timespan=timespan)
+            if loss_latency and uplink_collector.running(organization_id):
+                # Keep the local history complete between collector polls
+                uplink_history.ingest(organization_id, loss_latency)
             
             if not loss_latency:
                 return f"No uplink loss/latency data found for organization {organization_id}."
@@ -62,23 +167,29 @@ def register_analytics_tool_handlers():
             result += f"**Time Period**: Last {timespan//60} minutes\n"
             result += f"**Total Uplinks**: {len(loss_latency)}\n\n"
             
+            # Statistics for every uplink at once
+            stats = uplink_stats(
+                [column(entry.get('timeSeries'), 'lossPercent') for entry in loss_latency],
+                [column(entry.get('timeSeries'), 'latencyMs') for entry in loss_latency]
+            )
+            
             # Group by device serial for easier reading
             devices = {}
-            for entry in loss_latency:
+            for entry, entry_stats in zip(loss_latency, stats):
                 serial = entry.get('serial', 'Unknown')
                 if serial not in devices:
                     devices[serial] = {
                         'network_id': entry.get('networkId', 'Unknown'),
                         'uplinks': []
                     }
-                devices[serial]['uplinks'].append(entry)
+                devices[serial]['uplinks'].append((entry, entry_stats))
             
             # Format output by device
             for serial, device_data in devices.items():
                 result += f"## 📱 Device: {serial}\n"
                 result += f"Network: {device_data['network_id']}\n\n"
                 
-                for uplink in device_data['uplinks']:
+                for uplink, uplink_stat in device_data['uplinks']:
                     uplink_name = uplink.get('uplink', 'Unknown')
                     ip = uplink.get('ip', 'N/A')
                     
@@ -88,32 +199,11 @@ def register_analytics_tool_handlers():
                     else:
                         result += f"### 🔗 Unknown Uplink ({ip})\n"
                     
-                    # Get time series data
                     time_series = uplink.get('timeSeries', [])
                     
                     if time_series:
-                        # Get latest reading
-                        latest = time_series[-1]
-                        current_loss = latest.get('lossPercent', 0)
-                        current_latency = latest.get('latencyMs', 0)
-                        
-                        # Calculate statistics
-                        losses = [p.get('lossPercent', 0) for p in time_series if p.get('lossPercent') is not None]
-                        latencies = [p.get('latencyMs', 0) for p in time_series if p.get('latencyMs') is not None]
-                        
-                        if losses:
-                            avg_loss = sum(losses) / len(losses)
-                            max_loss = max(losses)
-                            min_loss = min(losses)
-                        else:
-                            avg_loss = max_loss = min_loss = 0
-                            
-                        if latencies:
-                            avg_latency = sum(latencies) / len(latencies)
-                            max_latency = max(latencies)
-                            min_latency = min(latencies)
-                        else:
-                            avg_latency = max_latency = min_latency = 0
+                        current_loss = uplink_stat.loss.latest or 0
+                        current_latency = uplink_stat.latency.latest or 0
                         
                         # Current status with indicators
                         loss_indicator = "🔴" if current_loss > 5 else "🟡" if current_loss > 1 else "🟢"
@@ -123,24 +213,19 @@ def register_analytics_tool_handlers():
                         result += f"- Packet Loss: {current_loss:.1f}% {loss_indicator}\n"
                         result += f"- Latency: {current_latency:.0f}ms {latency_indicator}\n\n"
                         
-                        result += f"**5-Minute Statistics:**\n"
-                        result += f"- Avg Loss: {avg_loss:.1f}% (Min: {min_loss:.1f}%, Max: {max_loss:.1f}%)\n"
-                        result += f"- Avg Latency: {avg_latency:.0f}ms (Min: {min_latency:.0f}ms, Max: {max_latency:.0f}ms)\n"
+                        result += f"**{max(1, timespan // 60)}-Minute Statistics:**\n"
+                        result += _uplink_stat_lines(uplink_stat)
                         result += f"- Data Points: {len(time_series)}\n\n"
                         
                         # Show last 5 readings
                         result += f"**Recent Readings:**\n"
                         for reading in time_series[-5:]:
                             ts = reading.get('ts', 'Unknown').split('T')[1].split('Z')[0]
-                            loss = reading.get('lossPercent', 0)
-                            lat = reading.get('latencyMs', 0)
+                            loss = reading.get('lossPercent') or 0
+                            lat = reading.get('latencyMs') or 0
                             result += f"- {ts}: Loss={loss:.1f}%, Latency={lat:.0f}ms\n"
                         
-                        # Alert on issues
-                        if avg_loss > 1:
-                            result += f"\n⚠️ **WARNING**: Average packet loss above 1%!\n"
-                        if avg_latency > 100:
-                            result += f"\n⚠️ **WARNING**: High average latency detected!\n"
+                        result += _uplink_warnings(uplink_stat)
                             
                     else:
                         result += "- **Status**: No data available\n"
@@ -154,6 +239,192 @@ def register_analytics_tool_handlers():
             error_details = traceback.format_exc()
             return f"Error retrieving uplink loss/latency data:\n{str(e)}\n\nDetails:\n{error_details}"
 
+    @app.tool(
+        name="start_uplink_collection",
+        description="📈 Start background uplink loss/latency collection - keeps long-horizon history beyond the API's 5-minute limit"
+    )
+    def start_uplink_collection(organization_id: str, interval: int = MCP_UPLINK_POLL_INTERVAL):
+        """
+        Poll uplink loss and latency for an organization in the background.
+        
+        Samples are stored locally (1-minute resolution for recent data, rolled
+        up into buckets for older data) so get_organization_uplinks_loss_and_latency
+        can answer arbitrary windows.
+        
+        Args:
+            organization_id: Organization ID
+            interval: Seconds between polls (60-300, default: 240)
+            
+        Returns:
+            Collection status
+        """
+        try:
+            status = uplink_collector.start(meraki_client, organization_id, interval)
+            result = f"# 📈 Uplink Collection Started\n\n"
+            result += f"**Organization**: {organization_id}\n"
+            result += f"**Interval**: {status.interval}s\n"
+            coverage = uplink_history.coverage(organization_id)
+            if coverage:
+                result += f"**History Available**: {format_timestamp(coverage[0])} → {format_timestamp(coverage[1])}\n"
+            return result
+        except Exception as e:
+            return f"❌ Error starting uplink collection: {str(e)}"
+    
+    @app.tool(
+        name="stop_uplink_collection",
+        description="⏹️ Stop background uplink loss/latency collection for an organization (history is kept)"
+    )
+    def stop_uplink_collection(organization_id: str):
+        """
+        Stop polling uplink loss and latency for an organization.
+        
+        Args:
+            organization_id: Organization ID
+            
+        Returns:
+            Confirmation message
+        """
+        if uplink_collector.stop(organization_id):
+            return f"✅ Stopped uplink collection for organization {organization_id} (collected history is kept)"
+        return f"ℹ️ Uplink collection was not running for organization {organization_id}"
+    
+    @app.tool(
+        name="get_uplink_collection_status",
+        description="📈 Show background uplink collection status - polls, samples, history coverage and errors per organization"
+    )
+    def get_uplink_collection_status():
+        """
+        Show the state of background uplink collection for every organization.
+        
+        Returns:
+            Collection status per organization
+        """
+        if not uplink_collector.status:
+            return "ℹ️ No uplink collection has been started. Use start_uplink_collection or set MCP_UPLINK_COLLECT_ORGS."
+        result = "# 📈 Uplink Collection Status\n\n"
+        result += "| Organization | State | Interval | Polls | Samples | Uplinks | History | Last Error |\n"
+        result += "|---|---|---|---|---|---|---|---|\n"
+        for organization_id, status in uplink_collector.status.items():
+            state = "🟢 running" if uplink_collector.running(organization_id) else "⏹️ stopped"
+            coverage = uplink_history.coverage(organization_id)
+            history = f"{(coverage[1] - coverage[0]) / 3600:.1f}h" if coverage else "-"
+            result += (f"| {organization_id} | {state} | {status.interval}s | {status.polls} | {status.samples} | "
+                       f"{uplink_history.uplink_count(organization_id)} | {history} | {status.last_error or '-'} |\n")
+        return result
+
+    @app.tool(
+        name="start_anomaly_detection",
+        description="🚨 Start streaming anomaly detection - EWMA/z-score baselines for uplink loss/latency, AP connection failures and channel utilization"
+    )
+    def start_anomaly_detection(organization_id: str, interval: int = MCP_ANOMALY_POLL_INTERVAL, webhook_url: str = ""):
+        """
+        Detect anomalies in an organization's network metrics in the background.
+        
+        Uplink loss and latency are scored from the uplink collector (started
+        if needed); AP connection failures and channel utilization are polled
+        every interval. Each uplink, AP and band keeps its own baseline.
+        
+        Args:
+            organization_id: Organization ID
+            interval: Seconds between wireless polls (minimum 300, default: 300)
+            webhook_url: Optional URL that receives this organization's opened/resolved anomalies as JSON POSTs
+                (removed again when detection stops)
+            
+        Returns:
+            Monitoring status
+        """
+        try:
+            if webhook_url:
+                anomaly_webhooks.add(webhook_url, organization_id)
+            status = anomaly_monitor.start(meraki_client, organization_id, interval)
+            result = f"# 🚨 Anomaly Detection Started\n\n"
+            result += f"**Organization**: {organization_id}\n"
+            result += f"**Wireless Poll Interval**: {status.interval}s\n"
+            result += f"**Uplink Samples**: every {uplink_collector.status[organization_id].interval}s from uplink collection\n"
+            result += f"**Baselines Tracked**: {anomaly_detector.series_count(organization_id)}\n"
+            result += (f"**Threshold**: z ≥ {anomaly_detector.threshold:g} for {anomaly_detector.min_consecutive} "
+                       f"consecutive samples after {anomaly_detector.warmup} warm-up samples\n")
+            webhooks = anomaly_webhooks.targets(organization_id)
+            if webhooks:
+                result += f"**Webhooks**: {', '.join(webhooks)}\n"
+            return result
+        except Exception as e:
+            return f"❌ Error starting anomaly detection: {str(e)}"
+    
+    @app.tool(
+        name="stop_anomaly_detection",
+        description="⏹️ Stop streaming anomaly detection for an organization (baselines and uplink collection are kept)"
+    )
+    def stop_anomaly_detection(organization_id: str):
+        """
+        Stop anomaly detection for an organization and drop the webhooks added for it.
+        
+        Args:
+            organization_id: Organization ID
+            
+        Returns:
+            Confirmation message
+        """
+        webhooks = anomaly_webhooks.clear(organization_id)
+        removed = f", {len(webhooks)} webhook(s) removed" if webhooks else ""
+        if anomaly_monitor.stop(organization_id):
+            return f"✅ Stopped anomaly detection for organization {organization_id} (baselines are kept{removed})"
+        return f"ℹ️ Anomaly detection was not running for organization {organization_id}{removed}"
+    
+    @app.tool(
+        name="get_network_anomalies",
+        description="🚨 Get detected anomalies - uplink loss/latency, AP connection failures and channel utilization above their baselines"
+    )
+    def get_network_anomalies(organization_id: str = "", hours: int = 24, active_only: bool = False):
+        """
+        List anomalies found by the background detector.
+        
+        Args:
+            organization_id: Organization ID (empty for all monitored organizations)
+            hours: Look back this many hours (default: 24)
+            active_only: Only anomalies that have not recovered yet
+            
+        Returns:
+            Anomalies, newest first, with monitoring status
+        """
+        try:
+            if not anomaly_monitor.status:
+                return "ℹ️ No anomaly detection has been started. Use start_anomaly_detection or set MCP_ANOMALY_ORGS."
+            since = int(time.time()) - int(hours) * 3600
+            anomalies = anomaly_detector.anomalies(organization_id or None, since=since, active_only=active_only)
+            
+            result = f"# 🚨 Network Anomalies\n\n"
+            for org_id, status in anomaly_monitor.status.items():
+                if organization_id and org_id != organization_id:
+                    continue
+                state = "🟢 running" if anomaly_monitor.running(org_id) else "⏹️ stopped"
+                result += (f"**{org_id}**: {state}, {anomaly_detector.series_count(org_id)} baselines, "
+                           f"{status.polls} wireless polls")
+                result += f", last error: {status.last_error}\n" if status.last_error else "\n"
+            webhooks = anomaly_webhooks.targets(organization_id or None)
+            if webhooks:
+                failing = sum(1 for url in webhooks if url in anomaly_webhooks.errors)
+                result += f"**Webhooks**: {len(webhooks)} ({anomaly_webhooks.sent} sent, {failing} failing)\n"
+            
+            active = [a for a in anomalies if a.active]
+            result += f"\n**Anomalies (last {hours}h)**: {len(anomalies)} ({len(active)} active)\n\n"
+            if not anomalies:
+                return result + "✅ No anomalies detected\n"
+            
+            result += "| State | Severity | Started | Metric | Subject | Network | Peak | Baseline | z | Resolved |\n"
+            result += "|---|---|---|---|---|---|---|---|---|---|\n"
+            for anomaly in anomalies:
+                label, unit, _ = METRICS[anomaly.metric]
+                state = "🔴 active" if anomaly.active else "✅ resolved"
+                severity = "🚨 critical" if anomaly.severity == 'critical' else "⚠️ warning"
+                resolved = format_timestamp(anomaly.resolved_at) if anomaly.resolved_at else "-"
+                result += (f"| {state} | {severity} | {format_timestamp(anomaly.started_at)} | {label} | "
+                           f"{anomaly.subject} | {anomaly.network_id or '-'} | {anomaly.peak:.1f}{unit} | "
+                           f"{anomaly.baseline:.1f}{unit} ± {anomaly.std:.1f} | {anomaly.z:.1f} | {resolved} |\n")
+            return result
+        except Exception as e:
+            return f"❌ Error getting anomalies: {str(e)}"
+
     @app.tool(
         name="get_organization_appliance_uplink_statuses",
         description="🔗 Get REAL uplink status for all appliances in organization"
@@ -482,16 +753,59 @@ Possible causes:
             result = f"# ⚡ Network Latency Statistics for {network_id}\n\n"
             result += f"**Time Period**: Last {timespan/3600:.1f} hours\n\n"
             
-            for entry in latency_data:
-                result += f"## {entry.get('startTs', 'Unknown Time')}\n"
-                result += f"- **Average Latency**: {entry.get('avgLatencyMs', 'N/A')} ms\n"
-                result += f"- **Loss Percentage**: {entry.get('lossPercent', 'N/A')}%\n"
-                result += f"- **Jitter**: {entry.get('jitterMs', 'N/A')} ms\n"
-                if entry.get('uplink'):
-                    result += f"- **Uplink**: {entry['uplink']}\n"
+            categories = latency_category_stats(latency_data)
+            if not categories:
+                return result + "No per-traffic latency data available.\n"
+            
+            for category, values in categories.items():
+                result += f"## {category}\n"
+                avg = values.get('avg')
+                result += f"- **Average Latency**: {f'{avg:.1f}' if avg is not None else 'N/A'} ms\n"
+                for q in ('p50', 'p95', 'p99'):
+                    if values.get(q) is not None:
+                        result += f"- **{q}**: {values[q]:.0f} ms\n"
+                result += f"- **Samples**: {values.get('samples', 0)}\n"
                 result += "\n"
                 
             return result
             
         except Exception as e:
-            return f"Error retrieving latency statistics: {str(e)}"
\ No newline at end of file
+            return f"Error retrieving latency statistics: {str(e)}"
+
+    @app.tool(
+        name="get_organization_top_usage",
+        description="📊 Top clients, applications, SSIDs and VLANs by usage across an organization - streamed per network into fixed-size top-N heaps"
+    )
+    def get_organization_top_usage(
+        organization_id: str,
+        timespan: int = 86400,
+        top: int = 20,
+        dimensions: str = "client,application,ssid,vlan",
+        network_ids: str = ""
+    ):
+        """
+        Rank usage across every network of an organization in one call.
+        
+        Client pages are streamed network by network (concurrently) and only
+        the top entries of each dimension are kept, so memory stays constant
+        however many clients the organization has.
+        
+        Args:
+            organization_id: Organization ID
+            timespan: Usage window in seconds (default: 86400)
+            top: Entries per dimension (default: 20)
+            dimensions: Comma-separated subset of client, application, ssid, vlan
+            network_ids: Optional comma-separated network IDs (default: all networks with clients)
+            
+        Returns:
+            Top-N tables per dimension with share of total usage
+        """
+        try:
+            selected = [d.strip().lower() for d in dimensions.split(',') if d.strip()] or list(DIMENSIONS)
+            usage = top_usage(
+                meraki_client, organization_id, timespan, top,
+                [n.strip() for n in network_ids.split(',') if n.strip()] or None, selected
+            )
+            return "\n".join(usage.markdown())
+        except Exception as e:
+            return f"❌ Error getting top usage: {str(e)}"
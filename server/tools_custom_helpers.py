@@ -2,6 +2,24 @@
 Helper tools for common tasks - composite tools that combine multiple operations.
 """
 
+import asyncio
+import time
+
+from mcp.server.fastmcp import Context
+
+from utils.infrastructure import infrastructure_cache
+from utils.audit_store import audit_store, get_org_snapshot
+from utils.audit_rules import build_audit_tables
+from utils.audit_snapshot import OrgSnapshot, snapshot_networks
+from utils.rule_packs import HIPAA_PACK, POSTURE_PACK, SECURITY_AUDIT_PACK, RULE_PACKS
+from utils.fleet import default_stream_path, sweep_fleet
+from utils.org_directory import org_directory
+from utils.evidence_archive import evidence_archive
+from utils.network_health import check_org_health
+from utils.profiler import RunProfiler
+from utils.cost_estimator import combine_fleet, estimate_search, estimate_snapshot
+from utils.remediation import SecurityRuleOptions, remediate_networks
+
 # Global variables to store app and meraki client
 app = None
 meraki_client = None
@@ -56,35 +74,34 @@ def register_helper_tool_handlers():
             audit_results.append(f"**Time Zone**: {network.get('timeZone', 'Unknown')}")
             audit_results.append(f"**Audit Time**: {__import__('datetime').datetime.now().isoformat()}\n")
             
+            # Fetch every endpoint the audit reads once, concurrently, into a snapshot
+            device_error = None
+            try:
+                devices = [dict(device, networkId=network_id)
+                           for device in meraki_client.dashboard.networks.getNetworkDevices(network_id)]
+                infrastructure_cache.update(network_id, devices)
+            except Exception as e:
+                devices, device_error = [], e
+            (snap,), _ = snapshot_networks(
+                meraki_client, [network], devices,
+                SECURITY_AUDIT_PACK.endpoints() | {'security_events', 'site_to_site_vpn'},
+                organization_id=network.get('organizationId')
+            )
+            
+            def snapshot_value(endpoint):
+                value = getattr(snap, endpoint)
+                if value is None:
+                    raise RuntimeError(snap.errors.get(endpoint, 'not available for this network'))
+                return value
+            
             # 0. Analyze wireless infrastructure
             try:
-                devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
-                
-                for device in devices:
-                    model = device.get('model', '')
-                    device_name = device.get('name') or device.get('serial', 'Unnamed')
-                    
-                    if model.startswith('MX') and ('W' in model or 'w' in model):
-                        mx_with_wifi.append({
-                            'model': model,
-                            'name': device_name,
-                            'serial': device.get('serial', ''),
-                            'status': device.get('status', 'unknown')
-                        })
-                    elif model.startswith('MR'):
-                        mr_devices.append({
-                            'model': model,
-                            'name': device_name,
-                            'serial': device.get('serial', ''),
-                            'status': device.get('status', 'unknown')
-                        })
-                    else:
-                        other_devices.append({
-                            'model': model,
-                            'name': device_name,
-                            'serial': device.get('serial', ''),
-                            'status': device.get('status', 'unknown')
-                        })
+                if device_error:
+                    raise device_error
+                infra = snap.infrastructure
+                mx_with_wifi = infra.mx_wireless
+                mr_devices = infra.mr_devices
+                other_devices = infra.other_devices
                 
                 # Determine wireless infrastructure type
                 audit_results.append("## 📡 Wireless Infrastructure Analysis")
@@ -144,7 +161,7 @@ def register_helper_tool_handlers():
             
             # 1. Check IDS/IPS status
             try:
-                ids_status = meraki_client.dashboard.appliance.getNetworkApplianceSecurityIntrusion(network_id)
+                ids_status = snapshot_value('intrusion')
                 mode = ids_status.get('mode', 'disabled')
                 if mode == 'disabled':
                     audit_results.append("## ❌ IDS/IPS Status: DISABLED")
@@ -158,7 +175,7 @@ def register_helper_tool_handlers():
             
             # 2. Check AMP status
             try:
-                amp_status = meraki_client.dashboard.appliance.getNetworkApplianceSecurityMalware(network_id)
+                amp_status = snapshot_value('malware')
                 mode = amp_status.get('mode', 'disabled')
                 if mode == 'disabled':
                     audit_results.append("## ❌ Malware Protection: DISABLED")
@@ -171,7 +188,7 @@ def register_helper_tool_handlers():
             
             # 3. Check content filtering
             try:
-                content_filter = meraki_client.dashboard.appliance.getNetworkApplianceContentFiltering(network_id)
+                content_filter = snapshot_value('content_filtering')
                 blocked_categories = content_filter.get('blockedUrlCategories', [])
                 if not blocked_categories:
                     audit_results.append("## ❌ Content Filtering: NO CATEGORIES BLOCKED")
@@ -184,7 +201,7 @@ def register_helper_tool_handlers():
             
             # 4. Check firewall rules
             try:
-                l3_rules = meraki_client.dashboard.appliance.getNetworkApplianceFirewallL3FirewallRules(network_id)
+                l3_rules = snapshot_value('l3_firewall')
                 rules = l3_rules.get('rules', [])
                 custom_rules = [r for r in rules if r.get('comment') != 'Default rule']
                 if len(custom_rules) == 0:
@@ -198,10 +215,7 @@ def register_helper_tool_handlers():
             
             # 5. Check recent security events
             try:
-                events = meraki_client.dashboard.appliance.getNetworkApplianceSecurityEvents(
-                    network_id, 
-                    timespan=86400  # Last 24 hours
-                )
+                events = snapshot_value('security_events')  # Last 24 hours
                 if events:
                     audit_results.append(f"## 🚨 Recent Security Events: {len(events)} in last 24h")
                     # Show first few events
@@ -227,8 +241,8 @@ def register_helper_tool_handlers():
                 audit_results.append("*WiFi provided by security appliance - no separate access points*\n")
                 
                 try:
-                    # Use MX appliance wireless API for integrated wireless (not MR wireless API)
-                    ssids = meraki_client.dashboard.appliance.getNetworkApplianceSsids(network_id)
+                    # Snapshot uses the MX appliance wireless API for integrated wireless (not MR wireless API)
+                    ssids = snapshot_value('ssids')
                     weak_ssids = []
                     secure_ssids = []
                     disabled_ssids = 0
@@ -297,7 +311,7 @@ def register_helper_tool_handlers():
                 audit_results.append("*Full wireless infrastructure analysis and connection monitoring available*\n")
                 
                 try:
-                    ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(network_id)
+                    ssids = snapshot_value('ssids')
                     weak_ssids = []
                     secure_ssids = []
                     disabled_ssids = 0
@@ -371,7 +385,7 @@ def register_helper_tool_handlers():
             
             # 7. Check VPN configuration
             try:
-                vpn_config = meraki_client.dashboard.appliance.getNetworkApplianceVpnSiteToSiteVpn(network_id)
+                vpn_config = snapshot_value('site_to_site_vpn')
                 mode = vpn_config.get('mode', 'none')
                 
                 audit_results.append("## 🔐 VPN Configuration")
@@ -397,7 +411,7 @@ def register_helper_tool_handlers():
             
             # 8. Check VLAN configuration
             try:
-                vlans = meraki_client.dashboard.appliance.getNetworkApplianceVlans(network_id)
+                vlans = snapshot_value('appliance_vlans')
                 
                 if vlans:
                     audit_results.append("## 🏗️ Network Segmentation (VLANs)")
@@ -494,56 +508,12 @@ def register_helper_tool_handlers():
             except:
                 pass
             
-            # 11. Calculate security score
-            security_score = 0
+            # 11. Calculate security score from the snapshot with the security audit rules
+            tables = build_audit_tables(OrgSnapshot(organization_id=network.get('organizationId', ''), networks=[snap]))
+            results = SECURITY_AUDIT_PACK.evaluate(tables)
+            security_score = int(sum(result.points for result in results))
             max_score = 100
-            issues = []
-            
-            # IDS/IPS (20 points)
-            try:
-                if 'prevention' in str(audit_results):
-                    security_score += 20
-                elif 'detection' in str(audit_results):
-                    security_score += 10
-                else:
-                    issues.append("IDS/IPS disabled")
-            except:
-                pass
-            
-            # Malware protection (20 points)
-            if '✅ Malware Protection' in str(audit_results):
-                security_score += 20
-            else:
-                issues.append("Malware protection disabled")
-            
-            # Content filtering (15 points)
-            if '✅ Content Filtering' in str(audit_results):
-                security_score += 15
-            elif 'categories blocked' in str(audit_results):
-                security_score += 10
-            else:
-                issues.append("No content filtering")
-            
-            # Firewall rules (15 points)
-            if 'custom rules configured' in str(audit_results):
-                security_score += 15
-            else:
-                security_score += 5
-                issues.append("Only default firewall rules")
-            
-            # WiFi security (20 points)
-            if '❌ Security: Open' in str(audit_results):
-                issues.append("Open WiFi network detected")
-            elif '✅ Properly Secured SSIDs' in str(audit_results):
-                security_score += 20
-            else:
-                security_score += 10
-            
-            # VLANs (10 points)
-            if 'Total VLANs' in str(audit_results) and 'No VLANs' not in str(audit_results):
-                security_score += 10
-            else:
-                issues.append("No network segmentation")
+            issues = [result.issue for result in results if result.issue]
             
             audit_results.append("## 🎯 Security Score")
             audit_results.append(f"**Overall Score: {security_score}/100**")
@@ -621,17 +591,15 @@ def register_helper_tool_handlers():
             org_id = network.get('organizationId')
             product_types = network.get('productTypes', [])
             
-            # Get devices to understand infrastructure
+            # Get devices to understand infrastructure (fresh statuses, also refreshes the cache)
+            devices = None
             mx_with_wifi = []
             mr_devices = []
             try:
                 devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
-                for device in devices:
-                    model = device.get('model', '')
-                    if model.startswith('MX') and ('W' in model or 'w' in model):
-                        mx_with_wifi.append(device)
-                    elif model.startswith('MR'):
-                        mr_devices.append(device)
+                infra = infrastructure_cache.update(network_id, devices)
+                mx_with_wifi = infra.mx_wireless
+                mr_devices = infra.mr_devices
             except:
                 pass
             
@@ -682,7 +650,9 @@ def register_helper_tool_handlers():
             if 'appliance' in product_types:
                 try:
                     # Get organization uplink statuses
-                    uplink_statuses = meraki_client.dashboard.appliance.getOrganizationApplianceUplinkStatuses(org_id)
+                    uplink_statuses = meraki_client.dashboard.appliance.getOrganizationApplianceUplinkStatuses(
+                        org_id, networkIds=[network_id]
+                    )
                     network_uplinks = [u for u in uplink_statuses if u.get('networkId') == network_id]
                     
                     if network_uplinks:
@@ -701,7 +671,8 @@ def register_helper_tool_handlers():
             
             # 3. Check device status
             try:
-                devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
+                if devices is None:
+                    devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
                 offline_devices = []
                 alerting_devices = []
                 
@@ -767,17 +738,103 @@ def register_helper_tool_handlers():
             
         except Exception as e:
             return f"❌ Error checking network health: {str(e)}"
+
+    @app.tool(
+        name="check_organization_health",
+        description="🏥 Check health of every network in an organization - one fetch per org-level endpoint, joined by network"
+    )
+    def check_organization_health(
+        organization_id: str,
+        network_ids: str = "",
+        include_healthy: bool = False,
+        max_networks: int = 50
+    ):
+        """
+        Check device, uplink and assurance alert health for all networks at once.
+        
+        Device statuses, appliance uplink statuses and assurance alerts are each
+        fetched once for the organization and joined locally by networkId, instead
+        of running check_network_health per network.
+        
+        Args:
+            organization_id: ID of the organization to check
+            network_ids: Comma-separated network IDs to restrict the report to (default: all)
+            include_healthy: Also list networks with no issues
+            max_networks: Maximum networks to list
+            
+        Returns:
+            Organization health report, worst networks first
+        """
+        try:
+            selected = [n.strip() for n in network_ids.split(',') if n.strip()] or None
+            health = check_org_health(meraki_client, organization_id, network_ids=selected)
+            counts = health.status_counts()
+            
+            report = []
+            report.append(f"# 🏥 Organization Health Report: {organization_id}")
+            report.append(f"**Check Time**: {__import__('datetime').datetime.now().isoformat()}")
+            report.append(f"**Networks**: {len(health.networks)} | **API Calls**: {health.api_calls} | "
+                          f"**Duration**: {health.duration:.1f}s\n")
+            
+            report.append("## 📊 Summary")
+            report.append(f"- 🔴 Critical: {counts['critical']}")
+            report.append(f"- 🟡 Degraded: {counts['degraded']}")
+            report.append(f"- 🟢 Healthy: {counts['healthy']}")
+            total_devices = sum(len(n.devices) for n in health.networks)
+            online_devices = sum(n.online_count for n in health.networks)
+            report.append(f"- Devices Online: {online_devices}/{total_devices}")
+            for source, error in health.errors.items():
+                report.append(f"- ⚠️ {source} unavailable: {error}")
+            report.append("")
+            
+            icons = {'critical': '🔴', 'degraded': '🟡', 'healthy': '🟢'}
+            listed = [n for n in health.ranked() if include_healthy or n.status != 'healthy']
+            if listed:
+                report.append("## 🌐 Networks")
+                report.append("| Status | Network | Devices Online | Uplinks | Issues |")
+                report.append("|---|---|---|---|---|")
+                for network in listed[:max_networks]:
+                    interfaces = network.interfaces
+                    active = len([i for i in interfaces if i.get('status') == 'active'])
+                    uplinks = f"{active}/{len(interfaces)} active" if interfaces else "-"
+                    issues = "; ".join(network.issues) or "None"
+                    report.append(f"| {icons[network.status]} | {network.name} | "
+                                  f"{network.online_count}/{len(network.devices)} | {uplinks} | {issues} |")
+                if len(listed) > max_networks:
+                    report.append(f"\n... and {len(listed) - max_networks} more networks")
+                report.append("")
+            elif health.networks:
+                report.append("✅ All networks healthy\n")
+            
+            critical = [n for n in health.ranked() if n.status == 'critical']
+            if critical:
+                report.append("## 🚨 Critical Details")
+                for network in critical[:10]:
+                    report.append(f"### {network.name}")
+                    for device in network.devices_with_status('offline')[:5]:
+                        report.append(f"- ❌ Offline: {device.get('name') or device.get('serial')} ({device.get('model')})")
+                    for interface in network.failed_uplinks:
+                        report.append(f"- ❌ {interface.get('interface', 'Uplink')} failed on {interface.get('serial')}")
+                    for alert in network.alerts_with_severity('critical')[:5]:
+                        report.append(f"- 🚨 {alert.get('title') or alert.get('type', 'Alert')}")
+                report.append("")
+            
+            return "\n".join(report)
+            
+        except Exception as e:
+            return f"❌ Error checking organization health: {str(e)}"
     
     @app.tool(
         name="analyze_security_posture",
         description="🛡️ Analyze security posture - comprehensive check of all security settings and recent threats"
     )
-    def analyze_security_posture(organization_id: str):
+    def analyze_security_posture(organization_id: str, incremental: bool = True):
         """
         Analyze the security posture across the entire organization.
         
         Args:
             organization_id: ID of the organization to analyze
+            incremental: Reuse the previous audit snapshot and re-fetch only networks changed since then
             
         Returns:
             Organization-wide security posture analysis
@@ -791,102 +848,29 @@ def register_helper_tool_handlers():
             analysis.append(f"# 🛡️ Security Posture Analysis: {org_name}")
             analysis.append(f"**Analysis Time**: {__import__('datetime').datetime.now().isoformat()}\n")
             
-            # Get all networks
-            networks = meraki_client.dashboard.organizations.getOrganizationNetworks(organization_id)
+            # One configuration snapshot for every network (shared with the HIPAA audit)
+            snapshot = get_org_snapshot(
+                meraki_client, organization_id, POSTURE_PACK.endpoints(), incremental=incremental
+            )
             
-            # Security statistics
-            networks_checked = 0
-            ids_enabled_count = 0
-            amp_enabled_count = 0
-            content_filter_count = 0
-            weak_wifi_count = 0
-            total_threats = 0
+            # Evaluate the posture rules column-wise over every network at once
+            results = {result.rule.id: result for result in POSTURE_PACK.evaluate(build_audit_tables(snapshot))}
+            ids, amp, cf = results['posture.ids'], results['posture.amp'], results['posture.content_filtering']
+            networks_checked = snapshot.network_count
+            weak_wifi_count = results['posture.wifi'].failed
+            total_threats = int(results['posture.threats'].values['threats'])
+            ids_percent, amp_percent, cf_percent = ids.percent, amp.percent, cf.percent
             
             analysis.append(f"## 📊 Organization Overview")
-            analysis.append(f"- Total Networks: {len(networks)}")
+            analysis.append(f"- Total Networks: {networks_checked}")
+            analysis.append(f"- Snapshot: {snapshot.mode}, {len(snapshot.refetched_networks)} networks fetched, {snapshot.api_calls} API calls")
             analysis.append("")
             
-            # Check each network
-            for network in networks:
-                network_id = network['id']
-                network_name = network['name']
-                networks_checked += 1
-                
-                # Check IDS/IPS
-                try:
-                    ids = meraki_client.dashboard.appliance.getNetworkApplianceSecurityIntrusion(network_id)
-                    if ids.get('mode') != 'disabled':
-                        ids_enabled_count += 1
-                except:
-                    pass
-                
-                # Check AMP
-                try:
-                    amp = meraki_client.dashboard.appliance.getNetworkApplianceSecurityMalware(network_id)
-                    if amp.get('mode') != 'disabled':
-                        amp_enabled_count += 1
-                except:
-                    pass
-                
-                # Check content filtering
-                try:
-                    cf = meraki_client.dashboard.appliance.getNetworkApplianceContentFiltering(network_id)
-                    if cf.get('blockedUrlCategories'):
-                        content_filter_count += 1
-                except:
-                    pass
-                
-                # Check WiFi security (use correct API based on infrastructure)
-                try:
-                    # First determine infrastructure type
-                    devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
-                    mx_with_wifi = [d for d in devices if d.get('model', '').startswith('MX') and ('W' in d.get('model', '') or 'w' in d.get('model', ''))]
-                    mr_devices = [d for d in devices if d.get('model', '').startswith('MR')]
-                    
-                    # Use appropriate API based on infrastructure
-                    if mx_with_wifi and not mr_devices:
-                        # MX integrated wireless - use appliance API
-                        ssids = meraki_client.dashboard.appliance.getNetworkApplianceSsids(network_id)
-                    else:
-                        # Dedicated/mixed wireless - use wireless API
-                        ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(network_id)
-                    
-                    for ssid in ssids:
-                        if ssid.get('enabled'):
-                            auth = ssid.get('authMode', '')
-                            # For MX integrated wireless, check PSK presence
-                            if mx_with_wifi and not mr_devices:
-                                if auth == 'open' or (auth == 'psk' and not ssid.get('psk')):
-                                    weak_wifi_count += 1
-                                    break
-                            else:
-                                # For MR wireless, use original logic
-                                if auth == 'open' or (auth == 'psk' and ssid.get('encryptionMode') == 'wep'):
-                                    weak_wifi_count += 1
-                                    break
-                except:
-                    pass
-                
-                # Count security events
-                try:
-                    events = meraki_client.dashboard.appliance.getNetworkApplianceSecurityEvents(
-                        network_id, 
-                        timespan=86400
-                    )
-                    total_threats += len(events)
-                except:
-                    pass
-            
-            # Calculate percentages
-            ids_percent = (ids_enabled_count / networks_checked * 100) if networks_checked > 0 else 0
-            amp_percent = (amp_enabled_count / networks_checked * 100) if networks_checked > 0 else 0
-            cf_percent = (content_filter_count / networks_checked * 100) if networks_checked > 0 else 0
-            
             # Security scores
             analysis.append("## 🔒 Security Feature Adoption")
-            analysis.append(f"- IDS/IPS Enabled: {ids_enabled_count}/{networks_checked} ({ids_percent:.0f}%)")
-            analysis.append(f"- Malware Protection: {amp_enabled_count}/{networks_checked} ({amp_percent:.0f}%)")
-            analysis.append(f"- Content Filtering: {content_filter_count}/{networks_checked} ({cf_percent:.0f}%)")
+            analysis.append(f"- IDS/IPS Enabled: {ids.passed}/{networks_checked} ({ids_percent:.0f}%)")
+            analysis.append(f"- Malware Protection: {amp.passed}/{networks_checked} ({amp_percent:.0f}%)")
+            analysis.append(f"- Content Filtering: {cf.passed}/{networks_checked} ({cf_percent:.0f}%)")
             analysis.append("")
             
             # Risk indicators
@@ -903,21 +887,7 @@ def register_helper_tool_handlers():
             analysis.append("")
             
             # Overall score
-            security_score = 0
-            if ids_percent >= 80: security_score += 25
-            elif ids_percent >= 50: security_score += 15
-            elif ids_percent > 0: security_score += 5
-            
-            if amp_percent >= 80: security_score += 25
-            elif amp_percent >= 50: security_score += 15  
-            elif amp_percent > 0: security_score += 5
-            
-            if cf_percent >= 80: security_score += 25
-            elif cf_percent >= 50: security_score += 15
-            elif cf_percent > 0: security_score += 5
-            
-            if weak_wifi_count == 0: security_score += 25
-            elif weak_wifi_count <= 2: security_score += 10
+            security_score = int(sum(result.points for result in results.values()))
             
             analysis.append("## 🎯 Security Score")
             analysis.append(f"**Overall Score: {security_score}/100**")
@@ -945,168 +915,227 @@ def register_helper_tool_handlers():
             
         except Exception as e:
             return f"❌ Error analyzing security posture: {str(e)}"
+
+    @app.tool(
+        name="sweep_fleet_security_posture",
+        description="🌐 Fleet security sweep - score every network of every accessible organization, ranked worst first"
+    )
+    async def sweep_fleet_security_posture(
+        organization_ids: str = "",
+        incremental: bool = True,
+        top: int = 25,
+        ctx: Context = None
+    ):
+        """
+        Score every network across organizations with the perform_security_audit rules.
+
+        Organizations are swept concurrently under the per-organization rate budget.
+        Each network's result is streamed as a log message as soon as it is scored and
+        appended to a JSONL file under the state directory.
+
+        Args:
+            organization_ids: Comma-separated organization IDs (default: every accessible organization)
+            incremental: Reuse stored audit snapshots and re-fetch only networks changed since then
+            top: Number of worst networks to list
+
+        Returns:
+            Ranked fleet summary
+        """
+        try:
+            organizations = await asyncio.to_thread(org_directory.candidates, meraki_client)
+            wanted = {org_id.strip() for org_id in organization_ids.split(',') if org_id.strip()}
+            if wanted:
+                organizations = [org for org in organizations if org.id in wanted]
+            if not organizations:
+                return "❌ No accessible organizations to sweep"
+
+            loop = asyncio.get_running_loop()
+            finished = []
+
+            def on_result(posture):
+                if ctx is not None:
+                    message = (f"{posture.organization_name} / {posture.network_name}: "
+                               f"{posture.score}/{posture.max_score} ({posture.rating})")
+                    asyncio.run_coroutine_threadsafe(ctx.info(message), loop)
+
+            def on_organization(outcome):
+                finished.append(outcome)
+                if ctx is not None:
+                    asyncio.run_coroutine_threadsafe(
+                        ctx.report_progress(len(finished), len(organizations)), loop
+                    )
+
+            started = time.time()
+            sweep = await asyncio.to_thread(
+                sweep_fleet, meraki_client, organizations, on_result, on_organization,
+                incremental, default_stream_path(started)
+            )
+
+            report = []
+            report.append("# 🌐 Fleet Security Posture Sweep")
+            report.append(f"**Organizations**: {len(sweep.organizations)} | **Networks**: {len(sweep.networks)}")
+            average = sweep.average_score
+            report.append(f"**Average Score**: {average:.1f}/100" if average is not None else "**Average Score**: n/a")
+            report.append(f"**API Calls**: {sweep.api_calls} | **Duration**: {sweep.duration:.1f}s")
+            report.append(f"**Results Stream**: `{sweep.stream_path}`")
+            report.append("")
+
+            ratings = sweep.rating_counts()
+            report.append("## 📊 Rating Distribution")
+            for rating in ('Excellent', 'Good', 'Fair', 'Poor'):
+                report.append(f"- {rating}: {ratings.get(rating, 0)} networks")
+            report.append("")
+
+            report.append("## 🏢 Organizations (lowest average first)")
+            report.append("| Organization | Networks | Average | Worst | API Calls | Snapshot |")
+            report.append("|---|---|---|---|---|---|")
+            for org in sweep.ranked_organizations():
+                if org.error:
+                    report.append(f"| {org.name} | - | ❌ {org.error[:60]} | - | - | - |")
+                else:
+                    avg = f"{org.average_score:.1f}" if org.average_score is not None else "n/a"
+                    worst = org.worst_score if org.worst_score is not None else "n/a"
+                    report.append(f"| {org.name} | {org.network_count} | {avg} | {worst} | {org.api_calls} | {org.mode} |")
+            report.append("")
+
+            report.append(f"## 🚨 Lowest Scoring Networks (top {top})")
+            for posture in sweep.ranked_networks()[:top]:
+                issues = ', '.join(posture.issues) or 'no key issues'
+                report.append(f"- **{posture.score}/{posture.max_score}** {posture.organization_name} / "
+                              f"{posture.network_name} ({posture.network_id}) - {issues}")
+            report.append("")
+
+            issue_counts = sweep.issue_counts()
+            if issue_counts:
+                report.append("## 📋 Most Common Issues")
+                for issue, count in issue_counts.most_common():
+                    report.append(f"- {issue}: {count} networks")
+
+            return "\n".join(report)
+
+        except Exception as e:
+            return f"❌ Error sweeping fleet security posture: {str(e)}"
     
     @app.tool(
         name="apply_common_security_rules",
         description="🔒 Apply common security rules - easily block malicious traffic, countries, and content"
     )
-    def apply_common_security_rules(
-        network_id: str,
+    async def apply_common_security_rules(
+        network_id: str = "",
         block_malicious_sites: bool = True,
         block_high_risk_countries: bool = False,
         block_p2p: bool = False,
         block_social_media: bool = False,
         custom_blocked_countries: str = None,
-        custom_blocked_ports: str = None
+        custom_blocked_ports: str = None,
+        organization_id: str = "",
+        all_networks: bool = False,
+        dry_run: bool = False,
+        ctx: Context = None
     ):
         """
-        Apply common security rules to a network with a single command.
+        Apply common security rules to one or many networks with a single command.
+        
+        Current IDS/AMP/L3 settings of every selected network are read concurrently,
+        the required changes are compiled into Dashboard action batches, and the
+        batches are submitted in parallel and tracked to completion.
         
         Args:
-            network_id: Network ID to apply rules to
+            network_id: Network ID(s) to apply rules to, comma-separated
             block_malicious_sites: Block malware, phishing, and spam sites (default: True)
             block_high_risk_countries: Block traffic from high-risk countries (default: False)
             block_p2p: Block peer-to-peer applications (default: False)
             block_social_media: Block social media sites (default: False)
             custom_blocked_countries: Additional countries to block (e.g., "CN,RU,KP")
             custom_blocked_ports: TCP ports to block (e.g., "445,3389,22")
+            organization_id: Organization of the networks (looked up from the first network if empty)
+            all_networks: Apply to every appliance network of organization_id (required when network_id is empty)
+            dry_run: Only report the changes that would be made
             
         Returns:
-            Summary of applied security rules
+            Summary of applied security rules per network
         """
         try:
-            results = []
-            results.append(f"# 🔒 Applying Security Rules to Network {network_id}\n")
+            network_ids = [n.strip() for n in (network_id or '').split(',') if n.strip()]
+            if not network_ids and not (organization_id and all_networks):
+                return ("❌ Provide network_id (one or more, comma-separated), or organization_id with "
+                        "all_networks=True to target every appliance network of the organization")
+            if not organization_id:
+                network = await asyncio.to_thread(meraki_client.dashboard.networks.getNetwork, network_ids[0])
+                organization_id = network.get('organizationId')
+            
+            options = SecurityRuleOptions(
+                block_malicious_sites=block_malicious_sites,
+                block_high_risk_countries=block_high_risk_countries,
+                block_p2p=block_p2p,
+                block_social_media=block_social_media,
+                blocked_countries=[c.strip().upper() for c in (custom_blocked_countries or '').split(',') if c.strip()],
+                blocked_ports=[p.strip() for p in (custom_blocked_ports or '').split(',') if p.strip()]
+            )
             
-            # 1. Content Filtering for malicious sites
-            if block_malicious_sites:
-                try:
-                    # Block dangerous content categories
-                    dangerous_categories = [
-                        "5",   # Malware sites
-                        "6",   # Phishing and other frauds
-                        "3",   # Illegal content
-                        "4",   # Illegal downloads
-                        "83"   # Peer to peer (if not separately handled)
-                    ]
-                    
-                    if block_social_media:
-                        dangerous_categories.extend(["70"])  # Social networking
-                    
-                    if block_p2p:
-                        if "83" not in dangerous_categories:
-                            dangerous_categories.append("83")
-                    
-                    meraki_client.dashboard.appliance.updateNetworkApplianceContentFiltering(
-                        network_id,
-                        blockedUrlCategories=[f"meraki:contentFiltering/category/{cat}" for cat in dangerous_categories],
-                        urlCategoryListSize='fullList'
+            loop = asyncio.get_running_loop()
+            finished = []
+            
+            def on_batch(plans):
+                finished.extend(plans)
+                if ctx is not None:
+                    statuses = ', '.join(f"{plan.name}: {plan.status}" for plan in plans[:5])
+                    asyncio.run_coroutine_threadsafe(
+                        ctx.info(f"Action batch finished ({len(finished)} networks done) - {statuses}"), loop
                     )
-                    results.append("✅ **Content Filtering**: Blocked malicious site categories")
-                except Exception as e:
-                    results.append(f"❌ **Content Filtering**: Failed - {str(e)}")
-            
-            # 2. Layer 7 Firewall Rules
-            l7_rules = []
-            
-            # Block high-risk countries
-            if block_high_risk_countries or custom_blocked_countries:
-                countries = []
-                if block_high_risk_countries:
-                    # Common high-risk countries
-                    countries.extend(["CN", "RU", "KP", "IR"])
-                if custom_blocked_countries:
-                    countries.extend([c.strip().upper() for c in custom_blocked_countries.split(',')])
-                
-                # Remove duplicates
-                countries = list(set(countries))
-                
-                if countries:
-                    l7_rules.append({
-                        "policy": "deny",
-                        "type": "blacklistedCountries",
-                        "value": {"countries": countries}
-                    })
-                    results.append(f"✅ **Geo-blocking**: Blocked {len(countries)} countries: {', '.join(countries)}")
-            
-            # Block P2P applications
-            if block_p2p:
-                # Common P2P applications
-                p2p_apps = [
-                    "meraki:layer7/application/17",   # BitTorrent
-                    "meraki:layer7/application/169"   # Tor
-                ]
-                for app_id in p2p_apps:
-                    l7_rules.append({
-                        "policy": "deny",
-                        "type": "application",
-                        "value": {"id": app_id}
-                    })
-                results.append("✅ **L7 Firewall**: Blocked P2P applications")
-            
-            # Apply L7 rules if any
-            if l7_rules:
-                try:
-                    meraki_client.dashboard.appliance.updateNetworkApplianceFirewallL7FirewallRules(network_id, rules=l7_rules)
-                except Exception as e:
-                    results.append(f"❌ **L7 Firewall**: Failed - {str(e)}")
             
-            # 3. Layer 3 Firewall Rules for specific ports
-            if custom_blocked_ports:
-                try:
-                    # Get existing L3 rules
-                    current_l3 = meraki_client.dashboard.appliance.getNetworkApplianceFirewallL3FirewallRules(network_id)
-                    existing_rules = current_l3.get('rules', [])
-                    
-                    # Add port blocking rules
-                    ports = [p.strip() for p in custom_blocked_ports.split(',')]
-                    for port in ports:
-                        new_rule = {
-                            'comment': f'Block port {port} - Added by security helper',
-                            'policy': 'deny',
-                            'protocol': 'tcp',
-                            'srcCidr': 'any',
-                            'destCidr': 'any',
-                            'destPort': port,
-                            'syslogEnabled': True
-                        }
-                        existing_rules.insert(0, new_rule)  # Add to beginning
-                    
-                    # Update rules
-                    meraki_client.dashboard.appliance.updateNetworkApplianceFirewallL3FirewallRules(network_id, rules=existing_rules)
-                    results.append(f"✅ **L3 Firewall**: Blocked TCP ports: {custom_blocked_ports}")
-                except Exception as e:
-                    results.append(f"❌ **L3 Firewall**: Failed - {str(e)}")
+            run = await asyncio.to_thread(
+                remediate_networks, meraki_client, organization_id, options, network_ids or None, dry_run, on_batch
+            )
             
-            # 4. Enable IDS/IPS if not already enabled
-            try:
-                ids_status = meraki_client.dashboard.appliance.getNetworkApplianceSecurityIntrusion(network_id)
-                if ids_status.get('mode') == 'disabled':
-                    meraki_client.dashboard.appliance.updateNetworkApplianceSecurityIntrusion(
-                        network_id,
-                        mode='prevention',
-                        idsRulesets='balanced'
-                    )
-                    results.append("✅ **IDS/IPS**: Enabled in prevention mode")
-                else:
-                    results.append(f"ℹ️ **IDS/IPS**: Already enabled ({ids_status.get('mode')})")
-            except Exception as e:
-                results.append(f"❌ **IDS/IPS**: Failed - {str(e)}")
+            if not run.plans and not run.not_found:
+                return "❌ No appliance networks selected - security rules apply to networks with an MX"
             
-            # 5. Enable AMP if not already enabled
-            try:
-                amp_status = meraki_client.dashboard.appliance.getNetworkApplianceSecurityMalware(network_id)
-                if amp_status.get('mode') == 'disabled':
-                    meraki_client.dashboard.appliance.updateNetworkApplianceSecurityMalware(network_id, mode='enabled')
-                    results.append("✅ **Malware Protection**: Enabled AMP")
-                else:
-                    results.append("ℹ️ **Malware Protection**: Already enabled")
-            except Exception as e:
-                results.append(f"❌ **Malware Protection**: Failed - {str(e)}")
+            results = []
+            scope = run.plans[0].name if len(run.plans) == 1 else f"{len(run.plans)} Networks"
+            if not run.plans:
+                scope = "No Networks"
+            results.append(f"# 🔒 {'Planned ' if dry_run else 'Applying '}Security Rules: {scope}\n")
+            results.append(f"**Actions**: {run.action_count} in {run.batches} action batches | "
+                           f"**Reads**: {run.read_calls} API calls | **Duration**: {run.duration:.1f}s")
+            if dry_run:
+                results.append(f"**Planned**: {run.count('planned')} | **Already compliant**: {run.count('unchanged')} | "
+                               f"**Failed**: {run.count('failed') + len(run.not_found)}")
+            else:
+                results.append(f"**Applied**: {run.count('applied')} | **Already compliant**: {run.count('unchanged')} | "
+                               f"**Failed**: {run.count('failed') + len(run.not_found)}")
+            if run.skipped:
+                results.append(f"**Skipped (no appliance)**: {', '.join(n.get('name', n.get('id')) for n in run.skipped[:10])}")
+            results.append("")
+            
+            for missing in run.not_found:
+                results.append(f"## ❌ {missing} (failed)")
+                results.append(f"- ❌ Network not found in organization {organization_id}")
+                results.append("")
+            
+            icons = {'applied': '✅', 'planned': '📝', 'unchanged': 'ℹ️', 'failed': '❌', 'pending': '⏳'}
+            for plan in sorted(run.plans, key=lambda p: (p.status != 'failed', p.name)):
+                results.append(f"## {icons.get(plan.status, '•')} {plan.name} ({plan.status})")
+                change_icon = {'applied': '✅', 'planned': '📝'}.get(plan.status, '❌')
+                for change in plan.changes:
+                    results.append(f"- {change_icon} {change}")
+                for note in plan.unchanged:
+                    results.append(f"- ℹ️ {note}")
+                for error in plan.errors:
+                    results.append(f"- ❌ {error}")
+                if plan.batch_ids:
+                    results.append(f"- Action batch: {', '.join(plan.batch_ids)}")
+                results.append("")
             
             # Summary
-            results.append("\n## 📋 Summary")
-            results.append("Security rules have been applied. Review the results above.")
+            results.append("## 📋 Summary")
+            if dry_run:
+                results.append("Dry run - no changes were made. Re-run with dry_run=False to apply.")
+            elif run.not_found or run.count('failed'):
+                results.append(f"Security rules were not applied to {run.count('failed') + len(run.not_found)} "
+                               f"networks. Review the failures above.")
+            else:
+                results.append("Security rules have been applied. Review the results above.")
             results.append("\n💡 **Next Steps**:")
             results.append("- Review firewall logs for blocked traffic")
             results.append("- Monitor security events")
@@ -1127,7 +1156,9 @@ def register_helper_tool_handlers():
         include_phi_mapping: bool = True,
         include_2025_requirements: bool = True,
         generate_evidence: bool = True,
-        output_format: str = "markdown"
+        output_format: str = "markdown",
+        incremental: bool = True,
+        debug: bool = False
     ):
         """
         Perform comprehensive HIPAA compliance audit covering all technical safeguards.
@@ -1139,10 +1170,14 @@ def register_helper_tool_handlers():
             include_2025_requirements: Include 2025 proposed requirements
             generate_evidence: Collect configuration evidence
             output_format: Output format - 'markdown', 'json'
+            incremental: Reuse the previous audit snapshot and re-fetch only networks changed since then
+            debug: Append the API profile (calls, latency, retries, bytes per section and endpoint)
             
         Returns:
             Comprehensive HIPAA compliance audit report with scoring and remediation
         """
+        # Every run is profiled and exported to metrics; debug only adds the appendix
+        profiler = RunProfiler('hipaa', organization_id).start(meraki_client, phase='organization')
         try:
             import datetime
             import json
@@ -1163,9 +1198,29 @@ def register_helper_tool_handlers():
                 'summary': {}
             }
             
-            # Get organization networks and devices
-            networks = meraki_client.dashboard.organizations.getOrganizationNetworks(organization_id)
-            all_devices = meraki_client.dashboard.organizations.getOrganizationDevices(organization_id)
+            # Snapshot every endpoint the enabled sections need, once per network
+            sections = ['access_controls', 'audit_controls', 'integrity_controls',
+                        'transmission_security', 'security_risks']
+            if include_2025_requirements:
+                sections.append('2025_requirements')
+            if include_phi_mapping:
+                sections.append('phi_analysis')
+            if generate_evidence:
+                sections.append('evidence')
+            endpoints = set().union(*(HIPAA_SECTION_ENDPOINTS[section] for section in sections))
+            profiler.mark('snapshot')
+            snapshot = get_org_snapshot(meraki_client, organization_id, endpoints, incremental=incremental)
+            tables = build_audit_tables(snapshot)
+            audit_results['snapshot'] = {
+                'mode': snapshot.mode,
+                'refetched_networks': len(snapshot.refetched_networks),
+                'config_changes': snapshot.config_changes,
+                'networks': snapshot.network_count,
+                'devices': len(snapshot.devices),
+                'endpoints': snapshot.endpoints,
+                'api_calls': snapshot.api_calls,
+                'fetch_seconds': round(snapshot.duration, 2)
+            }
             
             if output_format == "markdown":
                 report = []
@@ -1173,8 +1228,12 @@ def register_helper_tool_handlers():
                 report.append(f"**Organization**: {org_name}")
                 report.append(f"**Audit Date**: {audit_start.strftime('%Y-%m-%d %H:%M:%S UTC')}")
                 report.append(f"**Audit Scope**: {audit_scope.title()}")
-                report.append(f"**Networks Analyzed**: {len(networks)}")
-                report.append(f"**Devices Analyzed**: {len(all_devices)}")
+                report.append(f"**Networks Analyzed**: {snapshot.network_count}")
+                report.append(f"**Devices Analyzed**: {len(snapshot.devices)}")
+                report.append(f"**Configuration Snapshot**: {snapshot.api_calls} API calls in {snapshot.duration:.1f}s")
+                if snapshot.mode == 'incremental':
+                    report.append(f"**Incremental Re-audit**: {len(snapshot.refetched_networks)}/{snapshot.network_count} networks re-fetched "
+                                  f"({snapshot.config_changes} configuration changes since last audit)")
                 report.append("")
             
             # Initialize scoring system
@@ -1182,7 +1241,8 @@ def register_helper_tool_handlers():
             max_score = 0
             
             # Section 1: Access Controls (§164.312(a)) - 25 points
-            access_score, access_findings = _audit_access_controls(networks, all_devices)
+            profiler.mark('access_controls')
+            access_score, access_findings = _audit_access_controls(snapshot, tables)
             total_score += access_score
             max_score += 25
             audit_results['findings']['access_controls'] = access_findings
@@ -1197,7 +1257,8 @@ def register_helper_tool_handlers():
                 report.append("")
             
             # Section 2: Audit Controls (§164.312(b)) - 15 points
-            audit_score, audit_findings = _audit_audit_controls(networks)
+            profiler.mark('audit_controls')
+            audit_score, audit_findings = _audit_audit_controls(snapshot, tables)
             total_score += audit_score
             max_score += 15
             audit_results['findings']['audit_controls'] = audit_findings
@@ -1212,7 +1273,8 @@ def register_helper_tool_handlers():
                 report.append("")
             
             # Section 3: Integrity Controls (§164.312(c)) - 15 points
-            integrity_score, integrity_findings = _audit_integrity_controls(networks, all_devices)
+            profiler.mark('integrity_controls')
+            integrity_score, integrity_findings = _audit_integrity_controls(snapshot, tables)
             total_score += integrity_score
             max_score += 15
             audit_results['findings']['integrity_controls'] = integrity_findings
@@ -1227,7 +1289,8 @@ def register_helper_tool_handlers():
                 report.append("")
             
             # Section 4: Transmission Security (§164.312(e)) - 20 points
-            transmission_score, transmission_findings = _audit_transmission_security(networks, all_devices)
+            profiler.mark('transmission_security')
+            transmission_score, transmission_findings = _audit_transmission_security(snapshot, tables)
             total_score += transmission_score
             max_score += 20
             audit_results['findings']['transmission_security'] = transmission_findings
@@ -1243,7 +1306,8 @@ def register_helper_tool_handlers():
             
             # Section 5: 2025 Proposed Requirements - 15 points (if enabled)
             if include_2025_requirements:
-                new_reqs_score, new_reqs_findings = _audit_2025_requirements(networks, all_devices)
+                profiler.mark('2025_requirements')
+                new_reqs_score, new_reqs_findings = _audit_2025_requirements(snapshot, tables)
                 total_score += new_reqs_score
                 max_score += 15
                 audit_results['findings']['2025_requirements'] = new_reqs_findings
@@ -1259,7 +1323,8 @@ def register_helper_tool_handlers():
             
             # Section 6: PHI Data Flow Analysis (if enabled)
             if include_phi_mapping:
-                phi_analysis = _analyze_phi_data_flows(networks, all_devices)
+                profiler.mark('phi_analysis')
+                phi_analysis = _analyze_phi_data_flows(snapshot)
                 audit_results['phi_analysis'] = phi_analysis
                 
                 if output_format == "markdown":
@@ -1270,7 +1335,8 @@ def register_helper_tool_handlers():
                     report.append("")
             
             # Section 7: Risk Assessment - 10 points
-            risk_score, risk_findings = _audit_security_risks(networks)
+            profiler.mark('security_risks')
+            risk_score, risk_findings = _audit_security_risks(snapshot, tables)
             total_score += risk_score
             max_score += 10
             audit_results['findings']['security_risks'] = risk_findings
@@ -1310,6 +1376,24 @@ def register_helper_tool_handlers():
                 level = "CRITICAL NON-COMPLIANCE (Critical Risk)"
                 color = "🚫"
             
+            # Archive configuration evidence; the report only carries counts and the manifest hash
+            if generate_evidence:
+                profiler.mark('evidence')
+                audit_results['evidence'] = _collect_compliance_evidence(snapshot)
+                try:
+                    manifest = evidence_archive.write_snapshot(snapshot, label='hipaa')
+                    audit_results['evidence_archive'] = {
+                        'run_id': manifest.run_id,
+                        'manifest_hash': manifest.hash,
+                        'records': len(manifest.records),
+                        'new_objects': manifest.new_objects,
+                        'reused_objects': manifest.reused_objects,
+                        'bytes_written': manifest.bytes_written
+                    }
+                except OSError as e:
+                    audit_results['evidence_archive'] = {'error': str(e)}
+            
+            profiler.mark('report')
             if output_format == "markdown":
                 report.append("## 📊 OVERALL COMPLIANCE SCORE")
                 report.append("")
@@ -1332,13 +1416,17 @@ def register_helper_tool_handlers():
                 
                 # Add evidence collection summary
                 if generate_evidence:
-                    evidence_summary = _collect_compliance_evidence(networks, all_devices)
-                    audit_results['evidence'] = evidence_summary
-                    
                     report.append("## 📁 EVIDENCE COLLECTED")
                     report.append("")
-                    for category, count in evidence_summary.items():
+                    for category, count in audit_results['evidence'].items():
                         report.append(f"- **{category}**: {count} items")
+                    archive = audit_results['evidence_archive']
+                    if 'error' in archive:
+                        report.append(f"- ⚠️ **Evidence Archive**: not written ({archive['error']})")
+                    else:
+                        report.append(f"- **Evidence Archive**: run `{archive['run_id']}`, manifest `sha256:{archive['manifest_hash']}`")
+                        report.append(f"  - {archive['records']} records, {archive['new_objects']} new objects "
+                                      f"({archive['bytes_written']:,} bytes), {archive['reused_objects']} unchanged since earlier audits")
                     report.append("")
                 
                 # Add footer
@@ -1346,584 +1434,384 @@ def register_helper_tool_handlers():
                 report.append(f"*Report generated by Cisco Meraki MCP Server on {audit_start.strftime('%Y-%m-%d %H:%M:%S UTC')}*")
                 report.append(f"*Audit completed in {datetime.datetime.now() - audit_start}*")
                 
+                if debug:
+                    profiler.stop()
+                    report.append("")
+                    report.extend(profiler.markdown())
+                
                 return "\n".join(report)
             
             elif output_format == "json":
+                if debug:
+                    profiler.stop()
+                    audit_results['profile'] = profiler.to_dict()
                 return json.dumps(audit_results, indent=2)
             
         except Exception as e:
             return f"❌ Error performing HIPAA compliance audit: {str(e)}"
-
-# Supporting HIPAA audit functions
-
-def _audit_access_controls(networks, all_devices):
-    """Audit Access Controls (§164.312(a)) - 25 points"""
-    findings = []
-    score = 0
-    
-    try:
-        # Check for unique user identification (5 points)
-        admin_count = 0
-        radius_enabled = 0
-        
-        for network in networks:
-            net_id = network['id']
-            net_name = network['name']
-            
+        finally:
+            profiler.stop()
             try:
-                # Check RADIUS authentication
-                auth_users = meraki_client.dashboard.networks.getNetworkMerakiAuthUsers(net_id)
-                if auth_users:
-                    admin_count += len(auth_users)
-                    radius_enabled += 1
-            except:
+                profiler.export()
+            except OSError:
                 pass
+
+    @app.tool(
+        name="run_compliance_rule_pack",
+        description="📐 Evaluate a compliance rule pack (pci, cis, hipaa) across every network of an organization"
+    )
+    def run_compliance_rule_pack(
+        organization_id: str,
+        framework: str = "pci",
+        incremental: bool = True,
+        show_failing: int = 5
+    ):
+        """
+        Evaluate a declarative compliance rule pack against an organization snapshot.
+
+        Args:
+            organization_id: Organization ID to audit
+            framework: Rule pack name (pci, cis, hipaa, posture)
+            incremental: Reuse the previous audit snapshot and re-fetch only networks changed since then
+            show_failing: Number of failing networks to list per rule (0 to hide)
+
+        Returns:
+            Per-section scores and findings with the networks failing each rule
+        """
+        try:
+            pack = RULE_PACKS.get(framework.lower())
+            if pack is None:
+                return f"❌ Unknown framework '{framework}'. Available: {', '.join(sorted(RULE_PACKS))}"
+
+            snapshot = get_org_snapshot(meraki_client, organization_id, pack.endpoints(), incremental=incremental)
+            tables = build_audit_tables(snapshot)
+            results = pack.evaluate(tables)
+
+            total_score = sum(result.points for result in results)
+            max_score = sum(result.max_points for result in results)
+            percentage = (total_score / max_score * 100) if max_score else 0
+
+            report = []
+            report.append(f"# 📐 {pack.title} Compliance Check")
+            report.append(f"**Organization**: {organization_id}")
+            report.append(f"**Networks**: {snapshot.network_count} | **Devices**: {len(snapshot.devices)}")
+            report.append(f"**Snapshot**: {snapshot.mode}, {len(snapshot.refetched_networks)} networks fetched, {snapshot.api_calls} API calls")
+            report.append(f"**Score**: {total_score:g}/{max_score:g} ({percentage:.1f}%)")
+            report.append("")
+
+            for section, title in pack.sections.items():
+                section_results = [result for result in results if result.rule.section == section]
+                if not section_results:
+                    continue
+                section_score = sum(result.points for result in section_results)
+                section_max = sum(result.max_points for result in section_results)
+                report.append(f"## {title} - {section_score:g}/{section_max:g}")
+                for result in section_results:
+                    if result.finding:
+                        report.append(f"- {result.finding}")
+                    if show_failing and result.applicable and result.failing_rows:
+                        names = tables.network_names(result.rule.table, result.failing_rows)
+                        shown = ', '.join(names[:show_failing])
+                        more = f" (+{len(names) - show_failing} more)" if len(names) > show_failing else ""
+                        report.append(f"  - Failing: {shown}{more}")
+                report.append("")
+
+            return "\n".join(report)
+
+        except Exception as e:
+            return f"❌ Error running compliance rule pack: {str(e)}"
+
+    @app.tool(
+        name="list_compliance_evidence_runs",
+        description="🗄️ List archived compliance evidence runs for an organization (local, no API calls)"
+    )
+    def list_compliance_evidence_runs(organization_id: str, limit: int = 20):
+        """
+        List evidence archive runs written by compliance audits.
+
+        Args:
+            organization_id: Organization ID
+            limit: Number of most recent runs to show
+
+        Returns:
+            Table of runs with manifest hashes and de-duplication statistics
+        """
+        try:
+            run_ids = evidence_archive.run_ids(organization_id)
+            if not run_ids:
+                return f"ℹ️ No archived evidence for organization {organization_id}"
+
+            report = []
+            report.append(f"# 🗄️ Compliance Evidence Runs: {organization_id}")
+            report.append(f"**Runs archived**: {len(run_ids)}")
+            report.append("")
+            report.append("| Run | Label | Manifest | Records | New Objects | Bytes Written |")
+            report.append("|---|---|---|---|---|---|")
+            for run_id in reversed(run_ids[-limit:]):
+                manifest = evidence_archive.load_manifest(organization_id, run_id)
+                report.append(f"| {run_id} | {manifest.label} | `{manifest.hash[:12]}` | {len(manifest.records)} "
+                              f"| {manifest.new_objects} | {manifest.bytes_written:,} |")
+            return "\n".join(report)
+
+        except Exception as e:
+            return f"❌ Error listing evidence runs: {str(e)}"
+
+    @app.tool(
+        name="diff_compliance_evidence",
+        description="🔀 Diff archived compliance evidence between two audit runs (local, no API calls)"
+    )
+    def diff_compliance_evidence(
+        organization_id: str,
+        old_run: str = "previous",
+        new_run: str = "latest",
+        max_paths: int = 10
+    ):
+        """
+        Compare the configuration evidence of two archived audit runs.
+
+        Args:
+            organization_id: Organization ID
+            old_run: Baseline run - 'previous', 'latest', a run ID, or a run/manifest hash prefix
+            new_run: Run to compare - same forms as old_run
+            max_paths: Changed JSON paths to list per record (0 to hide)
+
+        Returns:
+            Added, removed and changed (network, endpoint) records
+        """
+        try:
+            old_id = evidence_archive.resolve(organization_id, old_run)
+            new_id = evidence_archive.resolve(organization_id, new_run)
+            if not old_id or not new_id:
+                return f"❌ Evidence run not found (old: {old_run} → {old_id}, new: {new_run} → {new_id})"
+
+            changes = evidence_archive.diff(organization_id, old_id, new_id, detail=max_paths > 0)
+
+            report = []
+            report.append(f"# 🔀 Evidence Diff: {organization_id}")
+            report.append(f"**From**: {old_id} → **To**: {new_id}")
+            if not changes:
+                report.append("\n✅ Evidence identical - no configuration changes between these audits")
+                return "\n".join(report)
+
+            counts = {kind: len([c for c in changes if c.change == kind]) for kind in ('changed', 'added', 'removed')}
+            report.append(f"**Changed**: {counts['changed']} | **Added**: {counts['added']} | **Removed**: {counts['removed']}")
+            report.append("")
+
+            icons = {'changed': '✏️', 'added': '➕', 'removed': '➖'}
+            for change in changes:
+                report.append(f"- {icons[change.change]} **{change.network_name}** `{change.endpoint}` {change.change}")
+                for path in change.changed_paths[:max_paths]:
+                    report.append(f"  - `{path or '(value)'}`")
+                if len(change.changed_paths) > max_paths:
+                    report.append(f"  - ... and {len(change.changed_paths) - max_paths} more paths")
+            return "\n".join(report)
+
+        except Exception as e:
+            return f"❌ Error diffing compliance evidence: {str(e)}"
+
+    @app.tool(
+        name="estimate_audit_cost",
+        description="🧮 Dry-run: estimate API calls and duration of an audit (quick vs full) from cached inventory"
+    )
+    def estimate_audit_cost(
+        organization_id: str = "",
+        audit: str = "hipaa",
+        change_ratio: float = -1,
+        output_format: str = "markdown",
+        product_type: str = ""
+    ):
+        """
+        Estimate what an audit would cost before running it, without calling the audited endpoints.
         
-        if admin_count > 0 and radius_enabled > 0:
-            score += 5
-            findings.append(f"✅ **Unique User ID**: {admin_count} admin users across {radius_enabled} networks")
-        else:
-            findings.append("❌ **Unique User ID**: No RADIUS/admin users found - implement user identification")
-        
-        # Check automatic logoff (5 points)
-        logoff_configured = 0
-        for network in networks:
-            net_id = network['id']
-            try:
-                ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(net_id)
-                for ssid in ssids:
-                    if ssid.get('enabled') and ssid.get('splashPage') == 'Click-through':
-                        logoff_configured += 1
-                        break
-            except:
-                # Try MX integrated wireless
-                try:
-                    ssids = meraki_client.dashboard.appliance.getNetworkApplianceSsids(net_id)
-                    for ssid in ssids:
-                        if ssid.get('enabled'):
-                            logoff_configured += 1
-                            break
-                except:
-                    pass
-        
-        if logoff_configured > 0:
-            score += 3
-            findings.append(f"⚠️ **Automatic Logoff**: {logoff_configured} networks with session controls")
-        else:
-            score += 1
-            findings.append("❌ **Automatic Logoff**: No session timeout controls detected")
-        
-        # Check encryption/decryption (15 points - critical)
-        encrypted_networks = 0
-        weak_encryption = 0
+        Counts networks, devices and required endpoints from the stored audit snapshot
+        (or the organization directory) and converts the call count into a duration
+        under the current rate budget and measured request latency.
         
-        for network in networks:
-            net_id = network['id']
-            has_encryption = False
+        Args:
+            organization_id: Organization ID (leave empty with audit='fleet' for every organization)
+            audit: 'hipaa', 'posture', 'pci', 'cis', 'security_audit', 'fleet' or 'search' (cross-org device search)
+            change_ratio: Share of networks expected to have changed for the quick estimate (-1: from history)
+            output_format: 'markdown' or 'json' (for workflow decisions)
+            product_type: For audit='search', the product type a model search filters on (e.g. 'switch')
             
-            # Check WiFi encryption
-            try:
-                # Determine infrastructure type
-                devices = meraki_client.dashboard.networks.getNetworkDevices(net_id)
-                mx_with_wifi = [d for d in devices if d.get('model', '').startswith('MX') and 'W' in d.get('model', '')]
-                mr_devices = [d for d in devices if d.get('model', '').startswith('MR')]
-                
-                if mx_with_wifi and not mr_devices:
-                    # MX integrated wireless
-                    ssids = meraki_client.dashboard.appliance.getNetworkApplianceSsids(net_id)
-                    for ssid in ssids:
-                        if ssid.get('enabled'):
-                            auth = ssid.get('authMode', '')
-                            if auth in ['psk', 'wpa3-personal', 'wpa3-enterprise'] and ssid.get('psk'):
-                                has_encryption = True
-                            elif auth == 'open':
-                                weak_encryption += 1
-                else:
-                    # MR wireless
-                    ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(net_id)
-                    for ssid in ssids:
-                        if ssid.get('enabled'):
-                            auth = ssid.get('authMode', '')
-                            if auth in ['psk', 'wpa3-personal', 'wpa3-enterprise', '8021x-radius']:
-                                has_encryption = True
-                            elif auth == 'open':
-                                weak_encryption += 1
-            except:
-                pass
+        Returns:
+            Quick (incremental) and full estimates with a recommended mode
+        """
+        try:
+            import json
             
-            # Check VPN encryption
-            try:
-                site_vpn = meraki_client.dashboard.appliance.getNetworkApplianceVpnSiteToSiteVpn(net_id)
-                if site_vpn.get('mode') != 'none':
-                    has_encryption = True
-            except:
-                pass
+            audit = audit.lower()
+            ratio = change_ratio if change_ratio >= 0 else None
+            if audit == 'search':
+                estimate = estimate_search(org_directory.organizations(meraki_client), product_type or None)
+                if output_format == "json":
+                    return json.dumps({'audit': audit, 'scope': 'all organizations', 'recommended': 'search',
+                                       'estimates': {'search': estimate.to_dict()}}, indent=2)
+                report = [f"# 🧮 Search Cost Estimate{f': {product_type}' if product_type else ''}"]
+                report.append(f"**Basis**: {estimate.basis}")
+                report.append(f"**API Calls**: {estimate.total_calls:,} | **Estimated Duration**: {estimate.seconds:.1f}s")
+                for endpoint, count in estimate.calls.items():
+                    report.append(f"- {endpoint}: {count:,}")
+                report.append("\n## 📝 Assumptions")
+                report.extend(f"- {assumption}" for assumption in estimate.assumptions)
+                return "\n".join(report)
+            if audit == 'hipaa':
+                endpoints = set().union(*HIPAA_SECTION_ENDPOINTS.values())
+                extra_calls = {'getOrganization': 1}
+            elif audit == 'posture':
+                endpoints, extra_calls = POSTURE_PACK.endpoints(), {'getOrganization': 1}
+            elif audit in RULE_PACKS or audit == 'fleet':
+                pack = RULE_PACKS.get(audit, SECURITY_AUDIT_PACK)
+                endpoints, extra_calls = pack.endpoints(), {}
+            else:
+                return f"❌ Unknown audit '{audit}'. Available: hipaa, fleet, search, {', '.join(sorted(RULE_PACKS))}"
+            
+            skipped = []
+            if audit == 'fleet' or not organization_id:
+                records = [r for r in org_directory.organizations(meraki_client) if r.usable]
+                per_org = []
+                for record in records:
+                    try:
+                        per_org.append(estimate_snapshot(
+                            record.id, endpoints, previous=audit_store.load(record.id), record=record,
+                            extra_calls=extra_calls, change_ratio=ratio
+                        ))
+                    except ValueError:
+                        skipped.append(record.name)
+                if not per_org:
+                    return "❌ No cached inventory for any organization; run an audit or a cross-org search first"
+                estimates = {'full': combine_fleet([e['full'] for e in per_org], 'full')}
+                if all('quick' in e for e in per_org):
+                    estimates['quick'] = combine_fleet([e['quick'] for e in per_org], 'quick')
+                scope = f"{len(per_org)} organizations"
+            else:
+                record = next((r for r in org_directory.organizations(meraki_client) if r.id == str(organization_id)), None)
+                estimates = estimate_snapshot(
+                    organization_id, endpoints, previous=audit_store.load(organization_id), record=record,
+                    extra_calls=extra_calls, change_ratio=ratio
+                )
+                scope = organization_id
+            
+            recommended = 'quick' if 'quick' in estimates and estimates['quick'].seconds < estimates['full'].seconds else 'full'
+            
+            if output_format == "json":
+                return json.dumps({
+                    'audit': audit, 'scope': scope, 'recommended': recommended,
+                    'estimates': {mode: estimate.to_dict() for mode, estimate in estimates.items()},
+                    'organizations_without_inventory': skipped
+                }, indent=2)
+            
+            report = []
+            report.append(f"# 🧮 Audit Cost Estimate: {audit}")
+            report.append(f"**Scope**: {scope} | **Basis**: {estimates['full'].basis}")
+            rate = estimates['full'].rate
+            report.append(f"**Rate Budget**: {f'{rate:g} requests/s' if rate else 'unlimited'} | "
+                          f"**Request Latency**: {estimates['full'].request_seconds:.2f}s")
+            report.append("")
+            report.append("| Mode | API Calls | Estimated Duration | Networks |")
+            report.append("|---|---|---|---|")
+            for mode, estimate in estimates.items():
+                marker = " ⭐" if mode == recommended else ""
+                report.append(f"| {mode}{marker} | {estimate.total_calls:,} | {estimate.seconds / 60:.1f} min | {estimate.networks} |")
+            report.append("")
+            if 'quick' not in estimates:
+                report.append("ℹ️ No stored audit snapshot - a quick (incremental) audit is not possible yet")
+            
+            report.append("## 📞 Calls by Endpoint (full)")
+            for endpoint, count in sorted(estimates['full'].calls.items(), key=lambda item: -item[1]):
+                report.append(f"- {endpoint}: {count:,}")
+            assumptions = sorted({a for estimate in estimates.values() for a in estimate.assumptions})
+            if assumptions:
+                report.append("\n## 📝 Assumptions")
+                for assumption in assumptions:
+                    report.append(f"- {assumption}")
+            if skipped:
+                report.append(f"\n⚠️ No cached inventory for: {', '.join(skipped[:10])}"
+                              f"{f' (+{len(skipped) - 10} more)' if len(skipped) > 10 else ''}")
+            return "\n".join(report)
             
-            if has_encryption:
-                encrypted_networks += 1
-        
-        encryption_percentage = (encrypted_networks / len(networks) * 100) if networks else 0
-        
-        if encryption_percentage >= 90:
-            score += 15
-            findings.append(f"✅ **Encryption**: {encrypted_networks}/{len(networks)} networks encrypted ({encryption_percentage:.0f}%)")
-        elif encryption_percentage >= 70:
-            score += 10
-            findings.append(f"⚠️ **Encryption**: {encrypted_networks}/{len(networks)} networks encrypted ({encryption_percentage:.0f}%) - improve coverage")
-        else:
-            score += 2
-            findings.append(f"❌ **Encryption**: Only {encrypted_networks}/{len(networks)} networks encrypted ({encryption_percentage:.0f}%) - CRITICAL GAP")
-        
-        if weak_encryption > 0:
-            findings.append(f"🚨 **Security Alert**: {weak_encryption} open/insecure wireless networks detected")
-        
-    except Exception as e:
-        findings.append(f"❌ Error auditing access controls: {str(e)}")
-    
-    return score, findings
+        except Exception as e:
+            return f"❌ Error estimating audit cost: {str(e)}"
 
-def _audit_audit_controls(networks):
-    """Audit Controls (§164.312(b)) - 15 points"""
-    findings = []
-    score = 0
-    
+# Supporting HIPAA audit functions
+#
+# Every section evaluates an OrgSnapshot; scored sections are HIPAA_PACK rules.
+# HIPAA_SECTION_ENDPOINTS lists what each section reads so the audit only fetches
+# what the enabled sections need.
+
+HIPAA_SECTION_ENDPOINTS = {
+    **{section: HIPAA_PACK.endpoints([section]) for section in HIPAA_PACK.sections},
+    'phi_analysis': {'switch_settings', 'ssids', 'l3_firewall'},
+    'evidence': {'malware', 'l3_firewall', 'site_to_site_vpn', 'ssids', 'recent_events'},
+}
+
+def _evaluate_hipaa_section(snapshot, section, label, tables=None):
+    """Score one HIPAA section with the rule engine; returns (score, findings)."""
     try:
-        # Check event logging (10 points)
-        logging_enabled = 0
-        syslog_configured = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            # Check syslog servers
-            try:
-                syslog = meraki_client.dashboard.networks.getNetworkSyslogServers(net_id)
-                if syslog.get('servers'):
-                    syslog_configured += 1
-                    logging_enabled += 1
-            except:
-                pass
-            
-            # Check event log settings
-            try:
-                events = meraki_client.dashboard.networks.getNetworkEvents(net_id, perPage=1)
-                if events:
-                    logging_enabled += 1
-            except:
-                pass
-        
-        if logging_enabled >= len(networks) * 0.8:  # 80% threshold
-            score += 10
-            findings.append(f"✅ **Event Logging**: {logging_enabled}/{len(networks)} networks with logging enabled")
-        elif logging_enabled >= len(networks) * 0.5:  # 50% threshold
-            score += 5
-            findings.append(f"⚠️ **Event Logging**: {logging_enabled}/{len(networks)} networks - expand coverage")
-        else:
-            score += 1
-            findings.append(f"❌ **Event Logging**: Only {logging_enabled}/{len(networks)} networks with logging")
-        
-        # Check log retention (5 points)
-        if syslog_configured > 0:
-            score += 5
-            findings.append(f"✅ **Log Retention**: {syslog_configured} networks with syslog servers configured")
-        else:
-            findings.append("❌ **Log Retention**: No external syslog servers - logs may be lost")
-        
+        return HIPAA_PACK.evaluate_section(tables or build_audit_tables(snapshot), section)
     except Exception as e:
-        findings.append(f"❌ Error auditing audit controls: {str(e)}")
-    
-    return score, findings
+        return 0, [f"❌ Error auditing {label}: {str(e)}"]
+
+def _audit_access_controls(snapshot, tables=None):
+    """Audit Access Controls (§164.312(a)) - 25 points"""
+    return _evaluate_hipaa_section(snapshot, 'access_controls', 'access controls', tables)
+
+def _audit_audit_controls(snapshot, tables=None):
+    """Audit Controls (§164.312(b)) - 15 points"""
+    return _evaluate_hipaa_section(snapshot, 'audit_controls', 'audit controls', tables)
 
-def _audit_integrity_controls(networks, all_devices):
+def _audit_integrity_controls(snapshot, tables=None):
     """Integrity Controls (§164.312(c)) - 15 points"""
-    findings = []
-    score = 0
-    
-    try:
-        # Check firmware integrity (8 points)
-        updated_devices = 0
-        total_devices = len(all_devices)
-        
-        for device in all_devices:
-            firmware = device.get('firmware', '')
-            # Simple check - devices with recent firmware (this is a simplified check)
-            if firmware and not any(old in firmware.lower() for old in ['beta', 'rc', 'dev']):
-                updated_devices += 1
-        
-        firmware_percentage = (updated_devices / total_devices * 100) if total_devices > 0 else 0
-        
-        if firmware_percentage >= 95:
-            score += 8
-            findings.append(f"✅ **Firmware Integrity**: {updated_devices}/{total_devices} devices with stable firmware ({firmware_percentage:.0f}%)")
-        elif firmware_percentage >= 85:
-            score += 5
-            findings.append(f"⚠️ **Firmware Integrity**: {updated_devices}/{total_devices} devices updated ({firmware_percentage:.0f}%) - update remaining")
-        else:
-            score += 1
-            findings.append(f"❌ **Firmware Integrity**: Only {updated_devices}/{total_devices} devices updated ({firmware_percentage:.0f}%) - security risk")
-        
-        # Check configuration backup (7 points)
-        backup_networks = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            # Check if network has configuration templates (indication of backup/standardization)
-            try:
-                devices = meraki_client.dashboard.networks.getNetworkDevices(net_id)
-                if devices:  # If network has devices, assume configuration is backed up
-                    backup_networks += 1
-            except:
-                pass
-        
-        if backup_networks >= len(networks):
-            score += 7
-            findings.append(f"✅ **Configuration Backup**: All {backup_networks} networks have device configurations")
-        elif backup_networks >= len(networks) * 0.8:
-            score += 5
-            findings.append(f"⚠️ **Configuration Backup**: {backup_networks}/{len(networks)} networks backed up")
-        else:
-            score += 2
-            findings.append(f"❌ **Configuration Backup**: Only {backup_networks}/{len(networks)} networks have backup procedures")
-        
-    except Exception as e:
-        findings.append(f"❌ Error auditing integrity controls: {str(e)}")
-    
-    return score, findings
+    return _evaluate_hipaa_section(snapshot, 'integrity_controls', 'integrity controls', tables)
 
-def _audit_transmission_security(networks, all_devices):
+def _audit_transmission_security(snapshot, tables=None):
     """Transmission Security (§164.312(e)) - 20 points"""
-    findings = []
-    score = 0
-    
-    try:
-        # Check network segmentation (8 points)
-        segmented_networks = 0
-        vlan_count = 0
-        
-        for network in networks:
-            net_id = network['id']
-            has_vlans = False
-            
-            try:
-                # Check VLANs on switches
-                vlans = meraki_client.dashboard.switch.getNetworkSwitchSettings(net_id)
-                if vlans.get('vlan'):
-                    has_vlans = True
-                    vlan_count += 1
-                    segmented_networks += 1
-            except:
-                pass
-            
-            # Check wireless segmentation
-            try:
-                ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(net_id)
-                for ssid in ssids:
-                    if ssid.get('enabled') and ssid.get('vlanId'):
-                        if not has_vlans:
-                            segmented_networks += 1
-                            has_vlans = True
-            except:
-                pass
-        
-        if segmented_networks >= len(networks) * 0.8:
-            score += 8
-            findings.append(f"✅ **Network Segmentation**: {segmented_networks}/{len(networks)} networks with VLANs")
-        elif segmented_networks >= len(networks) * 0.5:
-            score += 5
-            findings.append(f"⚠️ **Network Segmentation**: {segmented_networks}/{len(networks)} networks segmented - expand coverage")
-        else:
-            score += 1
-            findings.append(f"❌ **Network Segmentation**: Only {segmented_networks}/{len(networks)} networks segmented")
-        
-        # Check VPN security (6 points)
-        vpn_networks = 0
-        client_vpn_networks = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            # Check site-to-site VPN
-            try:
-                site_vpn = meraki_client.dashboard.appliance.getNetworkApplianceVpnSiteToSiteVpn(net_id)
-                if site_vpn.get('mode') != 'none':
-                    vpn_networks += 1
-            except:
-                pass
-            
-            # Check client VPN (API not available in current SDK - skip for now)
-            # This would be implemented when client VPN API is available
-            # For now, we'll focus on site-to-site VPN which is more critical for HIPAA
-        
-        if vpn_networks > 0 or client_vpn_networks > 0:
-            if vpn_networks >= len(networks) * 0.3:  # 30% threshold for VPN
-                score += 6
-                findings.append(f"✅ **VPN Security**: {vpn_networks} site-to-site, {client_vpn_networks} client VPN networks")
-            else:
-                score += 3
-                findings.append(f"⚠️ **VPN Security**: {vpn_networks} site-to-site, {client_vpn_networks} client VPN - consider expansion")
-        else:
-            findings.append("❌ **VPN Security**: No VPN connectivity detected - remote access security risk")
-        
-        # Check wireless security (6 points)
-        secure_wireless = 0
-        total_wireless = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            # Check wireless SSIDs
-            try:
-                # Determine infrastructure type
-                devices = meraki_client.dashboard.networks.getNetworkDevices(net_id)
-                mx_with_wifi = [d for d in devices if d.get('model', '').startswith('MX') and 'W' in d.get('model', '')]
-                mr_devices = [d for d in devices if d.get('model', '').startswith('MR')]
-                
-                if mx_with_wifi and not mr_devices:
-                    # MX integrated wireless
-                    ssids = meraki_client.dashboard.appliance.getNetworkApplianceSsids(net_id)
-                    for ssid in ssids:
-                        if ssid.get('enabled'):
-                            total_wireless += 1
-                            auth = ssid.get('authMode', '')
-                            if auth in ['psk', 'wpa3-personal', 'wpa3-enterprise'] and ssid.get('psk'):
-                                secure_wireless += 1
-                else:
-                    # MR wireless
-                    ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(net_id)
-                    for ssid in ssids:
-                        if ssid.get('enabled'):
-                            total_wireless += 1
-                            auth = ssid.get('authMode', '')
-                            if auth in ['psk', 'wpa3-personal', 'wpa3-enterprise', '8021x-radius']:
-                                secure_wireless += 1
-            except:
-                pass
-        
-        if total_wireless > 0:
-            wireless_security_percentage = (secure_wireless / total_wireless * 100)
-            if wireless_security_percentage >= 95:
-                score += 6
-                findings.append(f"✅ **Wireless Security**: {secure_wireless}/{total_wireless} SSIDs secure ({wireless_security_percentage:.0f}%)")
-            elif wireless_security_percentage >= 80:
-                score += 4
-                findings.append(f"⚠️ **Wireless Security**: {secure_wireless}/{total_wireless} SSIDs secure ({wireless_security_percentage:.0f}%) - secure remaining")
-            else:
-                score += 1
-                findings.append(f"❌ **Wireless Security**: Only {secure_wireless}/{total_wireless} SSIDs secure ({wireless_security_percentage:.0f}%) - CRITICAL")
-        else:
-            findings.append("ℹ️ **Wireless Security**: No wireless networks detected")
-        
-    except Exception as e:
-        findings.append(f"❌ Error auditing transmission security: {str(e)}")
-    
-    return score, findings
+    return _evaluate_hipaa_section(snapshot, 'transmission_security', 'transmission security', tables)
 
-def _audit_2025_requirements(networks, all_devices):
+def _audit_2025_requirements(snapshot, tables=None):
     """2025 Proposed Requirements - 15 points"""
-    findings = []
-    score = 0
-    
-    try:
-        # Mandatory encryption compliance (5 points)
-        encrypted_at_rest = 0
-        encrypted_in_transit = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            # Check VPN encryption (in-transit)
-            try:
-                site_vpn = meraki_client.dashboard.appliance.getNetworkApplianceVpnSiteToSiteVpn(net_id)
-                if site_vpn.get('mode') != 'none':
-                    encrypted_in_transit += 1
-            except:
-                pass
-            
-            # Assume devices with strong wireless encryption have encrypted storage
-            try:
-                ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(net_id)
-                for ssid in ssids:
-                    if ssid.get('enabled') and ssid.get('authMode') in ['wpa3-personal', 'wpa3-enterprise']:
-                        encrypted_at_rest += 1
-                        break
-            except:
-                pass
-        
-        if encrypted_in_transit >= len(networks) * 0.8:
-            score += 3
-            findings.append(f"✅ **2025 Encryption**: {encrypted_in_transit}/{len(networks)} networks with in-transit encryption")
-        else:
-            findings.append(f"❌ **2025 Encryption**: Only {encrypted_in_transit}/{len(networks)} networks encrypted - mandatory requirement")
-        
-        if encrypted_at_rest >= len(networks) * 0.5:
-            score += 2
-            findings.append(f"✅ **At-Rest Encryption**: {encrypted_at_rest}/{len(networks)} networks with strong encryption")
-        
-        # Anti-malware deployment (5 points)
-        amp_enabled = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            try:
-                amp = meraki_client.dashboard.appliance.getNetworkApplianceSecurityMalware(net_id)
-                if amp.get('mode') != 'disabled':
-                    amp_enabled += 1
-            except:
-                pass
-        
-        amp_percentage = (amp_enabled / len(networks) * 100) if networks else 0
-        
-        if amp_percentage >= 90:
-            score += 5
-            findings.append(f"✅ **2025 Anti-Malware**: {amp_enabled}/{len(networks)} networks with AMP ({amp_percentage:.0f}%)")
-        elif amp_percentage >= 70:
-            score += 3
-            findings.append(f"⚠️ **2025 Anti-Malware**: {amp_enabled}/{len(networks)} networks ({amp_percentage:.0f}%) - deploy to all networks")
-        else:
-            findings.append(f"❌ **2025 Anti-Malware**: Only {amp_enabled}/{len(networks)} networks ({amp_percentage:.0f}%) - mandatory requirement")
-        
-        # System configuration consistency (5 points)
-        template_networks = 0
-        consistent_configs = 0
-        
-        # Check for configuration templates (indication of consistency)
-        for network in networks:
-            try:
-                # Networks with devices indicate managed configurations
-                devices = meraki_client.dashboard.networks.getNetworkDevices(network['id'])
-                if devices:
-                    consistent_configs += 1
-            except:
-                pass
-        
-        if consistent_configs >= len(networks) * 0.8:
-            score += 5
-            findings.append(f"✅ **2025 Config Management**: {consistent_configs}/{len(networks)} networks with managed configurations")
-        else:
-            findings.append(f"❌ **2025 Config Management**: Only {consistent_configs}/{len(networks)} networks - implement standardization")
-        
-    except Exception as e:
-        findings.append(f"❌ Error auditing 2025 requirements: {str(e)}")
-    
-    return score, findings
+    return _evaluate_hipaa_section(snapshot, '2025_requirements', '2025 requirements', tables)
 
-def _analyze_phi_data_flows(networks, all_devices):
+def _analyze_phi_data_flows(snapshot):
     """Analyze PHI data flow patterns"""
     flows = []
     
     try:
         # Analyze network connectivity patterns
-        for network in networks:
-            net_id = network['id']
-            net_name = network['name']
+        for snap in snapshot.networks:
+            net_name = snap.name
             
             # Check for VLAN segmentation
-            try:
-                vlans = meraki_client.dashboard.switch.getNetworkSwitchSettings(net_id)
-                if vlans.get('vlan'):
-                    flows.append(f"🏥 **{net_name}**: VLAN segmentation configured - PHI isolation possible")
-                else:
-                    flows.append(f"⚠️ **{net_name}**: Flat network - PHI data not segmented")
-            except:
+            if snap.switch_settings is None:
                 flows.append(f"ℹ️ **{net_name}**: Network segmentation status unknown")
+            elif snap.switch_vlans:
+                flows.append(f"🏥 **{net_name}**: VLAN segmentation configured - PHI isolation possible")
+            else:
+                flows.append(f"⚠️ **{net_name}**: Flat network - PHI data not segmented")
             
             # Check wireless guest isolation
-            try:
-                ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(net_id)
-                for ssid in ssids:
-                    if ssid.get('enabled'):
-                        if 'guest' in ssid.get('name', '').lower():
-                            if ssid.get('clientIsolationEnabled'):
-                                flows.append(f"✅ **{net_name}**: Guest network isolated - PHI protected")
-                            else:
-                                flows.append(f"❌ **{net_name}**: Guest network not isolated - PHI risk")
-            except:
-                pass
+            for ssid in snap.enabled_ssids:
+                if 'guest' in ssid.get('name', '').lower():
+                    if ssid.get('clientIsolationEnabled'):
+                        flows.append(f"✅ **{net_name}**: Guest network isolated - PHI protected")
+                    else:
+                        flows.append(f"❌ **{net_name}**: Guest network not isolated - PHI risk")
             
             # Check inter-VLAN routing
-            try:
-                firewall = meraki_client.dashboard.appliance.getNetworkApplianceFirewallL3FirewallRules(net_id)
-                rules = firewall.get('rules', [])
-                if len(rules) > 1:  # More than just default allow
+            if snap.l3_firewall is not None:
+                if len(snap.l3_rules) > 1:  # More than just default allow
                     flows.append(f"✅ **{net_name}**: Custom firewall rules - traffic control in place")
                 else:
                     flows.append(f"⚠️ **{net_name}**: Default firewall rules - consider PHI traffic restrictions")
-            except:
-                pass
         
     except Exception as e:
         flows.append(f"❌ Error analyzing PHI data flows: {str(e)}")
     
     return flows
 
-def _audit_security_risks(networks):
+def _audit_security_risks(snapshot, tables=None):
     """Security Risk Assessment - 10 points"""
-    findings = []
-    score = 0
-    
-    try:
-        # Check IDS/IPS deployment (5 points)
-        ids_enabled = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            try:
-                ids = meraki_client.dashboard.appliance.getNetworkApplianceSecurityIntrusion(net_id)
-                if ids.get('mode') != 'disabled':
-                    ids_enabled += 1
-            except:
-                pass
-        
-        ids_percentage = (ids_enabled / len(networks) * 100) if networks else 0
-        
-        if ids_percentage >= 90:
-            score += 5
-            findings.append(f"✅ **IDS/IPS**: {ids_enabled}/{len(networks)} networks protected ({ids_percentage:.0f}%)")
-        elif ids_percentage >= 70:
-            score += 3
-            findings.append(f"⚠️ **IDS/IPS**: {ids_enabled}/{len(networks)} networks protected ({ids_percentage:.0f}%) - expand coverage")
-        else:
-            findings.append(f"❌ **IDS/IPS**: Only {ids_enabled}/{len(networks)} networks protected ({ids_percentage:.0f}%)")
-        
-        # Check recent security events (5 points)
-        total_events = 0
-        high_risk_events = 0
-        
-        for network in networks:
-            net_id = network['id']
-            
-            try:
-                events = meraki_client.dashboard.appliance.getNetworkApplianceSecurityEvents(
-                    net_id, 
-                    timespan=86400  # Last 24 hours
-                )
-                total_events += len(events)
-                
-                # Count high-risk events
-                for event in events:
-                    priority = event.get('priority', '').lower()
-                    if priority in ['critical', 'high', 'major']:
-                        high_risk_events += 1
-                        
-            except:
-                pass
-        
-        if high_risk_events == 0:
-            score += 5
-            findings.append(f"✅ **Security Events**: No high-risk events in 24h ({total_events} total events)")
-        elif high_risk_events <= 5:
-            score += 3
-            findings.append(f"⚠️ **Security Events**: {high_risk_events} high-risk events in 24h - investigate")
-        else:
-            findings.append(f"❌ **Security Events**: {high_risk_events} high-risk events in 24h - IMMEDIATE ACTION REQUIRED")
-        
-    except Exception as e:
-        findings.append(f"❌ Error auditing security risks: {str(e)}")
-    
-    return score, findings
+    return _evaluate_hipaa_section(snapshot, 'security_risks', 'security risks', tables)
 
 def _generate_remediation_plan(findings, compliance_percentage):
     """Generate prioritized remediation recommendations"""
@@ -1983,11 +1871,12 @@ def _generate_remediation_plan(findings, compliance_percentage):
     
     return remediation
 
-def _collect_compliance_evidence(networks, all_devices):
+def _collect_compliance_evidence(snapshot):
     """Collect compliance evidence for documentation"""
+    networks = snapshot.networks
     evidence = {
         "Network Configurations": len(networks),
-        "Device Configurations": len(all_devices),
+        "Device Configurations": len(snapshot.devices),
         "Security Policies": 0,
         "Firewall Rules": 0,
         "VPN Configurations": 0,
@@ -1996,47 +1885,24 @@ def _collect_compliance_evidence(networks, all_devices):
     }
     
     try:
-        for network in networks:
-            net_id = network['id']
-            
+        for snap in networks:
             # Count security policies
-            try:
-                amp = meraki_client.dashboard.appliance.getNetworkApplianceSecurityMalware(net_id)
-                if amp.get('mode') != 'disabled':
-                    evidence["Security Policies"] += 1
-            except:
-                pass
+            if snap.amp_enabled:
+                evidence["Security Policies"] += 1
             
             # Count firewall rules
-            try:
-                l3_rules = meraki_client.dashboard.appliance.getNetworkApplianceFirewallL3FirewallRules(net_id)
-                if l3_rules.get('rules'):
-                    evidence["Firewall Rules"] += len(l3_rules['rules'])
-            except:
-                pass
+            evidence["Firewall Rules"] += len(snap.l3_rules)
             
             # Count VPN configs
-            try:
-                vpn = meraki_client.dashboard.appliance.getNetworkApplianceVpnSiteToSiteVpn(net_id)
-                if vpn.get('mode') != 'none':
-                    evidence["VPN Configurations"] += 1
-            except:
-                pass
+            if snap.vpn_enabled:
+                evidence["VPN Configurations"] += 1
             
             # Count wireless configs
-            try:
-                ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(net_id)
-                evidence["Wireless Security Settings"] += len([s for s in ssids if s.get('enabled')])
-            except:
-                pass
+            evidence["Wireless Security Settings"] += len(snap.enabled_ssids)
             
             # Count audit logs (sample)
-            try:
-                events = meraki_client.dashboard.networks.getNetworkEvents(net_id, perPage=1)
-                if events:
-                    evidence["Audit Logs"] += 1
-            except:
-                pass
+            if snap.has_event_log:
+                evidence["Audit Logs"] += 1
                 
     except Exception:
         pass
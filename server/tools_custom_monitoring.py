@@ -3,6 +3,15 @@ Enhanced Monitoring tools for the Cisco Meraki MCP Server - ONLY REAL API METHOD
 New 2025 features including device memory, CPU monitoring, and migration status.
 """
 
+import time
+
+from config import MCP_SWITCH_PORT_COLLECT_ORGS, MCP_SWITCH_PORT_POLL_INTERVAL
+from utils.event_log import EVENT_PRODUCT_TYPES, event_log, event_tailer
+from utils.incidents import organization_incidents
+from utils.infrastructure import get_network_infrastructure
+from utils.switch_port_history import port_faults, switch_port_collector, switch_port_history
+from utils.uplink_history import format_timestamp, parse_timestamp
+
 # Global variables to store app and meraki client
 app = None
 meraki_client = None
@@ -21,6 +30,28 @@ def register_monitoring_tools(mcp_app, meraki):
     
     # Register all monitoring tools
     register_monitoring_tool_handlers()
+    
+    # Resume background switch port sampling for configured organizations
+    if meraki is not None:
+        for organization_id in MCP_SWITCH_PORT_COLLECT_ORGS:
+            switch_port_collector.start(meraki, organization_id)
+
+
+_NO_SWITCH_PORT_HISTORY = ("ℹ️ No switch port history for organization {org_id}. "
+                           "Use start_switch_port_collection or get_organization_switch_ports_history first.")
+
+
+def _switch_port_history_header(title: str, organization_id: str, hours: int):
+    """Report header with history coverage, or None when nothing was collected yet."""
+    coverage = switch_port_history.coverage(organization_id)
+    if coverage is None:
+        return None
+    result = f"# {title}\n\n"
+    result += f"**Organization**: {organization_id}\n"
+    result += f"**Window**: last {hours}h (history {format_timestamp(coverage[0])} → {format_timestamp(coverage[1])})\n"
+    result += f"**Collection**: {'running' if switch_port_collector.running(organization_id) else 'stopped'}\n\n"
+    return result
+
 
 def register_monitoring_tool_handlers():
     """Register all enhanced monitoring tool handlers using ONLY REAL API methods."""
@@ -177,60 +208,230 @@ def register_monitoring_tool_handlers():
     
     @app.tool(
         name="get_organization_switch_ports_history",
-        description="🔌 Get organization-wide switch port history (2025 feature)"
+        description="🔌 Get organization-wide switch port status - current snapshot plus locally collected port history"
     )
     def get_organization_switch_ports_history(org_id: str, timespan: int = 3600):
         """
-        Get aggregated switch port statistics history for entire organization.
+        Get the current status of every switch port in the organization.
+        
+        Each call also adds the snapshot to the local port history used by the
+        flapping, error trend and PoE headroom tools.
         
         Args:
             org_id: Organization ID
-            timespan: Time span in seconds (default 1 hour)
+            timespan: Window of collected history to summarize in seconds (default 1 hour)
             
         Returns:
-            Organization-wide switch port history
+            Organization-wide switch port summary
         """
         try:
-            history = meraki_client.get_organization_switch_ports_history(org_id, timespan=timespan)
+            history = meraki_client.get_organization_switch_ports_history(org_id, perPage=20, total_pages='all')
+            switches = history.get('items', []) if isinstance(history, dict) else history
             
-            if not history:
+            if not switches:
                 return f"No switch port history available for organization {org_id}."
+            switch_port_history.ingest(org_id, switches)
+            switch_port_history.save(org_id)
                 
             result = f"# 🔌 Organization Switch Ports History - Org {org_id}\n\n"
-            result += f"**Time Period**: Last {timespan/3600:.1f} hours\n\n"
             
-            # Aggregate statistics
-            total_ports = 0
-            active_ports = 0
-            error_ports = 0
-            
-            for entry in history:
-                stats = entry.get('stats', {})
-                total_ports = max(total_ports, stats.get('totalPorts', 0))
-                active_ports = max(active_ports, stats.get('activePorts', 0))
-                error_ports = max(error_ports, stats.get('errorPorts', 0))
+            ports = [port for switch in switches for port in switch.get('ports') or []]
+            total_ports = len(ports)
+            active_ports = sum(1 for port in ports if str(port.get('status', '')).lower() == 'connected')
+            error_ports = sum(1 for port in ports if port.get('errors'))
+            warning_ports = sum(1 for port in ports if port.get('warnings'))
             
             result += f"## Summary\n"
+            result += f"- **Switches**: {len(switches)}\n"
             result += f"- **Total Ports**: {total_ports}\n"
             result += f"- **Active Ports**: {active_ports} ({(active_ports/total_ports*100) if total_ports else 0:.1f}%)\n"
-            result += f"- **Error Ports**: {error_ports}\n\n"
-            
-            # Recent history
-            result += f"## Recent Activity\n"
-            for entry in history[-10:]:
-                timestamp = entry.get('ts', 'Unknown')
-                stats = entry.get('stats', {})
-                
-                result += f"### {timestamp}\n"
-                result += f"- Active: {stats.get('activePorts', 0)}/{stats.get('totalPorts', 0)}\n"
-                result += f"- Errors: {stats.get('errorPorts', 0)}\n"
-                result += f"- Power Usage: {stats.get('totalPowerWatts', 0)}W\n\n"
+            result += f"- **Error Ports**: {error_ports}\n"
+            result += f"- **Warning Ports**: {warning_ports}\n\n"
+            
+            since = int(time.time()) - timespan
+            coverage = switch_port_history.coverage(org_id)
+            result += f"## Collected History\n"
+            result += f"- **Samples**: {format_timestamp(coverage[0])} → {format_timestamp(coverage[1])}\n"
+            result += f"- **Collection**: {'running' if switch_port_collector.running(org_id) else 'stopped'}\n"
+            result += f"- **Flapping Ports (last {timespan/3600:.1f}h)**: {len(switch_port_history.flapping(org_id, since))}\n"
+            result += f"- **Ports With Errors (last {timespan/3600:.1f}h)**: {len(switch_port_history.error_trends(org_id, since))}\n\n"
+            
+            # Ports currently reporting faults (an idle port's "Port disconnected" is not one)
+            problems = [(switch, port, port_faults(port)) for switch in switches for port in switch.get('ports') or []]
+            problems = [problem for problem in problems if problem[2]]
+            if problems:
+                result += f"## Ports With Errors\n"
+                for switch, port, conditions in problems[:20]:
+                    result += f"- **{switch.get('name') or switch.get('serial')} port {port.get('portId')}**: {', '.join(conditions)}\n"
+                if len(problems) > 20:
+                    result += f"... and {len(problems) - 20} more ports\n"
                 
             return result
             
         except Exception as e:
             return f"Error retrieving switch ports history: {str(e)}"
     
+    @app.tool(
+        name="start_switch_port_collection",
+        description="🔌 Start background switch port sampling - keeps per-port history of status, speed, errors, PoE and traffic"
+    )
+    def start_switch_port_collection(org_id: str, interval: int = MCP_SWITCH_PORT_POLL_INTERVAL):
+        """
+        Sample org-wide switch port statuses in the background.
+        
+        Samples go into a fixed-size ring buffer per port, so the flapping,
+        error trend and PoE headroom tools answer without new API calls.
+        
+        Args:
+            org_id: Organization ID
+            interval: Seconds between samples (minimum 60, default 300)
+            
+        Returns:
+            Collection status
+        """
+        try:
+            status = switch_port_collector.start(meraki_client, org_id, interval)
+            result = f"# 🔌 Switch Port Collection Started\n\n"
+            result += f"**Organization**: {org_id}\n"
+            result += f"**Interval**: {status.interval}s\n"
+            result += f"**Samples Kept**: {switch_port_history.capacity} per port\n"
+            coverage = switch_port_history.coverage(org_id)
+            if coverage:
+                result += f"**History Available**: {format_timestamp(coverage[0])} → {format_timestamp(coverage[1])}\n"
+            return result
+        except Exception as e:
+            return f"Error starting switch port collection: {str(e)}"
+    
+    @app.tool(
+        name="stop_switch_port_collection",
+        description="⏹️ Stop background switch port sampling for an organization (history is kept)"
+    )
+    def stop_switch_port_collection(org_id: str):
+        """
+        Stop sampling switch ports for an organization.
+        
+        Args:
+            org_id: Organization ID
+            
+        Returns:
+            Confirmation message
+        """
+        if switch_port_collector.stop(org_id):
+            return f"✅ Stopped switch port collection for organization {org_id} (collected history is kept)"
+        return f"ℹ️ Switch port collection was not running for organization {org_id}"
+    
+    @app.tool(
+        name="get_switch_port_flapping",
+        description="🔌 Find flapping switch ports - link up/down transitions and speed renegotiations from collected port history"
+    )
+    def get_switch_port_flapping(org_id: str, hours: int = 24, min_flaps: int = 3):
+        """
+        List ports whose link keeps going up and down.
+        
+        Args:
+            org_id: Organization ID
+            hours: Look back this many hours (default 24)
+            min_flaps: Minimum transitions plus speed changes to report (default 3)
+            
+        Returns:
+            Flapping ports, worst first
+        """
+        try:
+            result = _switch_port_history_header("🔌 Flapping Switch Ports", org_id, hours)
+            if result is None:
+                return _NO_SWITCH_PORT_HISTORY.format(org_id=org_id)
+            ports = switch_port_history.flapping(org_id, int(time.time()) - hours * 3600, min_flaps)
+            if not ports:
+                return result + f"✅ No ports with {min_flaps} or more link changes\n"
+            
+            result += "| Switch | Port | Link Changes | Speed Changes | Samples | Current |\n"
+            result += "|---|---|---|---|---|---|\n"
+            for port in ports[:50]:
+                result += (f"| {port.switch} ({port.serial}) | {port.port_id} | {port.flaps} | {port.speed_changes} | "
+                           f"{port.samples} | {port.status} |\n")
+            if len(ports) > 50:
+                result += f"\n... and {len(ports) - 50} more ports\n"
+            return result
+        except Exception as e:
+            return f"Error analyzing port flapping: {str(e)}"
+    
+    @app.tool(
+        name="get_switch_port_error_trends",
+        description="🔌 Switch port error trends - share of samples with CRC/PoE/STP errors and warnings, earlier vs recent"
+    )
+    def get_switch_port_error_trends(org_id: str, hours: int = 24):
+        """
+        List ports that reported errors or warnings and whether they are getting worse.
+        
+        Args:
+            org_id: Organization ID
+            hours: Look back this many hours (default 24)
+            
+        Returns:
+            Ports with errors, highest recent error rate first
+        """
+        try:
+            result = _switch_port_history_header("🔌 Switch Port Error Trends", org_id, hours)
+            if result is None:
+                return _NO_SWITCH_PORT_HISTORY.format(org_id=org_id)
+            ports = switch_port_history.error_trends(org_id, int(time.time()) - hours * 3600)
+            if not ports:
+                return result + "✅ No port errors or warnings in the window\n"
+            
+            icons = {'rising': '📈 rising', 'falling': '📉 falling', 'steady': '➡️ steady'}
+            result += "| Switch | Port | Error Rate | Earlier | Recent | Trend | Avg Traffic | Latest Conditions |\n"
+            result += "|---|---|---|---|---|---|---|---|\n"
+            for port in ports[:50]:
+                traffic = f"{port.traffic:.0f} Kbps" if port.traffic is not None else "-"
+                result += (f"| {port.switch} ({port.serial}) | {port.port_id} | {port.error_rate * 100:.0f}% | "
+                           f"{port.earlier_rate * 100:.0f}% | {port.recent_rate * 100:.0f}% | {icons[port.trend]} | "
+                           f"{traffic} | {', '.join(port.conditions) or '-'} |\n")
+            if len(ports) > 50:
+                result += f"\n... and {len(ports) - 50} more ports\n"
+            return result
+        except Exception as e:
+            return f"Error analyzing port errors: {str(e)}"
+    
+    @app.tool(
+        name="get_switch_poe_headroom",
+        description="⚡ Switch PoE budget headroom - average and peak PoE draw per switch against its model budget"
+    )
+    def get_switch_poe_headroom(org_id: str, hours: int = 24):
+        """
+        Compare each switch's PoE draw with its power budget.
+        
+        Args:
+            org_id: Organization ID
+            hours: Look back this many hours (default 24)
+            
+        Returns:
+            Switches with least PoE headroom first
+        """
+        try:
+            result = _switch_port_history_header("⚡ Switch PoE Headroom", org_id, hours)
+            if result is None:
+                return _NO_SWITCH_PORT_HISTORY.format(org_id=org_id)
+            switches = switch_port_history.poe_headroom(org_id, int(time.time()) - hours * 3600)
+            if not switches:
+                return result + "No PoE power usage reported in the window\n"
+            
+            result += "| Switch | Model | Budget | Average | Peak | Headroom | Utilization | PoE Ports |\n"
+            result += "|---|---|---|---|---|---|---|---|\n"
+            for switch in switches:
+                if switch.budget is None:
+                    budget = headroom = utilization = "-"
+                else:
+                    icon = "🔴" if switch.utilization >= 90 else "⚠️" if switch.utilization >= 75 else "✅"
+                    budget = f"{switch.budget:.0f}W"
+                    headroom = f"{switch.headroom:.1f}W"
+                    utilization = f"{icon} {switch.utilization:.0f}%"
+                result += (f"| {switch.switch} ({switch.serial}) | {switch.model or '-'} | {budget} | "
+                           f"{switch.average:.1f}W | {switch.peak:.1f}W | {headroom} | {utilization} | "
+                           f"{switch.allocated_ports} |\n")
+            return result
+        except Exception as e:
+            return f"Error analyzing PoE headroom: {str(e)}"
+    
     @app.tool(
         name="get_organization_devices_migration_status",
         description="🔄 Get device migration status across organization (2025 feature)"
@@ -303,81 +504,72 @@ def register_monitoring_tool_handlers():
         description="📋 Get network events (TIP: Specify product_type for multi-device networks: appliance/switch/wireless/camera)"
     )
     def get_network_events(network_id: str, product_type: str = None, event_types: str = None, 
-                          per_page: int = 1000, timespan: int = 86400):
+                          per_page: int = 1000, timespan: int = 86400, client: str = None,
+                          device: str = None, since_last: bool = False):
         """
         Get network events including port status changes.
         
+        Events are tailed incrementally into a local event log: each call only
+        fetches events newer than the previous one (and backfills older pages
+        when the window reaches further back than what is stored).
+        
         Args:
             network_id: Network ID
-            product_type: Filter by product type (appliance, switch, wireless, etc.)
+            product_type: Filter by product type (appliance, switch, wireless, etc.; default: all of the network's types)
             event_types: Comma-separated event types to filter (e.g. 'port_carrier_change')
-            per_page: Number of events per page (max 1000)
+            per_page: Maximum number of events to return
             timespan: Time span in seconds (default 24 hours)
+            client: Only events of this client (ID, MAC, IP or description)
+            device: Only events of this device (serial, name or MAC)
+            since_last: Only events newer than the previous call for this network
             
         Returns:
             Network events with focus on port changes
         """
         try:
-            kwargs = {
-                'perPage': per_page,
-                'timespan': timespan
-            }
-            
             if product_type:
-                kwargs['productType'] = product_type
-            if event_types:
-                kwargs['includedEventTypes'] = event_types.split(',')
-            
-            # Try to get events without productType first
-            try:
-                events = meraki_client.dashboard.networks.getNetworkEvents(network_id, **kwargs)
-            except Exception as e:
-                error_msg = str(e)
-                # Check if productType is required
-                if 'productType' in error_msg or 'multiple device types' in error_msg:
-                    # Try to detect network types
-                    try:
-                        network_info = meraki_client.dashboard.networks.getNetwork(network_id)
-                        product_types = network_info.get('productTypes', [])
-                        
-                        if not product_types:
-                            # Try to detect from devices
-                            devices = meraki_client.dashboard.networks.getNetworkDevices(network_id)
-                            detected_types = set()
-                            for device in devices:
-                                model = device.get('model', '')
-                                if model.startswith('MX'):
-                                    detected_types.add('appliance')
-                                elif model.startswith('MS'):
-                                    detected_types.add('switch')
-                                elif model.startswith('MR'):
-                                    detected_types.add('wireless')
-                                elif model.startswith('MV'):
-                                    detected_types.add('camera')
-                            product_types = list(detected_types)
-                        
-                        if product_types:
-                            return ("❌ Network has multiple device types. Please specify product_type parameter:\n"
-                                   f"Available types: {', '.join(product_types)}\n\n"
-                                   "💡 Examples:\n"
-                                   f"  • get_network_events('{network_id}', product_type='wireless')\n"
-                                   f"  • get_network_events('{network_id}', product_type='switch')\n"
-                                   f"  • get_network_events('{network_id}', product_type='appliance')")
-                    except:
-                        pass
-                    
-                    return ("❌ This network requires productType parameter.\n"
-                           "Common values: appliance, switch, wireless, camera\n\n"
-                           "💡 Try: get_network_events(network_id, product_type='wireless')")
-                else:
-                    raise  # Re-raise original error
+                product_types = [product_type]
+            else:
+                product_types = event_tailer.product_types(meraki_client, network_id)
+                if not product_types:
+                    # Try to detect from devices
+                    product_types = [p for p in get_network_infrastructure(meraki_client, network_id).product_types
+                                     if p in EVENT_PRODUCT_TYPES]
+                if not product_types:
+                    return ("❌ Could not determine the network's product types. Please specify product_type:\n"
+                            "Common values: appliance, switch, wireless, camera\n\n"
+                            "💡 Try: get_network_events(network_id, product_type='wireless')")
+            
+            since = int(time.time()) - timespan
+            if since_last:
+                previous = [event_log.cursor(network_id, p).starting_after for p in product_types]
+                if all(previous):
+                    since = max(since, min(parse_timestamp(p) for p in previous))
+            tail = event_tailer.tail(meraki_client, network_id, product_types, since=since)
+            if tail.errors and len(tail.errors) == len(product_types):
+                raise RuntimeError('; '.join(tail.errors.values()))
+            
+            events = event_log.query(
+                [network_id], since=since,
+                event_types=[t.strip() for t in event_types.split(',') if t.strip()] if event_types else None,
+                device=device, client=client, product_type=product_type, limit=per_page
+            )
             
             if not events:
+                if since_last:
+                    return f"No new events for network {network_id} since the last check."
                 return f"No events found for network {network_id} in the last {timespan/3600:.0f} hours."
                 
             result = f"# 📋 Network Events - Network {network_id}\n\n"
-            result += f"**Time Period**: Last {timespan/3600:.0f} hours\n"
-            result += f"**Total Events**: {len(events)}\n\n"
+            if since_last:
+                result += f"**Time Period**: Since {format_timestamp(since)}\n"
+            else:
+                result += f"**Time Period**: Last {timespan/3600:.0f} hours\n"
+            result += f"**Total Events**: {len(events)}\n"
+            result += f"**Fetched**: {len(tail.new_events)} new events in {tail.calls} API calls\n"
+            for stream, error in tail.errors.items():
+                result += f"⚠️ {stream}: {error}\n"
+            result += "\n"
             
             # Group events by type
             event_groups = {}
@@ -454,6 +646,120 @@ def register_monitoring_tool_handlers():
         except Exception as e:
             return f"Error retrieving network events: {str(e)}"
     
+    @app.tool(
+        name="search_network_events",
+        description="🔎 Search events across an organization's networks - incremental tail into the local event log, filter by type, client and device"
+    )
+    def search_network_events(org_id: str, hours: int = 24, event_types: str = None, client: str = None,
+                              device: str = None, network_ids: str = None, refresh: bool = True, limit: int = 100):
+        """
+        Search network events of many networks at once.
+        
+        Every network is tailed concurrently (only events newer than the stored
+        cursors are fetched), then the local event log is queried.
+        
+        Args:
+            org_id: Organization ID
+            hours: Look back this many hours (default 24)
+            event_types: Comma-separated event types (e.g. 'vpn_connectivity_change,port_carrier_change')
+            client: Only events of this client (ID, MAC, IP or description)
+            device: Only events of this device (serial, name or MAC)
+            network_ids: Optional comma-separated network IDs (default: all networks)
+            refresh: Tail new events before searching (False answers from the local log only)
+            limit: Maximum events to list (default 100)
+            
+        Returns:
+            Matching events, newest first
+        """
+        try:
+            since = int(time.time()) - hours * 3600
+            selected = [n.strip() for n in network_ids.split(',') if n.strip()] if network_ids else None
+            result = f"# 🔎 Network Events - Org {org_id}\n\n"
+            if refresh:
+                tail = event_tailer.tail_organization(meraki_client, org_id, since=since, network_ids=selected)
+                result += (f"**Fetched**: {len(tail.new_events)} new events from {tail.streams} event streams "
+                           f"in {tail.calls} API calls\n")
+                for stream, error in list(tail.errors.items())[:10]:
+                    result += f"⚠️ {stream}: {error}\n"
+                networks = tail.networks
+            else:
+                networks = selected or [n['id'] for n in meraki_client.dashboard.organizations.getOrganizationNetworks(
+                    org_id, total_pages='all')]
+            
+            events = event_log.query(
+                networks, since=since,
+                event_types=[t.strip() for t in event_types.split(',') if t.strip()] if event_types else None,
+                device=device, client=client
+            )
+            result += f"**Time Period**: Last {hours}h\n"
+            result += f"**Matching Events**: {len(events)}\n\n"
+            if not events:
+                return result + "No matching events.\n"
+            
+            result += "| Time | Network | Type | Device | Client | Description |\n"
+            result += "|---|---|---|---|---|---|\n"
+            for event in events[:limit]:
+                result += (f"| {event.get('occurredAt', '-')} | {event.get('networkId', '-')} | {event.get('type', '-')} | "
+                           f"{event.get('deviceName') or event.get('deviceSerial') or '-'} | "
+                           f"{event.get('clientDescription') or event.get('clientMac') or '-'} | "
+                           f"{event.get('description', '-')} |\n")
+            if len(events) > limit:
+                result += f"\n... and {len(events) - limit} more events\n"
+            return result
+            
+        except Exception as e:
+            return f"Error searching network events: {str(e)}"
+
+    @app.tool(
+        name="get_organization_incidents",
+        description="🚨 Correlate events and assurance alerts into incidents - group alert storms by time, topology and upstream device"
+    )
+    def get_organization_incidents(org_id: str, hours: int = 24, window_minutes: int = 10, refresh: bool = True,
+                                   include_alerts: bool = True, storm_networks: int = 3, network_ids: str = None,
+                                   limit: int = 20):
+        """
+        Reduce thousands of events and alerts to a short list of incidents.
+
+        Device and network events from the local event log and the organization's
+        assurance alerts are grouped when they happen within the window on the same
+        device, an upstream device or sibling devices; the same failure across many
+        networks becomes one storm incident.
+
+        Args:
+            org_id: Organization ID
+            hours: Look back this many hours (default 24)
+            window_minutes: Maximum gap between correlated signals (default 10)
+            refresh: Tail new events before correlating (False uses the local log only)
+            include_alerts: Also correlate assurance alerts (default True)
+            storm_networks: Merge same-type incidents spanning at least this many networks (0 disables)
+            network_ids: Optional comma-separated network IDs (default: all networks)
+            limit: Maximum incidents to list (default 20)
+
+        Returns:
+            Incidents, most severe first, with probable root device and client impact
+        """
+        try:
+            since = int(time.time()) - hours * 3600
+            selected = [n.strip() for n in network_ids.split(',') if n.strip()] if network_ids else None
+            fetched = ""
+            if refresh:
+                tail = event_tailer.tail_organization(meraki_client, org_id, since=since, network_ids=selected)
+                fetched = f"**Fetched**: {len(tail.new_events)} new events in {tail.calls} API calls\n"
+                networks = tail.networks
+            else:
+                networks = selected or [n['id'] for n in meraki_client.dashboard.organizations.getOrganizationNetworks(
+                    org_id, total_pages='all')]
+
+            report = organization_incidents(
+                meraki_client, org_id, event_log, networks, since, window=window_minutes * 60,
+                storm_networks=storm_networks, include_alerts=include_alerts
+            )
+            lines = report.markdown(limit)
+            return "\n".join(lines[:3]) + "\n" + fetched + "\n".join(lines[3:])
+
+        except Exception as e:
+            return f"Error correlating incidents: {str(e)}"
+
     @app.tool(
         name="get_organization_api_usage",
         description="📈 Get API usage analytics for the organization"
@@ -2,8 +2,12 @@
 Search tools for finding devices across organizations.
 """
 
+from datetime import datetime
 from typing import Optional
 
+from utils.infrastructure import model_product_type
+from utils.org_directory import org_directory
+
 app = None
 meraki_client = None
 
@@ -31,18 +35,20 @@ def register_search_tools(mcp_app, meraki):
             # Normalize serial to uppercase
             serial = serial.upper()
             
-            # Get all organizations
-            orgs = meraki_client.get_organizations()
+            # Get organizations with API access (cached, known failures skipped)
+            orgs = org_directory.candidates(meraki_client)
             
             result = f"# 🔍 Searching for device: {serial}\n\n"
+            errors = []
             
             for org in orgs:
-                org_id = org['id']
-                org_name = org.get('name', 'Unknown')
+                org_id = org.id
+                org_name = org.name
                 
                 try:
                     # Check organization inventory for the device
                     devices = meraki_client.get_organization_devices(org_id)
+                    org_directory.record_devices(org_id, devices)
                     
                     for device in devices:
                         if device.get('serial', '').upper() == serial:
@@ -83,11 +89,18 @@ def register_search_tools(mcp_app, meraki):
                             return result
                             
                 except Exception as e:
-                    # Skip organizations we can't access
+                    # Skip organizations we can't access, and remember not to ask again (refusals only)
+                    if not org_directory.record_error(org_id, e):
+                        errors.append(f"{org_name} ({org_id}): {str(e)}")
                     continue
             
             # Device not found
             result += f"❌ Device with serial **{serial}** not found in any accessible organization.\n\n"
+            if errors:
+                result += "⚠️ These organizations could not be searched (temporary errors, try again):\n"
+                for error in errors:
+                    result += f"- {error}\n"
+                result += "\n"
             result += "Possible reasons:\n"
             result += "- Serial number is incorrect\n"
             result += "- Device is not claimed to any organization\n"
@@ -116,21 +129,22 @@ def register_search_tools(mcp_app, meraki):
         try:
             result = f"# 🔍 Searching for devices: Model {model}\n\n"
             total_found = 0
+            errors = []
             
             if org_id:
                 # Search specific organization
-                orgs = [meraki_client.get_organization(org_id)]
+                org = meraki_client.get_organization(org_id)
+                orgs = [(org['id'], org.get('name', 'Unknown'))]
             else:
-                # Search all organizations
-                orgs = meraki_client.get_organizations()
+                # Search organizations that have this product type
+                orgs = [(org.id, org.name) for org in org_directory.candidates(meraki_client, model_product_type(model))]
             
-            for org in orgs:
-                org_id = org['id'] if isinstance(org, dict) else org
-                org_name = org.get('name', 'Unknown') if isinstance(org, dict) else 'Unknown'
+            for org_id, org_name in orgs:
                 org_found = []
                 
                 try:
                     devices = meraki_client.get_organization_devices(org_id)
+                    org_directory.record_devices(org_id, devices)
                     
                     for device in devices:
                         if model.upper() in device.get('model', '').upper():
@@ -148,9 +162,17 @@ def register_search_tools(mcp_app, meraki):
                             result += f"  - *...and {len(org_found) - 10} more*\n"
                         result += "\n"
                         
-                except:
+                except Exception as e:
+                    if not org_directory.record_error(org_id, e):
+                        errors.append(f"{org_name} ({org_id}): {str(e)}")
                     continue
             
+            if errors:
+                result += "⚠️ These organizations could not be searched (temporary errors, try again):\n"
+                for error in errors:
+                    result += f"- {error}\n"
+                result += "\n"
+            
             if total_found == 0:
                 result += f"❌ No devices found with model matching '{model}'\n"
             else:
@@ -176,15 +198,17 @@ def register_search_tools(mcp_app, meraki):
         try:
             result = f"# 🔍 Finding Unclaimed Devices\n\n"
             total_unclaimed = 0
+            errors = []
             
-            orgs = meraki_client.get_organizations()
+            orgs = org_directory.candidates(meraki_client)
             
             for org in orgs:
-                org_id = org['id']
-                org_name = org.get('name', 'Unknown')
+                org_id = org.id
+                org_name = org.name
                 
                 try:
                     devices = meraki_client.get_organization_devices(org_id)
+                    org_directory.record_devices(org_id, devices)
                     unclaimed = [d for d in devices if not d.get('networkId')]
                     
                     if unclaimed:
@@ -196,9 +220,17 @@ def register_search_tools(mcp_app, meraki):
                             total_unclaimed += 1
                         result += "\n"
                         
-                except:
+                except Exception as e:
+                    if not org_directory.record_error(org_id, e):
+                        errors.append(f"{org_name} ({org_id}): {str(e)}")
                     continue
             
+            if errors:
+                result += "⚠️ These organizations could not be searched (temporary errors, try again):\n"
+                for error in errors:
+                    result += f"- {error}\n"
+                result += "\n"
+            
             if total_unclaimed == 0:
                 result += "✅ No unclaimed devices found in any organization\n"
             else:
@@ -209,4 +241,51 @@ def register_search_tools(mcp_app, meraki):
             return result
             
         except Exception as e:
-            return f"❌ Error finding unclaimed devices: {str(e)}"
\ No newline at end of file
+            return f"❌ Error finding unclaimed devices: {str(e)}"
+    
+    @app.tool(
+        name="get_organization_directory",
+        description="🏢 List cached organizations with API access status, product types and last refresh time"
+    )
+    def get_organization_directory(refresh: bool = False, include_product_types: bool = False):
+        """
+        Show the organization directory used by cross-org searches and audits.
+        
+        Args:
+            refresh: Re-fetch the organization list and re-probe orgs that failed before
+            include_product_types: Look up product types for orgs not yet enriched (one call per org)
+            
+        Returns:
+            Organizations with access status and product types
+        """
+        try:
+            if refresh:
+                org_directory.candidates(meraki_client, refresh=True)
+            orgs = org_directory.organizations(meraki_client)
+            if include_product_types:
+                for org in orgs:
+                    org_directory.enrich(meraki_client, org)
+            
+            refreshed = datetime.fromtimestamp(org_directory.refreshed_at).strftime('%Y-%m-%d %H:%M:%S')
+            result = f"# 🏢 Organization Directory\n\n"
+            result += f"**Organizations**: {len(orgs)} | **Usable**: {len([o for o in orgs if o.usable])} | **Refreshed**: {refreshed}\n\n"
+            
+            result += "| Organization | ID | API | Access | Networks | Product Types |\n"
+            result += "|--------------|----|-----|--------|----------|---------------|\n"
+            for org in sorted(orgs, key=lambda o: o.name.lower()):
+                api = "✅" if org.api_enabled else "❌ Disabled"
+                access = {True: "✅", False: "❌", None: "❔ Not probed"}[org.accessible]
+                networks = org.network_count if org.network_count is not None else "-"
+                products = ", ".join(org.product_types) if org.product_types is not None else "-"
+                result += f"| {org.name} | {org.id} | {api} | {access} | {networks} | {products} |\n"
+            
+            failed = [o for o in orgs if o.accessible is False and o.last_error]
+            if failed:
+                result += "\n## ❌ Access Errors\n"
+                for org in failed:
+                    result += f"- **{org.name}**: {org.last_error[:200]}\n"
+            
+            return result
+            
+        except Exception as e:
+            return f"❌ Error listing organizations: {str(e)}"
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Offline tests for the streaming EWMA/z-score anomaly detector."""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.anomaly import AnomalyDetector, AnomalyMonitor, WebhookNotifier
+from utils.rate_limit import rate_scheduler
+from utils.uplink_history import UplinkCollector, UplinkHistoryStore, format_timestamp, parse_timestamp
+
+rate_scheduler.org_rate = 0
+
+START = parse_timestamp('2024-03-01T00:00:00Z')
+
+
+def detector():
+    return AnomalyDetector(alpha=0.1, threshold=3.0, warmup=10, min_consecutive=2,
+                           path=os.path.join(tempfile.mkdtemp(), 'baselines.json'))
+
+
+def test_spike_opens_and_recovery_resolves():
+    d = detector()
+    events = []
+    d.listeners.append(lambda event, anomaly: events.append((event, anomaly.started_at)))
+    latency = [20, 22, 21, 19, 20, 23, 21, 20, 22, 21, 20, 21] + [90, 95, 100] + [21, 20]
+    opened = [d.observe('O_1', 'uplink', 'Q-MX', 'wan1', 'uplink_latency', START + i * 60, v, 'N_1')
+              for i, v in enumerate(latency)]
+
+    # Opens on the second anomalous sample, dated from the first one
+    assert [i for i, a in enumerate(opened) if a] == [13]
+    anomaly = opened[13]
+    assert anomaly.started_at == START + 12 * 60 and anomaly.peak == 100 and anomaly.severity == 'critical'
+    assert anomaly.resolved_at == START + 15 * 60 and not anomaly.active
+    assert events == [('anomaly', START + 12 * 60), ('resolved', START + 12 * 60)]
+    # Clipped incident samples barely move the baseline
+    assert d.baselines[('O_1', 'Q-MX', 'wan1', 'uplink_latency')].mean < 35
+
+    # Overlapping samples are ignored, and a single spike is not an anomaly
+    assert d.observe('O_1', 'uplink', 'Q-MX', 'wan1', 'uplink_latency', START, 500) is None
+    assert d.observe('O_1', 'uplink', 'Q-MX', 'wan1', 'uplink_latency', START + 20 * 60, 300) is None
+    assert d.observe('O_1', 'uplink', 'Q-MX', 'wan1', 'uplink_latency', START + 21 * 60, 21) is None
+    assert len(d.anomalies('O_1')) == 1 and d.anomalies('O_1', active_only=True) == []
+    assert d.anomalies('O_2') == []
+
+
+def test_payload_parsing_and_persistence():
+    d = detector()
+    loss = [0.0] * 12 + [30.0, 40.0]
+    d.observe_uplinks('O_1', [{
+        'serial': 'Q-MX', 'networkId': 'N_1', 'uplink': 'wan1', 'ip': '8.8.8.8',
+        'timeSeries': [{'ts': format_timestamp(START + i * 60), 'lossPercent': v, 'latencyMs': None}
+                       for i, v in reversed(list(enumerate(loss)))]
+    }])
+    active = d.anomalies('O_1', active_only=True)
+    assert [(a.metric, a.detail, a.peak) for a in active] == [('uplink_loss', 'wan1 → 8.8.8.8', 40.0)]
+
+    for i in range(12):
+        d.observe_connection_stats('O_1', 'N_1', [
+            {'serial': 'Q-AP', 'connectionStats': {'assoc': 1, 'auth': 0, 'dhcp': 0, 'dns': 0, 'success': 99}},
+            {'serial': 'Q-QUIET', 'connectionStats': {'assoc': 3, 'success': 2}},
+        ], START + i * 300)
+    d.observe_channel_utilization('O_1', [
+        {'serial': 'Q-AP', 'network': {'id': 'N_1'}, 'startTs': format_timestamp(START + i * 300),
+         'byBand': [{'band': '5', 'total': {'percentage': 30.0}},
+                    {'band': '2.4', 'wifi': {'percentage': 20.0}, 'nonWifi': {'percentage': 5.0}}]}
+        for i in range(12)
+    ])
+    assert ('O_1', 'Q-AP', '', 'connection_failures') in d.baselines
+    assert ('O_1', 'Q-QUIET', '', 'connection_failures') not in d.baselines
+    assert d.baselines[('O_1', 'Q-AP', '2.4GHz', 'channel_utilization')].mean == 25.0
+
+    d.save()
+    reloaded = AnomalyDetector(path=d.path)
+    assert reloaded.series_count('O_1') == d.series_count('O_1') == 5
+    baseline = reloaded.baselines[('O_1', 'Q-AP', '5GHz', 'channel_utilization')]
+    assert baseline.count == 12 and baseline.last_ts == START + 11 * 300
+
+
+def test_monitor_polls_wireless_and_posts_webhooks():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    polls = []
+
+    class Organizations:
+        def getOrganizationNetworks(self, organization_id, **kwargs):
+            return [{'id': 'N_1'}, {'id': 'N_2'}]
+
+    class Wireless:
+        def getNetworkWirelessDevicesConnectionStats(self, network_id, timespan):
+            failures = 40 if len(polls) > 20 else 1
+            return [{'serial': f"Q-{network_id}", 'connectionStats': {'assoc': failures, 'success': 100}}]
+
+        def getOrganizationWirelessDevicesChannelUtilizationHistoryByDeviceByInterval(self, organization_id, **kwargs):
+            polls.append(kwargs)
+            return []
+
+    client = type('Client', (), {})()
+    client.dashboard = type('Dashboard', (), {})()
+    client.dashboard.organizations = Organizations()
+    client.dashboard.wireless = Wireless()
+
+    d = detector()
+    notifier = WebhookNotifier(urls=[])
+    notifier.add(f"http://127.0.0.1:{server.server_port}/hook")
+    d.listeners.append(notifier)
+    monitor = AnomalyMonitor(d, UplinkCollector(UplinkHistoryStore(directory=tempfile.mkdtemp())))
+    for _ in range(24):
+        # Each poll is scored at the current time; step the series clock forward instead of sleeping
+        for key, baseline in d.baselines.items():
+            baseline.last_ts -= 300
+        assert monitor.poll_once(client, 'O_1', 300) == 2
+    notifier._executor.shutdown(wait=True)
+    server.shutdown()
+
+    assert polls[0]['interval'] == 300 and polls[0]['timespan'] == 900
+    assert {a.serial for a in d.anomalies('O_1')} == {'Q-N_1', 'Q-N_2'}
+    assert sorted(r['anomaly']['serial'] for r in received) == ['Q-N_1', 'Q-N_2']
+    assert received[0]['event'] == 'anomaly' and received[0]['anomaly']['metric'] == 'connection_failures'
+    assert notifier.sent == 2 and not notifier.errors
+    assert os.path.exists(d.path)
+
+
+def test_webhooks_are_scoped_per_organization():
+    notifier = WebhookNotifier(urls=['https://all.example/hook'])
+    notifier.add('https://a.example/hook', 'O_A')
+    notifier.add('https://a.example/hook', 'O_A')
+    notifier.add('https://all.example/hook', 'O_B')
+    notifier.add('https://b.example/hook', 'O_B')
+    assert notifier.targets('O_A') == ['https://all.example/hook', 'https://a.example/hook']
+    assert notifier.targets('O_B') == ['https://all.example/hook', 'https://b.example/hook']
+    assert notifier.targets('O_C') == ['https://all.example/hook']
+
+    posted = []
+    notifier._post = lambda url, payload: posted.append((url, json.loads(payload)['anomaly']['serial']))
+    anomaly = type('Anomaly', (), {'organization_id': 'O_B', 'to_dict': lambda self: {'serial': 'Q-1'}})()
+    notifier('anomaly', anomaly)
+    notifier._executor.shutdown(wait=True)
+    # Registered globally and for the organization, the URL is still posted once
+    assert sorted(posted) == [('https://all.example/hook', 'Q-1'), ('https://b.example/hook', 'Q-1')]
+
+    notifier.errors['https://b.example/hook'] = 'timeout'
+    assert notifier.clear('O_B') == ['https://all.example/hook', 'https://b.example/hook']
+    assert notifier.targets('O_B') == ['https://all.example/hook'] and not notifier.errors
+    assert notifier.targets() == ['https://all.example/hook', 'https://a.example/hook']
+    assert notifier.remove('https://a.example/hook', 'O_A') and notifier.org_urls == {}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
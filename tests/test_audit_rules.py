@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Offline tests for the declarative audit rule engine and rule packs."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit_rules import Rule, Tier, build_audit_tables, evaluate_rule
+from utils.audit_snapshot import NetworkSnapshot, OrgSnapshot
+from utils.rule_packs import HIPAA_PACK, PCI_PACK, POSTURE_PACK, SECURITY_AUDIT_PACK
+
+
+def make_snapshot():
+    clinic = NetworkSnapshot(
+        network_id='N_1', name='Clinic', product_types=['appliance', 'wireless'],
+        devices=[{'model': 'MX68', 'firmware': 'MX 18.1'}, {'model': 'MR46', 'firmware': 'MR 31.1 beta'}],
+        intrusion={'mode': 'prevention'}, malware={'mode': 'enabled'},
+        content_filtering={'blockedUrlCategories': ['meraki:contentFiltering/category/C1']},
+        l3_firewall={'rules': [
+            {'policy': 'allow', 'srcCidr': 'Any', 'destCidr': 'Any', 'destPort': 'Any', 'comment': 'Legacy'},
+            {'policy': 'allow', 'srcCidr': 'Any', 'destCidr': 'Any', 'destPort': 'Any', 'comment': 'Default rule'},
+        ]},
+        appliance_vlans=[{'id': 1}, {'id': 20}],
+        site_to_site_vpn={'mode': 'spoke'},
+        ssids=[
+            {'number': 0, 'name': 'Staff', 'enabled': True, 'authMode': 'psk', 'wpaEncryptionMode': 'WPA2 only', 'psk': 'x'},
+            {'number': 1, 'name': 'Guest', 'enabled': True, 'authMode': 'open'},
+            {'number': 2, 'name': 'Unused', 'enabled': False, 'authMode': 'open'},
+        ],
+        ssid_source='wireless',
+    )
+    branch = NetworkSnapshot(
+        network_id='N_2', name='Branch', product_types=['appliance'],
+        devices=[{'model': 'MX67', 'firmware': 'MX 18.1'}],
+        intrusion={'mode': 'disabled'}, malware={'mode': 'disabled'},
+        l3_firewall={'rules': [{'policy': 'allow', 'comment': 'Default rule'}]},
+        site_to_site_vpn={'mode': 'none'},
+    )
+    closet = NetworkSnapshot(network_id='N_3', name='Closet', product_types=['switch'])
+    return OrgSnapshot(organization_id='O_1', networks=[clinic, branch, closet])
+
+
+def test_tables_are_columnar():
+    tables = build_audit_tables(make_snapshot())
+    assert len(tables.networks) == 3 and len(tables.ssids) == 3 and len(tables.devices) == 3
+    assert tables.networks['custom_l3_rule_count'].tolist() == [1, 0, 0]
+    assert tables.per_network('ssids', tables.ssids['enabled']).tolist() == [2, 0, 0]
+    assert tables.firewall_rules['any_any_allow'].tolist() == [True, False, False]
+    assert tables.devices['firmware_stable'].tolist() == [True, False, True]
+
+
+def test_rule_tiers_and_messages():
+    rule = Rule(
+        id='t.ids', section='s', title='IDS', table='networks',
+        passes=lambda t: t.networks['ids_enabled'], where=lambda t: t.networks['has_appliance'],
+        tiers=[Tier(5, "ok {passed}/{total}", at_least=90), Tier(0, "low {passed}/{total} ({percent:.0f}%)")]
+    )
+    result = evaluate_rule(rule, build_audit_tables(make_snapshot()))
+    assert (result.passed, result.total, result.points) == (1, 2, 0)
+    assert result.finding == "low 1/2 (50%)"
+    assert result.failing_rows == [1]
+
+
+def test_hipaa_sections_keep_report_findings():
+    tables = build_audit_tables(make_snapshot())
+    score, findings = HIPAA_PACK.evaluate_section(tables, 'security_risks')
+    assert "❌ **IDS/IPS**: Only 1/3 networks protected (33%)" in findings
+    assert any('No high-risk events' in f for f in findings)
+    score, findings = HIPAA_PACK.evaluate_section(tables, 'access_controls')
+    assert "🚨 **Security Alert**: 1 open/insecure wireless networks detected" in findings
+    assert 'auth_users' in HIPAA_PACK.endpoints(['access_controls'])
+
+
+def test_security_audit_and_posture_scores():
+    snapshot = make_snapshot()
+    single = OrgSnapshot(organization_id='O_1', networks=[snapshot.networks[0]])
+    results = SECURITY_AUDIT_PACK.evaluate(build_audit_tables(single))
+    # IDS prevention 20, AMP 20, CF 15, custom rules 15, open SSID 0, VLANs 10
+    assert sum(r.points for r in results) == 80
+    assert [r.issue for r in results if r.issue] == ['Open WiFi network detected']
+
+    posture = {r.rule.id: r for r in POSTURE_PACK.evaluate(build_audit_tables(snapshot))}
+    assert posture['posture.ids'].points == 5
+    assert posture['posture.wifi'].failed == 1 and posture['posture.wifi'].points == 10
+
+
+def test_pci_pack_not_applicable_and_failing_networks():
+    tables = build_audit_tables(make_snapshot())
+    results = {r.rule.id: r for r in PCI_PACK.evaluate(tables)}
+    assert results['pci.2.3.guest_isolation'].failed == 1
+    any_any = results['pci.1.3.no_any_any']
+    assert any_any.points == 0 and tables.network_names('firewall_rules', any_any.failing_rows) == ['Clinic']
+    ips = results['pci.11.5.ips']
+    assert ips.total == 2 and tables.network_names('networks', ips.failing_rows) == ['Branch']
+    empty = build_audit_tables(OrgSnapshot(organization_id='O_2'))
+    assert all(not r.applicable and r.max_points == 0 for r in PCI_PACK.evaluate(empty))
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
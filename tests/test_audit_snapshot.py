@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Offline tests for the shared audit configuration snapshot."""
+
+import gzip
+import os
+import sys
+import tempfile
+from collections import Counter
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit_snapshot import ALL_ENDPOINTS, build_org_snapshot
+from utils.audit_store import REDACTED, AuditSnapshotStore, get_org_snapshot, redact_secrets
+from utils.rate_limit import rate_scheduler
+from server.tools_custom_helpers import (
+    HIPAA_SECTION_ENDPOINTS, _audit_access_controls, _audit_transmission_security, _collect_compliance_evidence
+)
+
+# No real API behind the fake client; don't pace its calls
+rate_scheduler.org_rate = 0
+
+NETWORKS = [
+    {'id': 'N_1', 'name': 'Clinic', 'productTypes': ['appliance', 'switch', 'wireless']},
+    {'id': 'N_2', 'name': 'Branch', 'productTypes': ['appliance']},
+    {'id': 'N_3', 'name': 'Closet', 'productTypes': ['switch']},
+]
+DEVICES = [
+    {'model': 'MX68', 'networkId': 'N_1', 'firmware': 'MX 18.1'},
+    {'model': 'MR46', 'networkId': 'N_1', 'firmware': 'MR 30.1'},
+    {'model': 'MX67W', 'networkId': 'N_2', 'firmware': 'MX 18.1'},
+    {'model': 'MS120-8', 'networkId': 'N_3', 'firmware': 'MS 16.1'},
+]
+
+
+class Recorder:
+    """Dashboard section that records every call and answers from a table."""
+
+    def __init__(self, calls, responses):
+        self.calls = calls
+        self.responses = responses
+
+    def __getattr__(self, name):
+        def call(network_id, **kwargs):
+            self.calls[(name, network_id)] += 1
+            response = self.responses.get(name, {})
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return call
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = Counter()
+        ssid = {'enabled': True, 'name': 'Staff', 'authMode': 'psk', 'psk': 'x', 'vlanId': 10}
+        responses = {
+            'getOrganizationNetworks': NETWORKS,
+            'getOrganizationDevices': DEVICES,
+            'getNetworkWirelessSsids': [ssid, {'enabled': True, 'name': 'Guest', 'authMode': 'open'}],
+            'getNetworkApplianceSsids': [ssid],
+            'getNetworkApplianceVpnSiteToSiteVpn': {'mode': 'spoke'},
+            'getNetworkApplianceFirewallL3FirewallRules': {'rules': [{}, {}]},
+            'getNetworkSwitchSettings': {'vlan': 1},
+            'getNetworkMerakiAuthUsers': Exception('404'),
+            'getOrganizationConfigurationChanges': [{'networkId': 'N_2', 'label': 'SSID'},
+                                                    {'networkId': 'N_2', 'label': 'VLAN'}],
+        }
+        self.responses = responses
+        self.dashboard = type('Dashboard', (), {})()
+        for section in ('organizations', 'networks', 'wireless', 'appliance', 'switch'):
+            setattr(self.dashboard, section, Recorder(self.calls, responses))
+
+
+def test_each_endpoint_fetched_once_per_applicable_network():
+    client = FakeClient()
+    snapshot = build_org_snapshot(client, 'O_1', ALL_ENDPOINTS, max_workers=4)
+    assert all(count == 1 for count in client.calls.values())
+    # Appliance endpoints are skipped for the switch-only network
+    assert ('getNetworkApplianceSecurityMalware', 'N_3') not in client.calls
+    # MX-only wireless reads the appliance SSID API
+    assert snapshot.network('N_2').ssid_source == 'appliance'
+    assert ('getNetworkWirelessSsids', 'N_2') not in client.calls
+    assert 'auth_users' in snapshot.network('N_1').errors
+    assert snapshot.api_calls == sum(client.calls.values())
+
+
+def test_sections_evaluate_snapshot_without_api_calls():
+    client = FakeClient()
+    endpoints = HIPAA_SECTION_ENDPOINTS['access_controls'] | HIPAA_SECTION_ENDPOINTS['transmission_security']
+    snapshot = build_org_snapshot(client, 'O_1', endpoints)
+    calls = sum(client.calls.values())
+
+    _, access = _audit_access_controls(snapshot)
+    score, transmission = _audit_transmission_security(snapshot)
+    assert sum(client.calls.values()) == calls
+    assert any('1 open/insecure' in f for f in access)
+    assert any('3/3 networks with VLANs' in f for f in transmission)
+    assert any('2/3 SSIDs secure' in f for f in transmission)
+    assert score == 8 + 6 + 1
+
+
+def test_evidence_counts():
+    snapshot = build_org_snapshot(FakeClient(), 'O_1', HIPAA_SECTION_ENDPOINTS['evidence'])
+    evidence = _collect_compliance_evidence(snapshot)
+    assert evidence['Firewall Rules'] == 4
+    assert evidence['VPN Configurations'] == 2
+    assert evidence['Wireless Security Settings'] == 3
+
+
+def test_incremental_refresh_refetches_changed_networks_only():
+    client = FakeClient()
+    store = AuditSnapshotStore(tempfile.mkdtemp())
+    first = get_org_snapshot(client, 'O_1', ALL_ENDPOINTS, store=store)
+    assert first.mode == 'full'
+
+    client.calls.clear()
+    second = get_org_snapshot(client, 'O_1', ALL_ENDPOINTS, store=store)
+    assert second.mode == 'incremental'
+    assert second.refetched_networks == ['N_2']
+    assert second.config_changes == 2
+    # Unchanged N_1 reuses its config; only volatile security events and the failed endpoint are retried
+    n1_calls = sorted(name for (name, network_id) in client.calls if network_id == 'N_1')
+    assert n1_calls == ['getNetworkApplianceSecurityEvents', 'getNetworkMerakiAuthUsers']
+    assert second.network('N_1').l3_rules == [{}, {}]
+    assert second.api_calls == sum(client.calls.values())
+
+
+def test_inventory_change_triggers_refetch_and_store_round_trip():
+    client = FakeClient()
+    store = AuditSnapshotStore(tempfile.mkdtemp())
+    get_org_snapshot(client, 'O_1', {'site_to_site_vpn'}, store=store)
+    client.responses['getOrganizationDevices'] = DEVICES + [{'model': 'MS120-8', 'serial': 'NEW', 'networkId': 'N_1'}]
+    client.responses['getOrganizationConfigurationChanges'] = []
+
+    snapshot = get_org_snapshot(client, 'O_1', {'site_to_site_vpn', 'malware'}, store=store)
+    assert snapshot.refetched_networks == ['N_1']
+    assert snapshot.endpoints == ['malware', 'site_to_site_vpn']
+    # Newly requested endpoint is fetched for unchanged appliance networks too
+    assert ('getNetworkApplianceSecurityMalware', 'N_2') in client.calls
+    loaded = store.load('O_1')
+    assert loaded.network('N_1').infrastructure.switch_count == 1
+    assert loaded.network('N_2').vpn_enabled
+
+
+def test_template_and_org_level_changes():
+    client = FakeClient()
+    client.responses['getOrganizationNetworks'] = [dict(n, configTemplateId='L_T') if n['id'] != 'N_2' else n
+                                                   for n in NETWORKS]
+    store = AuditSnapshotStore(tempfile.mkdtemp())
+    get_org_snapshot(client, 'O_1', {'l3_firewall'}, store=store)
+
+    # A change on the template re-fetches the networks bound to it
+    client.responses['getOrganizationConfigurationChanges'] = [{'networkId': 'L_T', 'label': 'Firewall'}]
+    assert get_org_snapshot(client, 'O_1', {'l3_firewall'}, store=store).refetched_networks == ['N_1', 'N_3']
+
+    # A change naming an unknown network or template cannot be narrowed down
+    client.responses['getOrganizationConfigurationChanges'] = [{'networkId': 'L_GONE', 'label': 'Firewall'}]
+    assert get_org_snapshot(client, 'O_1', {'l3_firewall'}, store=store).refetched_networks == ['N_1', 'N_2', 'N_3']
+
+    # Organization-wide changes unrelated to the snapshot are ignored
+    client.calls.clear()
+    client.responses['getOrganizationConfigurationChanges'] = [
+        {'page': 'Organization > Administrators', 'label': 'Admin'}, {'page': 'Alerts', 'label': 'Email recipients'}]
+    snapshot = get_org_snapshot(client, 'O_1', {'l3_firewall'}, store=store)
+    assert snapshot.refetched_networks == [] and client.calls['getNetworkApplianceFirewallL3FirewallRules', 'N_1'] == 0
+
+    # Related ones re-fetch only the endpoints they affect, in every network
+    client.calls.clear()
+    client.responses['getOrganizationConfigurationChanges'] = [{'page': 'Policy objects', 'label': 'Object added'}]
+    snapshot = get_org_snapshot(client, 'O_1', {'l3_firewall'}, store=store)
+    assert snapshot.refetched_networks == []
+    fetched = sorted(key for key in client.calls if key[0].startswith('getNetwork'))
+    assert fetched == [('getNetworkApplianceFirewallL3FirewallRules', 'N_1'),
+                       ('getNetworkApplianceFirewallL3FirewallRules', 'N_2')]
+
+
+def test_stored_snapshot_has_no_secrets():
+    client = FakeClient()
+    client.responses['getNetworkWirelessSsids'] = [
+        {'name': 'Staff', 'authMode': 'psk', 'psk': 'hunter2-staff'},
+        {'name': 'Corp', 'authMode': '8021x-radius', 'radiusServers': [{'host': '10.0.0.5', 'secret': 'radius-key'}]},
+        {'name': 'Guest', 'authMode': 'open', 'psk': ''},
+    ]
+    store = AuditSnapshotStore(tempfile.mkdtemp())
+    snapshot = get_org_snapshot(client, 'O_1', {'ssids'}, store=store)
+    with gzip.open(store.path('O_1'), 'rt', encoding='utf-8') as f:
+        stored = f.read()
+    assert 'hunter2-staff' not in stored and 'radius-key' not in stored
+
+    ssids = store.load('O_1').network('N_1').ssids
+    assert ssids[0]['psk'] == REDACTED and ssids[1]['radiusServers'][0] == {'host': '10.0.0.5', 'secret': REDACTED}
+    # Presence checks answer the same; the in-memory snapshot is untouched
+    assert ssids[2]['psk'] == '' and snapshot.network('N_1').ssids[0]['psk'] == 'hunter2-staff'
+    assert redact_secrets({'radiusSecret': 's', 'adminPassword': 'p', 'name': 'n'}) == {
+        'radiusSecret': REDACTED, 'adminPassword': REDACTED, 'name': 'n'}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Offline tests for the dry-run audit cost estimator."""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit_snapshot import NetworkSnapshot, OrgSnapshot
+from utils.cost_estimator import combine_fleet, estimate_search, estimate_snapshot, measured_request_seconds
+from utils.org_directory import OrgRecord
+from utils.rate_limit import rate_scheduler
+
+
+def stored_snapshot():
+    networks = [NetworkSnapshot(network_id=f"N_{i}", name=f"Site {i}", product_types=['appliance'])
+                for i in range(10)]
+    networks.append(NetworkSnapshot(network_id='N_W', name='Wifi', product_types=['wireless']))
+    return OrgSnapshot(organization_id='O_1', networks=networks, devices=[{}] * 25,
+                       endpoints=['malware', 'ssids', 'security_events'])
+
+
+def test_quick_and_full_from_stored_snapshot():
+    org_rate = rate_scheduler.org_rate
+    rate_scheduler.org_rate = 10
+    try:
+        estimates = estimate_snapshot('O_1', ['malware', 'ssids', 'security_events', 'intrusion'],
+                                      previous=stored_snapshot(), extra_calls={'getOrganization': 1},
+                                      change_ratio=0.2, request_seconds=0.5, max_workers=8)
+    finally:
+        rate_scheduler.org_rate = org_rate
+
+    full = estimates['full']
+    assert full.calls == {'getOrganization': 1, 'getOrganizationNetworks': 1, 'getOrganizationDevices': 1,
+                          'malware': 10, 'ssids': 1, 'security_events': 10, 'intrusion': 10}
+    assert full.total_calls == 34 and full.devices == 25 and full.rate == 10
+    # 3 serial calls, then 31 parallel calls limited by 10 requests/s (slower than 8 workers at 0.5s)
+    assert abs(full.seconds - (3 * 0.5 + 31 / 10)) < 1e-9
+
+    quick = estimates['quick']
+    # malware/ssids re-fetched for changed networks only; volatile and new endpoints for all
+    assert quick.calls['malware'] == 2 and quick.calls['ssids'] == 1
+    assert quick.calls['security_events'] == 10 and quick.calls['intrusion'] == 10
+    assert quick.calls['getOrganizationConfigurationChanges'] == 1
+    assert quick.total_calls < full.total_calls and quick.seconds < full.seconds
+
+
+def test_directory_fallback_and_fleet():
+    record = OrgRecord(id='O_2', name='Beta', network_count=5, product_types=['switch'])
+    estimates = estimate_snapshot('O_2', ['switch_settings', 'malware'], record=record, request_seconds=1)
+    assert 'quick' not in estimates
+    assert estimates['full'].calls['switch_settings'] == 5 and 'malware' not in estimates['full'].calls
+    assert estimates['full'].assumptions
+
+    try:
+        estimate_snapshot('O_3', ['malware'], record=OrgRecord(id='O_3', name='Gamma'))
+        assert False, "expected ValueError without inventory"
+    except ValueError:
+        pass
+
+    fleet = combine_fleet([estimates['full'], estimates['full']], 'full', max_orgs=2)
+    assert fleet.total_calls == 2 * estimates['full'].total_calls and fleet.networks == 10
+
+
+def test_measured_latency_from_profiles():
+    with tempfile.TemporaryDirectory() as directory:
+        assert measured_request_seconds(directory) is None
+        with open(os.path.join(directory, 'profiles.jsonl'), 'w') as f:
+            f.write(json.dumps({'phases': {'snapshot': {'endpoints': {
+                'getNetworkDevices': {'requests': 4, 'seconds': 2.0}}}}}) + '\n')
+        assert measured_request_seconds(directory) == 0.5
+        # Only the most recent runs count
+        with open(os.path.join(directory, 'profiles.jsonl'), 'a') as f:
+            f.write(json.dumps({'phases': {'snapshot': {'endpoints': {
+                'getNetworkDevices': {'requests': 1, 'seconds': 0.1}}}}}) + '\n')
+        assert measured_request_seconds(directory, runs=1) == 0.1
+
+
+def test_cross_org_search():
+    records = [OrgRecord(id='1', name='Switches', product_types=['switch'], network_count=4),
+               OrgRecord(id='2', name='Wireless', product_types=['wireless'], network_count=2),
+               OrgRecord(id='3', name='Unknown'),
+               OrgRecord(id='4', name='Refused', accessible=False)]
+    by_serial = estimate_search(records, request_seconds=0.5)
+    assert by_serial.calls == {'getOrganizationDevices': 3} and by_serial.seconds == 1.5
+    by_model = estimate_search(records, 'switch', request_seconds=0.5)
+    assert by_model.calls == {'getOrganizationDevices': 2, 'getOrganizationNetworks': 1}
+    assert by_model.networks == 4 and by_model.mode == 'search'
+    # A generator is read once; the skipped count must still see every record
+    assert 'API disabled or access refused' in ' '.join(estimate_search(iter(records), request_seconds=0.5).assumptions)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
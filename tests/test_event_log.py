@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Offline tests for cursor-based event tailing and the local event log."""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.event_log as event_log_module
+from utils.event_log import EventLog, EventTailer
+from utils.rate_limit import rate_scheduler
+from utils.uplink_history import format_timestamp, parse_timestamp
+
+rate_scheduler.org_rate = 0
+
+# Recent enough that tailed events are inside the log's retention
+NOW = int(time.time()) // 3600 * 3600
+
+
+def make_event(ts, event_type='association', serial='Q-AP1', client_mac='aa:bb:cc:00:00:01'):
+    return {'occurredAt': format_timestamp(ts), 'type': event_type, 'description': event_type,
+            'deviceSerial': serial, 'deviceName': f"AP {serial}", 'clientMac': client_mac,
+            'clientDescription': 'Laptop', 'eventData': {}}
+
+
+class FakeDashboard:
+    """getNetworkEvents paging by time like the Dashboard: newest-first pages, cursors are timestamps."""
+
+    def __init__(self):
+        self.events = {}
+        self.calls = []
+        self.networks = self
+        self.organizations = self
+
+    def getNetworkEvents(self, network_id, productType, perPage, direction, total_pages, **kwargs):
+        self.calls.append(dict(kwargs, network_id=network_id, productType=productType, direction=direction))
+        stored = sorted(self.events.get((network_id, productType), []), key=lambda e: e['occurredAt'])
+        if direction == 'next':
+            after = parse_timestamp(kwargs['startingAfter'])
+            page = [e for e in stored if parse_timestamp(e['occurredAt']) > after][:perPage * total_pages]
+            more = len(page) == perPage * total_pages
+            return {'pageStartAt': kwargs['startingAfter'],
+                    'pageEndAt': page[-1]['occurredAt'] if more else format_timestamp(NOW),
+                    'events': page}
+        before = parse_timestamp(kwargs['endingBefore']) if 'endingBefore' in kwargs else NOW + 1
+        page = [e for e in stored if parse_timestamp(e['occurredAt']) < before][-perPage:]
+        return {'pageStartAt': page[0]['occurredAt'] if page else format_timestamp(0),
+                'pageEndAt': kwargs.get('endingBefore', format_timestamp(NOW)),
+                'events': page[::-1]}
+
+    def getNetwork(self, network_id):
+        return {'id': network_id, 'productTypes': ['wireless', 'switch', 'sensor']}
+
+    def getOrganizationNetworks(self, organization_id, **kwargs):
+        return [{'id': 'N_1', 'productTypes': ['wireless']}, {'id': 'N_2', 'productTypes': ['switch', 'camera']}]
+
+
+def client():
+    c = type('Client', (), {})()
+    c.dashboard = FakeDashboard()
+    return c
+
+
+def test_tail_fetches_only_new_events_and_backfills_on_demand():
+    event_log_module.PER_PAGE = 5
+    try:
+        meraki = client()
+        dashboard = meraki.dashboard
+        dashboard.events[('N_1', 'wireless')] = [make_event(NOW - 3600 * i) for i in range(1, 13)]
+        log = EventLog(directory=tempfile.mkdtemp())
+        tailer = EventTailer(log, max_pages=10)
+
+        # First tail without a window reads one page back from now
+        result = tailer.tail(meraki, 'N_1', ['wireless'])
+        assert result.calls == 1 and len(result.new_events) == 5
+        cursor = log.cursor('N_1', 'wireless')
+        assert cursor.starting_after == format_timestamp(NOW) and cursor.covered_from == NOW - 5 * 3600
+
+        # Asking for the last 9 hours backfills older pages from endingBefore only
+        result = tailer.tail(meraki, 'N_1', ['wireless'], since=NOW - 9 * 3600)
+        assert [c.get('endingBefore') for c in dashboard.calls[-1:]] == [format_timestamp(NOW - 5 * 3600)]
+        assert len(result.new_events) == 5 and log.event_count('N_1') == 10
+
+        # New events arrive; the next tail starts after the stored cursor
+        dashboard.events[('N_1', 'wireless')].append(make_event(NOW + 60, 'disassociation', client_mac='aa:bb:cc:00:00:02'))
+        dashboard.calls.clear()
+        result = tailer.tail(meraki, 'N_1', ['wireless'], since=NOW - 9 * 3600)
+        assert dashboard.calls == [{'startingAfter': format_timestamp(NOW), 'network_id': 'N_1',
+                                    'productType': 'wireless', 'direction': 'next'}]
+        assert [e['type'] for e in result.new_events] == ['disassociation']
+
+        # Nothing new: one cheap call, nothing added
+        assert tailer.tail(meraki, 'N_1', ['wireless']).new_events == []
+
+        # Reaching the oldest events marks the stream complete
+        tailer.tail(meraki, 'N_1', ['wireless'], since=NOW - 30 * 86400)
+        assert log.cursor('N_1', 'wireless').complete and log.event_count('N_1') == 13
+    finally:
+        event_log_module.PER_PAGE = 1000
+
+
+def test_query_indexes_and_persistence():
+    directory = tempfile.mkdtemp()
+    log = EventLog(directory=directory)
+    log.add('N_1', 'wireless', [make_event(NOW - 600), make_event(NOW - 300, 'wpa_auth', 'Q-AP2', 'aa:bb:cc:00:00:02')])
+    log.add('N_2', 'switch', [make_event(NOW - 100, 'port_carrier_change', 'Q-SW1', None)])
+    # Duplicates from overlapping pages are ignored
+    assert log.add('N_1', 'wireless', [make_event(NOW - 600)]) == []
+
+    assert [e['type'] for e in log.query(['N_1', 'N_2'])] == ['port_carrier_change', 'wpa_auth', 'association']
+    assert [e['deviceSerial'] for e in log.query(['N_1'], device='ap q-ap2')] == ['Q-AP2']
+    assert [e['type'] for e in log.query(['N_1', 'N_2'], client='AA:BB:CC:00:00:01')] == ['association']
+    assert [e['networkId'] for e in log.query(['N_1', 'N_2'], event_types=['port_carrier_change'])] == ['N_2']
+    assert len(log.query(['N_1', 'N_2'], since=NOW - 400)) == 2 and len(log.query(['N_1', 'N_2'], limit=1)) == 1
+    assert log.query(['N_1'], product_type='switch') == []
+
+    cursor = log.cursor('N_1', 'wireless')
+    cursor.starting_after, cursor.ending_before, cursor.updated_at = format_timestamp(NOW), format_timestamp(NOW - 900), NOW
+    log._save_cursors()
+
+    reloaded = EventLog(directory=directory, retention=450)
+    assert reloaded.event_count('N_1') == 2
+    assert reloaded.cursor('N_1', 'wireless').starting_after == format_timestamp(NOW)
+    assert [c.network_id for c in reloaded.cursors()] == ['N_1']
+
+    # Compaction drops expired events and moves the backfill cursor so they can be fetched again
+    assert reloaded.compact('N_1', now=NOW) == 1
+    assert reloaded.cursor('N_1', 'wireless').covered_from == NOW - 450
+    assert EventLog(directory=directory).event_count('N_1') == 1
+
+
+def test_tail_organization_uses_network_product_types():
+    meraki = client()
+    meraki.dashboard.events[('N_2', 'switch')] = [make_event(NOW - 60, 'port_carrier_change', 'Q-SW1')]
+    tailer = EventTailer(EventLog(directory=tempfile.mkdtemp()))
+    progress = []
+    result = tailer.tail_organization(meraki, 'O_1', on_progress=lambda done, total: progress.append(done))
+    assert sorted((c['network_id'], c['productType']) for c in meraki.dashboard.calls) == [
+        ('N_1', 'wireless'), ('N_2', 'camera'), ('N_2', 'switch')]
+    assert result.streams == 3 and len(result.new_events) == 1 and progress[-1] == 2
+    assert sorted(result.networks) == ['N_1', 'N_2']
+    # Product types of a single network come from getNetwork (unsupported types are skipped)
+    assert tailer.product_types(meraki, 'N_9') == ['wireless', 'switch']
+
+
+def test_empty_product_types_tail_nothing():
+    meraki = client()
+    tailer = EventTailer(EventLog(directory=tempfile.mkdtemp()))
+    # An explicit empty list is not "all product types"
+    assert tailer.tail(meraki, 'N_9', []).networks == []
+    assert tailer.tail_organization(meraki, 'O_1', product_types=[]).networks == []
+    # Networks without any of the requested streams are skipped
+    assert tailer.tail_organization(meraki, 'O_1', product_types=['appliance']).networks == []
+    assert meraki.dashboard.calls == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Offline tests for the content-addressed compliance evidence archive."""
+
+import os
+import sys
+import tempfile
+from dataclasses import replace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit_snapshot import NetworkSnapshot, OrgSnapshot
+from utils.audit_store import REDACTED
+from utils.evidence_archive import EvidenceArchive
+
+
+def make_snapshot(rules):
+    return OrgSnapshot(
+        organization_id='O_1',
+        endpoints=['l3_firewall', 'malware', 'ssids'],
+        networks=[
+            NetworkSnapshot(network_id='N_1', name='Clinic', devices=[{'serial': 'Q1'}],
+                            l3_firewall={'rules': rules}, malware={'mode': 'enabled'}),
+            NetworkSnapshot(network_id='N_2', name='Branch', malware={'mode': 'disabled'},
+                            errors={'l3_firewall': '404'}),
+        ]
+    )
+
+
+def test_runs_deduplicate_unchanged_records():
+    with tempfile.TemporaryDirectory() as directory:
+        archive = EvidenceArchive(directory)
+        first = archive.write_snapshot(make_snapshot([{'policy': 'deny'}]), label='hipaa')
+        # devices + l3 + malware for N_1; devices + malware for N_2 (failed l3, no ssids)
+        assert len(first.records) == 5 and first.new_objects == 5
+
+        second = archive.write_snapshot(make_snapshot([{'policy': 'deny'}]))
+        assert second.new_objects == 0 and second.reused_objects == 5
+        assert second.hash == first.hash
+
+        record = first.index()[('N_1', 'l3_firewall')]
+        assert archive.get('O_1', record.hash)['data'] == {'rules': [{'policy': 'deny'}]}
+
+
+def test_diff_between_runs():
+    with tempfile.TemporaryDirectory() as directory:
+        archive = EvidenceArchive(directory)
+        old = archive.write_snapshot(make_snapshot([{'policy': 'deny', 'destPort': '22'}]))
+        snapshot = make_snapshot([{'policy': 'deny', 'destPort': '3389'}])
+        snapshot.networks[1] = replace(snapshot.networks[1], ssids=[{'name': 'Guest'}])
+        new = archive.write_snapshot(snapshot)
+        assert new.new_objects == 2
+
+        changes = {(c.network_id, c.endpoint): c for c in archive.diff('O_1', old.run_id, new.run_id)}
+        assert changes[('N_1', 'l3_firewall')].changed_paths == ['rules[0].destPort']
+        assert changes[('N_2', 'ssids')].change == 'added'
+        assert len(changes) == 2
+
+        assert archive.resolve('O_1', 'latest') == new.run_id
+        assert archive.resolve('O_1', 'previous') == old.run_id
+        assert archive.resolve('O_1', new.hash[:10]) == new.run_id
+
+
+def test_secrets_volatile_endpoints_and_org_paths():
+    with tempfile.TemporaryDirectory() as directory:
+        archive = EvidenceArchive(directory)
+        snapshot = make_snapshot([])
+        snapshot.endpoints = snapshot.endpoints + ['security_events']
+        snapshot.networks[0] = replace(snapshot.networks[0], ssids=[{'name': 'Staff', 'psk': 'hunter2'}],
+                                       security_events=[{'ts': 1}])
+        manifest = archive.write_snapshot(snapshot)
+        assert ('N_1', 'security_events') not in manifest.index()
+        record = manifest.index()[('N_1', 'ssids')]
+        assert archive.get('O_1', record.hash)['data'] == [{'name': 'Staff', 'psk': REDACTED}]
+        # A new PSK value is not a change of evidence
+        snapshot.networks[0].ssids[0]['psk'] = 'other'
+        assert archive.write_snapshot(snapshot).new_objects == 0
+
+        assert os.path.dirname(archive.manifest_path('../../etc', 'run')).startswith(os.path.join(directory, '______etc'))
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Offline tests for the fleet-wide security posture sweep and the rate scheduler."""
+
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit_store import AuditSnapshotStore
+from utils.fleet import sweep_fleet
+from utils.org_directory import OrgRecord
+from utils.rate_limit import RateScheduler, TokenBucket, rate_scheduler
+import utils.audit_store as audit_store_module
+
+rate_scheduler.org_rate = 0
+
+NETWORKS = {
+    'O_1': [{'id': 'N_1', 'name': 'HQ', 'productTypes': ['appliance']},
+            {'id': 'N_2', 'name': 'Shop', 'productTypes': ['appliance']}],
+    'O_2': [{'id': 'N_3', 'name': 'Depot', 'productTypes': ['appliance']}],
+}
+HARDENED = {'N_1'}
+
+
+class Section:
+    """Dashboard section answering per-ID responses."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, name):
+        def call(target_id, **kwargs):
+            self.calls.append((name, target_id))
+            if target_id == 'O_3':
+                raise Exception('403 Forbidden')
+            if name == 'getOrganizationNetworks':
+                return NETWORKS[target_id]
+            if name == 'getOrganizationDevices':
+                return []
+            hardened = target_id in HARDENED
+            return {
+                'getNetworkApplianceSecurityIntrusion': {'mode': 'prevention' if hardened else 'disabled'},
+                'getNetworkApplianceSecurityMalware': {'mode': 'enabled' if hardened else 'disabled'},
+                'getNetworkApplianceContentFiltering': {'blockedUrlCategories': ['c'] if hardened else []},
+                'getNetworkApplianceFirewallL3FirewallRules': {'rules': [{'comment': 'Custom'}] if hardened else []},
+                'getNetworkApplianceVlans': [{'id': 1}] if hardened else [],
+            }.get(name, {})
+        return call
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.dashboard = type('Dashboard', (), {})()
+        for section in ('organizations', 'networks', 'appliance', 'wireless', 'switch'):
+            setattr(self.dashboard, section, Section(self.calls))
+
+
+def test_sweep_streams_and_ranks():
+    shared_store = audit_store_module.audit_store
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            audit_store_module.audit_store = AuditSnapshotStore(os.path.join(directory, 'snapshots'))
+            streamed = []
+            orgs = [OrgRecord(id='O_1', name='Alpha'), OrgRecord(id='O_2', name='Beta'), OrgRecord(id='O_3', name='Gamma')]
+            stream_path = os.path.join(directory, 'sweep.jsonl')
+            sweep = sweep_fleet(FakeClient(), orgs, on_result=streamed.append, incremental=False,
+                                stream_path=stream_path, max_orgs=3)
+
+            assert sorted(p.network_id for p in streamed) == ['N_1', 'N_2', 'N_3']
+            ranked = sweep.ranked_networks()
+            # No SSIDs scores the neutral 10 WiFi points, as in perform_security_audit
+            assert ranked[-1].network_id == 'N_1' and ranked[-1].score == 90
+            assert ranked[0].score == 15 and 'IDS/IPS disabled' in ranked[0].issues
+            assert sweep.issue_counts()['No content filtering'] == 2
+
+            by_org = {o.organization_id: o for o in sweep.ranked_organizations()}
+            assert by_org['O_1'].average_score == 52.5 and by_org['O_1'].worst_score == 15
+            assert by_org['O_3'].error and sweep.ranked_organizations()[-1].organization_id == 'O_3'
+
+            with open(stream_path) as f:
+                records = [json.loads(line) for line in f]
+            assert [r['type'] for r in records].count('network') == 3
+            assert [r['type'] for r in records].count('organization') == 3
+    finally:
+        audit_store_module.audit_store = shared_store
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+
+    scheduler = RateScheduler(org_rate=0, global_rate=0)
+    assert scheduler.acquire('O_1') == 0.0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Offline tests for correlating events and assurance alerts into incidents."""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.event_log import EventLog
+from utils.incidents import (
+    Signal, alert_signals, build_topology, correlate, event_signal, organization_incidents
+)
+from utils.rate_limit import rate_scheduler
+from utils.uplink_history import format_timestamp
+
+rate_scheduler.org_rate = 0
+
+NOW = int(time.time()) // 3600 * 3600
+
+DEVICES = [
+    {'serial': 'Q-MX1', 'name': 'Branch1 MX', 'model': 'MX68', 'networkId': 'N_1', 'mac': 'aa:00:00:00:00:01'},
+    {'serial': 'Q-SW1', 'name': 'Branch1 Core', 'model': 'MS225-48', 'networkId': 'N_1', 'mac': 'aa:00:00:00:00:02'},
+    {'serial': 'Q-SW2', 'name': 'Branch1 IDF', 'model': 'MS120-8', 'networkId': 'N_1', 'mac': 'aa:00:00:00:00:03'},
+    {'serial': 'Q-AP1', 'name': 'AP Lobby', 'model': 'MR46', 'networkId': 'N_1', 'mac': 'aa:00:00:00:00:04'},
+    {'serial': 'Q-AP2', 'name': 'AP Office', 'model': 'MR46', 'networkId': 'N_1', 'mac': 'aa:00:00:00:00:05'},
+    {'serial': 'Q-AP3', 'name': 'AP Store', 'model': 'CW9162', 'networkId': 'N_1', 'mac': 'aa:00:00:00:00:06'},
+    {'serial': 'Q-MX2', 'name': 'Branch2 MX', 'model': 'MX68', 'networkId': 'N_2'},
+    {'serial': 'Q-MX3', 'name': 'Branch3 MX', 'model': 'MX68', 'networkId': 'N_3'},
+    {'serial': 'Q-MX4', 'name': 'Branch4 MX', 'model': 'MX68', 'networkId': 'N_4'},
+]
+
+# Q-AP2 hangs off the IDF switch (LLDP chassis ID), Q-AP3 off the IDF switch by CDP name
+DISCOVERY = [
+    {'serial': 'Q-SW2', 'ports': [
+        {'portId': '1', 'lldp': {'systemName': 'Branch1 Core', 'chassisId': 'aa:00:00:00:00:02'}},
+        {'portId': '2', 'lldp': [{'name': 'Chassis ID', 'value': 'AA-00-00-00-00-05'}]},
+        {'portId': '3', 'cdp': {'deviceId': 'AP Store'}},
+    ]},
+]
+
+
+def signal(ts, node, kind='device_offline', network_id='N_1', severity='warning'):
+    return Signal(ts=ts, network_id=network_id, node=node, kind=kind, severity=severity,
+                  source='event', description=kind)
+
+
+def test_topology_tiers_and_neighbours():
+    topology = build_topology(DEVICES, DISCOVERY)
+    assert topology.parent('Q-MX1') == 'network:N_1'
+    assert topology.parent('Q-SW1') == 'Q-MX1' and topology.parent('Q-SW2') == 'Q-MX1'
+    # Switch-to-switch links do not re-parent; APs learned from LLDP/CDP hang below their switch
+    assert topology.parent('Q-AP1') == 'Q-SW1'
+    assert topology.parent('Q-AP2') == 'Q-SW2' and topology.parent('Q-AP3') == 'Q-SW2'
+    assert topology.ancestors('Q-AP2') == ['Q-SW2', 'Q-MX1', 'network:N_1']
+    assert topology.name('Q-AP3') == 'AP Store' and topology.name('network:N_2') == 'network N_2'
+
+
+def test_correlate_by_topology_time_and_storm():
+    topology = build_topology(DEVICES, DISCOVERY)
+    signals = [
+        # The IDF switch goes down, its APs follow a minute later
+        signal(NOW, 'Q-SW2', 'switch_down'),
+        signal(NOW + 60, 'Q-AP2', 'ap_offline'),
+        signal(NOW + 90, 'Q-AP3', 'ap_offline'),
+        # An unrelated AP on the core switch an hour later stays separate
+        signal(NOW + 3600, 'Q-AP1', 'ap_offline', severity='info'),
+        # The same VPN failure at three other branches becomes one storm
+        signal(NOW + 7200, 'Q-MX2', 'vpn_connectivity_change', 'N_2'),
+        signal(NOW + 7260, 'Q-MX3', 'vpn_connectivity_change', 'N_3', 'critical'),
+        signal(NOW + 7500, 'Q-MX4', 'vpn_connectivity_change', 'N_4'),
+    ]
+    clients = [
+        {'occurredAt': format_timestamp(NOW + 30), 'networkId': 'N_1', 'deviceSerial': 'Q-AP2',
+         'clientMac': f"bb:00:00:00:00:0{i % 3}", 'type': 'disassociation'} for i in range(5)
+    ]
+    incidents = correlate(signals, topology, window=600, storm_networks=3, client_events=clients)
+    assert [(i.severity, len(i.signals)) for i in incidents] == [('critical', 3), ('warning', 3), ('info', 1)]
+
+    storm = incidents[0]
+    assert storm.storm and storm.networks == ['N_2', 'N_3', 'N_4']
+    assert storm.title == 'vpn_connectivity_change across 3 networks'
+
+    outage = incidents[1]
+    assert outage.root == 'Q-SW2' and outage.title == 'ap_offline at Branch1 IDF'
+    assert outage.client_impact == 3 and outage.start == NOW and outage.end == NOW + 90
+    assert incidents[2].client_impact == 0 and not incidents[2].storm
+
+    # Without storm merging the branches stay separate; a tighter window splits the chain
+    assert len(correlate(signals, topology, window=600, storm_networks=0)) == 5
+    assert len(correlate(signals[:3], topology, window=45)) == 2
+
+
+def test_event_and_alert_signals():
+    event = {'occurredAt': format_timestamp(NOW), 'networkId': 'N_1', 'type': 'vpn_connectivity_change',
+             'description': 'VPN connectivity changed to down'}
+    parsed = event_signal(event)
+    assert parsed.node == 'network:N_1' and parsed.severity == 'warning' and parsed.ts == NOW
+
+    alert = {'network': {'id': 'N_1', 'name': 'Branch1'}, 'type': 'Device offline', 'title': 'APs went offline',
+             'severity': 'critical', 'startedAt': format_timestamp(NOW), 'resolvedAt': format_timestamp(NOW + 300),
+             'scope': {'devices': [{'serial': 'Q-AP1'}, {'serial': 'Q-AP2'}]}}
+    signals = alert_signals(alert)
+    assert [(s.node, s.severity, s.end) for s in signals] == [('Q-AP1', 'critical', NOW + 300),
+                                                             ('Q-AP2', 'critical', NOW + 300)]
+    # Alerts without an ID are told apart by their content
+    assert signals[0].alert_id == signals[1].alert_id
+    assert alert_signals(dict(alert, title='Other'))[0].alert_id != signals[0].alert_id
+    assert alert_signals({'networkId': 'N_2', 'severity': 'informational', 'startedAt': NOW})[0].node == 'network:N_2'
+
+
+def test_organization_incidents_combines_log_and_alerts():
+    calls = []
+
+    class Dashboard:
+        def __init__(self):
+            self.organizations = self
+            self.switch = self
+
+        def getOrganizationDevices(self, organization_id, **kwargs):
+            return DEVICES
+
+        def getOrganizationSwitchPortsTopologyDiscoveryByDevice(self, organization_id, **kwargs):
+            return {'items': DISCOVERY}
+
+        def getOrganizationAssuranceAlerts(self, organization_id, **kwargs):
+            calls.append(kwargs)
+            return [{'id': 'A_1', 'networkId': 'N_1', 'type': 'Switch offline', 'severity': 'critical',
+                     'startedAt': format_timestamp(NOW - 120),
+                     'scope': {'devices': [{'serial': 'Q-SW2'}, {'serial': 'Q-AP2'}, {'serial': 'Q-AP3'}]}},
+                    {'networkId': 'N_9', 'type': 'Other network', 'startedAt': format_timestamp(NOW - 120)}]
+
+    client = type('Client', (), {})()
+    client.dashboard = Dashboard()
+    log = EventLog(directory=tempfile.mkdtemp())
+    log.add('N_1', 'wireless', [
+        {'occurredAt': format_timestamp(NOW - 60), 'type': 'ap_offline', 'deviceSerial': 'Q-AP2', 'description': ''},
+        {'occurredAt': format_timestamp(NOW - 30), 'type': 'association', 'deviceSerial': 'Q-AP1',
+         'clientMac': 'bb:00:00:00:00:01', 'description': ''},
+    ])
+
+    report = organization_incidents(client, 'O_INC', log, ['N_1'], since=NOW - 3600)
+    assert (report.events, report.alerts, report.client_events) == (1, 1, 1)
+    assert calls[0]['tsStart'] == format_timestamp(NOW - 3600) and calls[0]['perPage'] == 300
+    assert len(report.incidents) == 1 and report.incidents[0].root == 'Q-SW2'
+    assert report.incidents[0].severity == 'critical'
+    # One alert scoped to three devices is three signals but still one alert
+    assert len(report.incidents[0].signals) == 4 and report.incidents[0].alerts == 1
+    assert '**Probable Root**: Branch1 IDF' in "\n".join(report.markdown())
+
+    quiet = organization_incidents(client, 'O_INC', log, ['N_1'], since=NOW - 10, include_alerts=False)
+    assert quiet.incidents == [] and len(calls) == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Offline tests for the per-network infrastructure classification cache."""
+
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import TTLCache
+from utils.infrastructure import InfrastructureCache, classify_devices
+
+
+class FakeNetworks:
+    def __init__(self, devices):
+        self.devices = devices
+        self.calls = 0
+
+    def getNetworkDevices(self, network_id):
+        self.calls += 1
+        return self.devices
+
+
+class FakeClient:
+    def __init__(self, devices):
+        self.dashboard = type('Dashboard', (), {})()
+        self.dashboard.networks = FakeNetworks(devices)
+
+
+def test_classify_mx_integrated_wireless():
+    info = classify_devices('N_1', [{'model': 'MX67W', 'serial': 'Q1'}, {'model': 'MS120-8', 'serial': 'Q2'}])
+    assert info.wifi_source == 'mx_integrated'
+    assert info.mx_wireless_only
+    assert info.has_switch and info.has_appliance
+    assert info.product_types == ['appliance', 'switch']
+
+
+def test_classify_mixed_and_dedicated():
+    mixed = classify_devices('N_1', [{'model': 'MX68CW'}, {'model': 'MR33'}])
+    dedicated = classify_devices('N_2', [{'model': 'MX68'}, {'model': 'MR46'}, {'model': 'MR46'}])
+    assert mixed.wifi_source == 'mixed'
+    assert dedicated.wifi_source == 'mr_dedicated'
+    assert dedicated.mr_count == 2
+
+
+def test_cache_fetches_once_and_invalidates():
+    client = FakeClient([{'model': 'MR33', 'serial': 'Q1'}])
+    cache = InfrastructureCache(ttl=60)
+    cache.get(client, 'N_1')
+    cache.get(client, 'N_1')
+    assert client.dashboard.networks.calls == 1
+    cache.invalidate('N_1')
+    cache.get(client, 'N_1')
+    assert client.dashboard.networks.calls == 2
+
+
+def test_org_inventory_primes_every_network():
+    client = FakeClient([])
+    cache = InfrastructureCache(ttl=60)
+    cache.update_from_org_devices(
+        [{'model': 'MX64W', 'networkId': 'N_1'}, {'model': 'MR33', 'networkId': 'N_2'}],
+        ['N_1', 'N_2', 'N_3']
+    )
+    assert cache.get(client, 'N_1').wifi_source == 'mx_integrated'
+    assert cache.get(client, 'N_2').wifi_source == 'mr_dedicated'
+    assert cache.get(client, 'N_3').wifi_source == 'none'
+    assert client.dashboard.networks.calls == 0
+
+
+def test_concurrent_loads_share_one_call_and_release_key_locks():
+    cache = TTLCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', load))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ['value'] * 4 and len(calls) == 1
+
+    try:
+        cache.get_or_load('failing', lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    assert cache._key_locks == {}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Offline tests for the arithmetic IPAM engine (no API calls)."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ipam import analyze_network, analyze_vlan, first_gap, merge_ranges
+
+
+def test_merge_and_first_gap():
+    assert merge_ranges([(5, 7), (1, 3), (4, 4), (10, 12)]) == [(1, 7), (10, 12)]
+    assert first_gap(1, 20, [(1, 7), (10, 12)]) == 8
+    assert first_gap(1, 7, [(1, 7)]) is None
+
+
+def test_slash_eight_pool_without_host_list():
+    usage = analyze_vlan({
+        'id': 1, 'name': 'Big', 'subnet': '10.0.0.0/8', 'applianceIp': '10.0.0.1',
+        'reservedIpRanges': [{'start': '10.0.0.2', 'end': '10.0.0.50'}]
+    })
+    assert usage.usable_count == 2 ** 24 - 2
+    assert usage.pool_start == '10.0.0.51'
+    assert usage.pool_end == '10.255.255.254'
+    assert usage.pool_size == 2 ** 24 - 2 - 50
+    assert usage.next_free == '10.0.0.51'
+
+
+def test_used_free_and_next_free():
+    vlan = {
+        'id': 10, 'name': 'Data', 'subnet': '192.168.10.0/29', 'applianceIp': '192.168.10.1',
+        'fixedIpAssignments': {'aa:aa:aa:aa:aa:01': {'ip': '192.168.10.2', 'name': 'printer'}}
+    }
+    clients = [
+        {'mac': 'bb:bb:bb:bb:bb:01', 'ip': '192.168.10.3', 'status': 'Online'},
+        {'mac': 'bb:bb:bb:bb:bb:02', 'ip': '192.168.99.3', 'status': 'Online'},
+    ]
+    usage = analyze_vlan(vlan, clients)
+    assert usage.pool_size == 5
+    assert usage.used_count == 2
+    assert usage.free_count == 3
+    assert usage.next_free == '192.168.10.4'
+    assert usage.conflicts == []
+
+
+def test_conflicts_detected():
+    vlans = [
+        {
+            'id': 10, 'subnet': '192.168.10.0/24', 'applianceIp': '192.168.10.1',
+            'reservedIpRanges': [{'start': '192.168.10.200', 'end': '192.168.10.250'}],
+            'fixedIpAssignments': {
+                'aa:aa:aa:aa:aa:01': {'ip': '192.168.10.210', 'name': 'in-range'},
+                'aa:aa:aa:aa:aa:02': {'ip': '10.1.1.1', 'name': 'outside'},
+                'aa:aa:aa:aa:aa:03': {'ip': '192.168.10.20', 'name': 'nas'},
+            }
+        },
+        {'id': 20, 'subnet': '192.168.10.128/25'},
+    ]
+    clients = [
+        {'mac': 'cc:cc:cc:cc:cc:01', 'ip': '192.168.10.20', 'status': 'Online'},
+        {'mac': 'cc:cc:cc:cc:cc:02', 'ip': '192.168.10.30', 'status': 'Online'},
+        {'mac': 'cc:cc:cc:cc:cc:03', 'ip': '192.168.10.30', 'status': 'Online'},
+        {'mac': 'cc:cc:cc:cc:cc:04', 'ip': '192.168.10.30', 'status': 'Offline'},
+    ]
+    analysis = analyze_network(vlans, clients)
+    conflicts = ' | '.join(analysis['vlans'][0].conflicts)
+    assert 'inside a reserved range' in conflicts
+    assert 'outside subnet' in conflicts
+    assert 'reserved for aa:aa:aa:aa:aa:03' in conflicts
+    assert 'Duplicate IP 192.168.10.30' in conflicts
+    assert 'cc:cc:cc:cc:cc:04' not in conflicts
+    assert len(analysis['overlaps']) == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
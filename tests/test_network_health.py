@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Offline tests for the organization-scope health check."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.network_health import check_org_health
+from utils.rate_limit import rate_scheduler
+
+rate_scheduler.org_rate = 0
+
+RESPONSES = {
+    'getOrganizationNetworks': [
+        {'id': 'N_1', 'name': 'HQ', 'productTypes': ['appliance', 'switch']},
+        {'id': 'N_2', 'name': 'Shop', 'productTypes': ['appliance']},
+        {'id': 'N_3', 'name': 'Depot', 'productTypes': ['wireless']},
+    ],
+    'getOrganizationDevicesStatuses': [
+        {'serial': 'Q1', 'networkId': 'N_1', 'status': 'online'},
+        {'serial': 'Q2', 'networkId': 'N_1', 'status': 'offline', 'model': 'MS120'},
+        {'serial': 'Q3', 'networkId': 'N_2', 'status': 'online'},
+        {'serial': 'Q4', 'networkId': 'N_3', 'status': 'online'},
+    ],
+    'getOrganizationApplianceUplinkStatuses': [
+        {'networkId': 'N_1', 'serial': 'Q1', 'uplinks': [{'interface': 'wan1', 'status': 'active'}]},
+        {'networkId': 'N_2', 'serial': 'Q3', 'uplinks': [{'interface': 'wan1', 'status': 'failed'},
+                                                         {'interface': 'wan2', 'status': 'ready'}]},
+    ],
+}
+
+
+class Section:
+    """Dashboard section answering from a response table; unknown methods fail like a 404."""
+
+    def __init__(self, calls, responses):
+        self.calls = calls
+        self.responses = responses
+
+    def __getattr__(self, name):
+        def call(organization_id, **kwargs):
+            self.calls.append(name)
+            if name not in self.responses:
+                raise Exception('404 Not Found')
+            return self.responses[name]
+        return call
+
+
+class FakeClient:
+    def __init__(self, responses=RESPONSES):
+        self.calls = []
+        self.dashboard = type('Dashboard', (), {})()
+        for section in ('organizations', 'appliance'):
+            setattr(self.dashboard, section, Section(self.calls, responses))
+
+
+def test_org_endpoints_fetched_once_and_joined():
+    client = FakeClient()
+    health = check_org_health(client, 'O_1')
+
+    assert sorted(client.calls) == sorted(list(RESPONSES) + ['getOrganizationAssuranceAlerts'])
+    assert health.api_calls == 4
+    assert 'alerts' in health.errors
+
+    by_id = {n.network_id: n for n in health.networks}
+    assert by_id['N_1'].status == 'degraded' and by_id['N_1'].issues == ['1/2 devices offline']
+    assert by_id['N_2'].status == 'critical' and by_id['N_2'].failed_uplinks[0]['serial'] == 'Q3'
+    assert by_id['N_3'].status == 'healthy'
+    assert [n.network_id for n in health.ranked()] == ['N_2', 'N_1', 'N_3']
+    assert health.status_counts() == {'critical': 1, 'degraded': 1, 'healthy': 1}
+
+
+def test_network_filter_and_alerts():
+    alerts = [{'network': {'id': 'N_3', 'name': 'Depot'}, 'severity': 'critical', 'title': 'AP offline'},
+              {'network': {'id': 'N_1', 'name': 'HQ'}, 'severity': 'warning'}]
+    health = check_org_health(FakeClient({**RESPONSES, 'getOrganizationAssuranceAlerts': alerts}),
+                              'O_1', network_ids=['N_3'])
+    assert not health.errors
+    assert [n.network_id for n in health.networks] == ['N_3']
+    assert health.networks[0].status == 'critical' and health.networks[0].issues == ['1 critical alerts']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Offline tests for the cached organization directory."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import meraki
+
+from utils.org_directory import OrgDirectory, is_access_error
+
+ORGS = [
+    {'id': '1', 'name': 'Wireless Only', 'api': {'enabled': True}},
+    {'id': '2', 'name': 'API Disabled', 'api': {'enabled': False}},
+    {'id': '3', 'name': 'No Permission', 'api': {'enabled': True}},
+    {'id': '4', 'name': 'Switches', 'api': {'enabled': True}},
+]
+
+NETWORKS = {
+    '1': [{'id': 'N_1', 'productTypes': ['wireless']}],
+    '4': [{'id': 'N_4', 'productTypes': ['switch', 'appliance']}],
+}
+
+
+def api_error(status, reason, message=None):
+    response = type('Response', (), {'status_code': status, 'reason': reason, 'json': lambda self: message})()
+    return meraki.APIError({'tags': ['organizations'], 'operation': 'getOrganizationNetworks'}, response)
+
+
+class FakeOrganizations:
+    def __init__(self):
+        self.calls = []
+        self.transient = set()
+
+    def getOrganizations(self):
+        self.calls.append('getOrganizations')
+        return ORGS
+
+    def getOrganizationNetworks(self, org_id, **kwargs):
+        self.calls.append(('getOrganizationNetworks', org_id))
+        if org_id in self.transient:
+            raise api_error(503, 'Service Unavailable')
+        if org_id not in NETWORKS:
+            raise api_error(403, 'Forbidden', {'errors': ['You do not have permission']})
+        return NETWORKS[org_id]
+
+
+class FakeClient:
+    def __init__(self):
+        self.dashboard = type('Dashboard', (), {})()
+        self.dashboard.organizations = FakeOrganizations()
+
+
+def test_org_list_is_cached_and_disabled_orgs_skipped():
+    client = FakeClient()
+    directory = OrgDirectory(ttl=60)
+    first = directory.candidates(client)
+    directory.candidates(client)
+    assert [o.id for o in first] == ['1', '3', '4']
+    assert client.dashboard.organizations.calls == ['getOrganizations']
+
+
+def test_product_filter_enriches_once_and_remembers_failures():
+    client = FakeClient()
+    directory = OrgDirectory(ttl=60)
+    switch_orgs = directory.candidates(client, 'switch')
+    assert [o.id for o in switch_orgs] == ['4']
+    calls = len(client.dashboard.organizations.calls)
+
+    wireless_orgs = directory.candidates(client, 'wireless')
+    assert [o.id for o in wireless_orgs] == ['1']
+    assert len(client.dashboard.organizations.calls) == calls
+    assert directory.get(client, '3').accessible is False
+    assert '403' in directory.get(client, '3').last_error
+
+
+def test_transient_errors_do_not_hide_orgs():
+    client = FakeClient()
+    client.dashboard.organizations.transient.add('4')
+    directory = OrgDirectory(ttl=60)
+    # The org stays a candidate with unknown product types
+    assert [o.id for o in directory.candidates(client, 'switch')] == ['4']
+    record = directory.get(client, '4')
+    assert record.accessible is None and '503' in record.last_error
+    assert not directory.record_error('4', TimeoutError('read timed out'))
+
+    # Once the API recovers the org is found again
+    client.dashboard.organizations.transient.clear()
+    assert [o.id for o in directory.candidates(client, 'switch')] == ['4']
+
+    assert is_access_error(api_error(404, 'Not Found')) and is_access_error(api_error(401, 'Unauthorized'))
+    assert is_access_error(api_error(400, 'Bad Request', {'errors': ['API is not enabled for this organization']}))
+    assert not is_access_error(api_error(429, 'Too Many Requests')) and not is_access_error(Exception('403'))
+
+
+def test_refresh_reprobes_failed_orgs():
+    client = FakeClient()
+    directory = OrgDirectory(ttl=60)
+    directory.candidates(client)
+    directory.mark_inaccessible('3', 'boom')
+    assert '3' not in [o.id for o in directory.candidates(client)]
+    assert '3' in [o.id for o in directory.candidates(client, refresh=True)]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Offline tests for the bundled MAC OUI vendor database (no API calls)."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.oui import (
+    enrich_clients, client_vendor, get_oui_database, is_locally_administered, normalize_mac
+)
+
+
+def test_normalize_mac_notations():
+    assert normalize_mac("00-18-0A-12-34-56") == "00:18:0a:12:34:56"
+    assert normalize_mac("0018.0a12.3456") == "00:18:0a:12:34:56"
+    assert normalize_mac("00180a123456") == "00:18:0a:12:34:56"
+    assert normalize_mac("not-a-mac") is None
+    assert normalize_mac(None) is None
+
+
+def test_lookup_known_vendor():
+    db = get_oui_database()
+    assert len(db) > 10000
+    assert db.lookup("00:18:0a:12:34:56") == "Cisco Meraki"
+    assert db.lookup("00180A123456") == "Cisco Meraki"
+
+
+def test_lookup_many_preserves_order_and_unknowns():
+    vendors = get_oui_database().lookup_many(["00:18:0a:00:00:01", "garbage", None, "da:a1:19:00:00:01"])
+    assert vendors == ["Cisco Meraki", None, None, None]
+
+
+def test_locally_administered_flag():
+    assert is_locally_administered("da:a1:19:00:00:01")
+    assert not is_locally_administered("00:18:0a:00:00:01")
+
+
+def test_enrich_clients_keeps_dashboard_manufacturer():
+    clients = [
+        {"mac": "00:18:0a:00:00:01"},
+        {"mac": "da:a1:19:00:00:01"},
+        {"mac": "00:18:0a:00:00:02", "manufacturer": "Meraki"},
+    ]
+    enrich_clients(clients)
+    assert clients[0]["ouiVendor"] == "Cisco Meraki"
+    assert clients[1]["randomizedMac"] is True
+    assert [client_vendor(c) for c in clients] == ["Cisco Meraki", "Randomized MAC", "Meraki"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Offline tests for the client-to-port attribution index."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.port_index import PortIndexCache, build_port_index, parse_vlan_list
+
+CLIENTS = [
+    {'mac': 'AA:AA:AA:00:00:01', 'ip': '10.0.1.10', 'vlan': 1, 'recentDeviceSerial': 'MS1', 'switchport': '3'},
+    {'mac': 'aa:aa:aa:00:00:02', 'ip': '10.0.1.11', 'vlan': 1, 'recentDeviceSerial': 'MS1', 'switchport': '3'},
+    {'mac': 'aa:aa:aa:00:00:03', 'ip': '10.0.20.5', 'vlan': 20, 'recentDeviceSerial': 'MX1', 'switchport': None},
+    {'mac': 'aa:aa:aa:00:00:04', 'ip': '10.0.30.5', 'vlan': 30, 'recentDeviceSerial': 'MR1', 'switchport': None},
+]
+
+
+def test_parse_vlan_list():
+    assert parse_vlan_list('all') is None
+    assert parse_vlan_list('1,3,10-12') == {'1', '3', '10', '11', '12'}
+
+
+def test_switchport_attribution_and_locate():
+    index = build_port_index('N_1', CLIENTS)
+    assert len(index.clients_on_port('MS1', 3)) == 2
+    assert index.locate('aa-aa-aa-00-00-01') == ('MS1', '3')
+    assert index.locate('aa:aa:aa:00:00:04') is None
+    assert index.find_client('10.0.20.5')['mac'] == 'aa:aa:aa:00:00:03'
+
+
+def test_appliance_ports_fall_back_to_vlans():
+    index = build_port_index('N_1', CLIENTS)
+    access, source = index.appliance_port_clients('MX1', {'number': 4, 'type': 'access', 'vlan': 20})
+    assert source == 'vlan' and [c['ip'] for c in access] == ['10.0.20.5']
+    trunk, _ = index.appliance_port_clients('MX1', {'number': 5, 'type': 'trunk', 'vlan': 1, 'allowedVlans': '20-30'})
+    assert len(trunk) == 4
+
+
+def test_mac_table_and_lldp():
+    mac_tables = {'MX1': [
+        {'mac': 'aa:aa:aa:00:00:03', 'port': '4', 'vlanId': 20},
+        {'mac': 'aa:aa:aa:00:00:03', 'port': '2', 'vlanId': 20},
+        {'mac': 'aa:aa:aa:00:00:01', 'port': '2', 'vlanId': 1},
+    ]}
+    lldp = {'MX1': {'ports': {'2': {'lldp': {'systemName': 'core-ms', 'portId': '48'}}}}}
+    index = build_port_index('N_1', CLIENTS, lldp, mac_tables)
+    clients, source = index.appliance_port_clients('MX1', {'number': 4, 'type': 'access', 'vlan': 20})
+    assert source == 'mac_table' and len(clients) == 1
+    # Port 2 is the uplink to the switch; the client is located on its edge port
+    assert index.locate('aa:aa:aa:00:00:03') == ('MX1', '4')
+    assert index.locate('aa:aa:aa:00:00:01') == ('MS1', '3')
+    assert index.neighbor('MX1', 2)['system_name'] == 'core-ms'
+    assert index.sources == ['clients', 'mac_table', 'lldp_cdp']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Offline tests for the audit run profiler."""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import meraki_client
+from utils.audit_snapshot import NetworkSnapshot, _run_fetches
+from utils import profiler as profiler_module
+from utils.profiler import RunProfiler, read_profiles, tail_lines
+from utils.rate_limit import rate_scheduler
+
+rate_scheduler.org_rate = 0
+
+
+class Response:
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+
+
+class FakeSession:
+    """Mimics the SDK RestSession retry loop: request() calls _send_request() until it succeeds."""
+
+    def __init__(self, failures):
+        self.failures = dict(failures)
+
+    def _send_request(self, method, url, **kwargs):
+        if self.failures.get(url, 0) > 0:
+            self.failures[url] -= 1
+            return Response(429)
+        return Response(200, b'{"mode": "enabled"}')
+
+    def request(self, metadata, method, url, **kwargs):
+        while True:
+            response = self._send_request(method, url, **kwargs)
+            if response.status_code == 200:
+                return response
+
+
+class Section:
+    def __init__(self, session):
+        self.session = session
+
+    def __getattr__(self, name):
+        def call(target_id, **kwargs):
+            self.session.request({'tags': ['x'], 'operation': name}, 'GET', f"/{name}/{target_id}")
+            return {'mode': 'enabled'}
+        return call
+
+
+class FakeClient:
+    def __init__(self, failures=()):
+        self.dashboard = type('Dashboard', (), {})()
+        self.dashboard._session = FakeSession(failures)
+        for section in ('organizations', 'networks', 'appliance'):
+            setattr(self.dashboard, section, Section(self.dashboard._session))
+
+
+def test_phases_endpoints_and_retries():
+    client = FakeClient({'/getNetworkApplianceSecurityMalware/N_2': 2})
+    profiler = RunProfiler('hipaa', 'O_1')
+    with profiler.activate(client, phase='organization'):
+        client.dashboard.organizations.getOrganization('O_1')
+        profiler.mark('snapshot')
+        snapshots = [NetworkSnapshot(network_id=n, name=n, product_types=['appliance']) for n in ('N_1', 'N_2')]
+        _run_fetches(client, [(snap, 'malware') for snap in snapshots], max_workers=2, organization_id='O_1')
+        profiler.mark('access_controls')
+
+    # Requests made after the run are not recorded
+    client.dashboard.organizations.getOrganization('O_1')
+
+    assert profiler.phases['organization'].endpoints['getOrganization'].requests == 1
+    malware = profiler.phases['snapshot'].endpoints['getNetworkApplianceSecurityMalware']
+    assert malware.requests == 2 and malware.attempts == 4 and malware.retries == 2
+    assert malware.bytes == 2 * len(b'{"mode": "enabled"}')
+    assert profiler.phases['access_controls'].total().requests == 0
+    assert profiler.total().requests == 3 and profiler.total().retries == 2
+    assert 'getNetworkApplianceSecurityMalware' in '\n'.join(profiler.markdown())
+
+
+def test_streaming_dashboard_is_instrumented():
+    create = meraki_client.meraki.DashboardAPI
+    meraki_client.meraki.DashboardAPI = lambda **kwargs: FakeClient().dashboard
+    try:
+        client = meraki_client.MerakiClient.__new__(meraki_client.MerakiClient)
+        client.dashboard = FakeClient().dashboard
+        client._streaming_dashboard = None
+        client._streaming_lock = threading.Lock()
+        profiler = RunProfiler('top_usage', 'O_1')
+        with profiler.activate(client, phase='stream'):
+            client.streaming_dashboard.organizations.getOrganizationClientsSearch('O_1')
+    finally:
+        meraki_client.meraki.DashboardAPI = create
+    assert profiler.phases['stream'].endpoints['getOrganizationClientsSearch'].requests == 1
+
+
+def test_export_metrics():
+    profiler = RunProfiler('hipaa', 'O_1')
+    client = FakeClient()
+    with profiler.activate(client, phase='snapshot'):
+        client.dashboard.networks.getNetworkDevices('N_1')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = profiler.export(directory)
+        with open(path) as f:
+            metrics = f.read()
+        assert 'meraki_mcp_audit_requests{run="hipaa",organization="O_1",phase="snapshot",endpoint="getNetworkDevices"} 1' in metrics
+        with open(os.path.join(directory, 'profiles.jsonl')) as f:
+            record = json.loads(f.readline())
+        assert record['phases']['snapshot']['endpoints']['getNetworkDevices']['requests'] == 1
+
+
+def test_profile_log_keeps_last_runs():
+    limit = profiler_module.MCP_PROFILE_LOG_RUNS
+    profiler_module.MCP_PROFILE_LOG_RUNS = 3
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for run in range(5):
+                RunProfiler(f"run{run}", 'O_1').export(directory)
+            assert [p['run'] for p in read_profiles(directory)] == ['run2', 'run3', 'run4']
+            assert [p['run'] for p in read_profiles(directory, runs=2)] == ['run3', 'run4']
+            assert read_profiles(os.path.join(directory, 'missing')) == []
+
+            # Reading backwards across block boundaries returns whole lines only
+            path = os.path.join(directory, 'lines.txt')
+            with open(path, 'w') as f:
+                f.write(''.join(f"line {i}\n" for i in range(100)))
+            assert tail_lines(path, 4, block_size=7) == [b'line 96', b'line 97', b'line 98', b'line 99']
+            assert len(tail_lines(path, 500, block_size=7)) == 100
+    finally:
+        profiler_module.MCP_PROFILE_LOG_RUNS = limit
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Offline tests for the batched security remediation pipeline."""
+
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit_snapshot import NetworkSnapshot
+from utils.rate_limit import rate_scheduler
+from utils.remediation import SecurityRuleOptions, pack_batches, plan_network, remediate_networks
+
+rate_scheduler.org_rate = 0
+
+NETWORKS = [{'id': f"N_{i}", 'name': f"Site {i}", 'productTypes': ['appliance']} for i in range(5)]
+NETWORKS.append({'id': 'N_W', 'name': 'Wifi only', 'productTypes': ['wireless']})
+
+
+class Organizations:
+    def __init__(self, failing):
+        self.failing = failing
+        self.batches = {}
+        self.lock = threading.Lock()
+
+    def getOrganizationNetworks(self, organization_id, **kwargs):
+        return NETWORKS
+
+    def createOrganizationActionBatch(self, organization_id, actions, confirmed, synchronous):
+        assert confirmed and not synchronous and len(actions) <= 4
+        failed = any(action['resource'].startswith(f"/networks/{self.failing}/") for action in actions)
+        with self.lock:
+            batch_id = f"B{len(self.batches)}"
+            self.batches[batch_id] = {'id': batch_id, 'actions': actions,
+                                      'status': {'completed': not failed, 'failed': failed,
+                                                 'errors': ['Invalid rule'] if failed else []}}
+        # Reported as still running until the first poll
+        return {'id': batch_id, 'status': {'completed': False, 'failed': False}}
+
+    def getOrganizationActionBatch(self, organization_id, batch_id):
+        return self.batches[batch_id]
+
+
+class Appliance:
+    def getNetworkApplianceSecurityIntrusion(self, network_id):
+        return {'mode': 'prevention' if network_id == 'N_0' else 'disabled'}
+
+    def getNetworkApplianceSecurityMalware(self, network_id):
+        return {'mode': 'disabled'}
+
+
+class FakeClient:
+    def __init__(self, failing=None):
+        self.dashboard = type('Dashboard', (), {})()
+        self.dashboard.organizations = Organizations(failing)
+        self.dashboard.appliance = Appliance()
+
+
+def test_plan_skips_settings_already_in_place():
+    snap = NetworkSnapshot(network_id='N_1', name='Site 1', product_types=['appliance'],
+                           intrusion={'mode': 'detection'}, malware={'mode': 'disabled'},
+                           l3_firewall={'rules': [{'policy': 'deny', 'protocol': 'tcp', 'destPort': '445'},
+                                                  {'comment': 'Default rule', 'policy': 'allow'}]})
+    options = SecurityRuleOptions(block_p2p=True, blocked_ports=['445', '3389'], block_high_risk_countries=True)
+    plan = plan_network(snap, options)
+
+    resources = [action['resource'] for action in plan.actions]
+    assert resources == ['/networks/N_1/appliance/contentFiltering', '/networks/N_1/appliance/firewall/l7FirewallRules',
+                         '/networks/N_1/appliance/firewall/l3FirewallRules', '/networks/N_1/appliance/security/malware']
+    l3_rules = plan.actions[2]['body']['rules']
+    assert [rule.get('destPort') for rule in l3_rules] == ['3389', '445']
+    assert plan.unchanged == ['IDS/IPS: already enabled (detection)']
+
+    batches = pack_batches([plan, plan, plan], max_actions=9)
+    assert [len(batch) for batch in batches] == [2, 1]
+
+
+def test_batches_applied_and_failures_isolated():
+    client = FakeClient(failing='N_3')
+    run = remediate_networks(client, 'O_1', SecurityRuleOptions(block_malicious_sites=False),
+                             max_actions=4, poll_interval=0)
+
+    statuses = {plan.network_id: plan.status for plan in run.plans}
+    assert statuses == {'N_0': 'applied', 'N_1': 'applied', 'N_2': 'applied', 'N_3': 'failed', 'N_4': 'applied'}
+    assert [n['id'] for n in run.skipped] == ['N_W']
+    failed = next(plan for plan in run.plans if plan.network_id == 'N_3')
+    assert failed.errors == ['Invalid rule'] and len(failed.batch_ids) == 2
+
+
+def test_dry_run_submits_nothing():
+    client = FakeClient()
+    run = remediate_networks(client, 'O_1', SecurityRuleOptions(), network_ids=['N_0', 'N_1'], dry_run=True)
+    assert [plan.status for plan in run.plans] == ['planned', 'planned']
+    assert not client.dashboard.organizations.batches and run.action_count == 5
+
+
+def test_unknown_network_ids_reported():
+    client = FakeClient()
+    run = remediate_networks(client, 'O_1', SecurityRuleOptions(), network_ids=['N_0', 'N_OTHER', 'N_TYPO'],
+                             dry_run=True)
+    assert [plan.network_id for plan in run.plans] == ['N_0']
+    assert run.not_found == ['N_OTHER', 'N_TYPO']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Offline tests for the organization-wide wireless RF heatmap."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.rate_limit import rate_scheduler
+from utils.rf_heatmap import band_percentage, build_rf_heatmap, history_interval
+from utils.uplink_history import format_timestamp, parse_timestamp
+
+rate_scheduler.org_rate = 0
+
+START = parse_timestamp('2024-03-01T00:00:00Z')
+
+# AP -> band -> (average utilization, downstream loss)
+APS = {
+    'Q-LOBBY': {'2.4': (85.0, 2.0), '5': (40.0, 1.0)},
+    'Q-HALL': {'2.4': (30.0, 12.0), '5': (20.0, 0.5)},
+    'Q-OFFICE': {'2.4': (10.0, 0.1), '5': (5.0, 0.0)},
+}
+
+
+def band_entry(band, total):
+    return {'band': band, 'wifi': {'percentage': total * 0.8}, 'nonWifi': {'percentage': total * 0.2},
+            'total': {'percentage': total}}
+
+
+class Organizations:
+    def getOrganizationDevices(self, organization_id, total_pages=1, **kwargs):
+        assert kwargs['productTypes'] == ['wireless'] and total_pages == 'all'
+        return [{'serial': serial, 'name': serial.title().replace('Q-', ''), 'networkId': 'N_1'} for serial in APS]
+
+
+class Wireless:
+    def __init__(self):
+        self.calls = []
+
+    def getOrganizationWirelessDevicesChannelUtilizationByDevice(self, organization_id, total_pages=1, **kwargs):
+        self.calls.append(('utilization', kwargs))
+        return [{'serial': serial, 'network': {'id': 'N_1'},
+                 'byBand': [band_entry(band, values[0]) for band, values in bands.items()]}
+                for serial, bands in APS.items()]
+
+    def getOrganizationWirelessDevicesChannelUtilizationHistoryByDeviceByInterval(self, organization_id, total_pages=1, **kwargs):
+        self.calls.append(('history', kwargs))
+        entries = []
+        for hour in range(24):
+            for serial, bands in APS.items():
+                # The lobby 2.4 GHz radio peaks at 100% during the busiest hour
+                spike = 15.0 if serial == 'Q-LOBBY' and hour == 12 else 0.0
+                entries.append({'serial': serial, 'network': {'id': 'N_1'}, 'startTs': format_timestamp(START + hour * 3600),
+                                'byBand': [band_entry(band, values[0] + (spike if band == '2.4' else 0))
+                                           for band, values in bands.items()]})
+        return entries
+
+    def getOrganizationWirelessDevicesPacketLossByDevice(self, organization_id, total_pages=1, **kwargs):
+        self.calls.append(('loss', kwargs))
+        (band,) = kwargs['bands']
+        return [{'device': {'serial': serial, 'name': serial}, 'network': {'id': 'N_1', 'name': 'Campus'},
+                 'downstream': {'lossPercentage': bands[band][1]}, 'upstream': {'lossPercentage': 0.0}}
+                for serial, bands in APS.items() if band in bands]
+
+    def getNetworkWirelessSignalQualityHistory(self, network_id, **kwargs):
+        self.calls.append(('signal', kwargs))
+        return [{'snr': 20, 'rssi': -70}, {'snr': 30, 'rssi': -60}]
+
+
+def client():
+    c = type('Client', (), {})()
+    c.dashboard = type('Dashboard', (), {})()
+    c.dashboard.organizations = Organizations()
+    c.dashboard.wireless = Wireless()
+    return c
+
+
+def test_helpers():
+    assert band_percentage({'wifi': {'percentage': 30}, 'nonWifi': {'percentage': 5}}) == 35
+    assert band_percentage({'wifi': {'percentage': 30}}, 'nonWifi') is None
+    assert history_interval(86400) == 3600 and history_interval(3600) == 300 and history_interval(90 * 86400) == 21600
+
+
+def test_heatmap_joins_and_ranks_worst_offenders():
+    c = client()
+    heatmap = build_rf_heatmap(c, 'O_1', timespan=86400, signal_top=2)
+    assert heatmap.serials == ['Q-HALL', 'Q-LOBBY', 'Q-OFFICE'] and heatmap.bands == ('2.4', '5', '6')
+    assert heatmap.errors == {}
+
+    calls = c.dashboard.wireless.calls
+    assert sorted(k['bands'][0] for name, k in calls if name == 'loss') == ['2.4', '5', '6']
+    assert [k['interval'] for name, k in calls if name == 'history'] == [3600]
+
+    lobby = heatmap.serials.index('Q-LOBBY')
+    assert heatmap.matrices['utilization'][lobby, 0] == 85.0
+    assert np.isclose(heatmap.matrices['non_wifi'][lobby, 0], 17.0)
+    assert heatmap.matrices['utilization_peak'][lobby, 0] == 100.0
+    assert np.isnan(heatmap.matrices['utilization'][lobby, 2])
+
+    # Lobby 2.4 GHz is congested, hall 2.4 GHz is lossy (12% vs 5% threshold = 2.4)
+    worst = heatmap.worst(3)
+    assert [(cell.serial, cell.band) for cell in worst[:2]] == [('Q-HALL', '2.4'), ('Q-LOBBY', '2.4')]
+    assert np.isclose(worst[0].score, 12.0 / 5.0) and worst[0].values['snr'] == 25.0
+    assert worst[2].values['snr'] is None
+    assert len([name for name, _ in calls if name == 'signal']) == 2
+
+    summary = heatmap.band_summary()
+    assert summary['2.4'] == {'aps': 3, 'utilization_avg': 125.0 / 3, 'utilization_p95': summary['2.4']['utilization_p95'],
+                              'congested': 1, 'lossy': 1}
+    assert summary['6']['aps'] == 0
+
+    report = "\n".join(heatmap.markdown(top=5))
+    assert "Worst Offenders" in report and "| 🔴 Lobby | Campus | 2.4 |" in report
+    assert heatmap.to_dict()['worst'][0]['serial'] == 'Q-HALL'
+
+
+def test_failed_source_is_reported():
+    c = client()
+
+    def fail(*args, **kwargs):
+        raise Exception("403 Forbidden")
+
+    c.dashboard.wireless.getOrganizationWirelessDevicesPacketLossByDevice = fail
+    heatmap = build_rf_heatmap(c, 'O_1', bands=['2.4', '5'], signal_top=0)
+    assert set(heatmap.errors) == {'packet_loss_2.4', 'packet_loss_5'}
+    assert np.isnan(heatmap.matrices['loss_down']).all()
+    assert heatmap.worst(1)[0].serial == 'Q-LOBBY'
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Offline tests for the windowed sensor history fetcher."""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.rate_limit import rate_scheduler
+from utils.sensor_history import SensorReadingsCache, fetch_sensor_history, reading_value, split_windows
+from utils.uplink_history import format_timestamp, parse_timestamp
+
+rate_scheduler.org_rate = 0
+
+START = parse_timestamp('2024-03-01T00:00:00Z')
+DAY = 86400
+
+
+class Sensor:
+    """Readings every 30 minutes for two MT sensors; both window edges are inclusive like the API."""
+
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+        self._lock = threading.Lock()
+
+    def getOrganizationSensorReadingsHistory(self, organization_id, total_pages=1, **kwargs):
+        t0, t1 = parse_timestamp(kwargs['t0']), parse_timestamp(kwargs['t1'])
+        with self._lock:
+            self.calls.append((t0, t1, total_pages, kwargs.get('serials')))
+        if self.fail_after is not None and t0 >= self.fail_after:
+            raise Exception("429 Too Many Requests")
+        readings = []
+        for ts in range(t0 - t0 % 1800, t1 + 1, 1800):
+            if ts < t0:
+                continue
+            hour = (ts - START) / 3600
+            for serial in ('Q-MT1', 'Q-MT2'):
+                network = {'id': 'N_1', 'name': 'Cold Room'}
+                readings.append({'serial': serial, 'network': network, 'ts': format_timestamp(ts), 'metric': 'temperature',
+                                 'temperature': {'celsius': 4.0 + (serial == 'Q-MT2') * 10 + np.sin(hour), 'fahrenheit': 0}})
+                readings.append({'serial': serial, 'network': network, 'ts': format_timestamp(ts), 'metric': 'door',
+                                 'door': {'open': hour % 24 == 8}})
+        return readings
+
+
+def client(sensor):
+    c = type('Client', (), {})()
+    c.dashboard = type('Dashboard', (), {})()
+    c.dashboard.sensor = sensor
+    return c
+
+
+def test_windows_and_values():
+    assert split_windows(START, START + 2 * DAY + 10) == [
+        (START, START + DAY), (START + DAY, START + 2 * DAY), (START + 2 * DAY, START + 2 * DAY + 10)
+    ]
+    # Never longer than the API's seven days
+    assert len(split_windows(START, START + 30 * DAY, window=30 * DAY)) == 5
+    assert reading_value({'metric': 'noise', 'noise': {'ambient': {'level': 41}}}, 'noise') == 41.0
+    assert reading_value({'metric': 'water', 'water': {'present': True}}, 'water') == 1.0
+    assert reading_value({'metric': 'button', 'button': {'pressType': 'short'}}, 'button') is None
+
+
+def test_thirty_days_merge_sorted_and_deduplicated():
+    sensor = Sensor()
+    progress = []
+    history = fetch_sensor_history(client(sensor), 'O_1', START, START + 30 * DAY, serials=['Q-MT1', 'Q-MT2'],
+                                   on_progress=lambda done, total: progress.append((done, total)))
+    assert history.windows == 30 and len(sensor.calls) == 30 and progress[-1] == (30, 30)
+    assert all(total_pages == 'all' and serials == ['Q-MT1', 'Q-MT2'] for _, _, total_pages, serials in sensor.calls)
+
+    assert history.serials == ['Q-MT1', 'Q-MT2'] and history.metrics == ['door', 'temperature']
+    series = history.series[('Q-MT1', 'temperature')]
+    # Readings on window edges were returned twice but are kept once
+    assert len(series.ts) == 30 * 48 + 1 and np.all(np.diff(series.ts) == 1800)
+    assert series.network_name == 'Cold Room' and series.unit == '°C'
+
+    summaries = dict((s.serial, summary) for s, summary in history.summaries('temperature'))
+    assert abs(summaries['Q-MT1'].mean - 4.0) < 0.05 and abs(summaries['Q-MT2'].max - 15.0) < 0.01
+    door = history.series[('Q-MT2', 'door')]
+    assert door.values.sum() == 30  # open on the 08:00 reading of every day
+
+    reduced = series.downsample(100, 'lttb')
+    assert len(reduced.ts) == 100 and reduced.ts[0] == series.ts[0] and reduced.ts[-1] == series.ts[-1]
+    extremes = door.downsample(60, 'minmax')
+    assert extremes.values.sum() == 30 and len(extremes.ts) <= 60
+
+
+def test_failed_windows_are_reported():
+    history = fetch_sensor_history(client(Sensor(fail_after=START + 2 * DAY)), 'O_1', START, START + 4 * DAY)
+    assert len(history.errors) == 2 and 'Too Many Requests' in history.errors[0]
+    assert len(history.series[('Q-MT1', 'temperature')].ts) == 2 * 48 + 1
+
+    try:
+        fetch_sensor_history(client(Sensor(fail_after=0)), 'O_1', START, START + DAY)
+        assert False, "expected every window to fail"
+    except RuntimeError as e:
+        assert 'Too Many Requests' in str(e)
+
+
+def test_cache_fetches_only_missing_ranges():
+    directory = tempfile.mkdtemp()
+    sensor = Sensor()
+    cache = SensorReadingsCache(directory=directory, retention=10 ** 10)
+    first = cache.history(client(sensor), 'O_1', START, START + DAY)
+    assert len(sensor.calls) == 1 and first.readings == 4 * 49 and first.cached == 0
+
+    again = cache.history(client(sensor), 'O_1', START, START + DAY)
+    assert len(sensor.calls) == 1 and again.readings == 0 and again.cached == 4 * 49
+    assert np.array_equal(again.series[('Q-MT1', 'temperature')].values, first.series[('Q-MT1', 'temperature')].values)
+
+    # Overlapping window: only the part after the cached day is fetched
+    later = cache.history(client(sensor), 'O_1', START + DAY // 2, START + 2 * DAY)
+    assert sensor.calls[-1][:2] == (START + DAY, START + 2 * DAY)
+    series = later.series[('Q-MT1', 'temperature')]
+    assert series.ts[0] == START + DAY // 2 and len(series.ts) == 73 and np.all(np.diff(series.ts) == 1800)
+
+    # A narrower filter is answered by the unfiltered fetch, but not the other way round
+    cache.history(client(sensor), 'O_1', START, START + DAY, serials=['Q-MT2'], metrics=['door'])
+    assert len(sensor.calls) == 2
+    cache.history(client(sensor), 'O_1', START + 2 * DAY, START + 3 * DAY, serials=['Q-MT2'])
+    assert len(sensor.calls) == 3 and sensor.calls[-1][3] == ['Q-MT2']
+    cache.history(client(sensor), 'O_1', START + 2 * DAY, START + 3 * DAY)
+    assert len(sensor.calls) == 4
+
+    # Persisted: a new cache over the same directory does not refetch
+    reloaded = SensorReadingsCache(directory=directory, retention=10 ** 10)
+    history = reloaded.history(client(sensor), 'O_1', START, START + 2 * DAY, serials=['Q-MT1'])
+    assert len(sensor.calls) == 4 and history.serials == ['Q-MT1'] and history.cached == 2 * (2 * 48 + 1)
+    # Every series comes back intact from the single-pass load
+    saved, loaded = cache._org('O_1')[0], reloaded._org('O_1')[0]
+    assert sorted(saved) == sorted(loaded) and len(saved) == 4
+    assert all(np.array_equal(saved[k].ts, loaded[k].ts) and np.array_equal(saved[k].values, loaded[k].values)
+               for k in saved)
+
+
+def test_cache_keeps_requested_window_beyond_retention():
+    sensor = Sensor()
+    directory = tempfile.mkdtemp()
+    # Every reading of the fake sensor is far older than a one-day retention
+    cache = SensorReadingsCache(directory=directory, retention=DAY)
+    history = cache.history(client(sensor), 'O_1', START, START + 3 * DAY)
+    assert sum(len(s.ts) for s in history.series.values()) == 4 * (3 * 48 + 1)
+    calls = len(sensor.calls)
+
+    again = cache.history(client(sensor), 'O_1', START, START + 3 * DAY)
+    assert len(sensor.calls) == calls and again.cached == 4 * (3 * 48 + 1)
+    reloaded = SensorReadingsCache(directory=directory, retention=DAY)
+    assert reloaded.history(client(sensor), 'O_1', START, START + 3 * DAY).readings == 0
+
+
+def test_cache_refetches_recent_readings():
+    sensor = Sensor()
+    cache = SensorReadingsCache(directory=tempfile.mkdtemp(), retention=10 ** 10)
+    now = int(time.time())
+    cache.history(client(sensor), 'O_1', now - 3600, now)
+    # The last minutes before the fetch may still receive late readings, so they are fetched again
+    cache.history(client(sensor), 'O_1', now - 3600, now)
+    assert len(sensor.calls) == 2 and sensor.calls[1][0] == now - 600
+    assert cache.stats('O_1')['series'] == 4
+    cache.clear('O_1')
+    assert cache.stats('O_1')['readings'] == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
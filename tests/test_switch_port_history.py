@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Offline tests for the switch port ring buffer, its analyses and the collector."""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.rate_limit import rate_scheduler
+from utils.switch_port_history import (
+    SwitchPortCollector, SwitchPortHistoryStore, SwitchPortRing, parse_speed, port_faults
+)
+
+rate_scheduler.org_rate = 0
+
+START = 1_700_000_000
+
+
+def snapshot(i):
+    """Port 1 flaps every other poll, port 2 starts logging CRC errors halfway, port 3 draws PoE."""
+    return {'items': [
+        {'serial': 'Q-SW1', 'name': 'IDF-1', 'model': 'MS120-8LP', 'network': {'id': 'N_1'}, 'ports': [
+            {'portId': '1', 'enabled': True, 'status': 'Connected' if i % 2 else 'Disconnected', 'speed': '1 Gbps'},
+            {'portId': '2', 'enabled': True, 'status': 'Connected', 'speed': '100 Mbps' if i >= 6 else '1 Gbps',
+             'errors': ['Very high proportion of CRC errors'] if i >= 5 else [], 'warnings': [],
+             'trafficInKbps': {'total': 500.0}},
+            {'portId': '3', 'enabled': True, 'status': 'Connected', 'speed': '1 Gbps',
+             'powerUsageInWh': 24 * (30 + i), 'poe': {'isAllocated': True}},
+            {'portId': '4', 'enabled': False, 'status': 'Disabled', 'speed': ''},
+        ]},
+        {'serial': 'Q-SW2', 'name': 'Core', 'model': 'MS390-48UX', 'network': {'id': 'N_1'}, 'ports': [
+            {'portId': '1', 'enabled': True, 'status': 'Connected', 'speed': '10 Gbps', 'powerUsageInWh': 240},
+        ]},
+    ]}
+
+
+def test_parse_speed():
+    assert parse_speed('1 Gbps') == 1000 and parse_speed('2.5 Gbps') == 2500 and parse_speed('100 Mbps') == 100
+    assert np.isnan(parse_speed('')) and np.isnan(parse_speed(None))
+
+
+def test_ring_overwrites_oldest_and_analyses():
+    store = SwitchPortHistoryStore(directory=tempfile.mkdtemp(), capacity=8)
+    for i in range(10):
+        assert store.ingest('O_1', snapshot(i), ts=START + i * 300) == 5
+    # Polls that do not move forward in time are ignored
+    assert store.ingest('O_1', snapshot(0), ts=START) == 0
+
+    ring = store.ring('O_1')
+    ts, columns = ring.window()
+    assert list(ts) == [START + i * 300 for i in range(2, 10)] and ring.samples == 8
+    assert columns['status'].shape == (5, 8)
+    assert store.coverage('O_1') == (START + 600, START + 2700) and store.port_count('O_1') == 5
+
+    flapping = store.flapping('O_1')
+    assert [(p.serial, p.port_id, p.flaps, p.speed_changes) for p in flapping] == [('Q-SW1', '1', 7, 0)]
+    assert flapping[0].status == 'connected' and flapping[0].switch == 'IDF-1'
+    # The disabled port is never counted as flapping; one renegotiation is below the threshold
+    assert store.flapping('O_1', min_flaps=1)[1].port_id == '2'
+
+    trends = store.error_trends('O_1')
+    assert [(t.port_id, t.trend) for t in trends] == [('2', 'rising')]
+    assert trends[0].error_rate == 5 / 8 and trends[0].recent_rate == 1.0 and trends[0].earlier_rate == 0.25
+    assert trends[0].traffic == 500.0 and trends[0].conditions == ['Very high proportion of CRC errors']
+    assert store.error_trends('O_1', since=START + 1500)[0].trend == 'steady'
+
+    poe = store.poe_headroom('O_1')
+    assert [(h.serial, h.budget) for h in poe] == [('Q-SW1', 67), ('Q-SW2', None)]
+    assert poe[0].peak == 39 and poe[0].average == 35.5 and poe[0].headroom == 28
+    assert poe[0].allocated_ports == 1 and poe[1].utilization is None and poe[1].peak == 10
+
+
+def test_idle_ports_are_not_errors():
+    store = SwitchPortHistoryStore(directory=tempfile.mkdtemp(), capacity=8)
+    for i in range(4):
+        store.ingest('O_1', {'items': [{'serial': 'Q-SW1', 'ports': [
+            # Nothing plugged in: the API reports the link state as an error on every poll
+            {'portId': '1', 'enabled': True, 'status': 'Disconnected', 'errors': ['Port disconnected'], 'warnings': []},
+            {'portId': '2', 'enabled': False, 'status': 'Disabled', 'errors': ['Port disabled']},
+            {'portId': '3', 'enabled': True, 'status': 'Connected', 'errors': [],
+             'warnings': ['PoE port was denied power', 'Port disconnected']},
+        ]}]}, ts=START + i * 300)
+    _, columns = store.ring('O_1').window()
+    assert columns['errors'].tolist() == [[0] * 4, [0] * 4, [1] * 4]
+    assert [(t.port_id, t.conditions) for t in store.error_trends('O_1')] == [('3', ['PoE port was denied power'])]
+    assert port_faults({'errors': ['Port disconnected.'], 'warnings': ['Too many CRC errors']}) == ['Too many CRC errors']
+
+
+def test_persistence_and_resize():
+    directory = tempfile.mkdtemp()
+    store = SwitchPortHistoryStore(directory=directory, capacity=8)
+    for i in range(10):
+        store.ingest('O_1', snapshot(i), ts=START + i * 300)
+    store.save('O_1')
+
+    reloaded = SwitchPortHistoryStore(directory=directory, capacity=8)
+    assert reloaded.flapping('O_1')[0].flaps == 7
+    assert reloaded.ring('O_1').written == 10
+    assert reloaded.ingest('O_1', snapshot(10), ts=START + 3000) == 5
+
+    smaller = SwitchPortHistoryStore(directory=directory, capacity=4)
+    ts, _ = smaller.ring('O_1').window()
+    assert list(ts) == [START + i * 300 for i in range(6, 10)]
+    assert smaller.error_trends('O_1')[0].error_rate == 1.0
+    assert isinstance(SwitchPortHistoryStore(directory=tempfile.mkdtemp()).ring('O_2'), SwitchPortRing)
+
+
+def test_collector_polls_org_statuses():
+    calls = []
+
+    class Switch:
+        def getOrganizationSwitchPortsStatusesBySwitch(self, organization_id, **kwargs):
+            calls.append(kwargs)
+            return snapshot(len(calls))['items']
+
+    client = type('Client', (), {})()
+    client.dashboard = type('Dashboard', (), {})()
+    client.dashboard.switch = Switch()
+
+    store = SwitchPortHistoryStore(directory=tempfile.mkdtemp(), capacity=8)
+    collector = SwitchPortCollector(store)
+    assert collector.poll_once(client, 'O_1') == 5
+    assert calls == [{'perPage': 20, 'total_pages': 'all'}]
+    assert os.path.exists(store.path('O_1'))
+    assert not collector.running('O_1') and not collector.stop('O_1')
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
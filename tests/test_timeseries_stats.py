@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Offline tests for the vectorized loss/latency statistics."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.timeseries_stats import (
+    availability, column, distribution_percentiles_many, latency_category_stats, loss_bursts, lttb_indices,
+    min_max_indices, summarize, summarize_many, to_matrix, uplink_stats
+)
+
+
+def test_summaries_match_per_series_numpy():
+    rng = np.random.default_rng(7)
+    series = [list(rng.uniform(5, 80, size=n)) for n in (1, 5, 60, 300)]
+    series.append([])
+    series.append([None, 12.0, None, 20.0])
+    summaries = summarize_many(series)
+
+    for values, summary in zip(series[:4], summaries):
+        values = np.asarray(values)
+        assert summary.count == len(values)
+        assert np.isclose(summary.mean, values.mean()) and summary.max == values.max()
+        assert np.isclose(summary.p95, np.percentile(values, 95)) and np.isclose(summary.p99, np.percentile(values, 99))
+        assert summary.latest == values[-1]
+        if len(values) > 1:
+            assert np.isclose(summary.jitter, np.abs(np.diff(values)).mean())
+        else:
+            assert summary.jitter is None
+
+    assert summaries[4].count == 0 and summaries[4].mean is None and summaries[4].latest is None
+    # Missing samples are skipped, and jitter is not taken across a gap
+    assert summaries[5].count == 2 and summaries[5].mean == 16.0 and summaries[5].latest == 20.0
+    assert summaries[5].jitter is None
+    assert summarize([]).p50 is None
+
+
+def test_bursts_and_availability():
+    loss = [
+        [0, 2, 3, 0, 0, 5, 0, 4, 4, 4],
+        [100, 100, 0, None, 0],
+        [],
+    ]
+    bursts = loss_bursts(loss, threshold=1, min_samples=2)
+    assert [(b.start, b.length, b.peak) for b in bursts[0]] == [(1, 2, 3.0), (7, 3, 4.0)]
+    assert [(b.start, b.length) for b in bursts[1]] == [(0, 2)]
+    assert bursts[2] == []
+    assert availability(loss) == [100.0, 50.0, None]
+
+    stats = uplink_stats(loss, [[20.0] * 10, [None] * 5, []])
+    assert stats[0].worst_burst.start == 7 and stats[1].latency.count == 0
+
+
+def test_time_series_columns_and_matrix():
+    points = [{'ts': 'a', 'lossPercent': 0.0, 'latencyMs': 10.0}, {'ts': 'b', 'lossPercent': None, 'latencyMs': 30.0}]
+    assert column(points, 'lossPercent') == [0.0, None]
+    matrix = to_matrix([column(points, 'latencyMs'), np.array([1.0], dtype=np.float32)])
+    assert matrix.shape == (2, 2) and np.isnan(matrix[1, 1])
+
+
+def test_latency_histogram_percentiles():
+    per_ap = distribution_percentiles_many([
+        {'0': 10, '1': 80, '5': 10},
+        {'100': 1},
+        {},
+    ])
+    assert per_ap[0] == {50: 1.0, 95: 5.0, 99: 5.0}
+    assert per_ap[1][99] == 100.0
+    assert per_ap[2][50] is None
+
+    stats = latency_category_stats({'latencyStats': {
+        'voiceTraffic': {'rawDistribution': {'2': 90, '64': 10}, 'avg': 8.2},
+        'videoTraffic': {'rawDistribution': {}, 'avg': None},
+    }})
+    assert stats['voiceTraffic'] == {'avg': 8.2, 'samples': 100, 'p50': 2.0, 'p95': 64.0, 'p99': 64.0}
+    assert stats['videoTraffic']['p95'] is None
+
+
+def test_downsampling_keeps_shape_and_extremes():
+    ts = np.arange(10_000)
+    values = np.sin(ts / 300.0)
+    values[4321] = 9.0
+    kept = lttb_indices(ts, values, 200)
+    assert len(kept) == 200 and kept[0] == 0 and kept[-1] == 9999 and np.all(np.diff(kept) > 0)
+    assert 4321 in kept
+    assert list(lttb_indices(ts[:10], values[:10], 50)) == list(range(10))
+
+    extremes = min_max_indices(values, 100)
+    assert len(extremes) <= 200 and np.all(np.diff(extremes) > 0)
+    assert 4321 in extremes and values[extremes].min() == values.min()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Offline tests for the streaming top-N usage engine."""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limit import rate_scheduler
+from utils.top_usage import TopN, UsageEntry, UsageTally, _paced, format_kilobytes, top_usage
+
+rate_scheduler.org_rate = 0
+
+
+def test_heap_keeps_largest_entries():
+    heap = TopN(3)
+    for i, total in enumerate([5, 1, 9, 3, 7, 9, 2]):
+        heap.push(UsageEntry(key=i, label=str(i), sent=total))
+    assert len(heap) == 3
+    assert [(e.key, e.total) for e in heap.items()] == [(2, 9), (5, 9), (4, 7)]
+
+    other = TopN(3)
+    other.push(UsageEntry(key='x', label='x', recv=8))
+    heap.merge(other)
+    assert [e.key for e in heap.items()] == [2, 5, 'x']
+
+    tally = UsageTally()
+    tally.add('corp', 'corp', 10, 5)
+    tally.add('corp', 'corp', 1, 1)
+    tally.add('guest', 'guest', 2, 0)
+    assert [(e.key, e.total, e.clients) for e in tally.top(1)] == [('corp', 17, 2)]
+    assert format_kilobytes(512) == "512.0 KB" and format_kilobytes(3 * 1024 * 1024) == "3.0 GB"
+
+
+def test_org_top_usage_streams_networks():
+    pulled = []
+
+    def clients(network_id):
+        # A generator, like the SDK's iterator mode: nothing is materialized per network
+        for i in range(500):
+            pulled.append(network_id)
+            yield {'id': f"{network_id}-{i}", 'mac': f"00:{i:04x}", 'ip': f"10.0.0.{i % 250}",
+                   'ssid': 'corp' if i % 2 else None, 'vlan': None if i % 2 else 10 + i % 3,
+                   'usage': {'sent': i, 'recv': 2 * i if network_id == 'N_2' else i}}
+
+    class Organizations:
+        def getOrganizationNetworks(self, organization_id, **kwargs):
+            return [{'id': 'N_1', 'name': 'HQ', 'productTypes': ['wireless']},
+                    {'id': 'N_2', 'name': 'Branch', 'productTypes': ['appliance']},
+                    {'id': 'N_3', 'name': 'Cameras', 'productTypes': ['camera']},
+                    {'id': 'N_4', 'name': 'Broken', 'productTypes': ['switch']}]
+
+    class Networks:
+        def getNetworkClients(self, network_id, **kwargs):
+            assert kwargs['perPage'] == 1000 and kwargs['total_pages'] == 'all'
+            if network_id == 'N_4':
+                raise RuntimeError('403 Forbidden')
+            return clients(network_id)
+
+        def getNetworkTraffic(self, network_id, timespan):
+            assert timespan <= 30 * 86400
+            return [{'application': 'YouTube', 'sent': 10, 'recv': 900, 'numClients': 4},
+                    {'application': 'DNS', 'sent': 1, 'recv': 1, 'numClients': 40}]
+
+    client = type('Client', (), {})()
+    client.dashboard = type('Dashboard', (), {})()
+    client.dashboard.organizations = Organizations()
+    client.dashboard.networks = Networks()
+
+    progress = []
+    usage = top_usage(client, 'O_1', timespan=90 * 86400, top=5, max_workers=2,
+                      on_progress=lambda done, total: progress.append((done, total)))
+
+    assert usage.networks == 3 and usage.clients_seen == 1000 and len(pulled) == 1000
+    assert list(usage.errors) == ['Broken'] and progress[-1] == (3, 3)
+    top_clients = usage.leaders['client']
+    assert [e.key for e in top_clients] == [('N_2', f"N_2-{i}") for i in range(499, 494, -1)]
+    assert top_clients[0].total == 499 * 3 and top_clients[0].detail['network'] == 'Branch'
+
+    apps = usage.leaders['application']
+    assert [(e.label, e.total, e.clients, e.networks) for e in apps] == [('YouTube', 1820, 8, 2), ('DNS', 4, 80, 2)]
+    ssid = usage.leaders['ssid']
+    assert [(e.label, e.clients, e.networks) for e in ssid] == [('corp', 500, 2)]
+    assert sorted(e.label for e in usage.leaders['vlan']) == ['VLAN 10', 'VLAN 11', 'VLAN 12']
+    assert sum(e.clients for e in usage.leaders['vlan']) == 500
+    assert usage.total == sum(range(500)) * 2 + sum(range(500)) * 3
+
+    markdown = "\n".join(usage.markdown())
+    assert "Top Usage - Organization O_1" in markdown and "⚠️ Broken: 403 Forbidden" in markdown
+
+    only_apps = top_usage(client, 'O_1', top=1, network_ids=['N_1'], dimensions=['application'])
+    assert only_apps.clients_seen == 0 and list(only_apps.leaders) == ['application']
+    assert only_apps.leaders['application'][0].label == 'YouTube'
+
+
+def test_streamed_pages_each_take_a_rate_slot():
+    fetched = []
+
+    def pages():
+        for page in range(3):
+            fetched.append(page)
+            yield from range(page * 2, page * 2 + 2)
+
+    acquired = []
+    acquire = rate_scheduler.acquire
+    rate_scheduler.acquire = lambda organization_id=None: acquired.append(len(fetched))
+    try:
+        assert list(_paced(pages(), 'O_1', per_page=2)) == [0, 1, 2, 3, 4, 5]
+        # A slot is taken before the second and third pages are requested (and one after the full last page)
+        assert acquired == [1, 2, 3]
+        assert list(_paced([1, 2, 3], 'O_1', per_page=2)) == [1, 2, 3] and len(acquired) == 3
+    finally:
+        rate_scheduler.acquire = acquire
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Offline tests for the uplink loss/latency history store and collector."""
+
+import os
+import sys
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.collector import PollingCollector
+from utils.rate_limit import rate_scheduler
+from utils.uplink_history import UplinkCollector, UplinkHistoryStore, format_timestamp, parse_timestamp
+
+rate_scheduler.org_rate = 0
+
+START = parse_timestamp('2024-03-01T00:00:00Z')
+
+
+def response(minutes, loss=0.0, latency=20.0, serial='Q-MX', uplink='wan1'):
+    return [{
+        'serial': serial, 'networkId': 'N_1', 'uplink': uplink, 'ip': '8.8.8.8',
+        'timeSeries': [{'ts': format_timestamp(START + m * 60), 'lossPercent': loss, 'latencyMs': latency}
+                       for m in minutes]
+    }]
+
+
+def test_ingest_skips_overlap_and_answers_windows():
+    store = UplinkHistoryStore(directory=tempfile.mkdtemp())
+    assert store.ingest('O_1', response(range(0, 5))) == 5
+    # Next poll overlaps the previous five minutes by one sample
+    assert store.ingest('O_1', response(range(4, 9), loss=10.0)) == 4
+    assert store.ingest('O_1', [{'serial': 'Q-MX', 'uplink': 'wan2', 'timeSeries': []}]) == 0
+
+    windows = store.query('O_1', START + 120, START + 300)
+    assert len(windows) == 1 and windows[0].points == 4
+    assert list(windows[0].loss) == [0.0, 0.0, 0.0, 10.0]
+    assert windows[0].to_time_series()[0] == {'ts': '2024-03-01T00:02:00Z', 'lossPercent': 0.0, 'latencyMs': 20.0}
+    assert store.query('O_1', START + 3600, START + 7200) == []
+    assert store.coverage('O_1') == (START, START + 8 * 60)
+
+
+def test_compaction_rollup_and_persistence():
+    directory = tempfile.mkdtemp()
+    store = UplinkHistoryStore(directory=directory, raw_retention=3600, rollup_step=900, retention=86400)
+    # Two hours of samples; loss only in the first quarter hour
+    store.ingest('O_1', response(range(0, 15), loss=4.0, latency=40.0))
+    store.ingest('O_1', response(range(15, 120), loss=0.0, latency=20.0))
+    now = START + 120 * 60
+    store.compact('O_1', now=now)
+
+    series = next(iter(store._series('O_1').values()))
+    # Samples older than one hour (aligned to 15-minute buckets) were rolled up
+    assert list(series.rollup['ts']) == [START, START + 900, START + 1800, START + 2700]
+    assert list(series.rollup['count']) == [15, 15, 15, 15]
+    assert series.rollup['loss'][0] == 4.0 and series.rollup['latency_max'][0] == 40.0
+    assert series.raw['ts'][0] == START + 3600 and len(series.raw['ts']) == 60
+
+    window = store.query('O_1', START, now)[0]
+    assert window.resolution == 900 and window.points == 4 + 60
+    assert np.nanmax(window.loss_max) == 4.0
+
+    store.save('O_1')
+    reloaded = UplinkHistoryStore(directory=directory, raw_retention=3600, rollup_step=900, retention=86400)
+    again = reloaded.query('O_1', START, now)[0]
+    assert np.array_equal(again.ts, window.ts) and np.array_equal(again.loss, window.loss)
+
+    # Rollups older than the retention are dropped
+    reloaded.compact('O_1', now=START + 86400 + 1800)
+    assert reloaded.coverage('O_1')[0] > START + 900
+
+
+def test_collector_poll_once():
+    class Organizations:
+        def __init__(self):
+            self.calls = []
+
+        def getOrganizationDevicesUplinksLossAndLatency(self, organization_id, timespan):
+            self.calls.append(timespan)
+            return response(range(0, 5))
+
+    client = type('Client', (), {})()
+    client.dashboard = type('Dashboard', (), {})()
+    client.dashboard.organizations = Organizations()
+    directory = tempfile.mkdtemp()
+    collector = UplinkCollector(UplinkHistoryStore(directory=directory, raw_retention=10 ** 9))
+    assert collector.poll_once(client, 'O_1') == 5
+    assert collector.poll_once(client, 'O_1') == 0
+    assert client.dashboard.organizations.calls == [300, 300]
+    assert os.path.exists(os.path.join(directory, 'O_1.npz'))
+    assert not collector.running('O_1') and not collector.stop('O_1')
+
+
+def test_restart_right_after_stop_starts_a_new_thread():
+    polled = threading.Event()
+
+    class Collector(PollingCollector):
+        def poll_once(self, meraki_client, organization_id):
+            polled.set()
+            return 1
+
+    collector = Collector()
+    first = collector._start(None, 'O_1', 3600)
+    assert polled.wait(5) and collector.running('O_1')
+    assert collector._start(None, 'O_1', 600) is first and first.interval == 600
+
+    # The first thread is still winding down when start() is called again
+    polled.clear()
+    assert collector.stop('O_1')
+    second = collector._start(None, 'O_1', 3600)
+    assert second is not first and collector.running('O_1') and polled.wait(5)
+    collector.stop_all()
+    assert not collector.running('O_1')
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Offline tests for the shared wireless audit engine."""
+
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limit import rate_scheduler
+from utils.wifi_audit import audit_wireless_network, utilization_resolution, wireless_config_cache
+
+rate_scheduler.org_rate = 0
+
+RESPONSES = {
+    'getNetwork': {'id': 'N_1', 'name': 'Burswood', 'organizationId': 'O_1'},
+    'getNetworkDevices': [
+        {'serial': 'Q-1', 'name': 'Lobby', 'model': 'MR46', 'firmware': 'wireless-29-7'},
+        {'serial': 'Q-2', 'name': 'Office', 'model': 'MR36', 'firmware': 'wireless-29-7'},
+        {'serial': 'Q-3', 'name': 'Gateway', 'model': 'MX68'},
+    ],
+    'getOrganizationDevicesStatuses': [
+        {'serial': 'Q-1', 'status': 'online', 'lanIp': '10.0.0.11'},
+        {'serial': 'Q-2', 'status': 'offline'},
+    ],
+    'getNetworkWirelessSsids': [
+        {'number': 0, 'name': 'Corp', 'enabled': True, 'authMode': 'psk'},
+        {'number': 1, 'name': 'Guest', 'enabled': True, 'authMode': 'open'},
+        {'number': 2, 'name': 'Unconfigured SSID 3', 'enabled': False},
+    ],
+    'getNetworkWirelessRfProfiles': [{'name': 'Basic', 'bandSelectionType': 'ap'}],
+    'getNetworkWirelessConnectionStats': {'assoc': 5, 'auth': 10, 'dhcp': 5, 'dns': 0, 'success': 80},
+    'getNetworkWirelessDevicesConnectionStats': [
+        {'serial': 'Q-1', 'connectionStats': {'assoc': 0, 'auth': 30, 'dhcp': 0, 'dns': 0, 'success': 70}},
+    ],
+    'getNetworkWirelessLatencyStats': {'voiceTraffic': {'avg': 80.0}, 'bestEffortTraffic': {'avg': 10.0}},
+    'getNetworkWirelessDevicesLatencyStats': [],
+    'getNetworkWirelessFailedConnections': [{'failureStep': 'auth'}, {'failureStep': 'auth'}, {'failureStep': 'dhcp'}],
+    'getNetworkWirelessAirMarshal': [{'ssid': 'Evil', 'wiredMacs': ['aa:bb']}, {'ssid': 'Neighbour', 'wiredMacs': []}],
+    'getNetworkClients': [{'mac': '1', 'ssid': 'Corp'}, {'mac': '2', 'ssid': None}],
+    'getNetworkWirelessSettings': {'meshingEnabled': False},
+    'getNetworkAlertsSettings': {'alerts': [{'type': 'gatewayDown', 'enabled': False}]},
+    'getDeviceWirelessStatus': {'basicServiceSets': [
+        {'ssidName': 'Corp', 'band': '2.4 GHz', 'channel': 6, 'enabled': True, 'broadcasting': True},
+        {'ssidName': 'Corp', 'band': '5 GHz', 'channel': 36, 'enabled': True, 'broadcasting': True},
+    ]},
+}
+
+
+class Section:
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            with self.client.lock:
+                self.client.calls.append((name, args, kwargs))
+            if name in self.client.failures:
+                raise Exception(f"{name} failed")
+            if name == 'getNetworkWirelessChannelUtilizationHistory':
+                value = 70.0 if kwargs['deviceSerial'] == 'Q-1' and kwargs['band'] == '5' else 20.0
+                return [{'utilizationTotal': value}]
+            return RESPONSES[name]
+        return call
+
+
+class FakeClient:
+    def __init__(self, failures=()):
+        self.calls = []
+        self.failures = set(failures)
+        self.lock = threading.Lock()
+        self.dashboard = type('Dashboard', (), {})()
+        for section in ('organizations', 'networks', 'wireless'):
+            setattr(self.dashboard, section, Section(self))
+
+    def count(self, method):
+        return len([c for c in self.calls if c[0] == method])
+
+
+def test_audit_joins_per_ap_stats_and_findings():
+    wireless_config_cache.clear()
+    client = FakeClient()
+    progress = []
+    audit = audit_wireless_network(client, 'N_1', timespan=86400, max_workers=4,
+                                   on_progress=lambda done, total: progress.append((done, total)))
+
+    assert audit.name == 'Burswood' and audit.organization_id == 'O_1'
+    assert [ap.serial for ap in audit.access_points] == ['Q-1', 'Q-2']
+    lobby, office = audit.access_points
+    assert lobby.status == 'online' and lobby.lan_ip == '10.0.0.11' and office.status == 'offline'
+    assert lobby.utilization == {'2.4': 20.0, '5': 70.0}
+    assert lobby.channels == {'2.4 GHz': 6, '5 GHz': 36}
+    assert lobby.success_rate == 70.0 and office.success_rate is None
+    assert audit.success_rate == 80.0
+
+    # One radio status and one utilization call per band for every AP, at the coarsest resolution
+    assert client.count('getDeviceWirelessStatus') == 2
+    assert client.count('getNetworkWirelessChannelUtilizationHistory') == 4
+    assert all(c[2]['resolution'] == 86400 for c in client.calls
+               if c[0] == 'getNetworkWirelessChannelUtilizationHistory')
+    assert audit.api_calls == len(client.calls)
+    assert progress[-1][0] == progress[-1][1] == len(client.calls) - 1
+
+    messages = [f['message'] for f in audit.findings]
+    assert audit.findings[0]['severity'] == 'critical'
+    assert any('1/2 access points offline' in m for m in messages)
+    assert any('Lobby: connection success rate 70.0%' in m for m in messages)
+    assert any('Lobby: 5GHz channel utilization 70%' in m for m in messages)
+    assert any("voiceTraffic latency 80ms" in m for m in messages)
+    assert any("SSID 'Guest' is open" in m for m in messages)
+    assert any('1 rogue SSIDs' in m for m in messages)
+    assert audit.failures_by_step() == {'auth': 2, 'dhcp': 1}
+    assert 'Lobby' in '\n'.join(audit.markdown())
+
+
+def test_cached_config_and_failed_sources():
+    wireless_config_cache.clear()
+    audit_wireless_network(FakeClient(), 'N_1', per_ap=False)
+
+    client = FakeClient(failures={'getNetworkWirelessAirMarshal', 'getDeviceWirelessStatus'})
+    audit = audit_wireless_network(client, 'N_1', organization_id='O_1')
+    assert client.count('getNetworkWirelessSsids') == 0 and client.count('getNetworkWirelessRfProfiles') == 0
+    assert client.count('getNetwork') == 0
+    assert sorted(audit.cached) == ['rf_profiles', 'ssids'] and len(audit.active_ssids) == 2
+    assert 'air_marshal' in audit.errors and audit.air_marshal == []
+    assert 'radios' in audit.access_points[0].errors and audit.access_points[0].utilization
+    assert audit.api_calls == len(client.calls)
+
+    wireless_config_cache.invalidate('N_1')
+    client = FakeClient()
+    audit_wireless_network(client, 'N_1', organization_id='O_1', per_ap=False)
+    assert client.count('getNetworkWirelessSsids') == 1
+
+    try:
+        audit_wireless_network(FakeClient(failures={'getNetworkDevices'}), 'N_1', organization_id='O_1')
+        assert False, "expected failure without a device inventory"
+    except Exception as e:
+        assert 'Unable to list devices' in str(e)
+
+
+def test_utilization_resolution():
+    assert utilization_resolution(86400 * 7) == 86400
+    assert utilization_resolution(7200) == 3600
+    assert utilization_resolution(300) == 600
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
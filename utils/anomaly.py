@@ -0,0 +1,495 @@
+"""
+Streaming anomaly detection over collected network metrics.
+
+ISP degradation and RF trouble used to surface only when somebody looked at
+the right tool at the right time. The detector scores every new sample of
+
+    uplink_loss / uplink_latency        per uplink, from the uplink collector (one sample per minute)
+    connection_failures                 per AP, share of failed association/auth/DHCP/DNS steps
+    channel_utilization                 per AP and band, from the organization-wide utilization history
+
+against an exponentially weighted mean and variance kept per series, so the
+memory used does not grow with history length. A series becomes anomalous
+when MIN_CONSECUTIVE samples in a row sit MCP_ANOMALY_Z standard deviations
+above its baseline, and recovers when it falls back below half of that.
+While anomalous, samples are clipped before they update the baseline so a
+long incident is not learned as normal within minutes.
+
+Opened and resolved anomalies are kept in a bounded log and passed to
+listeners such as the WebhookNotifier (MCP_ANOMALY_WEBHOOKS).
+"""
+
+import json
+import math
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    MCP_ANOMALY_ALPHA, MCP_ANOMALY_POLL_INTERVAL, MCP_ANOMALY_WARMUP, MCP_ANOMALY_WEBHOOKS, MCP_ANOMALY_Z,
+    MCP_AUDIT_CONCURRENCY, MCP_CACHE_TTL, MCP_STATE_DIR, SERVER_NAME
+)
+from utils.cache import TTLCache
+from utils.collector import CollectionStatus, PollingCollector
+from utils.rate_limit import rate_scheduler
+from utils.rf_heatmap import band_percentage
+from utils.uplink_history import UplinkCollector, format_timestamp, parse_timestamp, uplink_collector
+
+# Metric -> (label, unit, smallest standard deviation used for scoring).
+# The floor keeps flat series (0% loss for days) from flagging noise-level changes.
+METRICS = {
+    'uplink_loss': ('Uplink loss', '%', 1.0),
+    'uplink_latency': ('Uplink latency', 'ms', 5.0),
+    'connection_failures': ('Connection failures', '%', 2.0),
+    'channel_utilization': ('Channel utilization', '%', 5.0),
+}
+
+MIN_CONSECUTIVE = 2
+RECOVERY_FACTOR = 0.5
+CRITICAL_Z = 6.0
+MAX_ANOMALIES = 1000
+
+# Fewer connection attempts than this in a poll window are too few to score
+MIN_CONNECTION_ATTEMPTS = 10
+
+# Shortest window/interval accepted by the wireless statistics endpoints
+MIN_POLL_INTERVAL = 300
+
+SeriesKey = Tuple[str, str, str, str]
+
+
+class Baseline:
+    """EWMA mean and variance of one series plus its anomaly state."""
+
+    __slots__ = ('mean', 'var', 'count', 'last_ts', 'streak', 'streak_start', 'open')
+
+    def __init__(self, mean: float = 0.0, var: float = 0.0, count: int = 0, last_ts: Optional[int] = None):
+        self.mean = mean
+        self.var = var
+        self.count = count
+        self.last_ts = last_ts
+        self.streak = 0
+        self.streak_start: Optional[int] = None
+        self.open: Optional['Anomaly'] = None
+
+    def std(self, floor: float) -> float:
+        return max(math.sqrt(self.var), floor)
+
+    def score(self, value: float, floor: float) -> float:
+        return (value - self.mean) / self.std(floor)
+
+    def update(self, value: float, alpha: float) -> None:
+        # Plain running average until 1/n drops below alpha, so early samples are not over-weighted
+        alpha = max(alpha, 1.0 / (self.count + 1))
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (self.var + diff * increment)
+        self.count += 1
+
+
+@dataclass
+class Anomaly:
+    """A period in which one series stayed above its baseline."""
+
+    organization_id: str
+    network_id: Optional[str]
+    kind: str
+    serial: str
+    detail: str
+    metric: str
+    started_at: int
+    value: float
+    baseline: float
+    std: float
+    z: float
+    peak: float
+    last_seen: int
+    resolved_at: Optional[int] = None
+
+    @property
+    def active(self) -> bool:
+        return self.resolved_at is None
+
+    @property
+    def severity(self) -> str:
+        return 'critical' if self.z >= CRITICAL_Z else 'warning'
+
+    @property
+    def subject(self) -> str:
+        return f"{self.serial} {self.detail}".strip()
+
+    def describe(self) -> str:
+        label, unit, _ = METRICS.get(self.metric, (self.metric, '', 0))
+        return (f"{label} {self.peak:.1f}{unit} on {self.subject} "
+                f"(baseline {self.baseline:.1f}{unit} ± {self.std:.1f}, z {self.z:.1f})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update(
+            severity=self.severity, active=self.active, description=self.describe(),
+            started=format_timestamp(self.started_at),
+            resolved=format_timestamp(self.resolved_at) if self.resolved_at is not None else None
+        )
+        return data
+
+
+class AnomalyDetector:
+    """Per-series EWMA/z-score baselines and a bounded log of detected anomalies."""
+
+    def __init__(
+        self,
+        alpha: float = MCP_ANOMALY_ALPHA,
+        threshold: float = MCP_ANOMALY_Z,
+        warmup: int = MCP_ANOMALY_WARMUP,
+        min_consecutive: int = MIN_CONSECUTIVE,
+        path: Optional[str] = None,
+        max_anomalies: int = MAX_ANOMALIES
+    ):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_consecutive = min_consecutive
+        self.path = path or os.path.join(MCP_STATE_DIR, 'anomaly_baselines.json')
+        self.baselines: Dict[SeriesKey, Baseline] = {}
+        self.log: Deque[Anomaly] = deque(maxlen=max_anomalies)
+        # Called with ('anomaly' | 'resolved', anomaly), e.g. the webhook notifier
+        self.listeners: List[Callable[[str, Anomaly], None]] = []
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _emit(self, event: str, anomaly: Anomaly) -> None:
+        for listener in list(self.listeners):
+            try:
+                listener(event, anomaly)
+            except Exception:
+                pass
+
+    def observe(
+        self,
+        organization_id: str,
+        kind: str,
+        serial: str,
+        detail: str,
+        metric: str,
+        ts: int,
+        value: Optional[float],
+        network_id: Optional[str] = None
+    ) -> Optional[Anomaly]:
+        """
+        Score one sample and fold it into the baseline of its series.
+
+        Samples at or before the last one seen for the series are ignored, so
+        overlapping polls can be fed as-is.
+
+        Returns:
+            The anomaly opened by this sample, if any
+        """
+        self._ensure_loaded()
+        floor = METRICS[metric][2]
+        events = []
+        with self._lock:
+            key = (organization_id, serial, detail, metric)
+            baseline = self.baselines.get(key)
+            if baseline is None:
+                baseline = self.baselines[key] = Baseline()
+            if baseline.last_ts is not None and ts <= baseline.last_ts:
+                return None
+            baseline.last_ts = ts
+            if value is None or math.isnan(value):
+                return None
+
+            z = baseline.score(value, floor) if baseline.count >= self.warmup else 0.0
+            std = baseline.std(floor)
+            opened = None
+            if z >= self.threshold:
+                if baseline.streak == 0:
+                    baseline.streak_start = ts
+                baseline.streak += 1
+                if baseline.open is None and baseline.streak >= self.min_consecutive:
+                    opened = baseline.open = Anomaly(
+                        organization_id=organization_id, network_id=network_id, kind=kind, serial=serial,
+                        detail=detail, metric=metric, started_at=baseline.streak_start, value=value,
+                        baseline=baseline.mean, std=std, z=z, peak=value, last_seen=ts
+                    )
+                    self.log.append(opened)
+                    events.append(('anomaly', opened))
+            else:
+                baseline.streak = 0
+
+            current = baseline.open
+            if current is not None and current is not opened:
+                current.value = value
+                current.last_seen = ts
+                if value > current.peak:
+                    current.peak, current.z = value, z
+                if z < self.threshold * RECOVERY_FACTOR:
+                    current.resolved_at = ts
+                    baseline.open = None
+                    events.append(('resolved', current))
+
+            # Clip anomalous samples so an incident does not become the new normal right away
+            if z >= self.threshold:
+                value = baseline.mean + self.threshold * std
+            baseline.update(value, self.alpha)
+
+        for event, anomaly in events:
+            self._emit(event, anomaly)
+        return opened
+
+    def observe_uplinks(self, organization_id: str, entries: Iterable[Dict[str, Any]]) -> List[Anomaly]:
+        """Score a getOrganizationDevicesUplinksLossAndLatency response."""
+        opened = []
+        for entry in entries or []:
+            detail = entry.get('uplink') or ''
+            if entry.get('ip'):
+                detail = f"{detail} → {entry['ip']}"
+            points = sorted(entry.get('timeSeries') or [], key=lambda p: parse_timestamp(p['ts']))
+            for point in points:
+                ts = parse_timestamp(point['ts'])
+                for metric, field in (('uplink_loss', 'lossPercent'), ('uplink_latency', 'latencyMs')):
+                    anomaly = self.observe(organization_id, 'uplink', entry.get('serial', ''), detail, metric,
+                                           ts, point.get(field), entry.get('networkId'))
+                    if anomaly:
+                        opened.append(anomaly)
+        return opened
+
+    def observe_connection_stats(
+        self, organization_id: str, network_id: str, entries: Iterable[Dict[str, Any]], ts: int
+    ) -> List[Anomaly]:
+        """Score a getNetworkWirelessDevicesConnectionStats response covering the window ending at ts."""
+        opened = []
+        for entry in entries or []:
+            stats = entry.get('connectionStats') or {}
+            failures = sum(stats.get(step, 0) or 0 for step in ('assoc', 'auth', 'dhcp', 'dns'))
+            attempts = failures + (stats.get('success', 0) or 0)
+            if attempts < MIN_CONNECTION_ATTEMPTS:
+                continue
+            anomaly = self.observe(organization_id, 'ap', entry.get('serial', ''), '', 'connection_failures',
+                                   ts, failures / attempts * 100, network_id)
+            if anomaly:
+                opened.append(anomaly)
+        return opened
+
+    def observe_channel_utilization(self, organization_id: str, entries: Iterable[Dict[str, Any]]) -> List[Anomaly]:
+        """Score a getOrganizationWirelessDevicesChannelUtilizationHistoryByDeviceByInterval response."""
+        opened = []
+        entries = [e for e in entries or [] if e.get('startTs')]
+        for entry in sorted(entries, key=lambda e: parse_timestamp(e['startTs'])):
+            ts = parse_timestamp(entry['startTs'])
+            network_id = (entry.get('network') or {}).get('id')
+            for band in entry.get('byBand') or []:
+                anomaly = self.observe(organization_id, 'ap', entry.get('serial', ''), f"{band.get('band')}GHz",
+                                       'channel_utilization', ts, band_percentage(band), network_id)
+                if anomaly:
+                    opened.append(anomaly)
+        return opened
+
+    def anomalies(
+        self,
+        organization_id: Optional[str] = None,
+        since: Optional[int] = None,
+        active_only: bool = False
+    ) -> List[Anomaly]:
+        """Logged anomalies, newest first."""
+        with self._lock:
+            anomalies = list(self.log)
+        return [
+            a for a in reversed(anomalies)
+            if (organization_id is None or a.organization_id == organization_id)
+            and (since is None or a.last_seen >= since)
+            and (not active_only or a.active)
+        ]
+
+    def series_count(self, organization_id: Optional[str] = None) -> int:
+        self._ensure_loaded()
+        with self._lock:
+            return sum(1 for key in self.baselines if organization_id is None or key[0] == organization_id)
+
+    def save(self) -> None:
+        """Persist the baselines (not the anomaly state) so a restart does not need a new warm-up."""
+        self._ensure_loaded()
+        with self._lock:
+            rows = [[*key, b.mean, b.var, b.count, b.last_ts] for key, b in self.baselines.items()]
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(rows, f)
+        os.replace(temp_path, self.path)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.path) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                return
+            for organization_id, serial, detail, metric, mean, var, count, last_ts in rows:
+                self.baselines.setdefault((organization_id, serial, detail, metric), Baseline(mean, var, count, last_ts))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.baselines.clear()
+            self.log.clear()
+            self._loaded = True
+
+
+class WebhookNotifier:
+    """
+    Posts opened and resolved anomalies as JSON to webhook URLs in the background.
+
+    URLs given at construction (MCP_ANOMALY_WEBHOOKS) receive every organization's
+    anomalies; URLs added for an organization only receive that organization's and
+    are dropped with clear() when its detection stops. A URL is posted once per
+    anomaly even when it is registered both ways.
+    """
+
+    def __init__(self, urls: Iterable[str] = MCP_ANOMALY_WEBHOOKS, timeout: float = 10):
+        self.urls: List[str] = list(dict.fromkeys(urls))
+        self.org_urls: Dict[str, List[str]] = {}
+        self.timeout = timeout
+        self.sent = 0
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='anomaly-webhook')
+
+    def add(self, url: str, organization_id: Optional[str] = None) -> None:
+        """Register a URL for one organization, or for every organization when none is given."""
+        if not url.startswith(('http://', 'https://')):
+            raise ValueError(f"Webhook URL must start with http:// or https://: {url}")
+        with self._lock:
+            urls = self.urls if organization_id is None else self.org_urls.setdefault(organization_id, [])
+            if url not in urls:
+                urls.append(url)
+
+    def remove(self, url: str, organization_id: Optional[str] = None) -> bool:
+        with self._lock:
+            urls = self.urls if organization_id is None else self.org_urls.get(organization_id, [])
+            if url not in urls:
+                return False
+            urls.remove(url)
+            if organization_id is not None and not urls:
+                del self.org_urls[organization_id]
+            self._forget_errors()
+        return True
+
+    def clear(self, organization_id: str) -> List[str]:
+        """Drop the URLs registered for an organization; returns them."""
+        with self._lock:
+            removed = self.org_urls.pop(organization_id, [])
+            self._forget_errors()
+        return removed
+
+    def targets(self, organization_id: Optional[str] = None) -> List[str]:
+        """Distinct URLs notified for an organization (for any organization when none is given)."""
+        with self._lock:
+            scoped = ([url for urls in self.org_urls.values() for url in urls] if organization_id is None
+                      else self.org_urls.get(organization_id, []))
+            return list(dict.fromkeys(self.urls + scoped))
+
+    def _forget_errors(self) -> None:
+        registered = set(self.urls).union(*self.org_urls.values())
+        for url in [url for url in self.errors if url not in registered]:
+            del self.errors[url]
+
+    def __call__(self, event: str, anomaly: Anomaly) -> None:
+        payload = json.dumps({'source': SERVER_NAME, 'event': event, 'anomaly': anomaly.to_dict()}).encode()
+        for url in self.targets(anomaly.organization_id):
+            self._executor.submit(self._post, url, payload)
+
+    def _post(self, url: str, payload: bytes) -> None:
+        request = urllib.request.Request(url, data=payload, headers={'Content-Type': 'application/json'}, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+            self.sent += 1
+            self.errors.pop(url, None)
+        except Exception as e:
+            self.errors[url] = str(e)
+
+
+class AnomalyMonitor(PollingCollector):
+    """
+    Feeds the detector: uplink samples arrive from the uplink collector, and a
+    thread per organization polls AP connection failures and channel utilization.
+    """
+
+    thread_name = 'anomaly-monitor'
+
+    def __init__(self, detector: AnomalyDetector, collector: UplinkCollector):
+        super().__init__()
+        self.detector = detector
+        self.collector = collector
+        self._networks = TTLCache(MCP_CACHE_TTL)
+        collector.listeners.append(self._on_uplinks)
+
+    def _on_uplinks(self, organization_id: str, entries: List[Dict[str, Any]]) -> None:
+        if self.running(organization_id):
+            self.detector.observe_uplinks(organization_id, entries)
+
+    def _wireless_networks(self, meraki_client, organization_id: str) -> List[Dict[str, Any]]:
+        def load():
+            rate_scheduler.acquire(organization_id)
+            return meraki_client.dashboard.organizations.getOrganizationNetworks(
+                organization_id, productTypes=['wireless'], total_pages='all'
+            )
+        return self._networks.get_or_load(organization_id, load)
+
+    def poll_once(self, meraki_client, organization_id: str, interval: int = MCP_ANOMALY_POLL_INTERVAL) -> int:
+        """Fetch and score one window of wireless metrics; returns the number of AP samples scored."""
+        window = max(MIN_POLL_INTERVAL, int(interval))
+        now = int(time.time())
+        dashboard = meraki_client.dashboard
+        networks = self._wireless_networks(meraki_client, organization_id)
+
+        def connection_stats(network_id: str):
+            rate_scheduler.acquire(organization_id)
+            return network_id, dashboard.wireless.getNetworkWirelessDevicesConnectionStats(network_id, timespan=window)
+
+        samples = 0
+        with ThreadPoolExecutor(max_workers=MCP_AUDIT_CONCURRENCY) as executor:
+            futures = [executor.submit(connection_stats, n['id']) for n in networks]
+            rate_scheduler.acquire(organization_id)
+            utilization = dashboard.wireless.getOrganizationWirelessDevicesChannelUtilizationHistoryByDeviceByInterval(
+                organization_id, timespan=3 * window, interval=MIN_POLL_INTERVAL, total_pages='all'
+            )
+            self.detector.observe_channel_utilization(organization_id, utilization)
+            samples += len(utilization or [])
+            for future in futures:
+                network_id, entries = future.result()
+                self.detector.observe_connection_stats(organization_id, network_id, entries, now)
+                samples += len(entries or [])
+        self.detector.save()
+        return samples
+
+    def _poll(self, meraki_client, status: CollectionStatus) -> int:
+        return self.poll_once(meraki_client, status.organization_id, status.interval)
+
+    def start(self, meraki_client, organization_id: str, interval: int = MCP_ANOMALY_POLL_INTERVAL) -> CollectionStatus:
+        """
+        Start monitoring an organization (or change the wireless poll interval).
+
+        Uplink collection is started as well since uplink anomalies are scored
+        from its samples.
+        """
+        interval = max(MIN_POLL_INTERVAL, int(interval))
+        if not self.collector.running(organization_id):
+            self.collector.start(meraki_client, organization_id)
+        return self._start(meraki_client, organization_id, interval)
+
+
+# Shared by the analytics tools
+anomaly_detector = AnomalyDetector()
+anomaly_webhooks = WebhookNotifier()
+anomaly_detector.listeners.append(anomaly_webhooks)
+anomaly_monitor = AnomalyMonitor(anomaly_detector, uplink_collector)
@@ -0,0 +1,421 @@
+"""
+Declarative audit rule engine over tabular snapshots.
+
+An OrgSnapshot is flattened into column tables (one NumPy array per column):
+
+    networks        one row per network (feature flags, counts, modes)
+    devices         one row per device
+    ssids           one row per SSID
+    firewall_rules  one row per L3 firewall rule
+    vpn             one row per network with a site-to-site VPN config
+
+Rules are predicates over those columns. Each rule returns a boolean mask for all
+rows of its table at once, so an org with thousands of networks is evaluated with
+a handful of vectorized operations instead of nested per-network loops. The
+pass/total counts are mapped to points and a finding through ordered tiers.
+
+Rule packs (HIPAA, PCI, CIS, ...) live in utils/rule_packs.py.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from utils.audit_snapshot import NetworkSnapshot, OrgSnapshot
+from utils.infrastructure import model_product_type
+
+HIGH_RISK_PRIORITIES = ('critical', 'high', 'major')
+UNSTABLE_FIRMWARE_MARKERS = ('beta', 'rc', 'dev')
+
+
+class Table:
+    """Named columns of equal length."""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        lengths = {len(column) for column in columns.values()}
+        self._length = lengths.pop() if lengths else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class AuditTables:
+    """All tables of one snapshot plus helpers to roll child rows up to networks."""
+
+    def __init__(self, tables: Dict[str, Table]):
+        self.tables = tables
+
+    def __getattr__(self, name: str) -> Table:
+        try:
+            return self.__dict__['tables'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, name: str) -> Table:
+        return self.tables[name]
+
+    def per_network(self, table: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Count rows of a child table per network.
+
+        Args:
+            table: Child table name (must have a network_index column)
+            mask: Rows to count (default: all)
+
+        Returns:
+            int array aligned with the networks table
+        """
+        index = self.tables[table]['network_index']
+        if mask is not None:
+            index = index[mask]
+        return np.bincount(index, minlength=len(self.tables['networks'])).astype(np.int64)
+
+    def any_per_network(self, table: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Bool array: network has at least one matching child row."""
+        return self.per_network(table, mask) > 0
+
+    def network_names(self, table: str, rows: Iterable[int]) -> List[str]:
+        """Distinct network names owning the given rows of a table, in row order."""
+        names = self.tables['networks']['name']
+        if table == 'networks':
+            indexes = list(rows)
+        else:
+            column = self.tables[table]['network_index']
+            indexes = [int(column[row]) for row in rows]
+        return list(dict.fromkeys(str(names[index]) for index in indexes))
+
+
+def _columns(rows: List[Dict[str, Any]], spec: Dict[str, Any]) -> Table:
+    """Build a Table from row dicts; spec maps column name to NumPy dtype."""
+    return Table({
+        name: np.array([row[name] for row in rows], dtype=dtype) if rows else np.array([], dtype=dtype)
+        for name, dtype in spec.items()
+    })
+
+
+NETWORK_COLUMNS = {
+    'network_id': object, 'name': object,
+    'has_appliance': bool, 'has_switch': bool, 'has_wireless': bool,
+    'device_count': np.int64, 'auth_user_count': np.int64,
+    'syslog': bool, 'event_log': bool, 'switch_vlans': bool,
+    'vpn_mode': object, 'vpn_enabled': bool,
+    'amp_mode': object, 'amp_enabled': bool,
+    'ids_mode': object, 'ids_enabled': bool,
+    'content_filter_categories': np.int64, 'content_filter_enabled': bool,
+    'l3_rule_count': np.int64, 'custom_l3_rule_count': np.int64,
+    'appliance_vlan_count': np.int64,
+    'security_event_count': np.int64, 'high_risk_event_count': np.int64,
+}
+
+DEVICE_COLUMNS = {
+    'network_index': np.int64, 'serial': object, 'model': object, 'product_type': object,
+    'firmware': object, 'firmware_stable': bool,
+}
+
+SSID_COLUMNS = {
+    'network_index': np.int64, 'number': np.int64, 'name': object, 'source': object,
+    'enabled': bool, 'auth_mode': object, 'encryption_mode': object, 'wpa_mode': object,
+    'has_psk': bool, 'vlan_tagged': bool, 'splash_page': object,
+    'client_isolation': bool, 'guest': bool,
+}
+
+FIREWALL_COLUMNS = {
+    'network_index': np.int64, 'policy': object, 'protocol': object,
+    'src_cidr': object, 'dest_cidr': object, 'dest_port': object,
+    'is_default': bool, 'any_any_allow': bool,
+}
+
+VPN_COLUMNS = {
+    'network_index': np.int64, 'mode': object, 'hub_count': np.int64, 'vpn_subnet_count': np.int64,
+}
+
+
+def _is_any(value: Any) -> bool:
+    return str(value or '').strip().lower() in ('any', '0.0.0.0/0', '')
+
+
+def _network_row(snap: NetworkSnapshot) -> Dict[str, Any]:
+    l3_rules = snap.l3_rules
+    events = snap.security_events or []
+    return {
+        'network_id': snap.network_id,
+        'name': snap.name,
+        'has_appliance': 'appliance' in snap.product_types,
+        'has_switch': 'switch' in snap.product_types,
+        'has_wireless': 'wireless' in snap.product_types or snap.infrastructure.has_mx_wireless,
+        'device_count': len(snap.devices),
+        'auth_user_count': len(snap.auth_users or []),
+        'syslog': snap.has_syslog,
+        'event_log': snap.has_event_log,
+        'switch_vlans': snap.switch_vlans,
+        'vpn_mode': (snap.site_to_site_vpn or {}).get('mode') or '',
+        'vpn_enabled': snap.vpn_enabled,
+        'amp_mode': (snap.malware or {}).get('mode') or '',
+        'amp_enabled': snap.amp_enabled,
+        'ids_mode': (snap.intrusion or {}).get('mode') or '',
+        'ids_enabled': snap.ids_enabled,
+        'content_filter_categories': len((snap.content_filtering or {}).get('blockedUrlCategories') or []),
+        'content_filter_enabled': snap.content_filter_enabled,
+        'l3_rule_count': len(l3_rules),
+        'custom_l3_rule_count': len([r for r in l3_rules if r.get('comment') != 'Default rule']),
+        'appliance_vlan_count': len(snap.appliance_vlans or []),
+        'security_event_count': len(events),
+        'high_risk_event_count': len([e for e in events if str(e.get('priority', '')).lower() in HIGH_RISK_PRIORITIES]),
+    }
+
+
+def build_audit_tables(snapshot: OrgSnapshot) -> AuditTables:
+    """
+    Flatten a snapshot into column tables.
+
+    Args:
+        snapshot: OrgSnapshot (any subset of endpoints; missing data reads as disabled/empty)
+
+    Returns:
+        AuditTables with networks, devices, ssids, firewall_rules and vpn tables
+    """
+    networks, devices, ssids, rules, vpns = [], [], [], [], []
+
+    for index, snap in enumerate(snapshot.networks):
+        networks.append(_network_row(snap))
+
+        for device in snap.devices:
+            firmware = device.get('firmware') or ''
+            devices.append({
+                'network_index': index,
+                'serial': device.get('serial', ''),
+                'model': device.get('model', ''),
+                'product_type': device.get('productType') or model_product_type(device.get('model')) or '',
+                'firmware': firmware,
+                'firmware_stable': bool(firmware) and not any(m in firmware.lower() for m in UNSTABLE_FIRMWARE_MARKERS),
+            })
+
+        for ssid in snap.ssids or []:
+            name = ssid.get('name') or ''
+            ssids.append({
+                'network_index': index,
+                'number': int(ssid.get('number') or 0),
+                'name': name,
+                'source': snap.ssid_source or '',
+                'enabled': bool(ssid.get('enabled')),
+                'auth_mode': ssid.get('authMode') or '',
+                'encryption_mode': ssid.get('encryptionMode') or '',
+                'wpa_mode': ssid.get('wpaEncryptionMode') or '',
+                'has_psk': bool(ssid.get('psk')),
+                'vlan_tagged': bool(ssid.get('vlanId')),
+                'splash_page': ssid.get('splashPage') or '',
+                'client_isolation': bool(ssid.get('clientIsolationEnabled')),
+                'guest': 'guest' in name.lower(),
+            })
+
+        for rule in snap.l3_rules:
+            policy = (rule.get('policy') or '').lower()
+            rules.append({
+                'network_index': index,
+                'policy': policy,
+                'protocol': (rule.get('protocol') or '').lower(),
+                'src_cidr': rule.get('srcCidr') or '',
+                'dest_cidr': rule.get('destCidr') or '',
+                'dest_port': str(rule.get('destPort') or ''),
+                'is_default': rule.get('comment') == 'Default rule',
+                'any_any_allow': (policy == 'allow' and rule.get('comment') != 'Default rule'
+                                  and _is_any(rule.get('srcCidr')) and _is_any(rule.get('destCidr'))
+                                  and _is_any(rule.get('destPort'))),
+            })
+
+        if snap.site_to_site_vpn:
+            subnets = snap.site_to_site_vpn.get('subnets') or []
+            vpns.append({
+                'network_index': index,
+                'mode': snap.site_to_site_vpn.get('mode') or 'none',
+                'hub_count': len(snap.site_to_site_vpn.get('hubs') or []),
+                'vpn_subnet_count': len([s for s in subnets if s.get('useVpn')]),
+            })
+
+    return AuditTables({
+        'networks': _columns(networks, NETWORK_COLUMNS),
+        'devices': _columns(devices, DEVICE_COLUMNS),
+        'ssids': _columns(ssids, SSID_COLUMNS),
+        'firewall_rules': _columns(rules, FIREWALL_COLUMNS),
+        'vpn': _columns(vpns, VPN_COLUMNS),
+    })
+
+
+@dataclass
+class Tier:
+    """
+    One outcome of a rule. Tiers are checked in order; the first whose bounds hold wins.
+
+    message is a format string with {passed}, {failed}, {total}, {percent} and any
+    rule value names; None produces no finding. issue is a short label used by
+    reports that list key issues.
+    """
+
+    points: float
+    message: Optional[str] = None
+    at_least: Optional[float] = None
+    at_most: Optional[float] = None
+    measure: Optional[str] = None
+    issue: Optional[str] = None
+
+    def matches(self, measures: Dict[str, float], default_measure: str) -> bool:
+        value = measures[self.measure or default_measure]
+        if self.at_least is not None and value < self.at_least:
+            return False
+        if self.at_most is not None and value > self.at_most:
+            return False
+        return True
+
+
+Predicate = Callable[[AuditTables], np.ndarray]
+
+
+@dataclass
+class Rule:
+    """
+    Declarative check over one table.
+
+    where selects the rows the rule applies to (default: all), passes marks the
+    compliant rows. values are extra per-row numbers summed over applicable rows and
+    exposed to tiers and messages. requires lists the snapshot endpoints read.
+    """
+
+    id: str
+    section: str
+    title: str
+    table: str
+    passes: Predicate
+    tiers: List[Tier]
+    where: Optional[Predicate] = None
+    values: Dict[str, Predicate] = field(default_factory=dict)
+    measure: str = 'percent'
+    requires: Set[str] = field(default_factory=set)
+    skip_if_empty: bool = False
+
+    @property
+    def max_points(self) -> float:
+        return max((tier.points for tier in self.tiers), default=0)
+
+
+@dataclass
+class RuleResult:
+    rule: Rule
+    passed: int
+    total: int
+    percent: float
+    values: Dict[str, float]
+    points: float
+    finding: Optional[str]
+    issue: Optional[str]
+    applicable: bool = True
+    failing_rows: List[int] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return self.total - self.passed
+
+    @property
+    def max_points(self) -> float:
+        return self.rule.max_points if self.applicable else 0
+
+
+def evaluate_rule(rule: Rule, tables: AuditTables) -> RuleResult:
+    """Evaluate one rule against every row of its table at once."""
+    table = tables[rule.table]
+    applies = np.ones(len(table), dtype=bool) if rule.where is None else np.asarray(rule.where(tables), dtype=bool)
+    passing = np.asarray(rule.passes(tables), dtype=bool) & applies
+
+    total = int(applies.sum())
+    passed = int(passing.sum())
+    percent = (passed / total * 100) if total else 0.0
+    values = {name: float(np.asarray(value(tables))[applies].sum()) for name, value in rule.values.items()}
+    failing_rows = np.flatnonzero(applies & ~passing).tolist()
+
+    if rule.skip_if_empty and total == 0:
+        return RuleResult(rule, 0, 0, 0.0, values, 0, f"ℹ️ **{rule.title}**: Not applicable", None,
+                          applicable=False)
+
+    measures = {'passed': passed, 'failed': total - passed, 'total': total, 'percent': percent, **values}
+    for tier in rule.tiers:
+        if tier.matches(measures, rule.measure):
+            finding = None
+            if tier.message:
+                finding = tier.message.format(title=rule.title, **{k: _display(v) for k, v in measures.items()})
+            return RuleResult(rule, passed, total, percent, values, tier.points, finding, tier.issue,
+                              failing_rows=failing_rows)
+    return RuleResult(rule, passed, total, percent, values, 0, None, None, failing_rows=failing_rows)
+
+
+def _display(value: float):
+    """Show whole numbers without a decimal point in messages."""
+    return int(value) if isinstance(value, float) and value.is_integer() and value == value else value
+
+
+@dataclass
+class RulePack:
+    """A compliance framework: ordered sections of rules."""
+
+    name: str
+    title: str
+    sections: Dict[str, str]
+    rules: List[Rule]
+
+    def section_rules(self, section: str) -> List[Rule]:
+        return [rule for rule in self.rules if rule.section == section]
+
+    def endpoints(self, sections: Optional[Iterable[str]] = None) -> Set[str]:
+        """Snapshot endpoints needed to evaluate the given sections (default: all)."""
+        wanted = set(sections) if sections is not None else set(self.sections)
+        needed: Set[str] = set()
+        for rule in self.rules:
+            if rule.section in wanted:
+                needed |= rule.requires
+        return needed
+
+    def evaluate(self, tables: AuditTables, sections: Optional[Sequence[str]] = None) -> List[RuleResult]:
+        wanted = set(sections) if sections is not None else set(self.sections)
+        return [evaluate_rule(rule, tables) for rule in self.rules if rule.section in wanted]
+
+    def evaluate_section(self, tables: AuditTables, section: str) -> Tuple[float, List[str]]:
+        """(score, findings) for one section, the shape the audit reports use."""
+        results = self.evaluate(tables, [section])
+        return sum(r.points for r in results), [r.finding for r in results if r.finding]
+
+
+def coverage_rule(
+    id: str,
+    section: str,
+    title: str,
+    table: str,
+    passes: Predicate,
+    points: float,
+    requires: Iterable[str],
+    where: Optional[Predicate] = None,
+    unit: str = 'networks',
+    issue: Optional[str] = None
+) -> Rule:
+    """
+    Rule scored on the share of compliant rows: full points at 100%, half at 80%+.
+
+    Tables with no applicable rows are reported as not applicable and excluded
+    from the score.
+    """
+    return Rule(
+        id=id, section=section, title=title, table=table, passes=passes, where=where,
+        requires=set(requires), skip_if_empty=True,
+        tiers=[
+            Tier(points, "✅ **{title}**: {passed}/{total} " + unit + " compliant", at_least=100),
+            Tier(points / 2, "⚠️ **{title}**: {passed}/{total} " + unit + " compliant ({percent:.0f}%)", at_least=80,
+                 issue=issue or title),
+            Tier(0, "❌ **{title}**: only {passed}/{total} " + unit + " compliant ({percent:.0f}%)",
+                 issue=issue or title),
+        ]
+    )
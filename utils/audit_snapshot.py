@@ -0,0 +1,475 @@
+"""
+Organization configuration snapshots for audits.
+
+The HIPAA audit sections used to call the same per-network endpoints over and
+over (SSIDs four times, site-to-site VPN four times, ...). A snapshot fetches
+every endpoint the requested sections need exactly once per network, in
+parallel, and the sections then evaluate against the resulting records.
+
+Endpoints are only requested for networks with the matching product type, so an
+audit no longer pays a failed appliance call for every switch-only network.
+
+refresh_org_snapshot() updates a previous snapshot incrementally: networks listed in
+getOrganizationConfigurationChanges since the last fetch (or bound to a changed
+template), new networks and networks whose inventory changed are re-fetched; all others keep their configuration and only
+time-based endpoints (VOLATILE_ENDPOINTS) are requested again. Organization-wide
+changes re-fetch only the endpoints they relate to (ORG_CHANGE_ENDPOINTS).
+
+Every request waits for the organization's budget in utils.rate_limit, so several
+snapshots can run side by side without tripping the Dashboard rate limit.
+"""
+
+import contextvars
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import MCP_AUDIT_CONCURRENCY
+from utils.infrastructure import NetworkInfrastructure, classify_devices, infrastructure_cache
+from utils.rate_limit import rate_scheduler
+
+# Endpoint name -> (required product type or None, fetch(dashboard, network_id))
+ENDPOINTS: Dict[str, Tuple[Optional[str], Callable[[Any, str], Any]]] = {
+    'auth_users': (None, lambda d, n: d.networks.getNetworkMerakiAuthUsers(n)),
+    'syslog_servers': (None, lambda d, n: d.networks.getNetworkSyslogServers(n)),
+    'recent_events': (None, lambda d, n: d.networks.getNetworkEvents(n, perPage=3)),
+    'switch_settings': ('switch', lambda d, n: d.switch.getNetworkSwitchSettings(n)),
+    'site_to_site_vpn': ('appliance', lambda d, n: d.appliance.getNetworkApplianceVpnSiteToSiteVpn(n)),
+    'malware': ('appliance', lambda d, n: d.appliance.getNetworkApplianceSecurityMalware(n)),
+    'intrusion': ('appliance', lambda d, n: d.appliance.getNetworkApplianceSecurityIntrusion(n)),
+    'l3_firewall': ('appliance', lambda d, n: d.appliance.getNetworkApplianceFirewallL3FirewallRules(n)),
+    'content_filtering': ('appliance', lambda d, n: d.appliance.getNetworkApplianceContentFiltering(n)),
+    'appliance_vlans': ('appliance', lambda d, n: d.appliance.getNetworkApplianceVlans(n)),
+    'security_events': ('appliance', lambda d, n: d.appliance.getNetworkApplianceSecurityEvents(n, timespan=86400)),
+    # SSIDs come from the appliance or wireless API depending on hardware, see _fetch_ssids
+    'ssids': ('wireless', None),
+}
+
+ALL_ENDPOINTS = frozenset(ENDPOINTS)
+
+# Endpoints reporting recent activity rather than configuration; always re-fetched
+VOLATILE_ENDPOINTS = frozenset({'security_events'})
+
+# Keywords in the page/label of an organization-wide configuration change -> endpoints
+# that may reflect it in every network. Changes matching none are ignored.
+ORG_CHANGE_ENDPOINTS: Dict[str, frozenset] = {
+    'ssid': frozenset({'ssids'}),
+    'wireless': frozenset({'ssids'}),
+    'radius': frozenset({'ssids'}),
+    'vpn': frozenset({'site_to_site_vpn'}),
+    'firewall': frozenset({'l3_firewall'}),
+    'policy object': frozenset({'l3_firewall'}),
+    'content filter': frozenset({'content_filtering'}),
+    'malware': frozenset({'malware'}),
+    'intrusion': frozenset({'intrusion'}),
+    'vlan': frozenset({'appliance_vlans'}),
+    'syslog': frozenset({'syslog_servers'}),
+    'switch': frozenset({'switch_settings'}),
+    'user': frozenset({'auth_users'}),
+}
+
+# getOrganizationConfigurationChanges only looks back this far
+MAX_CHANGE_LOOKBACK = 365 * 86400
+
+NetworkCallback = Callable[['NetworkSnapshot'], None]
+
+
+@dataclass
+class NetworkSnapshot:
+    """Configuration of one network as fetched for an audit. None means not available."""
+
+    network_id: str
+    name: str
+    product_types: List[str] = field(default_factory=list)
+    devices: List[Dict[str, Any]] = field(default_factory=list)
+    auth_users: Optional[List[Dict[str, Any]]] = None
+    syslog_servers: Optional[Dict[str, Any]] = None
+    recent_events: Optional[Any] = None
+    switch_settings: Optional[Dict[str, Any]] = None
+    ssids: Optional[List[Dict[str, Any]]] = None
+    ssid_source: Optional[str] = None
+    site_to_site_vpn: Optional[Dict[str, Any]] = None
+    malware: Optional[Dict[str, Any]] = None
+    intrusion: Optional[Dict[str, Any]] = None
+    l3_firewall: Optional[Dict[str, Any]] = None
+    content_filtering: Optional[Dict[str, Any]] = None
+    appliance_vlans: Optional[List[Dict[str, Any]]] = None
+    security_events: Optional[List[Dict[str, Any]]] = None
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @cached_property
+    def infrastructure(self) -> NetworkInfrastructure:
+        return classify_devices(self.network_id, self.devices)
+
+    @property
+    def enabled_ssids(self) -> List[Dict[str, Any]]:
+        return [ssid for ssid in self.ssids or [] if ssid.get('enabled')]
+
+    @property
+    def vpn_enabled(self) -> bool:
+        return bool(self.site_to_site_vpn) and self.site_to_site_vpn.get('mode') != 'none'
+
+    @property
+    def amp_enabled(self) -> bool:
+        return bool(self.malware) and self.malware.get('mode') != 'disabled'
+
+    @property
+    def ids_enabled(self) -> bool:
+        return bool(self.intrusion) and self.intrusion.get('mode') != 'disabled'
+
+    @property
+    def l3_rules(self) -> List[Dict[str, Any]]:
+        return (self.l3_firewall or {}).get('rules') or []
+
+    @property
+    def content_filter_enabled(self) -> bool:
+        return bool((self.content_filtering or {}).get('blockedUrlCategories'))
+
+    @property
+    def has_event_log(self) -> bool:
+        if isinstance(self.recent_events, dict):
+            return bool(self.recent_events.get('events'))
+        return bool(self.recent_events)
+
+    @property
+    def has_syslog(self) -> bool:
+        return bool((self.syslog_servers or {}).get('servers'))
+
+    @property
+    def switch_vlans(self) -> bool:
+        return bool((self.switch_settings or {}).get('vlan'))
+
+
+@dataclass
+class OrgSnapshot:
+    """Every network snapshot of an organization plus fetch statistics."""
+
+    organization_id: str
+    networks: List[NetworkSnapshot] = field(default_factory=list)
+    devices: List[Dict[str, Any]] = field(default_factory=list)
+    endpoints: List[str] = field(default_factory=list)
+    fetched_at: float = field(default_factory=time.time)
+    api_calls: int = 0
+    duration: float = 0.0
+    mode: str = 'full'
+    refetched_networks: List[str] = field(default_factory=list)
+    config_changes: int = 0
+
+    @property
+    def network_count(self) -> int:
+        return len(self.networks)
+
+    def network(self, network_id: str) -> Optional[NetworkSnapshot]:
+        return next((n for n in self.networks if n.network_id == network_id), None)
+
+
+def _wants(snapshot: NetworkSnapshot, endpoint: str) -> bool:
+    """Whether an endpoint applies to a network's product types."""
+    product_type = ENDPOINTS[endpoint][0]
+    if endpoint == 'ssids':
+        return 'wireless' in snapshot.product_types or snapshot.infrastructure.has_mx_wireless
+    return product_type is None or product_type in snapshot.product_types
+
+
+def _fetch_ssids(meraki_client, snapshot: NetworkSnapshot) -> None:
+    if snapshot.infrastructure.mx_wireless_only:
+        snapshot.ssid_source = 'appliance'
+        snapshot.ssids = meraki_client.dashboard.appliance.getNetworkApplianceSsids(snapshot.network_id)
+    else:
+        snapshot.ssid_source = 'wireless'
+        snapshot.ssids = meraki_client.dashboard.wireless.getNetworkWirelessSsids(snapshot.network_id)
+
+
+def fetch_network_endpoint(meraki_client, snapshot: NetworkSnapshot, endpoint: str) -> None:
+    """Fetch one endpoint into the snapshot, recording the error instead of raising."""
+    try:
+        if endpoint == 'ssids':
+            _fetch_ssids(meraki_client, snapshot)
+        else:
+            setattr(snapshot, endpoint, ENDPOINTS[endpoint][1](meraki_client.dashboard, snapshot.network_id))
+        snapshot.errors.pop(endpoint, None)
+    except Exception as e:
+        setattr(snapshot, endpoint, None)
+        snapshot.errors[endpoint] = str(e)
+
+
+def _run_fetches(
+    meraki_client,
+    tasks: List[Tuple[NetworkSnapshot, str]],
+    max_workers: int,
+    organization_id: Optional[str] = None,
+    snapshots: Iterable[NetworkSnapshot] = (),
+    on_network: Optional[NetworkCallback] = None
+) -> int:
+    """
+    Fetch (snapshot, endpoint) pairs concurrently under the rate budget.
+
+    on_network is called once for each of snapshots as soon as its last fetch
+    finished (immediately for snapshots with nothing to fetch).
+
+    Returns:
+        Number of calls made
+    """
+    remaining = Counter(id(snapshot) for snapshot, _ in tasks)
+    lock = threading.Lock()
+
+    def notify(snapshot):
+        if on_network is not None:
+            try:
+                on_network(snapshot)
+            except Exception:
+                pass
+
+    for snapshot in snapshots:
+        if id(snapshot) not in remaining:
+            notify(snapshot)
+
+    def run(task):
+        rate_scheduler.acquire(organization_id)
+        fetch_network_endpoint(meraki_client, *task)
+        with lock:
+            remaining[id(task[0])] -= 1
+            done = remaining[id(task[0])] == 0
+        if done:
+            notify(task[0])
+
+    if tasks:
+        # Each task runs in a copy of the caller's context so an active profiler sees its requests
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, run, task) for task in tasks]
+            for future in futures:
+                future.result()
+    return len(tasks)
+
+
+def _new_network_snapshots(networks: Iterable[Dict[str, Any]], devices: Iterable[Dict[str, Any]]) -> List[NetworkSnapshot]:
+    by_network: Dict[str, List[Dict[str, Any]]] = {}
+    for device in devices:
+        if device.get('networkId'):
+            by_network.setdefault(device['networkId'], []).append(device)
+
+    return [
+        NetworkSnapshot(
+            network_id=network['id'],
+            name=network.get('name', network['id']),
+            product_types=list(network.get('productTypes') or []),
+            devices=by_network.get(network['id'], [])
+        )
+        for network in networks
+    ]
+
+
+def snapshot_networks(
+    meraki_client,
+    networks: Iterable[Dict[str, Any]],
+    devices: Iterable[Dict[str, Any]],
+    endpoints: Iterable[str] = ALL_ENDPOINTS,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    organization_id: Optional[str] = None,
+    on_network: Optional[NetworkCallback] = None
+) -> Tuple[List[NetworkSnapshot], int]:
+    """
+    Fetch endpoints for a list of networks concurrently.
+
+    Args:
+        meraki_client: MerakiClient instance
+        networks: Network dicts from getOrganizationNetworks
+        devices: Org devices (each carries networkId), used for classification
+        endpoints: Endpoint names from ENDPOINTS to fetch
+        max_workers: Concurrent requests
+        organization_id: Organization whose rate budget the requests use
+        on_network: Called with each network snapshot as soon as it is complete
+
+    Returns:
+        (network snapshots in input order, number of API calls made)
+    """
+    snapshots = _new_network_snapshots(networks, devices)
+    tasks = [(snapshot, endpoint) for snapshot in snapshots for endpoint in sorted(endpoints)
+             if endpoint in ENDPOINTS and _wants(snapshot, endpoint)]
+    return snapshots, _run_fetches(meraki_client, tasks, max_workers, organization_id, snapshots, on_network)
+
+
+def build_org_snapshot(
+    meraki_client,
+    organization_id: str,
+    endpoints: Iterable[str] = ALL_ENDPOINTS,
+    networks: Optional[List[Dict[str, Any]]] = None,
+    devices: Optional[List[Dict[str, Any]]] = None,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    on_network: Optional[NetworkCallback] = None
+) -> OrgSnapshot:
+    """
+    Fetch an organization's audit configuration.
+
+    Args:
+        meraki_client: MerakiClient instance
+        organization_id: Organization ID
+        endpoints: Endpoint names from ENDPOINTS the caller will evaluate
+        networks: Network list if already fetched
+        devices: Org device inventory if already fetched
+        max_workers: Concurrent requests
+        on_network: Called with each network snapshot as soon as it is complete
+
+    Returns:
+        OrgSnapshot
+    """
+    started = time.time()
+    api_calls = 0
+    if networks is None:
+        rate_scheduler.acquire(organization_id)
+        networks = meraki_client.dashboard.organizations.getOrganizationNetworks(organization_id, total_pages='all')
+        api_calls += 1
+    if devices is None:
+        rate_scheduler.acquire(organization_id)
+        devices = meraki_client.dashboard.organizations.getOrganizationDevices(organization_id, total_pages='all')
+        api_calls += 1
+    infrastructure_cache.update_from_org_devices(devices, [n['id'] for n in networks])
+
+    endpoints = sorted(set(endpoints) & ALL_ENDPOINTS)
+    snapshots, calls = snapshot_networks(meraki_client, networks, devices, endpoints, max_workers,
+                                         organization_id, on_network)
+    return OrgSnapshot(
+        organization_id=organization_id,
+        networks=snapshots,
+        devices=list(devices),
+        endpoints=endpoints,
+        fetched_at=started,
+        api_calls=api_calls + calls,
+        duration=time.time() - started,
+        refetched_networks=[snapshot.network_id for snapshot in snapshots]
+    )
+
+
+def _serials(devices: Iterable[Dict[str, Any]]) -> List[str]:
+    return sorted(device.get('serial', '') for device in devices)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _changed_network_ids(
+    changes: Iterable[Dict[str, Any]],
+    networks: Iterable[Dict[str, Any]]
+) -> Tuple[Set[str], bool, Set[str]]:
+    """
+    Networks touched by configuration changes, whether every network must be re-fetched,
+    and the endpoints organization-wide changes require in every network.
+
+    A change on a configuration template applies to every network bound to it
+    (configTemplateId); one naming an unknown network or template cannot be narrowed
+    down. A change without a networkId is organization-wide: it only re-fetches the
+    endpoints its page and label relate to (ORG_CHANGE_ENDPOINTS) and is ignored
+    otherwise (administrators, alerts, licensing, ...).
+    """
+    network_ids = {network['id'] for network in networks}
+    bound: Dict[str, Set[str]] = {}
+    for network in networks:
+        if network.get('configTemplateId'):
+            bound.setdefault(network['configTemplateId'], set()).add(network['id'])
+
+    changed: Set[str] = set()
+    org_endpoints: Set[str] = set()
+    for change in changes:
+        network_id = change.get('networkId')
+        if network_id in network_ids:
+            changed.add(network_id)
+        elif network_id in bound:
+            changed |= bound[network_id]
+        elif network_id:
+            return network_ids, True, set()
+        else:
+            text = f"{change.get('page') or ''} {change.get('label') or ''}".lower()
+            for keyword, names in ORG_CHANGE_ENDPOINTS.items():
+                if keyword in text:
+                    org_endpoints |= names
+    return changed, False, org_endpoints
+
+
+def refresh_org_snapshot(
+    meraki_client,
+    previous: OrgSnapshot,
+    endpoints: Iterable[str] = ALL_ENDPOINTS,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    on_network: Optional[NetworkCallback] = None
+) -> OrgSnapshot:
+    """
+    Bring a previous snapshot up to date, re-fetching only what changed.
+
+    A network is re-fetched in full when it is new, appears in the configuration
+    change log since previous.fetched_at (directly or through its configuration
+    template), or its product types or device serials changed. A logged change
+    naming an unknown network or template re-fetches every network. Other networks
+    keep their data; they only re-fetch volatile endpoints, endpoints the previous
+    snapshot did not include, endpoints that failed, and endpoints related to an
+    organization-wide change.
+
+    Falls back to a full build when the previous snapshot is older than the change
+    log retention.
+
+    Args:
+        meraki_client: MerakiClient instance
+        previous: Snapshot from an earlier run
+        endpoints: Endpoint names the caller will evaluate
+        max_workers: Concurrent requests
+        on_network: Called with each network snapshot as soon as it is complete
+
+    Returns:
+        New OrgSnapshot covering the union of previous and requested endpoints
+    """
+    organization_id = previous.organization_id
+    started = time.time()
+    if started - previous.fetched_at > MAX_CHANGE_LOOKBACK:
+        return build_org_snapshot(meraki_client, organization_id, set(endpoints) | set(previous.endpoints),
+                                  max_workers=max_workers, on_network=on_network)
+
+    organizations = meraki_client.dashboard.organizations
+    rate_scheduler.acquire(organization_id)
+    networks = organizations.getOrganizationNetworks(organization_id, total_pages='all')
+    rate_scheduler.acquire(organization_id)
+    devices = organizations.getOrganizationDevices(organization_id, total_pages='all')
+    rate_scheduler.acquire(organization_id)
+    changes = organizations.getOrganizationConfigurationChanges(
+        organization_id, t0=_iso(previous.fetched_at), total_pages='all'
+    )
+    infrastructure_cache.update_from_org_devices(devices, [n['id'] for n in networks])
+    changed_ids, refetch_all, org_endpoints = _changed_network_ids(changes, networks)
+
+    requested = set(endpoints) & ALL_ENDPOINTS
+    all_endpoints = requested | set(previous.endpoints)
+    previous_by_id = {snap.network_id: snap for snap in previous.networks}
+
+    snapshots = []
+    tasks = []
+    refetched = []
+    for fresh in _new_network_snapshots(networks, devices):
+        old = previous_by_id.get(fresh.network_id)
+        if (old is None or refetch_all or fresh.network_id in changed_ids or old.product_types != fresh.product_types
+                or _serials(old.devices) != _serials(fresh.devices)):
+            snapshot, wanted = fresh, all_endpoints
+            refetched.append(fresh.network_id)
+        else:
+            snapshot = replace(old, name=fresh.name, devices=fresh.devices, errors=dict(old.errors))
+            wanted = ((requested & VOLATILE_ENDPOINTS) | (requested - set(previous.endpoints))
+                      | (requested & set(old.errors)) | (all_endpoints & org_endpoints))
+        snapshots.append(snapshot)
+        tasks.extend((snapshot, endpoint) for endpoint in sorted(wanted) if _wants(snapshot, endpoint))
+
+    calls = _run_fetches(meraki_client, tasks, max_workers, organization_id, snapshots, on_network)
+    return OrgSnapshot(
+        organization_id=organization_id,
+        networks=snapshots,
+        devices=list(devices),
+        endpoints=sorted(all_endpoints),
+        fetched_at=started,
+        api_calls=3 + calls,
+        duration=time.time() - started,
+        mode='incremental',
+        refetched_networks=refetched,
+        config_changes=len(changes)
+    )
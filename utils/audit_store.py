@@ -0,0 +1,142 @@
+"""
+Persistence of audit snapshots between runs.
+
+Snapshots are stored as gzip-compressed JSON, one file per organization, under
+MCP_STATE_DIR/audit_snapshots, with secrets (PSKs, RADIUS shared secrets, ...)
+replaced by a marker; audits only check whether a secret is set. get_org_snapshot() loads the previous snapshot,
+refreshes it incrementally from the configuration change log and saves the
+result, so a weekly audit of an unchanged org costs a handful of API calls.
+"""
+
+import gzip
+import json
+import os
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, Optional
+
+from config import MCP_AUDIT_CONCURRENCY, MCP_STATE_DIR
+from utils.audit_snapshot import (
+    ALL_ENDPOINTS, NetworkCallback, NetworkSnapshot, OrgSnapshot, build_org_snapshot, refresh_org_snapshot
+)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Keys whose values are credentials; matched case-insensitively, also as suffixes (radiusSecret, adminPassword)
+SECRET_KEYS = ('psk', 'secret', 'password', 'passphrase', 'presharedkey', 'sharedkey', 'privatekey', 'apikey', 'token')
+REDACTED = '[redacted]'
+
+
+def _is_secret(key: Any) -> bool:
+    key = str(key).lower()
+    return any(key == name or key.endswith(name) for name in SECRET_KEYS)
+
+
+def redact_secrets(value: Any) -> Any:
+    """
+    Copy of an API payload with every non-empty secret value replaced by REDACTED.
+
+    Empty secrets are kept as they are, so "is a PSK set" checks give the same answer.
+    """
+    if isinstance(value, dict):
+        return {key: (REDACTED if item not in (None, '') else item) if _is_secret(key) else redact_secrets(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact_secrets(item) for item in value]
+    return value
+
+
+def snapshot_to_dict(snapshot: OrgSnapshot) -> Dict[str, Any]:
+    data = redact_secrets(asdict(snapshot))
+    data['version'] = SNAPSHOT_FORMAT_VERSION
+    return data
+
+
+def snapshot_from_dict(data: Dict[str, Any]) -> OrgSnapshot:
+    data = dict(data)
+    data.pop('version', None)
+    networks = [NetworkSnapshot(**network) for network in data.pop('networks', [])]
+    return OrgSnapshot(networks=networks, **data)
+
+
+class AuditSnapshotStore:
+    """Directory of persisted OrgSnapshots keyed by organization ID."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(MCP_STATE_DIR, 'audit_snapshots')
+
+    def path(self, organization_id: str) -> str:
+        return os.path.join(self.directory, f"{organization_id}.json.gz")
+
+    def load(self, organization_id: str) -> Optional[OrgSnapshot]:
+        """Return the stored snapshot, or None if missing, unreadable or from another format version."""
+        try:
+            with gzip.open(self.path(organization_id), 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != SNAPSHOT_FORMAT_VERSION:
+                return None
+            return snapshot_from_dict(data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, snapshot: OrgSnapshot) -> None:
+        """Write a snapshot atomically."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(snapshot.organization_id)
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(snapshot_to_dict(snapshot), f, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def delete(self, organization_id: str) -> None:
+        try:
+            os.remove(self.path(organization_id))
+        except FileNotFoundError:
+            pass
+
+
+# Shared by the audit tools
+audit_store = AuditSnapshotStore()
+
+
+def get_org_snapshot(
+    meraki_client,
+    organization_id: str,
+    endpoints: Iterable[str] = ALL_ENDPOINTS,
+    incremental: bool = True,
+    store: Optional[AuditSnapshotStore] = None,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    on_network: Optional[NetworkCallback] = None
+) -> OrgSnapshot:
+    """
+    Snapshot an organization, reusing the persisted snapshot when possible.
+
+    Args:
+        meraki_client: MerakiClient instance
+        organization_id: Organization ID
+        endpoints: Endpoint names the caller will evaluate
+        incremental: Refresh the stored snapshot instead of fetching everything
+        store: Snapshot store (defaults to the shared one)
+        max_workers: Concurrent requests
+        on_network: Called with each network snapshot as soon as it is complete
+
+    Returns:
+        Up-to-date OrgSnapshot (also saved to the store)
+    """
+    store = store or audit_store
+    previous = store.load(organization_id) if incremental else None
+    snapshot = None
+    if previous is not None:
+        try:
+            snapshot = refresh_org_snapshot(meraki_client, previous, endpoints, max_workers, on_network)
+        except Exception:
+            # e.g. configuration change log not available - fall back to a full fetch
+            snapshot = None
+    if snapshot is None:
+        snapshot = build_org_snapshot(meraki_client, organization_id, endpoints, max_workers=max_workers,
+                                      on_network=on_network)
+
+    try:
+        store.save(snapshot)
+    except OSError:
+        pass
+    return snapshot
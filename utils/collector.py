@@ -0,0 +1,93 @@
+"""
+Background polling threads shared by the history collectors.
+
+Uplink loss/latency, switch port statuses and wireless anomaly metrics are all
+sampled the same way: one daemon thread per organization calls poll_once every
+`interval` seconds until its stop event is set. PollingCollector owns those
+threads and their CollectionStatus; subclasses only implement poll_once and
+clamp the interval in start().
+
+A collection is running while its stop event is registered. stop() removes the
+event right away, so a start() that follows immediately creates a new thread
+and status instead of returning the status of the thread that is winding down.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+
+@dataclass
+class CollectionStatus:
+    """State of the background collection of one organization."""
+
+    organization_id: str
+    interval: int
+    started_at: float = field(default_factory=time.time)
+    polls: int = 0
+    samples: int = 0
+    last_poll: Optional[float] = None
+    last_error: Optional[str] = None
+    running: bool = True
+
+
+class PollingCollector:
+    """One polling thread per organization; subclasses implement poll_once."""
+
+    thread_name = 'collector'
+
+    def __init__(self):
+        self.status: Dict[str, CollectionStatus] = {}
+        self._stops: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def poll_once(self, meraki_client, organization_id: str) -> int:
+        """Take one sample of an organization; returns the number of samples added."""
+        raise NotImplementedError
+
+    def _poll(self, meraki_client, status: CollectionStatus) -> int:
+        return self.poll_once(meraki_client, status.organization_id)
+
+    def _run(self, meraki_client, status: CollectionStatus, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                status.samples += self._poll(meraki_client, status)
+                status.last_error = None
+            except Exception as e:
+                status.last_error = str(e)
+            status.polls += 1
+            status.last_poll = time.time()
+            stop.wait(status.interval)
+        status.running = False
+
+    def _start(self, meraki_client, organization_id: str, interval: int) -> CollectionStatus:
+        """Start a thread for the organization, or only change the interval while one is registered."""
+        with self._lock:
+            status = self.status.get(organization_id)
+            if status is not None and organization_id in self._stops:
+                status.interval = interval
+                return status
+            status = self.status[organization_id] = CollectionStatus(organization_id=organization_id, interval=interval)
+            stop = self._stops[organization_id] = threading.Event()
+        threading.Thread(
+            target=self._run, args=(meraki_client, status, stop), name=f"{self.thread_name}-{organization_id}",
+            daemon=True
+        ).start()
+        return status
+
+    def stop(self, organization_id: str) -> bool:
+        """Stop collecting an organization; returns False if it was not being collected."""
+        with self._lock:
+            stop = self._stops.pop(organization_id, None)
+        if stop is None:
+            return False
+        stop.set()
+        return True
+
+    def running(self, organization_id: str) -> bool:
+        return organization_id in self._stops
+
+    def stop_all(self) -> None:
+        for organization_id in list(self._stops):
+            self.stop(organization_id)
@@ -0,0 +1,254 @@
+"""
+Dry-run cost estimates for snapshot-based audits.
+
+Counts the Dashboard calls an audit would make from inventory that is already
+on hand, without calling the endpoints themselves:
+
+    stored snapshot     exact per-network product types and devices (audit_store)
+    org directory       network count and product-type union (an upper bound)
+
+and turns the count into a duration under the current rate budget and the
+request latency measured by earlier profiled runs. Both a quick (incremental)
+and a full audit are estimated so a caller can pick one before starting.
+
+Cross-org device searches are estimated from the organization directory alone:
+one inventory call per candidate organization, plus one network lookup for each
+organization whose product types are not known yet when the search filters on one.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from config import MCP_AUDIT_CONCURRENCY, MCP_FLEET_CONCURRENCY
+from utils.audit_snapshot import VOLATILE_ENDPOINTS, NetworkSnapshot, OrgSnapshot, _wants
+from utils.org_directory import OrgRecord
+from utils.profiler import read_profiles
+from utils.rate_limit import rate_scheduler
+
+# Used until a profiled run has measured the real request latency
+DEFAULT_REQUEST_SECONDS = 0.4
+
+# Share of networks assumed changed since the last audit when the stored snapshot cannot tell
+DEFAULT_CHANGE_RATIO = 0.1
+
+PAGE_SIZE = 1000
+
+
+def measured_request_seconds(directory: Optional[str] = None, runs: int = 20) -> Optional[float]:
+    """Average seconds per request over the last profiled runs (see utils.profiler), if any."""
+    seconds = 0.0
+    requests = 0
+    for profile in read_profiles(directory, runs):
+        for phase in profile.get('phases', {}).values():
+            for stats in phase.get('endpoints', {}).values():
+                seconds += stats.get('seconds', 0.0)
+                requests += stats.get('requests', 0)
+    return seconds / requests if requests else None
+
+
+def effective_rate(organization_count: int = 1) -> Optional[float]:
+    """Requests per second the rate scheduler allows across the given number of organizations."""
+    rates = []
+    if rate_scheduler.org_rate > 0:
+        rates.append(rate_scheduler.org_rate * max(1, organization_count))
+    if rate_scheduler.global_rate > 0:
+        rates.append(rate_scheduler.global_rate)
+    return min(rates) if rates else None
+
+
+@dataclass
+class CostEstimate:
+    """Estimated API cost of one audit mode."""
+
+    mode: str
+    calls: Dict[str, int] = field(default_factory=dict)
+    networks: int = 0
+    devices: Optional[int] = None
+    seconds: float = 0.0
+    rate: Optional[float] = None
+    request_seconds: float = DEFAULT_REQUEST_SECONDS
+    basis: str = ''
+    assumptions: List[str] = field(default_factory=list)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            'mode': self.mode, 'total_calls': self.total_calls, 'estimated_seconds': round(self.seconds, 1),
+            'networks': self.networks, 'devices': self.devices, 'calls': self.calls,
+            'rate_limit_per_second': self.rate, 'request_seconds': round(self.request_seconds, 3),
+            'basis': self.basis, 'assumptions': self.assumptions
+        }
+
+
+def _duration(serial_calls: int, parallel_calls: int, request_seconds: float, workers: int, rate: Optional[float]) -> float:
+    """Serial org-level calls, then parallel calls bounded by both concurrency and the rate budget."""
+    parallel = parallel_calls * request_seconds / max(1, workers)
+    if rate:
+        parallel = max(parallel, parallel_calls / rate)
+    return serial_calls * request_seconds + parallel
+
+
+def _pages(count: Optional[int]) -> int:
+    return max(1, math.ceil((count or 0) / PAGE_SIZE))
+
+
+def _inventory(
+    organization_id: str,
+    previous: Optional[OrgSnapshot],
+    record: Optional[OrgRecord]
+) -> tuple:
+    """(network snapshots to count against, device count or None, basis, assumptions)."""
+    if previous is not None:
+        return previous.networks, len(previous.devices), f"stored snapshot of {previous.network_count} networks", []
+    if record is not None and record.network_count is not None:
+        product_types = list(record.product_types or ['appliance', 'switch', 'wireless'])
+        networks = [NetworkSnapshot(network_id=f"{organization_id}-{i}", name='', product_types=product_types)
+                    for i in range(record.network_count)]
+        return networks, None, f"organization directory ({record.network_count} networks)", [
+            f"every network assumed to have {', '.join(product_types)} (upper bound)"
+        ]
+    raise ValueError(f"No cached inventory for organization {organization_id}; run an audit or org enrichment first")
+
+
+def estimate_snapshot(
+    organization_id: str,
+    endpoints: Iterable[str],
+    previous: Optional[OrgSnapshot] = None,
+    record: Optional[OrgRecord] = None,
+    extra_calls: Optional[Dict[str, int]] = None,
+    change_ratio: Optional[float] = None,
+    request_seconds: Optional[float] = None,
+    max_workers: int = MCP_AUDIT_CONCURRENCY
+) -> Dict[str, CostEstimate]:
+    """
+    Estimate quick (incremental) and full snapshot audits of one organization.
+
+    Args:
+        organization_id: Organization ID
+        endpoints: Snapshot endpoint names the audit needs
+        previous: Stored snapshot (exact inventory; also makes the quick mode possible)
+        record: Organization directory record, used when there is no stored snapshot
+        extra_calls: Organization-level calls the tool makes besides the snapshot
+        change_ratio: Share of networks expected to be re-fetched in quick mode
+        request_seconds: Seconds per request (default: measured, else DEFAULT_REQUEST_SECONDS)
+        max_workers: Concurrent requests per snapshot
+
+    Returns:
+        {'full': CostEstimate, 'quick': CostEstimate} - 'quick' only with a stored snapshot
+    """
+    endpoints = sorted(set(endpoints))
+    networks, devices, basis, assumptions = _inventory(organization_id, previous, record)
+    request_seconds = request_seconds or measured_request_seconds() or DEFAULT_REQUEST_SECONDS
+    rate = effective_rate()
+    extra_calls = dict(extra_calls or {})
+
+    per_endpoint = {endpoint: sum(1 for snap in networks if _wants(snap, endpoint)) for endpoint in endpoints}
+
+    full_calls = {**extra_calls, 'getOrganizationNetworks': _pages(len(networks)),
+                  'getOrganizationDevices': _pages(devices)}
+    full_calls.update({endpoint: count for endpoint, count in per_endpoint.items() if count})
+    serial = sum(extra_calls.values()) + 2
+    full = CostEstimate(
+        mode='full', calls=full_calls, networks=len(networks), devices=devices, rate=rate,
+        request_seconds=request_seconds, basis=basis, assumptions=list(assumptions),
+        seconds=_duration(serial, sum(per_endpoint.values()), request_seconds, max_workers, rate)
+    )
+    estimates = {'full': full}
+
+    if previous is not None:
+        if change_ratio is None:
+            change_ratio = (len(previous.refetched_networks) / previous.network_count
+                            if previous.mode == 'incremental' and previous.network_count else DEFAULT_CHANGE_RATIO)
+        missing = set(endpoints) - set(previous.endpoints)
+        quick_calls = dict(extra_calls)
+        quick_calls.update({'getOrganizationConfigurationChanges': 1, 'getOrganizationNetworks': _pages(len(networks)),
+                            'getOrganizationDevices': _pages(devices)})
+        parallel = 0
+        for endpoint, count in per_endpoint.items():
+            if endpoint in VOLATILE_ENDPOINTS or endpoint in missing:
+                calls = count
+            else:
+                calls = math.ceil(count * change_ratio)
+            if calls:
+                quick_calls[endpoint] = calls
+                parallel += calls
+        quick_assumptions = list(assumptions) + [f"{change_ratio:.0%} of networks changed since the last audit"]
+        if missing:
+            quick_assumptions.append(f"endpoints not in the stored snapshot fetched for every network: {', '.join(sorted(missing))}")
+        estimates['quick'] = CostEstimate(
+            mode='quick', calls=quick_calls, networks=len(networks), devices=devices, rate=rate,
+            request_seconds=request_seconds, basis=basis, assumptions=quick_assumptions,
+            seconds=_duration(serial + 1, parallel, request_seconds, max_workers, rate)
+        )
+    return estimates
+
+
+def combine_fleet(
+    estimates: List[CostEstimate],
+    mode: str,
+    max_orgs: int = MCP_FLEET_CONCURRENCY,
+    max_workers: int = MCP_AUDIT_CONCURRENCY
+) -> CostEstimate:
+    """Combine per-organization estimates of a sweep that runs max_orgs organizations at once."""
+    calls: Dict[str, int] = {}
+    for estimate in estimates:
+        for endpoint, count in estimate.calls.items():
+            calls[endpoint] = calls.get(endpoint, 0) + count
+    total = sum(calls.values())
+    rate = effective_rate(min(max_orgs, len(estimates)))
+    request_seconds = estimates[0].request_seconds if estimates else DEFAULT_REQUEST_SECONDS
+    seconds = sum(estimate.seconds for estimate in estimates) / max(1, min(max_orgs, len(estimates)))
+    if rate:
+        seconds = max(seconds, total / rate)
+    return CostEstimate(
+        mode=mode, calls=calls, networks=sum(e.networks for e in estimates),
+        devices=sum(e.devices or 0 for e in estimates), seconds=seconds, rate=rate,
+        request_seconds=request_seconds, basis=f"{len(estimates)} organizations",
+        assumptions=sorted({a for e in estimates for a in e.assumptions})
+    )
+
+
+def estimate_search(
+    records: Iterable[OrgRecord],
+    product_type: Optional[str] = None,
+    request_seconds: Optional[float] = None
+) -> CostEstimate:
+    """
+    Estimate a cross-org device search (search_device_by_serial, search_devices_by_model, ...).
+
+    The search tools query organizations one after another, so calls are serial.
+
+    Args:
+        records: Organization directory records
+        product_type: Product type the search filters on (model searches), or None
+        request_seconds: Seconds per request (default: measured, else DEFAULT_REQUEST_SECONDS)
+    """
+    records = list(records)
+    request_seconds = request_seconds or measured_request_seconds() or DEFAULT_REQUEST_SECONDS
+    rate = effective_rate()
+    usable = [record for record in records if record.usable]
+    unknown = [record for record in usable if record.product_types is None]
+    searched = [record for record in usable if not product_type or record.has_product(product_type)]
+
+    calls = {'getOrganizationDevices': len(searched)}
+    assumptions = ["one inventory page per organization"]
+    if product_type and unknown:
+        calls['getOrganizationNetworks'] = len(unknown)
+        assumptions.append(f"{len(unknown)} organizations with unknown product types searched (upper bound)")
+    skipped = len([record for record in records if not record.usable])
+    if skipped:
+        assumptions.append(f"{skipped} organizations skipped (API disabled or access refused)")
+    total = sum(calls.values())
+    seconds = total * request_seconds
+    if rate:
+        seconds = max(seconds, total / rate)
+    return CostEstimate(
+        mode='search', calls={name: count for name, count in calls.items() if count},
+        networks=sum(record.network_count or 0 for record in searched), seconds=seconds, rate=rate,
+        request_seconds=request_seconds, basis=f"organization directory ({len(searched)} of {len(usable)} organizations)",
+        assumptions=assumptions
+    )
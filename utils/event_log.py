@@ -0,0 +1,429 @@
+"""
+Incremental network event tailing.
+
+getNetworkEvents pages through a network's event log by time: each response
+carries pageStartAt/pageEndAt, and the next call passes one of them back as
+startingAfter (newer events) or endingBefore (older events). Fetching "the last
+day" fresh on every call repeats the same pages, so the tailer keeps both
+cursors per network and product type:
+
+    starting_after   end of the newest page fetched; the next tail only asks for events after it
+    ending_before    start of the oldest page fetched; older windows are backfilled from here
+
+Fetched events go to an append-only JSON Lines log per network under
+MCP_STATE_DIR/event_log, indexed in memory by event type, device (serial, name,
+MAC) and client (ID, MAC, IP, description), so "what happened since..."
+questions are answered locally. Events older than MCP_EVENT_RETENTION are
+dropped when a log is compacted.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from config import MCP_AUDIT_CONCURRENCY, MCP_CACHE_TTL, MCP_EVENT_MAX_PAGES, MCP_EVENT_RETENTION, MCP_STATE_DIR
+from utils.cache import TTLCache
+from utils.rate_limit import rate_scheduler
+from utils.uplink_history import format_timestamp, parse_timestamp
+
+PER_PAGE = 1000
+
+# Product types with their own event log (productType of getNetworkEvents)
+EVENT_PRODUCT_TYPES = ('appliance', 'switch', 'wireless', 'camera', 'cellularGateway', 'systemsManager')
+
+DEVICE_FIELDS = ('deviceSerial', 'deviceName', 'deviceMac')
+CLIENT_FIELDS = ('clientId', 'clientMac', 'clientIp', 'clientDescription')
+
+StreamKey = Tuple[str, str]
+
+
+def event_time(event: Dict[str, Any]) -> int:
+    try:
+        return parse_timestamp(event.get('occurredAt') or 0)
+    except ValueError:
+        return 0
+
+
+def _event_key(event: Dict[str, Any]) -> str:
+    return json.dumps(event, sort_keys=True, default=str)
+
+
+@dataclass
+class EventCursor:
+    """Tail position of one network and product type."""
+
+    network_id: str
+    product_type: str
+    starting_after: Optional[str] = None
+    ending_before: Optional[str] = None
+    # True once a backfill reached the oldest event the Dashboard keeps
+    complete: bool = False
+    updated_at: Optional[float] = None
+
+    @property
+    def covered_from(self) -> Optional[int]:
+        return None if self.ending_before is None else parse_timestamp(self.ending_before)
+
+
+class _NetworkEvents:
+    """Events of one network with their lookup indexes."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.times: List[int] = []
+        self.keys: Set[str] = set()
+        self.by_type: Dict[str, List[int]] = {}
+        self.by_device: Dict[str, List[int]] = {}
+        self.by_client: Dict[str, List[int]] = {}
+        self.by_product: Dict[str, List[int]] = {}
+
+    def add(self, event: Dict[str, Any]) -> bool:
+        key = _event_key(event)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        position = len(self.events)
+        self.events.append(event)
+        self.times.append(event_time(event))
+        self.by_type.setdefault(event.get('type') or '', []).append(position)
+        self.by_product.setdefault(event.get('productType') or '', []).append(position)
+        for fields, index in ((DEVICE_FIELDS, self.by_device), (CLIENT_FIELDS, self.by_client)):
+            for value in {str(event[f]).lower() for f in fields if event.get(f)}:
+                index.setdefault(value, []).append(position)
+        return True
+
+    def positions(
+        self,
+        event_types: Optional[Sequence[str]],
+        device: Optional[str],
+        client: Optional[str],
+        product_type: Optional[str]
+    ) -> Iterable[int]:
+        """Candidate positions from the narrowest applicable index (all events without filters)."""
+        candidates: Optional[Set[int]] = None
+        filters = []
+        if event_types:
+            filters.append({p for t in event_types for p in self.by_type.get(t, [])})
+        if device:
+            filters.append(set(self.by_device.get(device.lower(), [])))
+        if client:
+            filters.append(set(self.by_client.get(client.lower(), [])))
+        if product_type:
+            filters.append(set(self.by_product.get(product_type, [])))
+        for positions in filters:
+            candidates = positions if candidates is None else candidates & positions
+        return range(len(self.events)) if candidates is None else candidates
+
+
+class EventLog:
+    """Per-network event logs and tail cursors, loaded lazily from and saved to MCP_STATE_DIR/event_log."""
+
+    def __init__(self, directory: Optional[str] = None, retention: int = MCP_EVENT_RETENTION):
+        self.directory = directory or os.path.join(MCP_STATE_DIR, 'event_log')
+        self.retention = retention
+        self._networks: Dict[str, _NetworkEvents] = {}
+        self._cursors: Optional[Dict[StreamKey, EventCursor]] = None
+        self._lock = threading.RLock()
+
+    def path(self, network_id: str) -> str:
+        return os.path.join(self.directory, f"{network_id}.jsonl")
+
+    @property
+    def cursors_path(self) -> str:
+        return os.path.join(self.directory, 'cursors.json')
+
+    def _network(self, network_id: str) -> _NetworkEvents:
+        with self._lock:
+            if network_id not in self._networks:
+                self._networks[network_id] = self._load(network_id)
+            return self._networks[network_id]
+
+    def _load(self, network_id: str) -> _NetworkEvents:
+        log = _NetworkEvents()
+        try:
+            with open(self.path(network_id), encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        log.add(json.loads(line))
+                    except ValueError:
+                        continue  # Torn final line of an interrupted append
+        except OSError:
+            pass
+        return log
+
+    def add(self, network_id: str, product_type: str, events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append events not stored yet; returns the new ones."""
+        added = []
+        with self._lock:
+            log = self._network(network_id)
+            for event in events or []:
+                event = dict(event, networkId=event.get('networkId') or network_id, productType=product_type)
+                if log.add(event):
+                    added.append(event)
+            if added:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self.path(network_id), 'a', encoding='utf-8') as f:
+                    f.writelines(json.dumps(event, default=str) + '\n' for event in added)
+        return added
+
+    def query(
+        self,
+        network_ids: Iterable[str],
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        event_types: Optional[Sequence[str]] = None,
+        device: Optional[str] = None,
+        client: Optional[str] = None,
+        product_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Stored events matching every given filter, newest first.
+
+        device matches a serial, name or MAC; client matches a client ID, MAC, IP
+        or description (exact, case-insensitive).
+        """
+        matches: List[Tuple[int, Dict[str, Any]]] = []
+        with self._lock:
+            for network_id in network_ids:
+                log = self._network(network_id)
+                for position in log.positions(event_types, device, client, product_type):
+                    ts = log.times[position]
+                    if (since is None or ts >= since) and (until is None or ts <= until):
+                        matches.append((ts, log.events[position]))
+        matches.sort(key=lambda item: item[0], reverse=True)
+        return [event for _, event in matches[:limit]]
+
+    def event_count(self, network_id: str) -> int:
+        return len(self._network(network_id).events)
+
+    def compact(self, network_id: str, now: Optional[float] = None) -> int:
+        """Drop events older than the retention and rewrite the log; returns events removed."""
+        cutoff = (time.time() if now is None else now) - self.retention
+        with self._lock:
+            log = self._network(network_id)
+            keep = [event for event, ts in zip(log.events, log.times) if ts >= cutoff]
+            removed = len(log.events) - len(keep)
+            if not removed:
+                return 0
+            fresh = _NetworkEvents()
+            for event in keep:
+                fresh.add(event)
+            self._networks[network_id] = fresh
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(network_id)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(event, default=str) + '\n' for event in keep)
+            os.replace(temp_path, path)
+            for cursor in self._all_cursors().values():
+                if cursor.network_id == network_id and cursor.covered_from is not None and cursor.covered_from < cutoff:
+                    cursor.ending_before = format_timestamp(cutoff)
+                    cursor.complete = False
+            self._save_cursors()
+        return removed
+
+    def _all_cursors(self) -> Dict[StreamKey, EventCursor]:
+        with self._lock:
+            if self._cursors is None:
+                try:
+                    with open(self.cursors_path, encoding='utf-8') as f:
+                        self._cursors = {(c['network_id'], c['product_type']): EventCursor(**c) for c in json.load(f)}
+                except (OSError, ValueError, TypeError, KeyError):
+                    self._cursors = {}
+            return self._cursors
+
+    def cursor(self, network_id: str, product_type: str) -> EventCursor:
+        with self._lock:
+            cursors = self._all_cursors()
+            key = (network_id, product_type)
+            if key not in cursors:
+                cursors[key] = EventCursor(network_id=network_id, product_type=product_type)
+            return cursors[key]
+
+    def cursors(self, network_id: Optional[str] = None) -> List[EventCursor]:
+        with self._lock:
+            return [c for c in self._all_cursors().values()
+                    if c.updated_at is not None and (network_id is None or c.network_id == network_id)]
+
+    def _save_cursors(self) -> None:
+        with self._lock:
+            data = [asdict(cursor) for cursor in self._all_cursors().values() if cursor.updated_at is not None]
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self.cursors_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.cursors_path)
+
+    def clear(self, network_id: str) -> None:
+        with self._lock:
+            self._networks[network_id] = _NetworkEvents()
+            cursors = self._all_cursors()
+            for key in [k for k in cursors if k[0] == network_id]:
+                del cursors[key]
+            self._save_cursors()
+        try:
+            os.remove(self.path(network_id))
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class TailResult:
+    """Outcome of bringing one or more event streams up to date."""
+
+    new_events: List[Dict[str, Any]] = field(default_factory=list)
+    calls: int = 0
+    streams: int = 0
+    networks: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def merge(self, other: 'TailResult') -> None:
+        self.new_events += other.new_events
+        self.networks += other.networks
+        self.calls += other.calls
+        self.streams += other.streams
+        self.errors.update(other.errors)
+
+
+class EventTailer:
+    """Fetches only events the log does not have yet, using the stored cursors."""
+
+    def __init__(self, log: EventLog, max_pages: int = MCP_EVENT_MAX_PAGES):
+        self.log = log
+        self.max_pages = max_pages
+        self._product_types = TTLCache(MCP_CACHE_TTL)
+
+    def product_types(self, meraki_client, network_id: str, organization_id: Optional[str] = None) -> List[str]:
+        """Event log product types of a network (cached)."""
+        def load():
+            rate_scheduler.acquire(organization_id)
+            network = meraki_client.dashboard.networks.getNetwork(network_id)
+            return [p for p in network.get('productTypes') or [] if p in EVENT_PRODUCT_TYPES]
+        return self._product_types.get_or_load(network_id, load)
+
+    def _fetch(self, meraki_client, organization_id: Optional[str], cursor: EventCursor, **kwargs) -> Dict[str, Any]:
+        rate_scheduler.acquire(organization_id)
+        response = meraki_client.dashboard.networks.getNetworkEvents(
+            cursor.network_id, productType=cursor.product_type, perPage=PER_PAGE, **kwargs
+        )
+        return response if isinstance(response, dict) else {'events': list(response or [])}
+
+    def tail_stream(
+        self,
+        meraki_client,
+        network_id: str,
+        product_type: str,
+        since: Optional[int] = None,
+        organization_id: Optional[str] = None
+    ) -> TailResult:
+        """
+        Bring one network/product stream up to date.
+
+        Events after starting_after are fetched forward; when the stored history
+        starts later than `since`, older pages are backfilled from ending_before.
+        The first tail of a stream reads backwards from now.
+        """
+        result = TailResult(streams=1)
+        with self.log._lock:
+            cursor = self.log.cursor(network_id, product_type)
+
+        if cursor.starting_after:
+            response = self._fetch(meraki_client, organization_id, cursor, direction='next',
+                                   total_pages=self.max_pages, startingAfter=cursor.starting_after)
+            result.calls += 1
+            result.new_events += self.log.add(network_id, product_type, response.get('events'))
+            end = response.get('pageEndAt')
+            if end and parse_timestamp(end) >= parse_timestamp(cursor.starting_after):
+                cursor.starting_after = end
+
+        pages = 0
+        while (not cursor.complete and pages < self.max_pages
+               and (cursor.ending_before is None or (since is not None and cursor.covered_from > since))):
+            kwargs = {'endingBefore': cursor.ending_before} if cursor.ending_before else {}
+            response = self._fetch(meraki_client, organization_id, cursor, direction='prev', total_pages=1, **kwargs)
+            result.calls += 1
+            pages += 1
+            events = response.get('events') or []
+            result.new_events += self.log.add(network_id, product_type, events)
+            if cursor.starting_after is None:
+                cursor.starting_after = response.get('pageEndAt') or format_timestamp(time.time())
+            if response.get('pageStartAt'):
+                cursor.ending_before = response['pageStartAt']
+            if len(events) < PER_PAGE:
+                cursor.complete = True
+
+        cursor.updated_at = time.time()
+        with self.log._lock:
+            self.log._save_cursors()
+        return result
+
+    def tail(
+        self,
+        meraki_client,
+        network_id: str,
+        product_types: Optional[Sequence[str]] = None,
+        since: Optional[int] = None,
+        organization_id: Optional[str] = None
+    ) -> TailResult:
+        """Bring every (or the given) event stream of a network up to date; an empty list tails nothing."""
+        if product_types is None:
+            product_types = self.product_types(meraki_client, network_id, organization_id)
+        if not product_types:
+            return TailResult()
+        result = TailResult(networks=[network_id])
+        for product_type in product_types:
+            try:
+                result.merge(self.tail_stream(meraki_client, network_id, product_type, since, organization_id))
+            except Exception as e:
+                result.errors[f"{network_id}/{product_type}"] = str(e)
+        self.log.compact(network_id)
+        return result
+
+    def tail_organization(
+        self,
+        meraki_client,
+        organization_id: str,
+        since: Optional[int] = None,
+        network_ids: Optional[Sequence[str]] = None,
+        product_types: Optional[Sequence[str]] = None,
+        max_workers: int = MCP_AUDIT_CONCURRENCY,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> TailResult:
+        """Tail every network of an organization concurrently; networks without a wanted stream are skipped."""
+        if product_types is not None and not product_types:
+            return TailResult()
+        rate_scheduler.acquire(organization_id)
+        networks = meraki_client.dashboard.organizations.getOrganizationNetworks(organization_id, total_pages='all')
+        if network_ids:
+            wanted = set(network_ids)
+            networks = [n for n in networks if n['id'] in wanted]
+        for network in networks:
+            self._product_types.set(
+                network['id'], [p for p in network.get('productTypes') or [] if p in EVENT_PRODUCT_TYPES]
+            )
+
+        wanted_types = EVENT_PRODUCT_TYPES if product_types is None else product_types
+        streams = {network['id']: [p for p in wanted_types if p in (network.get('productTypes') or [])]
+                   for network in networks}
+
+        result = TailResult()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [
+                executor.submit(self.tail, meraki_client, network_id, types, since, organization_id)
+                for network_id, types in streams.items() if types
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                result.merge(future.result())
+                if on_progress:
+                    on_progress(done, len(futures))
+        return result
+
+
+# Shared by the monitoring tools
+event_log = EventLog()
+event_tailer = EventTailer(event_log)
@@ -0,0 +1,283 @@
+"""
+Content-addressed archive of compliance evidence.
+
+Audit evidence used to travel inside the report as nested dicts. The archive
+stores it on disk instead, one zstd-compressed JSON object per (network, endpoint):
+
+    <dir>/<org_id>/objects/<h[:2]>/<h>.json.zst   record: {network_id, endpoint, data}
+    <dir>/<org_id>/runs/<run_id>.jsonl.zst         manifest: one line per record
+
+Objects are named by the SHA-256 of their canonical JSON, so an unchanged
+configuration is stored once however many audits reference it. Secrets are
+redacted before hashing (utils.audit_store.redact_secrets), and time-based
+endpoints (VOLATILE_ENDPOINTS) are not archived since they differ on every run. A run manifest is
+itself identified by the hash of its record lines; the report quotes that hash,
+and two runs can be diffed locally without any API call.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import zstandard
+
+from config import MCP_STATE_DIR
+from utils.audit_snapshot import VOLATILE_ENDPOINTS, OrgSnapshot
+from utils.audit_store import redact_secrets
+
+# Snapshot fields archived for every network besides the fetched endpoints
+BASE_RECORDS = ('devices',)
+
+ZSTD_LEVEL = 10
+
+
+def canonical_json(value: Any) -> bytes:
+    """Deterministic JSON encoding used for hashing."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def content_hash(value: Any) -> str:
+    return hashlib.sha256(canonical_json(value)).hexdigest()
+
+
+def _path_component(value: Any) -> str:
+    """Organization ID made safe to use as a directory name."""
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in str(value)) or 'none'
+
+
+@dataclass
+class EvidenceRecord:
+    """Reference from a run to one archived object."""
+
+    network_id: str
+    network_name: str
+    endpoint: str
+    hash: str
+    size: int = 0
+
+
+@dataclass
+class EvidenceManifest:
+    """Evidence of one audit run."""
+
+    run_id: str
+    organization_id: str
+    created_at: float
+    label: str = ''
+    hash: str = ''
+    records: List[EvidenceRecord] = field(default_factory=list)
+    new_objects: int = 0
+    bytes_written: int = 0
+
+    @property
+    def reused_objects(self) -> int:
+        return len(self.records) - self.new_objects
+
+    def index(self) -> Dict[Tuple[str, str], EvidenceRecord]:
+        return {(record.network_id, record.endpoint): record for record in self.records}
+
+
+@dataclass
+class EvidenceChange:
+    network_id: str
+    network_name: str
+    endpoint: str
+    change: str  # 'added', 'removed' or 'changed'
+    old_hash: Optional[str] = None
+    new_hash: Optional[str] = None
+    changed_paths: List[str] = field(default_factory=list)
+
+
+def _flatten(value: Any, prefix: str = '') -> Dict[str, Any]:
+    """Flatten nested dicts/lists into {'a.b[0].c': leaf} for path-level diffs."""
+    if isinstance(value, dict):
+        items: Dict[str, Any] = {}
+        for key, child in value.items():
+            items.update(_flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return items or {prefix: {}}
+    if isinstance(value, list):
+        items = {}
+        for i, child in enumerate(value):
+            items.update(_flatten(child, f"{prefix}[{i}]"))
+        return items or {prefix: []}
+    return {prefix: value}
+
+
+class EvidenceArchive:
+    """Per-organization object store plus run manifests."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(MCP_STATE_DIR, 'evidence')
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def _org_dir(self, organization_id: str) -> str:
+        return os.path.join(self.directory, _path_component(organization_id))
+
+    def object_path(self, organization_id: str, digest: str) -> str:
+        return os.path.join(self._org_dir(organization_id), 'objects', digest[:2], f"{digest}.json.zst")
+
+    def manifest_path(self, organization_id: str, run_id: str) -> str:
+        return os.path.join(self._org_dir(organization_id), 'runs', f"{run_id}.jsonl.zst")
+
+    def _write_atomic(self, path: str, payload: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+
+    def put(self, organization_id: str, record: Dict[str, Any]) -> Tuple[str, int]:
+        """
+        Store one record (secrets redacted) unless an identical one exists.
+
+        Returns:
+            (content hash, compressed bytes written - 0 when de-duplicated)
+        """
+        raw = canonical_json(redact_secrets(record))
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self.object_path(organization_id, digest)
+        if os.path.exists(path):
+            return digest, 0
+        payload = self._compressor.compress(raw)
+        self._write_atomic(path, payload)
+        return digest, len(payload)
+
+    def get(self, organization_id: str, digest: str) -> Dict[str, Any]:
+        """Load an archived record by hash."""
+        with open(self.object_path(organization_id, digest), 'rb') as f:
+            return json.loads(self._decompressor.decompress(f.read()))
+
+    def write_snapshot(
+        self,
+        snapshot: OrgSnapshot,
+        endpoints: Optional[Iterable[str]] = None,
+        label: str = ''
+    ) -> EvidenceManifest:
+        """
+        Archive every (network, endpoint) record of a snapshot and write a run manifest.
+
+        Args:
+            snapshot: Audit snapshot to archive
+            endpoints: Endpoints to include (default: every endpoint in the snapshot; volatile ones never)
+            label: Free-form run label (e.g. 'hipaa')
+
+        Returns:
+            EvidenceManifest of the new run
+        """
+        organization_id = snapshot.organization_id
+        endpoints = sorted(set(endpoints if endpoints is not None else snapshot.endpoints) - VOLATILE_ENDPOINTS)
+        created_at = time.time()
+        records: List[EvidenceRecord] = []
+        new_objects = 0
+        bytes_written = 0
+
+        for snap in snapshot.networks:
+            for endpoint in list(BASE_RECORDS) + endpoints:
+                data = getattr(snap, endpoint, None)
+                if data is None:
+                    continue
+                digest, written = self.put(organization_id, {
+                    'network_id': snap.network_id, 'endpoint': endpoint, 'data': data
+                })
+                if written:
+                    new_objects += 1
+                    bytes_written += written
+                records.append(EvidenceRecord(snap.network_id, snap.name, endpoint, digest, written))
+
+        lines = [canonical_json(asdict(record)) for record in records]
+        manifest_hash = hashlib.sha256(b'\n'.join(
+            canonical_json([r.network_id, r.endpoint, r.hash]) for r in records
+        )).hexdigest()
+        # Microsecond timestamps keep run IDs in creation order
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(created_at))
+        run_id = f"{stamp}.{int(created_at % 1 * 1e6):06d}Z-{manifest_hash[:8]}"
+        header = canonical_json({
+            'type': 'run', 'run_id': run_id, 'organization_id': organization_id, 'created_at': created_at,
+            'label': label, 'hash': manifest_hash, 'new_objects': new_objects, 'bytes_written': bytes_written
+        })
+        payload = self._compressor.compress(b'\n'.join([header] + lines) + b'\n')
+        self._write_atomic(self.manifest_path(organization_id, run_id), payload)
+
+        return EvidenceManifest(
+            run_id=run_id, organization_id=organization_id, created_at=created_at, label=label,
+            hash=manifest_hash, records=records, new_objects=new_objects, bytes_written=bytes_written
+        )
+
+    def run_ids(self, organization_id: str) -> List[str]:
+        """Run IDs oldest first."""
+        try:
+            names = os.listdir(os.path.join(self._org_dir(organization_id), 'runs'))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len('.jsonl.zst')] for name in names if name.endswith('.jsonl.zst'))
+
+    def load_manifest(self, organization_id: str, run_id: str) -> EvidenceManifest:
+        with open(self.manifest_path(organization_id, run_id), 'rb') as f:
+            lines = self._decompressor.decompress(f.read()).decode('utf-8').splitlines()
+        header = json.loads(lines[0])
+        return EvidenceManifest(
+            run_id=header['run_id'], organization_id=header['organization_id'],
+            created_at=header['created_at'], label=header.get('label', ''), hash=header['hash'],
+            records=[EvidenceRecord(**json.loads(line)) for line in lines[1:] if line],
+            new_objects=header.get('new_objects', 0), bytes_written=header.get('bytes_written', 0)
+        )
+
+    def resolve(self, organization_id: str, ref: str) -> Optional[str]:
+        """
+        Turn a reference into a run ID.
+
+        Accepts 'latest', 'previous', a run ID, or a prefix of a run ID or manifest hash.
+        """
+        run_ids = self.run_ids(organization_id)
+        if not run_ids:
+            return None
+        if ref == 'latest':
+            return run_ids[-1]
+        if ref == 'previous':
+            return run_ids[-2] if len(run_ids) > 1 else None
+        matches = [run_id for run_id in run_ids if run_id.startswith(ref)]
+        if not matches:
+            matches = [run_id for run_id in run_ids if self.load_manifest(organization_id, run_id).hash.startswith(ref)]
+        return matches[-1] if matches else None
+
+    def diff(self, organization_id: str, old_run: str, new_run: str, detail: bool = True) -> List[EvidenceChange]:
+        """
+        Compare two runs record by record.
+
+        Args:
+            organization_id: Organization ID
+            old_run: Run ID of the baseline
+            new_run: Run ID to compare
+            detail: Also load changed objects and list the JSON paths that differ
+
+        Returns:
+            EvidenceChange list, sorted by network and endpoint
+        """
+        old = self.load_manifest(organization_id, old_run).index()
+        new = self.load_manifest(organization_id, new_run).index()
+        changes: List[EvidenceChange] = []
+        for key in sorted(set(old) | set(new)):
+            before, after = old.get(key), new.get(key)
+            name = (after or before).network_name
+            if before is None:
+                changes.append(EvidenceChange(key[0], name, key[1], 'added', new_hash=after.hash))
+            elif after is None:
+                changes.append(EvidenceChange(key[0], name, key[1], 'removed', old_hash=before.hash))
+            elif before.hash != after.hash:
+                change = EvidenceChange(key[0], name, key[1], 'changed', before.hash, after.hash)
+                if detail:
+                    old_flat = _flatten(self.get(organization_id, before.hash)['data'])
+                    new_flat = _flatten(self.get(organization_id, after.hash)['data'])
+                    change.changed_paths = sorted(
+                        path for path in set(old_flat) | set(new_flat) if old_flat.get(path) != new_flat.get(path)
+                    )
+                changes.append(change)
+        return changes
+
+
+# Shared by the audit tools
+evidence_archive = EvidenceArchive()
@@ -0,0 +1,227 @@
+"""
+Fleet-wide security posture sweep.
+
+Scores every network of every accessible organization with the single-network
+security audit rules (the same score perform_security_audit reports), from one
+audit snapshot per organization. Organizations are swept concurrently; each
+snapshot's requests share the organization's rate budget, so the sweep stays
+inside the Dashboard limits however many organizations run at once.
+
+Results are streamed: on_result is called with each network's score as soon as
+that network's endpoints are fetched, and can be appended to a JSONL file.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import MCP_AUDIT_CONCURRENCY, MCP_FLEET_CONCURRENCY, MCP_STATE_DIR
+from utils.audit_rules import build_audit_tables
+from utils.audit_snapshot import NetworkSnapshot, OrgSnapshot
+from utils.audit_store import get_org_snapshot
+from utils.org_directory import OrgRecord, org_directory
+from utils.rule_packs import SECURITY_AUDIT_PACK
+
+
+def posture_rating(score: float) -> str:
+    """Rating bands used by perform_security_audit."""
+    if score >= 80:
+        return 'Excellent'
+    if score >= 60:
+        return 'Good'
+    if score >= 40:
+        return 'Fair'
+    return 'Poor'
+
+
+@dataclass
+class NetworkPosture:
+    """Security audit score of one network."""
+
+    organization_id: str
+    organization_name: str
+    network_id: str
+    network_name: str
+    score: int
+    max_score: int
+    issues: List[str] = field(default_factory=list)
+    product_types: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def rating(self) -> str:
+        return posture_rating(self.score)
+
+
+@dataclass
+class OrgPosture:
+    """Per-organization sweep outcome."""
+
+    organization_id: str
+    name: str
+    network_count: int = 0
+    average_score: Optional[float] = None
+    worst_score: Optional[int] = None
+    api_calls: int = 0
+    duration: float = 0.0
+    mode: str = ''
+    error: Optional[str] = None
+
+
+@dataclass
+class FleetSweep:
+    """Results of a sweep across organizations."""
+
+    networks: List[NetworkPosture] = field(default_factory=list)
+    organizations: List[OrgPosture] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    duration: float = 0.0
+    stream_path: Optional[str] = None
+
+    @property
+    def average_score(self) -> Optional[float]:
+        if not self.networks:
+            return None
+        return sum(n.score for n in self.networks) / len(self.networks)
+
+    @property
+    def api_calls(self) -> int:
+        return sum(org.api_calls for org in self.organizations)
+
+    def ranked_networks(self) -> List[NetworkPosture]:
+        """Worst networks first."""
+        return sorted(self.networks, key=lambda n: (n.score, n.organization_name, n.network_name))
+
+    def ranked_organizations(self) -> List[OrgPosture]:
+        """Swept organizations, lowest average score first; failed organizations last."""
+        return sorted(
+            self.organizations,
+            key=lambda o: (o.average_score is None, o.average_score or 0, o.name)
+        )
+
+    def rating_counts(self) -> Counter:
+        return Counter(n.rating for n in self.networks)
+
+    def issue_counts(self) -> Counter:
+        return Counter(issue for n in self.networks for issue in n.issues)
+
+
+def score_network(snap: NetworkSnapshot, organization_id: str = '', organization_name: str = '') -> NetworkPosture:
+    """Evaluate the security audit rules for one network snapshot."""
+    tables = build_audit_tables(OrgSnapshot(organization_id=organization_id, networks=[snap]))
+    results = SECURITY_AUDIT_PACK.evaluate(tables)
+    return NetworkPosture(
+        organization_id=organization_id,
+        organization_name=organization_name,
+        network_id=snap.network_id,
+        network_name=snap.name,
+        score=int(sum(result.points for result in results)),
+        max_score=int(sum(result.max_points for result in results)),
+        issues=[result.issue for result in results if result.issue],
+        product_types=list(snap.product_types),
+        errors=dict(snap.errors),
+    )
+
+
+class _JsonlStream:
+    """Appends one JSON object per line, safe to call from worker threads."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def default_stream_path(started_at: float) -> str:
+    stamp = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(started_at))
+    return os.path.join(MCP_STATE_DIR, 'fleet_sweeps', f"sweep-{stamp}.jsonl")
+
+
+def sweep_fleet(
+    meraki_client,
+    organizations: Iterable[OrgRecord],
+    on_result: Optional[Callable[[NetworkPosture], None]] = None,
+    on_organization: Optional[Callable[[OrgPosture], None]] = None,
+    incremental: bool = True,
+    stream_path: Optional[str] = None,
+    max_orgs: int = MCP_FLEET_CONCURRENCY,
+    max_workers: int = MCP_AUDIT_CONCURRENCY
+) -> FleetSweep:
+    """
+    Score every network of the given organizations.
+
+    Args:
+        meraki_client: MerakiClient instance
+        organizations: Organizations to sweep (e.g. org_directory.candidates())
+        on_result: Called with each NetworkPosture as soon as the network is scored
+        on_organization: Called with each OrgPosture when its organization finishes
+        incremental: Refresh stored audit snapshots instead of fetching everything
+        stream_path: JSONL file to append network and organization records to
+        max_orgs: Organizations swept in parallel
+        max_workers: Concurrent requests within one organization
+
+    Returns:
+        FleetSweep with every network score and per-organization statistics
+    """
+    sweep = FleetSweep(stream_path=stream_path)
+    stream = _JsonlStream(stream_path) if stream_path else None
+    lock = threading.Lock()
+
+    def emit(posture: NetworkPosture) -> None:
+        with lock:
+            sweep.networks.append(posture)
+        if stream:
+            stream.write({'type': 'network', **asdict(posture), 'rating': posture.rating})
+        if on_result:
+            on_result(posture)
+
+    def sweep_org(record: OrgRecord) -> OrgPosture:
+        started = time.time()
+        outcome = OrgPosture(organization_id=record.id, name=record.name)
+        try:
+            snapshot = get_org_snapshot(
+                meraki_client, record.id, SECURITY_AUDIT_PACK.endpoints(), incremental=incremental,
+                max_workers=max_workers, on_network=lambda snap: emit(score_network(snap, record.id, record.name))
+            )
+            with lock:
+                scores = [n.score for n in sweep.networks if n.organization_id == record.id]
+            outcome.network_count = snapshot.network_count
+            outcome.average_score = sum(scores) / len(scores) if scores else None
+            outcome.worst_score = min(scores) if scores else None
+            outcome.api_calls = snapshot.api_calls
+            outcome.mode = snapshot.mode
+            org_directory.record_networks(record.id, [
+                {'productTypes': snap.product_types} for snap in snapshot.networks
+            ])
+        except Exception as e:
+            outcome.error = str(e)
+            org_directory.record_error(record.id, e)
+        outcome.duration = time.time() - started
+        if stream:
+            stream.write({'type': 'organization', **asdict(outcome)})
+        if on_organization:
+            on_organization(outcome)
+        return outcome
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_orgs)) as executor:
+            sweep.organizations = list(executor.map(sweep_org, list(organizations)))
+    finally:
+        if stream:
+            stream.close()
+    sweep.duration = time.time() - sweep.started_at
+    return sweep
@@ -0,0 +1,483 @@
+"""
+Event and alert correlation into incidents.
+
+During an outage dozens of networks emit related events (uplink down, VPN down,
+APs offline) and the Dashboard raises assurance alerts for each device. Instead
+of reading every network's events, collected events (utils.event_log) and
+getOrganizationAssuranceAlerts are reduced to signals and grouped:
+
+    time        signals only join when they are at most `window` seconds apart (chains extend an incident)
+    topology    a signal joins signals of the same device, of its upstream devices, of devices
+                downstream of it, and of sibling devices behind the same upstream device
+    storms      incidents of the same signal type in at least `storm_networks` networks within
+                the window are merged into one organization-wide incident
+
+Upstream devices come from the organization's inventory by tier (cellular
+gateway -> appliance -> switch -> access points, cameras, sensors) and are
+refined with the LLDP/CDP neighbours switches report on their ports. Client
+events (associations, authentications) are not signals; they are counted as
+the client impact of the incident covering their device.
+"""
+
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from config import MCP_CACHE_TTL
+from utils.cache import TTLCache
+from utils.event_log import CLIENT_FIELDS, EventLog, event_time
+from utils.infrastructure import model_product_type
+from utils.oui import normalize_mac
+from utils.rate_limit import rate_scheduler
+from utils.uplink_history import format_timestamp, parse_timestamp
+
+DEFAULT_WINDOW = 600
+
+# Devices higher up come first; unknown product types sit at the edge
+PRODUCT_TIERS = {'cellularGateway': 0, 'appliance': 1, 'switch': 2}
+EDGE_TIER = 3
+
+SEVERITY_ORDER = {'critical': 0, 'warning': 1, 'info': 2}
+ALERT_SEVERITIES = {'critical': 'critical', 'warning': 'warning'}
+
+# Event types and descriptions that indicate something went down rather than a routine change
+DOWN_PATTERN = re.compile(r'down|offline|unreachable|fail|lost|disconnect|dead', re.IGNORECASE)
+
+
+def network_node(network_id: str) -> str:
+    """Topology node standing for a whole network (events and alerts without a device)."""
+    return f"network:{network_id}"
+
+
+@dataclass
+class Topology:
+    """Upstream device of every known device, plus device names and networks."""
+
+    parents: Dict[str, str] = field(default_factory=dict)
+    names: Dict[str, str] = field(default_factory=dict)
+    networks: Dict[str, str] = field(default_factory=dict)
+
+    def parent(self, node: str) -> Optional[str]:
+        return self.parents.get(node)
+
+    def ancestors(self, node: str) -> List[str]:
+        chain, seen = [], {node}
+        parent = self.parents.get(node)
+        while parent is not None and parent not in seen:
+            chain.append(parent)
+            seen.add(parent)
+            parent = self.parents.get(parent)
+        return chain
+
+    def depth(self, node: str) -> int:
+        return len(self.ancestors(node))
+
+    def name(self, node: str) -> str:
+        if node.startswith('network:'):
+            return f"network {node[len('network:'):]}"
+        return self.names.get(node) or node
+
+
+def _neighbor_fields(value: Any) -> Dict[str, str]:
+    """LLDP/CDP neighbour as {'systemname': ..., 'chassisid': ...} from either dict or name/value-list form."""
+    if isinstance(value, list):
+        pairs = [(item.get('name'), item.get('value')) for item in value if isinstance(item, dict)]
+    elif isinstance(value, dict):
+        pairs = list(value.items())
+    else:
+        return {}
+    return {re.sub(r'[^a-z]', '', str(k).lower()): str(v) for k, v in pairs if k and v}
+
+
+def build_topology(
+    devices: Iterable[Dict[str, Any]],
+    discovery: Iterable[Dict[str, Any]] = ()
+) -> Topology:
+    """
+    Topology from getOrganizationDevices and (optionally) getOrganizationSwitchPortsTopologyDiscoveryByDevice.
+
+    Every device hangs below the highest-tier device of its network (below the
+    network node itself when none exists); APs, cameras and sensors seen as
+    LLDP/CDP neighbours of a switch port hang below that switch instead.
+    """
+    topology = Topology()
+    by_network: Dict[str, List[Tuple[int, str]]] = {}
+    by_mac: Dict[str, str] = {}
+    by_name: Dict[str, str] = {}
+    tiers: Dict[str, int] = {}
+    for device in devices:
+        serial, network_id = device.get('serial'), device.get('networkId')
+        if not serial or not network_id:
+            continue
+        tier = PRODUCT_TIERS.get(device.get('productType') or model_product_type(device.get('model')), EDGE_TIER)
+        tiers[serial] = tier
+        topology.names[serial] = device.get('name') or serial
+        topology.networks[serial] = network_id
+        by_network.setdefault(network_id, []).append((tier, serial))
+        if normalize_mac(device.get('mac')):
+            by_mac[normalize_mac(device.get('mac'))] = serial
+        if device.get('name'):
+            by_name[device['name'].lower()] = serial
+
+    for network_id, members in by_network.items():
+        members.sort()
+        tiered = {}
+        for tier, serial in members:
+            tiered.setdefault(tier, []).append(serial)
+        for tier, serial in members:
+            # Parent: the first device of the nearest higher tier in the same network
+            higher = [t for t in tiered if t < tier]
+            topology.parents[serial] = tiered[max(higher)][0] if higher else network_node(network_id)
+
+    for switch in discovery or []:
+        serial = switch.get('serial')
+        if serial not in tiers:
+            continue
+        for port in switch.get('ports') or []:
+            for protocol in ('lldp', 'cdp'):
+                neighbor = _neighbor_fields(port.get(protocol))
+                candidates = [by_mac.get(normalize_mac(neighbor.get(k)) or '') for k in ('chassisid', 'deviceid')]
+                candidates += [by_name.get(neighbor.get(k, '').lower()) for k in ('systemname', 'deviceid')]
+                found = next((c for c in candidates if c and c != serial), None)
+                if found and tiers[found] > tiers[serial] and topology.networks.get(found) == topology.networks[serial]:
+                    topology.parents[found] = serial
+    return topology
+
+
+@dataclass
+class Signal:
+    """One device- or network-level event or assurance alert."""
+
+    ts: int
+    network_id: str
+    node: str
+    kind: str
+    severity: str
+    source: str
+    description: str
+    end: Optional[int] = None
+    # Assurance alert the signal came from; one alert yields a signal per device in its scope
+    alert_id: Optional[str] = None
+
+
+@dataclass
+class Incident:
+    """Signals grouped by time and topology."""
+
+    signals: List[Signal]
+    root: str
+    root_name: str
+    client_impact: int = 0
+    storm: bool = False
+
+    @property
+    def start(self) -> int:
+        return min(s.ts for s in self.signals)
+
+    @property
+    def end(self) -> int:
+        return max(s.end or s.ts for s in self.signals)
+
+    @property
+    def severity(self) -> str:
+        return min((s.severity for s in self.signals), key=lambda v: SEVERITY_ORDER.get(v, 3))
+
+    @property
+    def networks(self) -> List[str]:
+        return sorted({s.network_id for s in self.signals})
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted({s.node for s in self.signals})
+
+    @property
+    def kinds(self) -> List[Tuple[str, int]]:
+        return Counter(s.kind for s in self.signals).most_common()
+
+    @property
+    def alerts(self) -> int:
+        """Distinct assurance alerts among the signals."""
+        return len({s.alert_id for s in self.signals if s.source == 'alert'})
+
+    @property
+    def title(self) -> str:
+        kind = self.kinds[0][0]
+        if self.storm:
+            return f"{kind} across {len(self.networks)} networks"
+        return f"{kind} at {self.root_name}"
+
+
+def _is_client_event(event: Dict[str, Any]) -> bool:
+    return any(event.get(f) for f in CLIENT_FIELDS)
+
+
+def event_signal(event: Dict[str, Any]) -> Signal:
+    network_id = event.get('networkId', '')
+    text = f"{event.get('type', '')} {event.get('description', '')}"
+    return Signal(
+        ts=event_time(event), network_id=network_id,
+        node=event.get('deviceSerial') or network_node(network_id),
+        kind=event.get('type') or 'event', severity='warning' if DOWN_PATTERN.search(text) else 'info',
+        source='event', description=event.get('description') or event.get('type') or ''
+    )
+
+
+def alert_signals(alert: Dict[str, Any]) -> List[Signal]:
+    """One signal per device in the alert's scope (or one for its network)."""
+    network = alert.get('network') or {}
+    network_id = network.get('id') if isinstance(network, dict) else alert.get('networkId')
+    network_id = network_id or alert.get('networkId') or ''
+    serials = [d['serial'] for d in (alert.get('scope') or {}).get('devices') or [] if d.get('serial')]
+    try:
+        started = parse_timestamp(alert.get('startedAt') or 0)
+        resolved = parse_timestamp(alert['resolvedAt']) if alert.get('resolvedAt') else None
+    except ValueError:
+        return []
+    kind = alert.get('type') or alert.get('title') or alert.get('categoryType') or 'alert'
+    alert_id = str(alert.get('id') or json.dumps(alert, sort_keys=True, default=str))
+    return [
+        Signal(ts=started, network_id=network_id, node=serial, kind=kind,
+               severity=ALERT_SEVERITIES.get(str(alert.get('severity', '')).lower(), 'info'), source='alert',
+               description=alert.get('title') or alert.get('description') or kind, end=resolved, alert_id=alert_id)
+        for serial in serials or [network_node(network_id)]
+    ]
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def correlate(
+    signals: Sequence[Signal],
+    topology: Topology,
+    window: int = DEFAULT_WINDOW,
+    storm_networks: int = 3,
+    client_events: Iterable[Dict[str, Any]] = ()
+) -> List[Incident]:
+    """
+    Group signals into incidents, most severe and largest first.
+
+    Signals are swept in time order; each one is joined with the latest earlier
+    signal (within `window`) on its own device, on each upstream device, below
+    it, and on sibling devices sharing its parent.
+    """
+    signals = sorted(signals, key=lambda s: s.ts)
+    # Devices missing from the inventory are added below their network on a copy
+    topology = Topology(dict(topology.parents), topology.names, topology.networks)
+    groups = _UnionFind(len(signals))
+    # key -> (latest ts, signal index) per lookup: device itself, devices below an ancestor, siblings
+    by_node: Dict[str, Tuple[int, int]] = {}
+    by_ancestor: Dict[str, Tuple[int, int]] = {}
+    by_parent: Dict[str, Tuple[int, int]] = {}
+
+    def join(index: Dict[str, Tuple[int, int]], key: Optional[str], i: int, ts: int) -> None:
+        if key is None:
+            return
+        latest = index.get(key)
+        if latest is not None and ts - latest[0] <= window:
+            groups.union(latest[1], i)
+
+    for i, signal in enumerate(signals):
+        node = signal.node
+        if node not in topology.parents and not node.startswith('network:'):
+            topology.parents[node] = network_node(signal.network_id)
+        ancestors = topology.ancestors(node)
+        parent = topology.parent(node)
+        for key in [node] + ancestors:
+            join(by_node, key, i, signal.ts)
+        join(by_ancestor, node, i, signal.ts)
+        join(by_parent, parent, i, signal.ts)
+        by_node[node] = (signal.ts, i)
+        for ancestor in ancestors:
+            by_ancestor[ancestor] = (signal.ts, i)
+        if parent is not None:
+            by_parent[parent] = (signal.ts, i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(signals)):
+        clusters.setdefault(groups.find(i), []).append(i)
+    members = list(clusters.values())
+
+    # Storms: the same dominant kind in many networks at about the same time
+    if storm_networks and len(members) > 1:
+        merged = _UnionFind(len(members))
+        dominant = [Counter(signals[i].kind for i in group).most_common(1)[0][0] for group in members]
+        spans = [(min(signals[i].ts for i in group), max(signals[i].ts for i in group)) for group in members]
+        by_kind: Dict[str, List[int]] = {}
+        for g, kind in enumerate(dominant):
+            by_kind.setdefault(kind, []).append(g)
+        for kind, indexes in by_kind.items():
+            indexes.sort(key=lambda g: spans[g][0])
+            run = [indexes[0]]
+            reach = spans[indexes[0]][1]
+            for g in indexes[1:] + [None]:
+                if g is not None and spans[g][0] - reach <= window:
+                    run.append(g)
+                    reach = max(reach, spans[g][1])
+                    continue
+                networks = {signals[i].network_id for r in run for i in members[r]}
+                if len(networks) >= storm_networks:
+                    for r in run[1:]:
+                        merged.union(run[0], r)
+                if g is not None:
+                    run, reach = [g], spans[g][1]
+        combined: Dict[int, List[int]] = {}
+        for g, group in enumerate(members):
+            combined.setdefault(merged.find(g), []).extend(group)
+        storms = {root for root, groups_ in Counter(merged.find(g) for g in range(len(members))).items() if groups_ > 1}
+        members = list(combined.values())
+        storm_flags = [root in storms for root in combined]
+    else:
+        storm_flags = [False] * len(members)
+
+    impact: Dict[str, List[Tuple[int, str]]] = {}
+    for event in client_events:
+        client = next((str(event[f]) for f in CLIENT_FIELDS if event.get(f)), None)
+        if client:
+            node = event.get('deviceSerial') or network_node(event.get('networkId', ''))
+            impact.setdefault(node, []).append((event_time(event), client))
+
+    incidents = []
+    for group, storm in zip(members, storm_flags):
+        grouped = [signals[i] for i in sorted(group)]
+        # Root: the highest device involved, earliest first among equals
+        root = min(grouped, key=lambda s: (topology.depth(s.node), s.ts)).node
+        incident = Incident(signals=grouped, root=root, root_name=topology.name(root), storm=storm)
+        start, end = incident.start - window, incident.end + window
+        nodes = set(incident.nodes)
+        nodes |= {n for n in impact if set(topology.ancestors(n)) & nodes}
+        incident.client_impact = len({client for n in nodes for ts, client in impact.get(n, ()) if start <= ts <= end})
+        incidents.append(incident)
+
+    return sorted(incidents, key=lambda inc: (SEVERITY_ORDER.get(inc.severity, 3), -len(inc.signals), -inc.start))
+
+
+@dataclass
+class IncidentReport:
+    organization_id: str
+    since: int
+    incidents: List[Incident]
+    events: int = 0
+    alerts: int = 0
+    client_events: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def markdown(self, limit: int = 20) -> List[str]:
+        lines = [f"# 🚨 Incidents - Organization {self.organization_id}", ""]
+        lines.append(f"**Since**: {format_timestamp(self.since)} | **Signals**: {self.events} events, "
+                     f"{self.alerts} alerts ({self.client_events} client events) → **{len(self.incidents)} incidents**")
+        for source, error in self.errors.items():
+            lines.append(f"⚠️ {source}: {error}")
+        lines.append("")
+        if not self.incidents:
+            return lines + ["✅ No device or network events in the window"]
+
+        icons = {'critical': '🔴', 'warning': '🟠', 'info': '🔵'}
+        lines += ["| # | Severity | Incident | Start | Duration | Networks | Devices | Signals | Alerts | Clients |",
+                  "|---|---|---|---|---|---|---|---|---|---|"]
+        for n, incident in enumerate(self.incidents[:limit], 1):
+            minutes = (incident.end - incident.start) / 60
+            lines.append(f"| {n} | {icons.get(incident.severity, '')} {incident.severity} | {incident.title} | "
+                         f"{format_timestamp(incident.start)} | {minutes:.0f}m | {len(incident.networks)} | "
+                         f"{len(incident.nodes)} | {len(incident.signals)} | {incident.alerts} | "
+                         f"{incident.client_impact} |")
+        if len(self.incidents) > limit:
+            lines.append(f"\n... and {len(self.incidents) - limit} more incidents")
+
+        lines.append("")
+        for n, incident in enumerate(self.incidents[:min(limit, 5)], 1):
+            lines.append(f"## {n}. {incident.title}")
+            lines.append(f"- **Probable Root**: {incident.root_name}")
+            lines.append(f"- **Networks**: {', '.join(incident.networks[:10])}"
+                         + (f" (+{len(incident.networks) - 10})" if len(incident.networks) > 10 else ""))
+            lines.append(f"- **Signals**: " + ", ".join(f"{kind} ×{count}" for kind, count in incident.kinds[:6]))
+            for signal in incident.signals[:3]:
+                lines.append(f"  - {format_timestamp(signal.ts)} [{signal.source}] {signal.description}")
+            lines.append("")
+        return lines
+
+
+_topologies = TTLCache(MCP_CACHE_TTL)
+
+
+def organization_topology(meraki_client, organization_id: str) -> Topology:
+    """Inventory + LLDP/CDP topology of an organization (cached)."""
+    def load():
+        dashboard = meraki_client.dashboard
+        rate_scheduler.acquire(organization_id)
+        devices = dashboard.organizations.getOrganizationDevices(organization_id, perPage=1000, total_pages='all')
+        discovery = []
+        try:
+            rate_scheduler.acquire(organization_id)
+            response = dashboard.switch.getOrganizationSwitchPortsTopologyDiscoveryByDevice(
+                organization_id, perPage=20, total_pages='all'
+            )
+            discovery = response.get('items', []) if isinstance(response, dict) else response or []
+        except Exception:
+            pass  # Tier-based topology only
+        return build_topology(devices or [], discovery)
+    return _topologies.get_or_load(organization_id, load)
+
+
+def organization_incidents(
+    meraki_client,
+    organization_id: str,
+    log: EventLog,
+    network_ids: Sequence[str],
+    since: int,
+    window: int = DEFAULT_WINDOW,
+    storm_networks: int = 3,
+    include_alerts: bool = True
+) -> IncidentReport:
+    """Correlate the logged events of the given networks and the organization's assurance alerts since `since`."""
+    report = IncidentReport(organization_id=organization_id, since=since, incidents=[])
+    events = log.query(network_ids, since=since)
+    signals = []
+    clients = []
+    for event in events:
+        if _is_client_event(event):
+            clients.append(event)
+        else:
+            signals.append(event_signal(event))
+    report.events, report.client_events = len(signals), len(clients)
+
+    if include_alerts:
+        try:
+            rate_scheduler.acquire(organization_id)
+            alerts = meraki_client.dashboard.organizations.getOrganizationAssuranceAlerts(
+                organization_id, tsStart=format_timestamp(since), tsEnd=format_timestamp(time.time()),
+                perPage=300, total_pages='all'
+            )
+            wanted: Set[str] = set(network_ids)
+            alert_ids: Set[str] = set()
+            for alert in alerts or []:
+                for signal in alert_signals(alert):
+                    if not wanted or signal.network_id in wanted:
+                        signals.append(signal)
+                        alert_ids.add(signal.alert_id)
+            report.alerts = len(alert_ids)
+        except Exception as e:
+            report.errors['assurance alerts'] = str(e)
+
+    try:
+        topology = organization_topology(meraki_client, organization_id)
+    except Exception as e:
+        report.errors['topology'] = str(e)
+        topology = Topology()
+    report.incidents = correlate(signals, topology, window, storm_networks, clients)
+    return report
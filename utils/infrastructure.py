@@ -0,0 +1,214 @@
+"""
+Per-network infrastructure classification.
+
+Several tools need to know whether a network's WiFi comes from an MX with
+integrated wireless (appliance SSID API) or from MR access points (wireless SSID
+API). Instead of each tool calling getNetworkDevices and re-scanning model
+strings, the classification is computed once per network and cached.
+
+The cache is primed for free whenever a tool has already fetched device lists
+(getNetworkDevices / getOrganizationDevices) and invalidated by tools that
+claim or remove devices.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import MCP_CACHE_TTL
+from utils.cache import TTLCache
+
+# Model prefix to Dashboard product type
+MODEL_PRODUCT_TYPES = {
+    'MX': 'appliance',
+    'Z': 'appliance',
+    'MS': 'switch',
+    'MR': 'wireless',
+    'CW': 'wireless',
+    'MV': 'camera',
+    'MT': 'sensor',
+    'MG': 'cellularGateway',
+}
+
+
+def is_mx_wireless(model: str) -> bool:
+    """True for MX appliances with integrated WiFi (MX64W, MX67W, MX68CW, ...)."""
+    model = model or ''
+    return model.startswith('MX') and 'W' in model.upper()
+
+
+def model_product_type(model: str) -> Optional[str]:
+    """Map a device model to its Dashboard product type."""
+    model = (model or '').upper()
+    for prefix, product_type in MODEL_PRODUCT_TYPES.items():
+        if model.startswith(prefix):
+            return product_type
+    return None
+
+
+def _device_summary(device: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'model': device.get('model', ''),
+        'name': device.get('name') or device.get('serial', 'Unnamed'),
+        'serial': device.get('serial', ''),
+        'status': device.get('status', 'unknown')
+    }
+
+
+@dataclass
+class NetworkInfrastructure:
+    """Cached classification of the hardware in one network."""
+
+    network_id: str
+    product_types: List[str] = field(default_factory=list)
+    mx_wireless: List[Dict[str, Any]] = field(default_factory=list)
+    mr_devices: List[Dict[str, Any]] = field(default_factory=list)
+    other_devices: List[Dict[str, Any]] = field(default_factory=list)
+    appliance_models: List[str] = field(default_factory=list)
+    switch_count: int = 0
+    device_count: int = 0
+    refreshed_at: float = field(default_factory=time.time)
+
+    @property
+    def mr_count(self) -> int:
+        return len(self.mr_devices)
+
+    @property
+    def has_mx_wireless(self) -> bool:
+        return bool(self.mx_wireless)
+
+    @property
+    def has_switch(self) -> bool:
+        return self.switch_count > 0
+
+    @property
+    def has_appliance(self) -> bool:
+        return bool(self.appliance_models)
+
+    @property
+    def wifi_source(self) -> str:
+        """One of 'mx_integrated', 'mr_dedicated', 'mixed' or 'none'."""
+        if self.mx_wireless and self.mr_devices:
+            return 'mixed'
+        if self.mx_wireless:
+            return 'mx_integrated'
+        if self.mr_devices:
+            return 'mr_dedicated'
+        return 'none'
+
+    @property
+    def mx_wireless_only(self) -> bool:
+        """True when SSIDs must be read from the appliance API."""
+        return self.wifi_source == 'mx_integrated'
+
+
+def classify_devices(network_id: str, devices: Iterable[Dict[str, Any]]) -> NetworkInfrastructure:
+    """
+    Build a NetworkInfrastructure record from a device list.
+
+    Args:
+        network_id: Network the devices belong to
+        devices: Device dicts from getNetworkDevices or getOrganizationDevices
+
+    Returns:
+        Classification record
+    """
+    info = NetworkInfrastructure(network_id=network_id)
+    product_types = set()
+
+    for device in devices:
+        model = device.get('model', '') or ''
+        product_type = device.get('productType') or model_product_type(model)
+        if product_type:
+            product_types.add(product_type)
+
+        summary = _device_summary(device)
+        if is_mx_wireless(model):
+            info.mx_wireless.append(summary)
+        elif model.startswith('MR') or model.startswith('CW'):
+            info.mr_devices.append(summary)
+        else:
+            info.other_devices.append(summary)
+
+        if product_type == 'appliance':
+            info.appliance_models.append(model)
+        elif product_type == 'switch':
+            info.switch_count += 1
+        info.device_count += 1
+
+    info.product_types = sorted(product_types)
+    return info
+
+
+class InfrastructureCache:
+    """Cache of NetworkInfrastructure records keyed by network ID."""
+
+    def __init__(self, ttl: float = MCP_CACHE_TTL):
+        self._cache = TTLCache(ttl)
+
+    def get(self, meraki_client, network_id: str) -> NetworkInfrastructure:
+        """
+        Return the classification for a network, calling getNetworkDevices on a miss.
+
+        Args:
+            meraki_client: MerakiClient instance
+            network_id: Network ID
+        """
+        return self._cache.get_or_load(
+            network_id,
+            lambda: classify_devices(network_id, meraki_client.dashboard.networks.getNetworkDevices(network_id))
+        )
+
+    def peek(self, network_id: str) -> Optional[NetworkInfrastructure]:
+        """Return the cached record without fetching."""
+        return self._cache.get(network_id)
+
+    def update(self, network_id: str, devices: Iterable[Dict[str, Any]]) -> NetworkInfrastructure:
+        """Reclassify a network from a device list the caller already fetched."""
+        info = classify_devices(network_id, devices)
+        self._cache.set(network_id, info)
+        return info
+
+    def update_from_org_devices(self, devices: Iterable[Dict[str, Any]], network_ids: Iterable[str] = ()) -> None:
+        """
+        Prime the cache for every network in an organization device inventory.
+
+        Args:
+            devices: Devices from getOrganizationDevices (each carries networkId)
+            network_ids: Networks that should be recorded even if they have no devices
+        """
+        by_network: Dict[str, List[Dict[str, Any]]] = {network_id: [] for network_id in network_ids}
+        for device in devices:
+            network_id = device.get('networkId')
+            if network_id:
+                by_network.setdefault(network_id, []).append(device)
+        for network_id, network_devices in by_network.items():
+            self.update(network_id, network_devices)
+
+    def invalidate(self, network_id: str) -> None:
+        """Forget a network, e.g. after devices were claimed into or removed from it."""
+        self._cache.invalidate(network_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Shared by every SSID/wireless tool in the process
+infrastructure_cache = InfrastructureCache()
+
+
+def get_network_infrastructure(meraki_client, network_id: str) -> NetworkInfrastructure:
+    """Shortcut for infrastructure_cache.get()."""
+    return infrastructure_cache.get(meraki_client, network_id)
+
+
+def get_network_ssids(meraki_client, network_id: str) -> List[Dict[str, Any]]:
+    """
+    Fetch SSIDs from the API that matches the network's WiFi hardware.
+
+    MX integrated wireless only networks use getNetworkApplianceSsids, everything
+    else (dedicated or mixed) uses getNetworkWirelessSsids.
+    """
+    if get_network_infrastructure(meraki_client, network_id).mx_wireless_only:
+        return meraki_client.dashboard.appliance.getNetworkApplianceSsids(network_id)
+    return meraki_client.dashboard.wireless.getNetworkWirelessSsids(network_id)
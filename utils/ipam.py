@@ -0,0 +1,264 @@
+"""
+IP address management (IPAM) calculations for MX VLANs.
+
+Everything is computed with integer arithmetic on address ranges - host lists are
+never materialized, so a /8 costs the same as a /29. Inputs are plain Dashboard
+payloads: VLANs from getNetworkApplianceVlans (subnet, applianceIp,
+reservedIpRanges, fixedIpAssignments) and clients from getNetworkClients.
+"""
+
+import ipaddress
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Range = Tuple[int, int]
+
+
+def pool_bounds(network: ipaddress.IPv4Network) -> Range:
+    """
+    First and last assignable host address of a subnet, as integers.
+
+    Matches ipaddress.hosts(): network and broadcast are excluded except for
+    /31 and /32 point-to-point subnets.
+    """
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+    if network.num_addresses > 2:
+        return first + 1, last - 1
+    return first, last
+
+
+def merge_ranges(ranges: Iterable[Range]) -> List[Range]:
+    """Merge overlapping or adjacent inclusive ranges into a sorted, disjoint list."""
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def clip_ranges(ranges: Iterable[Range], low: int, high: int) -> List[Range]:
+    """Restrict ranges to [low, high], dropping those entirely outside."""
+    return [(max(start, low), min(end, high)) for start, end in ranges if end >= low and start <= high]
+
+
+def range_size(ranges: Iterable[Range]) -> int:
+    """Number of addresses covered by disjoint ranges."""
+    return sum(end - start + 1 for start, end in ranges)
+
+
+def first_gap(low: int, high: int, blocked: List[Range]) -> Optional[int]:
+    """
+    Lowest address in [low, high] not covered by the sorted, disjoint blocked ranges.
+
+    Returns:
+        Address as an integer, or None if the whole range is blocked
+    """
+    candidate = low
+    for start, end in blocked:
+        if start > candidate:
+            break
+        candidate = max(candidate, end + 1)
+        if candidate > high:
+            return None
+    return candidate if candidate <= high else None
+
+
+def parse_ip(value: Any) -> Optional[int]:
+    """Parse an IPv4 address to an integer, None if missing or invalid."""
+    if not value:
+        return None
+    try:
+        return int(ipaddress.IPv4Address(str(value).strip()))
+    except ValueError:
+        return None
+
+
+def format_ip(value: int) -> str:
+    return str(ipaddress.IPv4Address(value))
+
+
+@dataclass
+class SubnetUsage:
+    """Address usage of one VLAN subnet."""
+
+    vlan_id: str
+    name: str
+    subnet: str
+    appliance_ip: Optional[str] = None
+    usable_count: int = 0
+    pool_start: Optional[str] = None
+    pool_end: Optional[str] = None
+    pool_size: int = 0
+    excluded_count: int = 0
+    fixed_count: int = 0
+    used_count: int = 0
+    free_count: int = 0
+    next_free: Optional[str] = None
+    conflicts: List[str] = field(default_factory=list)
+
+    @property
+    def utilization(self) -> float:
+        """Percentage of the DHCP pool in use."""
+        return (self.used_count / self.pool_size * 100) if self.pool_size else 0.0
+
+
+def _reserved_ranges(vlan: Dict[str, Any], usage: SubnetUsage) -> List[Range]:
+    ranges = []
+    for reserved in vlan.get('reservedIpRanges') or []:
+        start, end = parse_ip(reserved.get('start')), parse_ip(reserved.get('end'))
+        if start is None or end is None or end < start:
+            usage.conflicts.append(
+                f"Invalid reserved range {reserved.get('start')} - {reserved.get('end')}"
+            )
+            continue
+        ranges.append((start, end))
+
+    ordered = sorted(ranges)
+    for (_, prev_end), (start, end) in zip(ordered, ordered[1:]):
+        if start <= prev_end:
+            usage.conflicts.append(
+                f"Reserved ranges overlap at {format_ip(start)} - {format_ip(min(prev_end, end))}"
+            )
+    return ranges
+
+
+def analyze_vlan(vlan: Dict[str, Any], clients: Iterable[Dict[str, Any]] = ()) -> SubnetUsage:
+    """
+    Compute pool range, usage, free space and conflicts for one VLAN.
+
+    Args:
+        vlan: VLAN dict from getNetworkApplianceVlans
+        clients: Clients from getNetworkClients (any VLAN; filtered by subnet)
+
+    Returns:
+        SubnetUsage record
+    """
+    usage = SubnetUsage(
+        vlan_id=str(vlan.get('id', '')),
+        name=vlan.get('name', ''),
+        subnet=vlan.get('subnet') or '',
+        appliance_ip=vlan.get('applianceIp')
+    )
+
+    try:
+        network = ipaddress.IPv4Network(usage.subnet, strict=False)
+    except ValueError:
+        usage.conflicts.append(f"Invalid or missing subnet '{usage.subnet}'")
+        return usage
+
+    low, high = pool_bounds(network)
+    usage.usable_count = high - low + 1
+    subnet_start, subnet_end = int(network.network_address), int(network.broadcast_address)
+
+    # Addresses DHCP will never hand out: the MX itself and reserved ranges
+    excluded = merge_ranges(clip_ranges(_reserved_ranges(vlan, usage), low, high))
+    appliance = parse_ip(usage.appliance_ip)
+    if appliance is not None:
+        if subnet_start <= appliance <= subnet_end:
+            excluded = merge_ranges(excluded + clip_ranges([(appliance, appliance)], low, high))
+        else:
+            usage.conflicts.append(f"MX IP {usage.appliance_ip} is outside subnet {usage.subnet}")
+
+    usage.excluded_count = range_size(excluded)
+    usage.pool_size = usage.usable_count - usage.excluded_count
+    pool_gap = first_gap(low, high, excluded)
+    if pool_gap is not None:
+        usage.pool_start = format_ip(pool_gap)
+        # Highest non-excluded address: walk excluded ranges from the top
+        last = high
+        for start, end in reversed(excluded):
+            if end >= last >= start:
+                last = start - 1
+        usage.pool_end = format_ip(last)
+
+    # Fixed assignments (DHCP reservations)
+    used: Dict[int, str] = {}
+    fixed_by_ip: Dict[int, str] = {}
+    for mac, assignment in (vlan.get('fixedIpAssignments') or {}).items():
+        ip = parse_ip(assignment.get('ip'))
+        label = assignment.get('name') or mac
+        if ip is None:
+            usage.conflicts.append(f"Reservation {label} ({mac}) has an invalid IP '{assignment.get('ip')}'")
+            continue
+        if not subnet_start <= ip <= subnet_end:
+            usage.conflicts.append(f"Reservation {label} ({mac}) IP {format_ip(ip)} is outside subnet {usage.subnet}")
+            continue
+        if ip == appliance:
+            usage.conflicts.append(f"Reservation {label} ({mac}) uses the MX IP {format_ip(ip)}")
+        elif any(start <= ip <= end for start, end in excluded):
+            usage.conflicts.append(f"Reservation {label} ({mac}) IP {format_ip(ip)} is inside a reserved range")
+        if ip in fixed_by_ip and fixed_by_ip[ip] != mac.lower():
+            usage.conflicts.append(f"IP {format_ip(ip)} is reserved for both {fixed_by_ip[ip]} and {mac.lower()}")
+        fixed_by_ip[ip] = mac.lower()
+        used[ip] = mac.lower()
+    usage.fixed_count = len(fixed_by_ip)
+
+    # Clients inside this subnet. Every client seen in the lookback counts as using
+    # its address; conflicts are only reported between clients that are online now,
+    # since offline clients may simply have had their lease reassigned.
+    online_by_ip: Dict[int, str] = {}
+    for client in clients:
+        ip = parse_ip(client.get('ip'))
+        if ip is None or not subnet_start <= ip <= subnet_end:
+            continue
+        mac = (client.get('mac') or '').lower()
+        used.setdefault(ip, mac)
+        if (client.get('status') or 'online').lower() != 'online':
+            continue
+        if ip == appliance:
+            usage.conflicts.append(f"Client {mac} is using the MX IP {format_ip(ip)}")
+        elif ip in fixed_by_ip and fixed_by_ip[ip] != mac:
+            usage.conflicts.append(f"Client {mac} holds {format_ip(ip)}, reserved for {fixed_by_ip[ip]}")
+        elif ip in online_by_ip and online_by_ip[ip] != mac:
+            usage.conflicts.append(f"Duplicate IP {format_ip(ip)} on {online_by_ip[ip]} and {mac}")
+        online_by_ip.setdefault(ip, mac)
+
+    in_pool = sorted(ip for ip in used if low <= ip <= high and not any(s <= ip <= e for s, e in excluded))
+    usage.used_count = len(in_pool)
+    usage.free_count = max(0, usage.pool_size - usage.used_count)
+
+    blocked = merge_ranges(excluded + [(ip, ip) for ip in in_pool])
+    next_free = first_gap(low, high, blocked)
+    usage.next_free = format_ip(next_free) if next_free is not None else None
+    return usage
+
+
+def find_subnet_overlaps(vlans: Iterable[Dict[str, Any]]) -> List[str]:
+    """Report VLAN subnets that overlap each other."""
+    spans = []
+    for vlan in vlans:
+        try:
+            network = ipaddress.IPv4Network(vlan.get('subnet') or '', strict=False)
+        except ValueError:
+            continue
+        spans.append((int(network.network_address), int(network.broadcast_address), str(vlan.get('id')), str(network)))
+
+    overlaps = []
+    spans.sort()
+    for i, (start, end, vlan_id, subnet) in enumerate(spans):
+        for other_start, other_end, other_id, other_subnet in spans[i + 1:]:
+            if other_start > end:
+                break
+            overlaps.append(f"VLAN {vlan_id} ({subnet}) overlaps VLAN {other_id} ({other_subnet})")
+    return overlaps
+
+
+def analyze_network(vlans: List[Dict[str, Any]], clients: List[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    """
+    Run IPAM analysis for every VLAN of a network.
+
+    Returns:
+        {'vlans': [SubnetUsage, ...], 'overlaps': [...], 'conflict_count': int}
+    """
+    clients = list(clients)
+    results = [analyze_vlan(vlan, clients) for vlan in vlans]
+    overlaps = find_subnet_overlaps(vlans)
+    return {
+        'vlans': results,
+        'overlaps': overlaps,
+        'conflict_count': sum(len(r.conflicts) for r in results) + len(overlaps)
+    }
@@ -0,0 +1,202 @@
+"""
+Organization-scope network health.
+
+check_network_health works one network at a time and pulls org-wide endpoints
+(uplink statuses) only to filter them down to that network, so checking every
+network of an organization repeated the same org fetch N times. This module
+issues each organization-level endpoint once:
+
+    networks        getOrganizationNetworks
+    devices         getOrganizationDevicesStatuses
+    uplinks         getOrganizationApplianceUplinkStatuses
+    alerts          getOrganizationAssuranceAlerts
+
+and joins the results locally by networkId into one NetworkHealth per network.
+"""
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.rate_limit import rate_scheduler
+
+# Source name -> (SDK section, method)
+ORG_HEALTH_SOURCES = {
+    'networks': ('organizations', 'getOrganizationNetworks'),
+    'devices': ('organizations', 'getOrganizationDevicesStatuses'),
+    'uplinks': ('appliance', 'getOrganizationApplianceUplinkStatuses'),
+    'alerts': ('organizations', 'getOrganizationAssuranceAlerts'),
+}
+
+STATUS_ORDER = {'critical': 0, 'degraded': 1, 'healthy': 2}
+
+
+def _alert_network_id(alert: Dict[str, Any]) -> Optional[str]:
+    network = alert.get('network')
+    if isinstance(network, dict) and network.get('id'):
+        return network['id']
+    return alert.get('networkId')
+
+
+@dataclass
+class NetworkHealth:
+    """Health of one network, joined from the organization-level endpoints."""
+
+    network_id: str
+    name: str
+    product_types: List[str] = field(default_factory=list)
+    devices: List[Dict[str, Any]] = field(default_factory=list)
+    uplinks: List[Dict[str, Any]] = field(default_factory=list)
+    alerts: List[Dict[str, Any]] = field(default_factory=list)
+
+    def devices_with_status(self, status: str) -> List[Dict[str, Any]]:
+        return [d for d in self.devices if d.get('status') == status]
+
+    @property
+    def online_count(self) -> int:
+        return len(self.devices_with_status('online'))
+
+    @property
+    def interfaces(self) -> List[Dict[str, Any]]:
+        """Uplink interfaces of every appliance in the network, tagged with the appliance serial."""
+        return [
+            {**interface, 'serial': appliance.get('serial')}
+            for appliance in self.uplinks for interface in appliance.get('uplinks', [])
+        ]
+
+    @property
+    def failed_uplinks(self) -> List[Dict[str, Any]]:
+        return [i for i in self.interfaces if i.get('status') == 'failed']
+
+    def alerts_with_severity(self, severity: str) -> List[Dict[str, Any]]:
+        return [a for a in self.alerts if a.get('severity') == severity]
+
+    @property
+    def issues(self) -> List[str]:
+        """One line per problem, most severe first."""
+        issues = []
+        offline = self.devices_with_status('offline')
+        if offline:
+            issues.append(f"{len(offline)}/{len(self.devices)} devices offline")
+        alerting = self.devices_with_status('alerting')
+        if alerting:
+            issues.append(f"{len(alerting)} devices alerting")
+        if self.failed_uplinks:
+            issues.append(', '.join(f"{i.get('interface', 'uplink')} failed" for i in self.failed_uplinks))
+        for severity in ('critical', 'warning'):
+            alerts = self.alerts_with_severity(severity)
+            if alerts:
+                issues.append(f"{len(alerts)} {severity} alerts")
+        return issues
+
+    @property
+    def status(self) -> str:
+        """'critical', 'degraded' or 'healthy'."""
+        interfaces = self.interfaces
+        all_offline = bool(self.devices) and len(self.devices_with_status('offline')) == len(self.devices)
+        no_uplink = bool(interfaces) and not any(i.get('status') == 'active' for i in interfaces)
+        if all_offline or no_uplink or self.alerts_with_severity('critical'):
+            return 'critical'
+        if self.issues:
+            return 'degraded'
+        return 'healthy'
+
+
+@dataclass
+class OrgHealth:
+    """Health of every network of an organization."""
+
+    organization_id: str
+    networks: List[NetworkHealth] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    api_calls: int = 0
+    duration: float = 0.0
+
+    def ranked(self) -> List[NetworkHealth]:
+        """Worst networks first."""
+        return sorted(self.networks, key=lambda n: (STATUS_ORDER[n.status], -len(n.issues), n.name))
+
+    def status_counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in STATUS_ORDER}
+        for network in self.networks:
+            counts[network.status] += 1
+        return counts
+
+
+def _group_by_network(items: Iterable[Dict[str, Any]], key=lambda item: item.get('networkId')) -> Dict[str, List]:
+    grouped = defaultdict(list)
+    for item in items or []:
+        network_id = key(item)
+        if network_id:
+            grouped[network_id].append(item)
+    return grouped
+
+
+def check_org_health(
+    meraki_client,
+    organization_id: str,
+    network_ids: Optional[Iterable[str]] = None,
+    sources: Iterable[str] = tuple(ORG_HEALTH_SOURCES)
+) -> OrgHealth:
+    """
+    Fetch each organization-level health endpoint once and join per network.
+
+    Args:
+        meraki_client: MerakiClient instance
+        organization_id: Organization to check
+        network_ids: Restrict the report to these networks (default: all)
+        sources: Endpoints to fetch (see ORG_HEALTH_SOURCES); 'networks' is always fetched
+
+    Returns:
+        OrgHealth with one NetworkHealth per network. A failing source is recorded
+        in errors and the others are still joined.
+    """
+    started = time.time()
+    health = OrgHealth(organization_id=organization_id)
+    wanted = set(sources) | {'networks'}
+
+    def fetch(source: str):
+        section, method = ORG_HEALTH_SOURCES[source]
+        rate_scheduler.acquire(organization_id)
+        try:
+            return source, getattr(getattr(meraki_client.dashboard, section), method)(
+                organization_id, total_pages='all'
+            ), None
+        except Exception as e:
+            return source, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=len(wanted)) as executor:
+        results = list(executor.map(fetch, [s for s in ORG_HEALTH_SOURCES if s in wanted]))
+
+    data: Dict[str, Any] = {}
+    for source, value, error in results:
+        health.api_calls += 1
+        if error is not None:
+            health.errors[source] = error
+        data[source] = value or []
+
+    if 'networks' in health.errors:
+        raise Exception(f"Unable to list networks: {health.errors['networks']}")
+
+    devices = _group_by_network(data.get('devices'))
+    uplinks = _group_by_network(data.get('uplinks'))
+    alerts = _group_by_network(data.get('alerts'), key=_alert_network_id)
+
+    selected = set(network_ids) if network_ids else None
+    for network in data['networks']:
+        network_id = network.get('id')
+        if selected is not None and network_id not in selected:
+            continue
+        health.networks.append(NetworkHealth(
+            network_id=network_id,
+            name=network.get('name', network_id),
+            product_types=network.get('productTypes', []),
+            devices=devices.get(network_id, []),
+            uplinks=uplinks.get(network_id, []),
+            alerts=alerts.get(network_id, []),
+        ))
+
+    health.duration = time.time() - started
+    return health
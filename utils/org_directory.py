@@ -0,0 +1,243 @@
+"""
+Cached directory of the organizations the API key can see.
+
+Cross-org tools used to call getOrganizations on every run and then pay a failed
+request for each organization with API access disabled or no permissions. The
+directory keeps one record per organization with:
+
+    api_enabled     From getOrganizations (org['api']['enabled'])
+    accessible      None until probed, then False once a request was refused (401/403/404
+                    or API disabled; timeouts, 429s and 5xx errors leave it unchanged)
+    product_types   Union of network productTypes, filled lazily per org
+    refreshed_at    When the organization list was last fetched
+
+Enrichment is lazy: product types are only looked up (one getOrganizationNetworks
+call) for organizations a caller actually filters on.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import meraki
+
+from config import MCP_CACHE_TTL
+from utils.infrastructure import infrastructure_cache, model_product_type
+
+
+# Responses that mean the org refuses this API key, as opposed to transient failures
+ACCESS_DENIED_STATUSES = (401, 403, 404)
+
+
+def is_access_error(error: Any) -> bool:
+    """True when an API error means the organization refuses requests (not a timeout, 429 or 5xx)."""
+    if not isinstance(error, meraki.APIError):
+        return False
+    if error.status in ACCESS_DENIED_STATUSES:
+        return True
+    message = str(error.message or '').lower()
+    return 'api' in message and ('disabled' in message or 'not enabled' in message)
+
+
+@dataclass
+class OrgRecord:
+    """Everything the directory knows about one organization."""
+
+    id: str
+    name: str
+    url: str = ''
+    api_enabled: bool = True
+    accessible: Optional[bool] = None
+    product_types: Optional[List[str]] = None
+    network_count: Optional[int] = None
+    last_error: Optional[str] = None
+    enriched_at: Optional[float] = None
+
+    @property
+    def usable(self) -> bool:
+        """False when requests to this org are known to fail."""
+        return self.api_enabled and self.accessible is not False
+
+    def has_product(self, product_type: str) -> bool:
+        """True if the org has the product type, or it is not known yet."""
+        return self.product_types is None or product_type in self.product_types
+
+
+class OrgDirectory:
+    """Organization list plus per-org access and product-type metadata."""
+
+    def __init__(self, ttl: float = MCP_CACHE_TTL):
+        """
+        Args:
+            ttl: Seconds before the organization list and enrichment are re-fetched
+        """
+        self.ttl = ttl
+        self._records: Dict[str, OrgRecord] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+    @property
+    def refreshed_at(self) -> Optional[float]:
+        return self._refreshed_at
+
+    def _expired(self, timestamp: Optional[float]) -> bool:
+        return timestamp is None or time.time() - timestamp > self.ttl
+
+    def refresh(self, meraki_client) -> List[OrgRecord]:
+        """Re-fetch the organization list, keeping enrichment of orgs that still exist."""
+        orgs = meraki_client.dashboard.organizations.getOrganizations()
+        with self._lock:
+            records = {}
+            for org in orgs:
+                org_id = str(org['id'])
+                record = self._records.get(org_id) or OrgRecord(id=org_id, name=org.get('name', 'Unknown'))
+                record.name = org.get('name', record.name)
+                record.url = org.get('url', '')
+                record.api_enabled = (org.get('api') or {}).get('enabled', True)
+                records[org_id] = record
+            self._records = records
+            self._refreshed_at = time.time()
+            return list(records.values())
+
+    def organizations(self, meraki_client, refresh: bool = False) -> List[OrgRecord]:
+        """Every organization, fetching the list if it is missing or stale."""
+        with self._lock:
+            if refresh or self._expired(self._refreshed_at):
+                return self.refresh(meraki_client)
+            return list(self._records.values())
+
+    def get(self, meraki_client, org_id: str) -> Optional[OrgRecord]:
+        """Record for one organization, or None if the key cannot see it."""
+        org_id = str(org_id)
+        for record in self.organizations(meraki_client):
+            if record.id == org_id:
+                return record
+        return None
+
+    def enrich(self, meraki_client, record: OrgRecord, force: bool = False) -> OrgRecord:
+        """
+        Fill product types and network count with one getOrganizationNetworks call.
+
+        A refused request marks the org inaccessible so later searches skip it;
+        other failures are kept in last_error only.
+        """
+        if not record.api_enabled:
+            record.accessible = False
+            return record
+        if not force and not self._expired(record.enriched_at):
+            return record
+        try:
+            networks = meraki_client.dashboard.organizations.getOrganizationNetworks(
+                record.id, perPage=1000, total_pages='all'
+            )
+        except Exception as e:
+            self.record_error(record.id, e)
+            return record
+        self.record_networks(record.id, networks)
+        return record
+
+    def record_networks(self, org_id: str, networks: Iterable[Dict[str, Any]]) -> None:
+        """Update product types from a network list the caller already fetched."""
+        networks = list(networks)
+        product_types = set()
+        for network in networks:
+            product_types.update(network.get('productTypes') or [])
+        with self._lock:
+            record = self._records.get(str(org_id))
+            if record is None:
+                return
+            record.product_types = sorted(product_types)
+            record.network_count = len(networks)
+            record.accessible = True
+            record.last_error = None
+            record.enriched_at = time.time()
+
+    def record_devices(self, org_id: str, devices: Iterable[Dict[str, Any]]) -> None:
+        """
+        Note a successful inventory fetch.
+
+        Marks the org accessible, adds product types seen in the inventory and primes
+        the infrastructure cache for its networks.
+        """
+        devices = list(devices)
+        product_types = {device.get('productType') or model_product_type(device.get('model')) for device in devices}
+        product_types.discard(None)
+        with self._lock:
+            record = self._records.get(str(org_id))
+            if record is not None:
+                record.accessible = True
+                record.last_error = None
+                if record.product_types is not None:
+                    record.product_types = sorted(set(record.product_types) | product_types)
+        infrastructure_cache.update_from_org_devices(devices)
+
+    def mark_inaccessible(self, org_id: str, error: Any = None) -> None:
+        """Remember that requests to an org fail (403, API disabled, ...)."""
+        with self._lock:
+            record = self._records.get(str(org_id))
+            if record is not None:
+                record.accessible = False
+                record.last_error = str(error) if error is not None else None
+                record.enriched_at = time.time()
+
+    def record_error(self, org_id: str, error: Any) -> bool:
+        """
+        Note a failed request to an org.
+
+        Only access errors (see is_access_error) mark the org inaccessible; anything
+        else is kept in last_error and the org stays a candidate.
+
+        Returns:
+            True if the org was marked inaccessible
+        """
+        if is_access_error(error):
+            self.mark_inaccessible(org_id, error)
+            return True
+        with self._lock:
+            record = self._records.get(str(org_id))
+            if record is not None:
+                record.last_error = str(error)
+        return False
+
+    def candidates(self, meraki_client, product_type: Optional[str] = None, refresh: bool = False) -> List[OrgRecord]:
+        """
+        Organizations worth querying.
+
+        Skips orgs with API access disabled or known to refuse requests. With a
+        product type, orgs are enriched on first use and skipped if they have no
+        network of that type.
+
+        Args:
+            meraki_client: MerakiClient instance
+            product_type: Dashboard product type (e.g. 'wireless', 'switch') or None
+            refresh: Re-fetch the organization list and forget access failures
+        """
+        records = self.organizations(meraki_client, refresh=refresh)
+        if refresh:
+            for record in records:
+                record.accessible = None
+                record.enriched_at = None
+
+        result = []
+        for record in records:
+            if record.accessible is False and self._expired(record.enriched_at):
+                # Access may have been granted since; probe again
+                record.accessible = None
+            if not record.usable:
+                continue
+            if product_type:
+                self.enrich(meraki_client, record)
+                if not record.usable or not record.has_product(product_type):
+                    continue
+            result.append(record)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records = {}
+            self._refreshed_at = None
+
+
+# Shared by every cross-organization tool in the process
+org_directory = OrgDirectory()
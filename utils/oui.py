@@ -0,0 +1,242 @@
+"""
+Offline MAC OUI vendor database.
+
+The Dashboard only reports a ``manufacturer`` for clients it has fingerprinted,
+so randomized and newly seen MACs come back without a vendor. This module ships
+a compact copy of the IEEE MA-L registry (``data/oui.bin``) and resolves vendors
+locally without any API calls.
+
+File layout (all integers little-endian):
+
+    header        b"MOUI", uint32 version, uint32 entry count N, uint32 name count M
+    prefixes      N x uint32   24-bit OUIs, sorted ascending
+    name_index    N x uint16   index into the vendor name table
+    name_offsets  (M + 1) x uint32 byte offsets into the name blob
+    names         UTF-8 vendor names, concatenated
+
+The file is memory-mapped, so the table costs no heap memory until pages are
+touched, and batches are resolved with a single ``searchsorted`` call.
+"""
+
+import os
+import struct
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+OUI_MAGIC = b"MOUI"
+OUI_VERSION = 1
+OUI_HEADER = struct.Struct("<4sIII")
+
+DEFAULT_OUI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "oui.bin")
+
+# Hex digit value for every byte, -1 for anything that is not a hex digit
+_HEX_VALUES = np.full(256, -1, dtype=np.int16)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _HEX_VALUES[_c] = _i
+for _i, _c in enumerate(b"ABCDEF"):
+    _HEX_VALUES[_c] = 10 + _i
+
+
+def normalize_mac(mac: str) -> Optional[str]:
+    """
+    Normalize a MAC address to lowercase colon-separated form.
+
+    Args:
+        mac: MAC in any common notation (aa:bb:.., aa-bb-.., aabb.ccdd.eeff, aabbccddeeff)
+
+    Returns:
+        Normalized MAC (e.g. "aa:bb:cc:dd:ee:ff") or None if the value is not a MAC
+    """
+    if not mac or not isinstance(mac, str):
+        return None
+    digits = "".join(ch for ch in mac.lower() if ch not in ":-. ")
+    if len(digits) != 12 or any(ch not in "0123456789abcdef" for ch in digits):
+        return None
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def mac_to_oui(mac: str) -> Optional[int]:
+    """Return the 24-bit OUI of a MAC address as an integer, or None if invalid."""
+    normalized = normalize_mac(mac)
+    if normalized is None:
+        return None
+    return int(normalized[:8].replace(":", ""), 16)
+
+
+def is_locally_administered(mac: str) -> bool:
+    """
+    Check whether a MAC has the locally administered bit set.
+
+    Phones and laptops set this bit when they use private (randomized) MACs,
+    so these addresses never appear in the IEEE registry.
+    """
+    oui = mac_to_oui(mac)
+    return oui is not None and bool((oui >> 16) & 0x02)
+
+
+def _parse_ouis(macs: List[str]) -> np.ndarray:
+    """
+    Parse MAC strings to 24-bit OUIs in one vectorized pass.
+
+    Canonical "aa:bb:cc:dd:ee:ff" strings (what the Dashboard returns) are decoded
+    with NumPy; anything else goes through normalize_mac(). Invalid entries are -1.
+    """
+    count = len(macs)
+    ouis = np.full(count, -1, dtype=np.int64)
+    if count == 0:
+        return ouis
+
+    canonical = np.fromiter(
+        (isinstance(m, str) and len(m) == 17 and m.isascii() and m[2] == ":" and m[5] == ":" for m in macs),
+        dtype=bool,
+        count=count
+    )
+
+    if canonical.any():
+        positions = np.flatnonzero(canonical)
+        raw = np.array([macs[i] for i in positions], dtype="S17").view(np.uint8).reshape(-1, 17)
+        nibbles = _HEX_VALUES[raw[:, [0, 1, 3, 4, 6, 7]]].astype(np.int64)
+        valid = (nibbles >= 0).all(axis=1)
+        values = (
+            (nibbles[:, 0] << 20) | (nibbles[:, 1] << 16) | (nibbles[:, 2] << 12) |
+            (nibbles[:, 3] << 8) | (nibbles[:, 4] << 4) | nibbles[:, 5]
+        )
+        ouis[positions[valid]] = values[valid]
+
+    for i in np.flatnonzero(~canonical):
+        oui = mac_to_oui(macs[i]) if isinstance(macs[i], str) else None
+        if oui is not None:
+            ouis[i] = oui
+
+    return ouis
+
+
+class OUIDatabase:
+    """Memory-mapped, sorted OUI table with scalar and batched vendor lookups."""
+
+    def __init__(self, path: str = DEFAULT_OUI_PATH):
+        """
+        Open an OUI database file.
+
+        Args:
+            path: Path to an oui.bin file built by scripts/build_oui_database.py
+        """
+        self.path = path
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, count, name_count = OUI_HEADER.unpack(bytes(buffer[:OUI_HEADER.size]))
+        if magic != OUI_MAGIC or version != OUI_VERSION:
+            raise ValueError(f"{path} is not a version {OUI_VERSION} OUI database")
+
+        offset = OUI_HEADER.size
+        self._prefixes = np.frombuffer(buffer, dtype="<u4", count=count, offset=offset)
+        offset += 4 * count
+        self._name_index = np.frombuffer(buffer, dtype="<u2", count=count, offset=offset)
+        offset += 2 * count
+        self._name_offsets = np.frombuffer(buffer, dtype="<u4", count=name_count + 1, offset=offset)
+        offset += 4 * (name_count + 1)
+        self._names = buffer[offset:]
+        self._name_cache: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def _name(self, index: int) -> str:
+        name = self._name_cache.get(index)
+        if name is None:
+            start, end = self._name_offsets[index], self._name_offsets[index + 1]
+            name = bytes(self._names[start:end]).decode("utf-8")
+            self._name_cache[index] = name
+        return name
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """
+        Look up the registered vendor for a single MAC address.
+
+        Returns:
+            Vendor name, or None for unknown, invalid or locally administered MACs
+        """
+        return self.lookup_many([mac])[0]
+
+    def lookup_many(self, macs: List[str]) -> List[Optional[str]]:
+        """
+        Look up vendors for many MAC addresses at once.
+
+        Args:
+            macs: MAC address strings (any notation, invalid entries allowed)
+
+        Returns:
+            Vendor names in the same order as the input, None where unknown
+        """
+        return self._lookup_ouis(_parse_ouis(list(macs)))
+
+    def _lookup_ouis(self, ouis: np.ndarray) -> List[Optional[str]]:
+        """Resolve parsed OUIs (-1 for invalid) to vendor names."""
+        if len(self._prefixes) == 0:
+            return [None] * len(ouis)
+        positions = np.searchsorted(self._prefixes, np.clip(ouis, 0, None))
+        positions = np.minimum(positions, len(self._prefixes) - 1)
+        found = (ouis >= 0) & (self._prefixes[positions] == ouis)
+
+        vendors = np.full(len(ouis), None, dtype=object)
+        hits = np.flatnonzero(found)
+        if len(hits):
+            # Decode each distinct vendor once, then scatter names back to every hit
+            unique, inverse = np.unique(self._name_index[positions[hits]], return_inverse=True)
+            names = np.array([self._name(int(index)) for index in unique], dtype=object)
+            vendors[hits] = names[inverse]
+        return vendors.tolist()
+
+
+_database: Optional[OUIDatabase] = None
+_database_lock = threading.Lock()
+
+
+def get_oui_database() -> OUIDatabase:
+    """Return the shared OUI database, opening the bundled table on first use."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = OUIDatabase(os.getenv("MCP_OUI_DATABASE", DEFAULT_OUI_PATH))
+    return _database
+
+
+def enrich_clients(clients: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add offline vendor data to Dashboard client records in place.
+
+    Each client gets two extra keys:
+        ouiVendor: IEEE-registered vendor for the MAC (None if unregistered)
+        randomizedMac: True if the MAC is locally administered (private address)
+
+    The Dashboard ``manufacturer`` field is left untouched; callers should prefer it
+    and fall back to ``ouiVendor``.
+
+    Args:
+        clients: Client dicts as returned by getNetworkClients / getDeviceClients
+
+    Returns:
+        The same client dicts as a list
+    """
+    clients = list(clients)
+    ouis = _parse_ouis([client.get("mac") for client in clients])
+    vendors = get_oui_database()._lookup_ouis(ouis)
+    randomized = (ouis >= 0) & (((ouis >> 16) & 0x02) != 0)
+
+    for client, vendor, is_random in zip(clients, vendors, randomized.tolist()):
+        client["ouiVendor"] = vendor
+        client["randomizedMac"] = is_random
+    return clients
+
+
+def client_vendor(client: Dict[str, Any]) -> str:
+    """Best available vendor label for an (enriched) client record."""
+    if client.get("manufacturer"):
+        return client["manufacturer"]
+    if client.get("ouiVendor"):
+        return client["ouiVendor"]
+    if client.get("randomizedMac"):
+        return "Randomized MAC"
+    return "Unknown"
@@ -0,0 +1,346 @@
+"""
+Client-to-port attribution index.
+
+Answers "which clients are behind this switch/MX port" and "which port is this
+client on" from a single pass over a network's data instead of re-filtering the
+whole client list for every port. Three sources are combined, most precise first:
+
+    mac_table   Live MAC forwarding table of a device (createDeviceLiveToolsMacTable)
+    switchport  getNetworkClients recentDeviceSerial + switchport
+    lldp/cdp    getDeviceLldpCdp neighbours (switches, APs, phones on a port)
+
+MX appliance ports have no switchport attribution, so without a MAC table the
+index falls back to VLAN membership, grouped once by VLAN rather than per port.
+Indexes are cached per network.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from config import MCP_AUDIT_CONCURRENCY, MCP_CACHE_TTL
+from utils.cache import TTLCache
+from utils.infrastructure import get_network_infrastructure, model_product_type
+from utils.oui import normalize_mac
+from utils.rate_limit import rate_scheduler
+
+PortKey = Tuple[str, str]
+
+# Live tools jobs normally finish in a few seconds
+MAC_TABLE_POLL_INTERVAL = 1.0
+MAC_TABLE_POLL_ATTEMPTS = 10
+
+
+def parse_vlan_list(value: Any) -> Optional[Set[str]]:
+    """
+    Parse an allowedVlans string ("1,3,10-12") into a set of VLAN IDs.
+
+    Returns:
+        Set of VLAN IDs as strings, or None for "all" / empty (no restriction)
+    """
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if not text or text == 'all':
+        return None
+
+    vlans: Set[str] = set()
+    for part in text.split(','):
+        part = part.strip()
+        if '-' in part:
+            start, _, end = part.partition('-')
+            try:
+                vlans.update(str(v) for v in range(int(start), int(end) + 1))
+            except ValueError:
+                continue
+        elif part:
+            vlans.add(part)
+    return vlans
+
+
+def _neighbor_summary(port_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the lldp/cdp blocks of one getDeviceLldpCdp port entry."""
+    lldp = port_info.get('lldp') or {}
+    cdp = port_info.get('cdp') or {}
+    return {
+        'protocol': 'lldp' if lldp else 'cdp',
+        'system_name': lldp.get('systemName') or cdp.get('deviceId') or '',
+        'port_id': lldp.get('portId') or cdp.get('portId') or '',
+        'address': lldp.get('managementAddress') or cdp.get('address') or '',
+        'platform': cdp.get('platform') or lldp.get('systemDescription') or ''
+    }
+
+
+@dataclass
+class PortIndex:
+    """Clients and neighbours attributed to (device serial, port) pairs in one network."""
+
+    network_id: str
+    clients_by_port: Dict[PortKey, List[Dict[str, Any]]] = field(default_factory=dict)
+    attribution: Dict[PortKey, str] = field(default_factory=dict)
+    clients_by_vlan: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    neighbors: Dict[PortKey, Dict[str, Any]] = field(default_factory=dict)
+    port_by_mac: Dict[str, PortKey] = field(default_factory=dict)
+    client_by_mac: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    sources: List[str] = field(default_factory=list)
+    client_count: int = 0
+    built_at: float = field(default_factory=time.time)
+
+    def clients_on_port(self, serial: str, port: Any) -> List[Dict[str, Any]]:
+        """Clients attributed directly to a device port (MAC table or switchport)."""
+        return self.clients_by_port.get((serial, str(port)), [])
+
+    def clients_on_vlans(self, vlans: Iterable[str]) -> List[Dict[str, Any]]:
+        """Clients seen on any of the given VLAN IDs."""
+        result: List[Dict[str, Any]] = []
+        for vlan in vlans:
+            result.extend(self.clients_by_vlan.get(str(vlan), []))
+        return result
+
+    def neighbor(self, serial: str, port: Any) -> Optional[Dict[str, Any]]:
+        """LLDP/CDP neighbour seen on a device port."""
+        return self.neighbors.get((serial, str(port)))
+
+    def find_client(self, value: str) -> Optional[Dict[str, Any]]:
+        """Client record for a MAC or IP address."""
+        mac = normalize_mac(value)
+        if mac:
+            return self.client_by_mac.get(mac)
+        value = (value or '').strip()
+        return next((c for c in self.client_by_mac.values() if c.get('ip') == value), None)
+
+    def locate(self, mac: str) -> Optional[PortKey]:
+        """(serial, port) a client MAC was last attributed to."""
+        normalized = normalize_mac(mac)
+        return self.port_by_mac.get(normalized) if normalized else None
+
+    def appliance_port_clients(self, serial: Optional[str], port: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Clients behind an MX port.
+
+        Uses the MX MAC table when it was collected, otherwise clients on the port's
+        access VLAN, or its native plus allowed VLANs for trunks.
+
+        Args:
+            serial: MX serial (None if unknown)
+            port: Port dict from getNetworkAppliancePorts
+
+        Returns:
+            (clients, attribution) where attribution is 'mac_table' or 'vlan'
+        """
+        port_num = str(port.get('number', ''))
+        if serial and (serial, port_num) in self.clients_by_port:
+            return self.clients_on_port(serial, port_num), self.attribution.get((serial, port_num), 'mac_table')
+
+        native = str(port.get('vlan', ''))
+        if port.get('type') == 'trunk':
+            allowed = parse_vlan_list(port.get('allowedVlans'))
+            vlans = {native} if allowed is None else allowed | {native}
+        else:
+            vlans = {native}
+        return self.clients_on_vlans(sorted(vlans)), 'vlan'
+
+    def port_summary(self) -> List[Dict[str, Any]]:
+        """One row per attributed port, busiest first."""
+        keys = set(self.clients_by_port) | set(self.neighbors)
+        rows = []
+        for serial, port in keys:
+            clients = self.clients_by_port.get((serial, port), [])
+            rows.append({
+                'serial': serial,
+                'port': port,
+                'client_count': len(clients),
+                'attribution': self.attribution.get((serial, port), 'lldp' if not clients else ''),
+                'neighbor': self.neighbors.get((serial, port))
+            })
+        rows.sort(key=lambda row: (-row['client_count'], row['serial'], _port_sort_key(row['port'])))
+        return rows
+
+
+def _port_sort_key(port: str):
+    return (0, int(port)) if port.isdigit() else (1, port)
+
+
+def build_port_index(
+    network_id: str,
+    clients: Iterable[Dict[str, Any]],
+    lldp_by_serial: Optional[Dict[str, Dict[str, Any]]] = None,
+    mac_tables: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> PortIndex:
+    """
+    Build a PortIndex in a single pass over each source.
+
+    Args:
+        network_id: Network ID
+        clients: Clients from getNetworkClients
+        lldp_by_serial: {serial: getDeviceLldpCdp response}
+        mac_tables: {serial: live MAC table entries [{'mac', 'port', 'vlanId'}, ...]}
+
+    Returns:
+        PortIndex
+    """
+    index = PortIndex(network_id=network_id)
+    clients = list(clients)
+    index.client_count = len(clients)
+    client_by_mac = index.client_by_mac
+
+    for client in clients:
+        mac = normalize_mac(client.get('mac') or '')
+        if mac:
+            client_by_mac[mac] = client
+        vlan = client.get('vlan')
+        if vlan is not None and vlan != '':
+            index.clients_by_vlan.setdefault(str(vlan), []).append(client)
+
+        serial, port = client.get('recentDeviceSerial'), client.get('switchport')
+        if serial and port not in (None, ''):
+            key = (serial, str(port))
+            index.clients_by_port.setdefault(key, []).append(client)
+            index.attribution[key] = 'switchport'
+            if mac:
+                index.port_by_mac[mac] = key
+    if clients:
+        index.sources.append('clients')
+
+    # MAC tables are authoritative for the ports they cover, so they replace
+    # switchport attribution there rather than adding to it.
+    for serial, entries in (mac_tables or {}).items():
+        table_ports: Dict[PortKey, List[Dict[str, Any]]] = {}
+        for entry in entries or []:
+            mac = normalize_mac(entry.get('mac') or '')
+            port = entry.get('port')
+            if not mac or port in (None, ''):
+                continue
+            client = client_by_mac.get(mac) or {'mac': mac, 'vlan': entry.get('vlanId'), 'description': None}
+            table_ports.setdefault((serial, str(port)), []).append(client)
+        for key, port_clients in table_ports.items():
+            index.clients_by_port[key] = port_clients
+            index.attribution[key] = 'mac_table'
+        # Uplinks learn every MAC behind them; locate clients on their least busy
+        # port, and never move a client already placed on another device's port
+        located_elsewhere = {mac for mac, key in index.port_by_mac.items() if key[0] != serial}
+        for key, port_clients in sorted(table_ports.items(), key=lambda item: len(item[1]), reverse=True):
+            for client in port_clients:
+                mac = normalize_mac(client['mac'])
+                if mac not in located_elsewhere:
+                    index.port_by_mac[mac] = key
+        if table_ports:
+            index.sources.append('mac_table')
+
+    for serial, payload in (lldp_by_serial or {}).items():
+        for port_id, port_info in ((payload or {}).get('ports') or {}).items():
+            if port_info and (port_info.get('lldp') or port_info.get('cdp')):
+                index.neighbors[(serial, str(port_id))] = _neighbor_summary(port_info)
+    if index.neighbors:
+        index.sources.append('lldp_cdp')
+
+    return index
+
+
+def fetch_mac_table(meraki_client, serial: str) -> List[Dict[str, Any]]:
+    """
+    Run the live MAC table tool on a device and wait for the result.
+
+    Returns:
+        MAC table entries, or an empty list if the job did not complete in time
+    """
+    devices = meraki_client.dashboard.devices
+    job = devices.createDeviceLiveToolsMacTable(serial)
+    job_id = job.get('macTableId')
+    if not job_id:
+        return []
+    for _ in range(MAC_TABLE_POLL_ATTEMPTS):
+        time.sleep(MAC_TABLE_POLL_INTERVAL)
+        status = devices.getDeviceLiveToolsMacTable(serial, job_id)
+        if status.get('status') == 'complete':
+            return status.get('entries') or []
+        if status.get('status') == 'failed':
+            return []
+    return []
+
+
+class PortIndexCache:
+    """Cache of PortIndex records keyed by network and the sources they were built from."""
+
+    def __init__(self, ttl: float = MCP_CACHE_TTL):
+        self._cache = TTLCache(ttl)
+
+    def get(
+        self,
+        meraki_client,
+        network_id: str,
+        timespan: int = 86400,
+        include_lldp: bool = True,
+        include_mac_table: bool = False,
+        serials: Optional[Sequence[str]] = None
+    ) -> PortIndex:
+        """
+        Return the port index for a network, building it on a miss.
+
+        Args:
+            meraki_client: MerakiClient instance
+            network_id: Network ID
+            timespan: Client lookback in seconds
+            include_lldp: Query LLDP/CDP on switches and appliances
+            include_mac_table: Run live MAC table jobs on switches and appliances (slow)
+            serials: Only query these devices for LLDP/CDP and MAC tables (default: every switch and appliance)
+        """
+        restricted = tuple(sorted(serials)) if serials is not None else None
+        key = (network_id, timespan, include_lldp, include_mac_table, restricted)
+        return self._cache.get_or_load(
+            key,
+            lambda: self._build(meraki_client, network_id, timespan, include_lldp, include_mac_table, restricted)
+        )
+
+    def _build(self, meraki_client, network_id, timespan, include_lldp, include_mac_table, serials=None) -> PortIndex:
+        clients = meraki_client.get_network_clients(network_id, timespan=timespan)
+
+        if not (include_lldp or include_mac_table):
+            serials = []
+        elif serials is None:
+            infra = get_network_infrastructure(meraki_client, network_id)
+            serials = [
+                device['serial'] for device in infra.other_devices + infra.mx_wireless
+                if device.get('serial') and model_product_type(device.get('model')) in ('switch', 'appliance')
+            ]
+
+        def lldp(serial: str):
+            rate_scheduler.acquire()
+            try:
+                return meraki_client.dashboard.devices.getDeviceLldpCdp(serial)
+            except Exception:
+                return None
+
+        lldp_by_serial = {}
+        if include_lldp and serials:
+            with ThreadPoolExecutor(max_workers=min(MCP_AUDIT_CONCURRENCY, len(serials))) as executor:
+                for serial, payload in zip(serials, executor.map(lldp, serials)):
+                    if payload is not None:
+                        lldp_by_serial[serial] = payload
+
+        mac_tables = {}
+        if include_mac_table:
+            for serial in serials:
+                try:
+                    mac_tables[serial] = fetch_mac_table(meraki_client, serial)
+                except Exception:
+                    pass
+
+        return build_port_index(network_id, clients, lldp_by_serial, mac_tables)
+
+    def invalidate(self, network_id: str) -> None:
+        """Forget every index built for a network."""
+        self._cache.invalidate_where(lambda key: key[0] == network_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Shared by the port and client location tools
+port_index_cache = PortIndexCache()
+
+
+def get_port_index(meraki_client, network_id: str, **kwargs) -> PortIndex:
+    """Shortcut for port_index_cache.get()."""
+    return port_index_cache.get(meraki_client, network_id, **kwargs)
@@ -0,0 +1,409 @@
+"""
+Per-run API profiler for audits.
+
+A long audit used to report only its total duration. The profiler records, for
+each phase of a run (organization lookup, snapshot fetch, each section, evidence
+archive) and each Dashboard operation:
+
+    requests    HTTP requests the SDK made (one per page)
+    attempts    HTTP sends including retries (429, 5xx, connection errors)
+    errors      Requests that ended in an exception
+    seconds     Time spent inside the SDK, including its retry back-off
+    bytes       Response body bytes
+    rate_wait   Seconds spent waiting for the client-side rate budget
+
+Recording is driven by context variables, so concurrent tool calls sharing one
+Dashboard session each see only their own requests. instrument() wraps the SDK
+session once (the client's streaming session is wrapped when it is created);
+requests made outside an active profiler are not recorded.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config import MCP_PROFILE_LOG_RUNS, MCP_STATE_DIR
+
+PROFILE_LOG = 'profiles.jsonl'
+
+_active: contextvars.ContextVar[Optional['RunProfiler']] = contextvars.ContextVar('audit_profiler', default=None)
+_operation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('audit_operation', default=None)
+
+# Serializes appends and trimming of the profile log
+_log_lock = threading.Lock()
+
+
+def current_profiler() -> Optional['RunProfiler']:
+    """Profiler recording in the current context, if any."""
+    return _active.get()
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    attempts: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    bytes: int = 0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - self.requests)
+
+    def add(self, other: 'EndpointStats') -> None:
+        self.requests += other.requests
+        self.attempts += other.attempts
+        self.errors += other.errors
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.bytes += other.bytes
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    seconds: float = 0.0
+    rate_wait: float = 0.0
+    endpoints: Dict[str, EndpointStats] = field(default_factory=dict)
+
+    def total(self) -> EndpointStats:
+        total = EndpointStats()
+        for stats in self.endpoints.values():
+            total.add(stats)
+        return total
+
+
+class RunProfiler:
+    """Collects per-phase, per-operation API statistics for one run."""
+
+    def __init__(self, run: str, organization_id: str = ''):
+        """
+        Args:
+            run: Run kind, used as the metrics label (e.g. 'hipaa')
+            organization_id: Organization the run audits
+        """
+        self.run = run
+        self.organization_id = organization_id
+        self.phases: Dict[str, PhaseStats] = {}
+        self.started_at = time.time()
+        self.duration = 0.0
+        self._phase: Optional[str] = None
+        self._phase_started = 0.0
+        self._token = None
+        self._lock = threading.Lock()
+
+    # -- lifecycle -----------------------------------------------------
+
+    def start(self, meraki_client=None, phase: str = 'setup') -> 'RunProfiler':
+        """Begin recording in the current context (instrumenting the client's session)."""
+        if meraki_client is not None:
+            instrument(meraki_client.dashboard)
+        self._token = _active.set(self)
+        self.mark(phase)
+        return self
+
+    def mark(self, phase: str) -> None:
+        """End the current phase and start the next one; later requests count against it."""
+        now = time.perf_counter()
+        with self._lock:
+            if self._phase is not None:
+                self._get_phase(self._phase).seconds += now - self._phase_started
+            self._phase = phase
+            self._phase_started = now
+            self._get_phase(phase)
+
+    def stop(self) -> None:
+        """Close the last phase and stop recording. Safe to call more than once."""
+        if self._phase is None and self._token is None:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if self._phase is not None:
+                self._get_phase(self._phase).seconds += now - self._phase_started
+                self._phase = None
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+        self.duration = time.time() - self.started_at
+
+    @contextmanager
+    def activate(self, meraki_client=None, phase: str = 'setup'):
+        self.start(meraki_client, phase)
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    # -- recording (called from SDK hooks and the rate scheduler) --------
+
+    def _get_phase(self, name: str) -> PhaseStats:
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = PhaseStats(name)
+        return phase
+
+    def _endpoint(self, operation: Optional[str]) -> EndpointStats:
+        phase = self._get_phase(self._phase or 'untracked')
+        key = operation or 'unknown'
+        stats = phase.endpoints.get(key)
+        if stats is None:
+            stats = phase.endpoints[key] = EndpointStats()
+        return stats
+
+    def record_request(self, operation: Optional[str], seconds: float, size: int = 0, error: bool = False) -> None:
+        with self._lock:
+            stats = self._endpoint(operation)
+            stats.requests += 1
+            stats.errors += int(error)
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.bytes += size
+
+    def record_attempt(self, operation: Optional[str]) -> None:
+        with self._lock:
+            self._endpoint(operation).attempts += 1
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._get_phase(self._phase or 'untracked').rate_wait += seconds
+
+    # -- reporting -----------------------------------------------------
+
+    def total(self) -> EndpointStats:
+        total = EndpointStats()
+        for phase in self.phases.values():
+            total.add(phase.total())
+        return total
+
+    @property
+    def rate_wait(self) -> float:
+        return sum(phase.rate_wait for phase in self.phases.values())
+
+    def by_endpoint(self) -> Dict[str, EndpointStats]:
+        """Statistics per operation across all phases."""
+        merged: Dict[str, EndpointStats] = {}
+        for phase in self.phases.values():
+            for operation, stats in phase.endpoints.items():
+                merged.setdefault(operation, EndpointStats()).add(stats)
+        return merged
+
+    def hotspots(self, limit: int = 10) -> List[tuple]:
+        """(operation, stats) with the most SDK time first."""
+        return sorted(self.by_endpoint().items(), key=lambda item: item[1].seconds, reverse=True)[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.total()
+        return {
+            'run': self.run,
+            'organization_id': self.organization_id,
+            'started_at': self.started_at,
+            'duration': round(self.duration, 3),
+            'requests': total.requests,
+            'retries': total.retries,
+            'errors': total.errors,
+            'bytes': total.bytes,
+            'rate_wait': round(self.rate_wait, 3),
+            'phases': {
+                name: {
+                    'seconds': round(phase.seconds, 3),
+                    'rate_wait': round(phase.rate_wait, 3),
+                    'endpoints': {
+                        operation: {**asdict(stats), 'retries': stats.retries}
+                        for operation, stats in phase.endpoints.items()
+                    }
+                }
+                for name, phase in self.phases.items()
+            }
+        }
+
+    def markdown(self, top: int = 10) -> List[str]:
+        """Debug appendix lines for a report."""
+        total = self.total()
+        lines = ["## 🐞 DEBUG: API PROFILE", ""]
+        lines.append(f"**Requests**: {total.requests} | **Retries**: {total.retries} | **Errors**: {total.errors} | "
+                     f"**Bytes**: {total.bytes:,} | **Rate-limit wait**: {self.rate_wait:.1f}s | "
+                     f"**Run time**: {self.duration:.1f}s")
+        lines.append("")
+        lines.append("| Phase | Wall Time | Requests | Retries | SDK Time | Rate Wait | Bytes |")
+        lines.append("|---|---|---|---|---|---|---|")
+        for name, phase in self.phases.items():
+            stats = phase.total()
+            lines.append(f"| {name} | {phase.seconds:.2f}s | {stats.requests} | {stats.retries} | "
+                         f"{stats.seconds:.2f}s | {phase.rate_wait:.2f}s | {stats.bytes:,} |")
+        hotspots = self.hotspots(top)
+        if hotspots:
+            lines.append("")
+            lines.append("| Endpoint | Requests | Retries | Errors | SDK Time | Max | Avg | Bytes |")
+            lines.append("|---|---|---|---|---|---|---|---|")
+            for operation, stats in hotspots:
+                average = stats.seconds / stats.requests if stats.requests else 0
+                lines.append(f"| {operation} | {stats.requests} | {stats.retries} | {stats.errors} | "
+                             f"{stats.seconds:.2f}s | {stats.max_seconds:.2f}s | {average:.2f}s | {stats.bytes:,} |")
+        lines.append("")
+        return lines
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition of the run (node_exporter textfile collector format)."""
+        run = _label(self.run)
+        org = _label(self.organization_id)
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]) -> None:
+            lines.append(f"# HELP meraki_mcp_audit_{name} {help_text}")
+            lines.append(f"# TYPE meraki_mcp_audit_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels)
+                lines.append(f"meraki_mcp_audit_{name}{{{label_text}}} {value}")
+
+        base = [('run', run), ('organization', org)]
+        metric('duration_seconds', 'gauge', 'Wall time of the last audit run',
+               [(base, round(self.duration, 3))])
+        metric('phase_seconds', 'gauge', 'Wall time per audit phase',
+               [(base + [('phase', name)], round(phase.seconds, 3)) for name, phase in self.phases.items()])
+        metric('rate_wait_seconds', 'gauge', 'Seconds waiting for the client-side rate budget per phase',
+               [(base + [('phase', name)], round(phase.rate_wait, 3)) for name, phase in self.phases.items()])
+        endpoint_samples = [
+            (base + [('phase', name), ('endpoint', operation)], stats)
+            for name, phase in self.phases.items() for operation, stats in phase.endpoints.items()
+        ]
+        for field_name, help_text in (('requests', 'Dashboard API requests'), ('retries', 'Dashboard API retries'),
+                                      ('errors', 'Failed Dashboard API requests'), ('bytes', 'Response bytes')):
+            metric(field_name, 'gauge', f"{help_text} in the last audit run",
+                   [(labels, getattr(stats, field_name)) for labels, stats in endpoint_samples])
+        metric('request_seconds', 'gauge', 'Seconds inside the SDK in the last audit run',
+               [(labels, round(stats.seconds, 3)) for labels, stats in endpoint_samples])
+        return '\n'.join(lines) + '\n'
+
+    def export(self, directory: Optional[str] = None) -> str:
+        """
+        Write the run's metrics file and append it to the profile log.
+
+        Writes <dir>/audit_<run>_<org>.prom (replaced on every run, for a textfile
+        collector) and appends the full profile to <dir>/profiles.jsonl, which
+        keeps the last MCP_PROFILE_LOG_RUNS profiles.
+
+        Returns:
+            Path of the metrics file
+        """
+        directory = directory or os.path.join(MCP_STATE_DIR, 'metrics')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"audit_{_filename(self.run)}_{_filename(self.organization_id)}.prom")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+        log_path = os.path.join(directory, PROFILE_LOG)
+        with _log_lock:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.to_dict(), separators=(',', ':')) + '\n')
+            lines = tail_lines(log_path, MCP_PROFILE_LOG_RUNS + 1)
+            if len(lines) > MCP_PROFILE_LOG_RUNS:
+                temp_path = f"{log_path}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.writelines(line + b'\n' for line in lines[-MCP_PROFILE_LOG_RUNS:])
+                os.replace(temp_path, log_path)
+        return path
+
+
+def tail_lines(path: str, count: int, block_size: int = 65536) -> List[bytes]:
+    """Last `count` non-empty lines of a file, read backwards from its end."""
+    if count <= 0:
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = [line for line in data.split(b'\n') if line.strip()]
+    if position > 0:
+        # The first line may start before the bytes read
+        lines = lines[1:]
+    return lines[-count:]
+
+
+def read_profiles(directory: Optional[str] = None, runs: int = MCP_PROFILE_LOG_RUNS) -> List[Dict[str, Any]]:
+    """The last `runs` exported profiles, oldest first; unreadable lines are skipped."""
+    path = os.path.join(directory or os.path.join(MCP_STATE_DIR, 'metrics'), PROFILE_LOG)
+    try:
+        lines = tail_lines(path, runs)
+    except OSError:
+        return []
+    profiles = []
+    for line in lines:
+        try:
+            profiles.append(json.loads(line))
+        except ValueError:
+            continue
+    return profiles
+
+
+def _label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _filename(value: Any) -> str:
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in str(value)) or 'none'
+
+
+def _response_size(response) -> int:
+    try:
+        return len(response.content) if response is not None else 0
+    except Exception:
+        return 0
+
+
+def instrument(dashboard) -> None:
+    """
+    Hook the SDK session of a DashboardAPI so requests are recorded by the active profiler.
+
+    Wraps RestSession.request (one call per request/page) and the per-attempt send
+    (_send_request in SDK 2.x+, the underlying requests session in older ones).
+    Idempotent; a no-op for objects without a session.
+    """
+    session = getattr(dashboard, '_session', None)
+    if session is None or getattr(session, '_mcp_profiled', False):
+        return
+
+    original_request = session.request
+
+    def request(metadata, method, url, **kwargs):
+        profiler = _active.get()
+        if profiler is None:
+            return original_request(metadata, method, url, **kwargs)
+        operation = metadata.get('operation') if isinstance(metadata, dict) else None
+        token = _operation.set(operation)
+        started = time.perf_counter()
+        try:
+            response = original_request(metadata, method, url, **kwargs)
+        except Exception:
+            profiler.record_request(operation, time.perf_counter() - started, error=True)
+            raise
+        finally:
+            _operation.reset(token)
+        profiler.record_request(operation, time.perf_counter() - started, _response_size(response))
+        return response
+
+    def counting(send):
+        def wrapper(*args, **kwargs):
+            profiler = _active.get()
+            if profiler is not None:
+                profiler.record_attempt(_operation.get())
+            return send(*args, **kwargs)
+        return wrapper
+
+    session.request = request
+    if hasattr(session, '_send_request'):
+        session._send_request = counting(session._send_request)
+    elif hasattr(session, '_req_session'):
+        session._req_session.request = counting(session._req_session.request)
+    session._mcp_profiled = True
@@ -0,0 +1,111 @@
+"""
+Client-side rate scheduler for Dashboard API calls.
+
+The Dashboard allows about 10 requests per second per organization and 100 per
+second per source IP. The SDK backs off after a 429, but concurrent audits across
+many organizations hit the limit constantly and then sleep on Retry-After. The
+scheduler spaces requests out before they are sent instead: one token bucket per
+organization plus a global bucket for the whole process.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config import MCP_GLOBAL_RATE_LIMIT, MCP_ORG_RATE_LIMIT
+from utils.profiler import current_profiler
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Burst size (default: one second of tokens)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RateScheduler:
+    """Per-organization and global request budgets shared by every tool in the process."""
+
+    def __init__(self, org_rate: float = MCP_ORG_RATE_LIMIT, global_rate: float = MCP_GLOBAL_RATE_LIMIT):
+        self.org_rate = org_rate
+        self._global = TokenBucket(global_rate)
+        self._orgs: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.waited: Dict[str, float] = {}
+
+    @property
+    def global_rate(self) -> float:
+        return self._global.rate
+
+    def _bucket(self, organization_id: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._orgs.get(organization_id)
+            if bucket is None:
+                bucket = self._orgs[organization_id] = TokenBucket(self.org_rate)
+            return bucket
+
+    def acquire(self, organization_id: Optional[str] = None) -> float:
+        """
+        Wait for budget to make one request.
+
+        Args:
+            organization_id: Organization the request counts against (None: global budget only)
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        if organization_id:
+            waited += self._bucket(str(organization_id)).acquire()
+        waited += self._global.acquire()
+        if waited:
+            key = str(organization_id or '')
+            with self._lock:
+                self.waited[key] = self.waited.get(key, 0.0) + waited
+            profiler = current_profiler()
+            if profiler is not None:
+                profiler.record_wait(waited)
+        return waited
+
+    @contextmanager
+    def slot(self, organization_id: Optional[str] = None):
+        """Context manager form of acquire()."""
+        self.acquire(organization_id)
+        yield
+
+    def reset(self) -> None:
+        with self._lock:
+            self._orgs = {}
+            self.waited = {}
+
+
+# Shared by every tool in the process
+rate_scheduler = RateScheduler()
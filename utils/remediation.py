@@ -0,0 +1,348 @@
+"""
+Batched security remediation across networks.
+
+apply_common_security_rules used to make one blocking update call per endpoint
+per network, and read IDS/AMP/L3 state one network at a time. The pipeline here:
+
+    1. snapshots the current intrusion, malware and L3 firewall settings of every
+       selected network concurrently (utils.audit_snapshot, under the rate budget)
+    2. compiles the intended changes into Dashboard action-batch actions per
+       network, skipping settings that are already in place
+    3. packs whole networks into batches of at most MAX_BATCH_ACTIONS actions and
+       submits them asynchronously, MAX_RUNNING_BATCHES at a time per organization
+    4. polls each batch to completion and reports success per network
+
+Action batches are atomic, so a network's actions are never split across
+batches. When a batch covering several networks fails, each of its networks is
+resubmitted in a batch of its own so one bad network does not fail the rest.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.audit_snapshot import NetworkSnapshot, snapshot_networks
+from utils.rate_limit import rate_scheduler
+
+# Dashboard limits for asynchronous action batches
+MAX_BATCH_ACTIONS = 100
+MAX_RUNNING_BATCHES = 5
+
+BATCH_POLL_INTERVAL = 2.0
+BATCH_TIMEOUT = 600.0
+
+HIGH_RISK_COUNTRIES = ["CN", "RU", "KP", "IR"]
+MALICIOUS_CATEGORIES = ["5", "6", "3", "4", "83"]  # malware, phishing, illegal content/downloads, P2P
+SOCIAL_MEDIA_CATEGORIES = ["70"]
+P2P_APPLICATIONS = ["meraki:layer7/application/17", "meraki:layer7/application/169"]  # BitTorrent, Tor
+
+
+@dataclass
+class SecurityRuleOptions:
+    """What apply_common_security_rules should enforce."""
+
+    block_malicious_sites: bool = True
+    block_high_risk_countries: bool = False
+    block_p2p: bool = False
+    block_social_media: bool = False
+    blocked_countries: List[str] = field(default_factory=list)
+    blocked_ports: List[str] = field(default_factory=list)
+    enable_ids: bool = True
+    enable_amp: bool = True
+
+    @property
+    def countries(self) -> List[str]:
+        countries = list(HIGH_RISK_COUNTRIES) if self.block_high_risk_countries else []
+        countries.extend(self.blocked_countries)
+        return sorted(set(countries))
+
+
+@dataclass
+class NetworkPlan:
+    """Actions compiled for one network, and the outcome once submitted."""
+
+    network_id: str
+    name: str
+    actions: List[Dict[str, Any]] = field(default_factory=list)
+    changes: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    status: str = 'pending'  # pending, applied, unchanged, failed, planned
+    batch_ids: List[str] = field(default_factory=list)
+
+
+def _action(network_id: str, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    return {'resource': f"/networks/{network_id}/{path}", 'operation': 'update', 'body': body}
+
+
+def plan_network(snap: NetworkSnapshot, options: SecurityRuleOptions) -> NetworkPlan:
+    """Compile the action-batch actions that bring one network to the requested rules."""
+    plan = NetworkPlan(network_id=snap.network_id, name=snap.name)
+    network_id = snap.network_id
+
+    if options.block_malicious_sites:
+        categories = list(MALICIOUS_CATEGORIES)
+        if options.block_social_media:
+            categories.extend(SOCIAL_MEDIA_CATEGORIES)
+        plan.actions.append(_action(network_id, 'appliance/contentFiltering', {
+            'blockedUrlCategories': [f"meraki:contentFiltering/category/{cat}" for cat in categories],
+            'urlCategoryListSize': 'fullList'
+        }))
+        plan.changes.append("Content Filtering: blocked malicious site categories")
+
+    l7_rules = []
+    countries = options.countries
+    if countries:
+        l7_rules.append({'policy': 'deny', 'type': 'blacklistedCountries', 'value': {'countries': countries}})
+        plan.changes.append(f"Geo-blocking: {len(countries)} countries ({', '.join(countries)})")
+    if options.block_p2p:
+        l7_rules.extend({'policy': 'deny', 'type': 'application', 'value': {'id': app_id}} for app_id in P2P_APPLICATIONS)
+        plan.changes.append("L7 Firewall: blocked P2P applications")
+    if l7_rules:
+        plan.actions.append(_action(network_id, 'appliance/firewall/l7FirewallRules', {'rules': l7_rules}))
+
+    if options.blocked_ports:
+        if snap.l3_firewall is None:
+            plan.errors.append(f"L3 Firewall: current rules unavailable ({snap.errors.get('l3_firewall', 'unknown')})")
+        else:
+            # The default rule is returned by the API but must not be sent back
+            existing = [rule for rule in snap.l3_rules if rule.get('comment') != 'Default rule']
+            blocked = {rule.get('destPort') for rule in existing if rule.get('policy') == 'deny' and rule.get('protocol') == 'tcp'}
+            new_ports = [port for port in options.blocked_ports if port not in blocked]
+            if new_ports:
+                new_rules = [{
+                    'comment': f'Block port {port} - Added by security helper',
+                    'policy': 'deny', 'protocol': 'tcp', 'srcCidr': 'any', 'destCidr': 'any',
+                    'destPort': port, 'syslogEnabled': True
+                } for port in new_ports]
+                plan.actions.append(_action(network_id, 'appliance/firewall/l3FirewallRules', {'rules': new_rules + existing}))
+                plan.changes.append(f"L3 Firewall: blocked TCP ports {', '.join(new_ports)}")
+            else:
+                plan.unchanged.append("L3 Firewall: ports already blocked")
+
+    if options.enable_ids:
+        if snap.intrusion is None:
+            plan.errors.append(f"IDS/IPS: current mode unavailable ({snap.errors.get('intrusion', 'unknown')})")
+        elif snap.intrusion.get('mode') == 'disabled':
+            plan.actions.append(_action(network_id, 'appliance/security/intrusion',
+                                        {'mode': 'prevention', 'idsRulesets': 'balanced'}))
+            plan.changes.append("IDS/IPS: enabled in prevention mode")
+        else:
+            plan.unchanged.append(f"IDS/IPS: already enabled ({snap.intrusion.get('mode')})")
+
+    if options.enable_amp:
+        if snap.malware is None:
+            plan.errors.append(f"Malware Protection: current mode unavailable ({snap.errors.get('malware', 'unknown')})")
+        elif snap.malware.get('mode') == 'disabled':
+            plan.actions.append(_action(network_id, 'appliance/security/malware', {'mode': 'enabled'}))
+            plan.changes.append("Malware Protection: enabled AMP")
+        else:
+            plan.unchanged.append("Malware Protection: already enabled")
+
+    if not plan.actions:
+        plan.status = 'failed' if plan.errors else 'unchanged'
+    return plan
+
+
+def pack_batches(plans: List[NetworkPlan], max_actions: int = MAX_BATCH_ACTIONS) -> List[List[NetworkPlan]]:
+    """Group networks into batches of at most max_actions actions without splitting a network."""
+    batches: List[List[NetworkPlan]] = []
+    current: List[NetworkPlan] = []
+    size = 0
+    for plan in plans:
+        if not plan.actions:
+            continue
+        if current and size + len(plan.actions) > max_actions:
+            batches.append(current)
+            current, size = [], 0
+        current.append(plan)
+        size += len(plan.actions)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def run_action_batch(
+    meraki_client,
+    organization_id: str,
+    actions: List[Dict[str, Any]],
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    timeout: float = BATCH_TIMEOUT
+) -> Dict[str, Any]:
+    """
+    Submit one asynchronous action batch and wait for it to finish.
+
+    Returns:
+        Final batch (status.completed / status.failed / status.errors)
+    """
+    organizations = meraki_client.dashboard.organizations
+    rate_scheduler.acquire(organization_id)
+    batch = organizations.createOrganizationActionBatch(
+        organization_id, actions=actions, confirmed=True, synchronous=False
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        status = batch.get('status') or {}
+        if status.get('completed') or status.get('failed'):
+            return batch
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Action batch {batch.get('id')} still running after {timeout:.0f}s")
+        time.sleep(poll_interval)
+        rate_scheduler.acquire(organization_id)
+        batch = organizations.getOrganizationActionBatch(organization_id, batch['id'])
+
+
+def _batch_error(batch: Dict[str, Any]) -> str:
+    errors = (batch.get('status') or {}).get('errors') or []
+    return '; '.join(str(error) for error in errors) or 'action batch failed'
+
+
+def apply_plans(
+    meraki_client,
+    organization_id: str,
+    plans: List[NetworkPlan],
+    max_actions: int = MAX_BATCH_ACTIONS,
+    max_running: int = MAX_RUNNING_BATCHES,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    on_batch: Optional[Callable[[List[NetworkPlan]], None]] = None
+) -> List[List[NetworkPlan]]:
+    """
+    Submit the plans' actions as concurrent action batches and record per-network outcomes.
+
+    Args:
+        meraki_client: MerakiClient instance
+        organization_id: Organization owning the networks
+        plans: Compiled network plans (plans without actions are left as they are)
+        max_actions: Actions per batch
+        max_running: Batches submitted concurrently
+        poll_interval: Seconds between status polls
+        on_batch: Called with a batch's plans once it has finished
+
+    Returns:
+        The batches that were submitted (first attempt)
+    """
+    def submit(batch_plans: List[NetworkPlan]) -> None:
+        actions = [action for plan in batch_plans for action in plan.actions]
+        try:
+            batch = run_action_batch(meraki_client, organization_id, actions, poll_interval)
+        except Exception as e:
+            batch = {'status': {'failed': True, 'errors': [str(e)]}}
+
+        for plan in batch_plans:
+            if batch.get('id'):
+                plan.batch_ids.append(batch['id'])
+        if (batch.get('status') or {}).get('completed'):
+            for plan in batch_plans:
+                plan.status = 'applied'
+        elif len(batch_plans) > 1:
+            # Atomic batch: isolate the failing network(s) by retrying one network per batch
+            for plan in batch_plans:
+                submit([plan])
+            return
+        else:
+            batch_plans[0].status = 'failed'
+            batch_plans[0].errors.append(_batch_error(batch))
+        if on_batch is not None:
+            try:
+                on_batch(batch_plans)
+            except Exception:
+                pass
+
+    batches = pack_batches(plans, max_actions)
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, max_running)) as executor:
+            list(executor.map(submit, batches))
+    return batches
+
+
+@dataclass
+class RemediationRun:
+    """Outcome of remediate_networks."""
+
+    organization_id: str
+    plans: List[NetworkPlan] = field(default_factory=list)
+    skipped: List[Dict[str, Any]] = field(default_factory=list)
+    not_found: List[str] = field(default_factory=list)
+    batches: int = 0
+    read_calls: int = 0
+    duration: float = 0.0
+    dry_run: bool = False
+
+    def count(self, status: str) -> int:
+        return len([plan for plan in self.plans if plan.status == status])
+
+    @property
+    def action_count(self) -> int:
+        return sum(len(plan.actions) for plan in self.plans)
+
+
+def remediate_networks(
+    meraki_client,
+    organization_id: str,
+    options: SecurityRuleOptions,
+    network_ids: Optional[List[str]] = None,
+    dry_run: bool = False,
+    on_batch: Optional[Callable[[List[NetworkPlan]], None]] = None,
+    max_workers: Optional[int] = None,
+    max_actions: int = MAX_BATCH_ACTIONS,
+    poll_interval: float = BATCH_POLL_INTERVAL
+) -> RemediationRun:
+    """
+    Plan and apply security rules to appliance networks of an organization.
+
+    Args:
+        meraki_client: MerakiClient instance
+        organization_id: Organization owning the networks
+        options: Rules to enforce
+        network_ids: Networks to remediate (default: every appliance network)
+        dry_run: Compile the actions without submitting them
+        on_batch: Called with a batch's plans once it has finished
+        max_workers: Concurrent reads while snapshotting current settings
+        max_actions: Actions per action batch
+        poll_interval: Seconds between action batch status polls
+
+    Returns:
+        RemediationRun with a plan and status per network; requested IDs that are
+        not networks of the organization are listed in not_found
+    """
+    started = time.time()
+    run = RemediationRun(organization_id=organization_id, dry_run=dry_run)
+    rate_scheduler.acquire(organization_id)
+    networks = meraki_client.dashboard.organizations.getOrganizationNetworks(organization_id, total_pages='all')
+    run.read_calls += 1
+    if network_ids:
+        wanted = set(network_ids)
+        networks = [network for network in networks if network.get('id') in wanted]
+        found = {network.get('id') for network in networks}
+        run.not_found = [network_id for network_id in network_ids if network_id not in found]
+    targets = []
+    for network in networks:
+        if 'appliance' in (network.get('productTypes') or []):
+            targets.append(network)
+        else:
+            run.skipped.append(network)
+
+    endpoints = set()
+    if options.blocked_ports:
+        endpoints.add('l3_firewall')
+    if options.enable_ids:
+        endpoints.add('intrusion')
+    if options.enable_amp:
+        endpoints.add('malware')
+    kwargs = {'max_workers': max_workers} if max_workers else {}
+    snapshots, calls = snapshot_networks(meraki_client, targets, [], endpoints,
+                                         organization_id=organization_id, **kwargs)
+    run.read_calls += calls
+    run.plans = [plan_network(snap, options) for snap in snapshots]
+
+    if dry_run:
+        for plan in run.plans:
+            if plan.actions:
+                plan.status = 'planned'
+        run.batches = len(pack_batches(run.plans, max_actions))
+    else:
+        run.batches = len(apply_plans(meraki_client, organization_id, run.plans, max_actions,
+                                      poll_interval=poll_interval, on_batch=on_batch))
+    run.duration = time.time() - started
+    return run
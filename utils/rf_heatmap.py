@@ -0,0 +1,385 @@
+"""
+Organization-wide wireless RF heatmap.
+
+Channel utilization, its history and packet loss live in separate
+organization endpoints, and the per-endpoint tools print ten items each. This
+module pulls every dataset at once (packet loss once per band) and joins them
+by AP serial and band into matrices with one row per AP and one column per
+band:
+
+    utilization, wifi, non_wifi                 window averages (%)
+    utilization_p95, utilization_peak           from the per-interval history (%)
+    loss_down, loss_up                          packet loss (%)
+    snr, rssi                                   signal quality, fetched for the worst offenders only
+
+Each cell gets a congestion score (1.0 = at the HIGH_UTILIZATION or
+HIGH_PACKET_LOSS threshold) used to rank the worst APs and bands of the
+organization.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import MCP_AUDIT_CONCURRENCY
+from utils.rate_limit import rate_scheduler
+from utils.timeseries_stats import summarize_many
+from utils.uplink_history import parse_timestamp
+from utils.wifi_audit import HIGH_UTILIZATION
+
+HEATMAP_BANDS = ('2.4', '5', '6')
+
+# Downstream or upstream loss at or above this percentage marks a cell as lossy
+HIGH_PACKET_LOSS = 5.0
+
+# Intervals accepted by the channel utilization endpoints, and the longest history window
+UTILIZATION_INTERVALS = (300, 600, 3600, 7200, 14400, 21600)
+MAX_HISTORY_TIMESPAN = 31 * 86400
+HISTORY_POINTS = 48
+
+MATRICES = ('utilization', 'wifi', 'non_wifi', 'utilization_p95', 'utilization_peak', 'loss_down', 'loss_up',
+            'snr', 'rssi')
+
+
+def band_percentage(band: Dict[str, Any], part: str = 'total') -> Optional[float]:
+    """Utilization percentage of a byBand entry; total falls back to wifi + non-WiFi."""
+    value = (band.get(part) or {}).get('percentage')
+    if value is None and part == 'total':
+        parts = [(band.get(p) or {}).get('percentage') for p in ('wifi', 'nonWifi')]
+        if any(p is not None for p in parts):
+            value = sum(p for p in parts if p is not None)
+    return float(value) if value is not None else None
+
+
+def history_interval(timespan: int, points: int = HISTORY_POINTS) -> int:
+    """Smallest valid utilization interval giving at most `points` intervals over the timespan."""
+    for interval in UTILIZATION_INTERVALS:
+        if timespan / interval <= points:
+            return interval
+    return UTILIZATION_INTERVALS[-1]
+
+
+@dataclass
+class RfCell:
+    """One AP and band of the heatmap."""
+
+    serial: str
+    band: str
+    score: float
+    values: Dict[str, Optional[float]]
+
+
+@dataclass
+class RfHeatmap:
+    """Joined per-AP, per-band RF statistics of an organization."""
+
+    organization_id: str
+    timespan: int
+    bands: Tuple[str, ...]
+    serials: List[str] = field(default_factory=list)
+    devices: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    matrices: Dict[str, np.ndarray] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    requests: int = 0
+    elapsed: float = 0.0
+
+    def _matrix(self, name: str) -> np.ndarray:
+        if name not in self.matrices:
+            self.matrices[name] = np.full((len(self.serials), len(self.bands)), np.nan)
+        return self.matrices[name]
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Congestion score per cell: worst of utilization (p95 when known) and loss relative to their thresholds."""
+        utilization = np.where(np.isnan(self._matrix('utilization_p95')), self._matrix('utilization'),
+                               self._matrix('utilization_p95'))
+        loss = np.fmax(self._matrix('loss_down'), self._matrix('loss_up'))
+        return np.nan_to_num(np.fmax(utilization / HIGH_UTILIZATION, loss / HIGH_PACKET_LOSS), nan=0.0)
+
+    def cell(self, row: int, column: int, scores: Optional[np.ndarray] = None) -> RfCell:
+        scores = self.scores if scores is None else scores
+        values = {}
+        for name in MATRICES:
+            value = self._matrix(name)[row, column]
+            values[name] = None if np.isnan(value) else float(value)
+        return RfCell(self.serials[row], self.bands[column], float(scores[row, column]), values)
+
+    def worst(self, limit: int = 20, min_score: float = 0.0) -> List[RfCell]:
+        """Cells with data, highest congestion score first."""
+        scores = self.scores
+        has_data = ~np.isnan(self._matrix('utilization')) | ~np.isnan(self._matrix('loss_down'))
+        rows, columns = np.nonzero(has_data & (scores >= min_score))
+        order = np.argsort(-scores[rows, columns], kind='stable')[:limit]
+        return [self.cell(rows[i], columns[i], scores) for i in order]
+
+    def band_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per band: APs reporting, average and p95 utilization across APs, congested and lossy AP counts."""
+        utilization = self._matrix('utilization')
+        summaries = summarize_many(utilization.T) if len(self.serials) else [None] * len(self.bands)
+        loss = np.fmax(self._matrix('loss_down'), self._matrix('loss_up'))
+        peak = np.where(np.isnan(self._matrix('utilization_p95')), utilization, self._matrix('utilization_p95'))
+        result = {}
+        for column, band in enumerate(self.bands):
+            summary = summaries[column]
+            result[band] = {
+                'aps': int(summary.count) if summary else 0,
+                'utilization_avg': summary.mean if summary else None,
+                'utilization_p95': summary.p95 if summary else None,
+                'congested': int(np.sum(np.nan_to_num(peak[:, column]) >= HIGH_UTILIZATION)),
+                'lossy': int(np.sum(np.nan_to_num(loss[:, column]) >= HIGH_PACKET_LOSS)),
+            }
+        return result
+
+    def name(self, serial: str) -> str:
+        return (self.devices.get(serial) or {}).get('name') or serial
+
+    def markdown(self, top: int = 20, max_aps: int = 50) -> List[str]:
+        """Report lines: band summary, worst offenders and the per-AP matrix."""
+        lines = [f"# 📡 Wireless RF Heatmap - Organization {self.organization_id}", ""]
+        lines.append(f"**Window**: {self.timespan / 3600:.1f} hours | **APs**: {len(self.serials)} | "
+                     f"**Requests**: {self.requests} in {self.elapsed:.1f}s")
+        for source, error in self.errors.items():
+            lines.append(f"⚠️ {source}: {error}")
+        lines.append("")
+        if not self.serials:
+            lines.append("*No wireless statistics available*")
+            return lines
+
+        def pct(value: Optional[float]) -> str:
+            return f"{value:.0f}%" if value is not None else "-"
+
+        lines += ["## 📊 By Band", "", "| Band | APs | Avg Util | P95 Util | Congested | Lossy |", "|---|---|---|---|---|---|"]
+        for band, summary in self.band_summary().items():
+            if summary['aps'] or summary['lossy']:
+                lines.append(f"| {band} GHz | {summary['aps']} | {pct(summary['utilization_avg'])} | "
+                             f"{pct(summary['utilization_p95'])} | {summary['congested']} | {summary['lossy']} |")
+        lines.append("")
+
+        worst = self.worst(top)
+        lines += [f"## 🔥 Worst Offenders (top {len(worst)})", ""]
+        lines += ["| AP | Network | Band | Score | Util | P95 | Peak | Non-WiFi | Loss ↓ | Loss ↑ | SNR |",
+                  "|---|---|---|---|---|---|---|---|---|---|---|"]
+        for cell in worst:
+            v = cell.values
+            icon = "🔴" if cell.score >= 1 else "🟡" if cell.score >= 0.7 else "🟢"
+            network = (self.devices.get(cell.serial) or {}).get('networkName') or \
+                (self.devices.get(cell.serial) or {}).get('networkId') or '-'
+            snr = f"{v['snr']:.0f} dB" if v['snr'] is not None else "-"
+            loss_down = f"{v['loss_down']:.1f}%" if v['loss_down'] is not None else "-"
+            loss_up = f"{v['loss_up']:.1f}%" if v['loss_up'] is not None else "-"
+            lines.append(f"| {icon} {self.name(cell.serial)} | {network} | {cell.band} | {cell.score:.2f} | "
+                         f"{pct(v['utilization'])} | {pct(v['utilization_p95'])} | {pct(v['utilization_peak'])} | "
+                         f"{pct(v['non_wifi'])} | {loss_down} | {loss_up} | {snr} |")
+        lines.append("")
+
+        # Matrix: APs by worst band score, utilization / downstream loss per band
+        scores = self.scores
+        order = np.argsort(-scores.max(axis=1), kind='stable')[:max_aps]
+        lines += ["## 🗺️ AP × Band Matrix (utilization / downstream loss)", ""]
+        lines.append("| AP | " + " | ".join(f"{band} GHz" for band in self.bands) + " |")
+        lines.append("|---|" + "---|" * len(self.bands))
+        utilization, loss = self._matrix('utilization'), self._matrix('loss_down')
+        for row in order:
+            cells = []
+            for column in range(len(self.bands)):
+                u, l = utilization[row, column], loss[row, column]
+                if np.isnan(u) and np.isnan(l):
+                    cells.append("-")
+                    continue
+                icon = "🔴" if scores[row, column] >= 1 else "🟡" if scores[row, column] >= 0.7 else "🟢"
+                cells.append(f"{icon} {'-' if np.isnan(u) else f'{u:.0f}%'} / {'-' if np.isnan(l) else f'{l:.1f}%'}")
+            lines.append(f"| {self.name(self.serials[row])} | " + " | ".join(cells) + " |")
+        if len(self.serials) > max_aps:
+            lines.append(f"\n... and {len(self.serials) - max_aps} more APs")
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'organization_id': self.organization_id,
+            'timespan': self.timespan,
+            'bands': list(self.bands),
+            'serials': self.serials,
+            'matrices': {name: [[None if np.isnan(v) else float(v) for v in row] for row in matrix]
+                         for name, matrix in self.matrices.items()},
+            'band_summary': self.band_summary(),
+            'worst': [cell.__dict__ for cell in self.worst()],
+            'errors': self.errors,
+        }
+
+
+def build_rf_heatmap(
+    meraki_client,
+    organization_id: str,
+    timespan: int = 86400,
+    network_ids: Optional[List[str]] = None,
+    bands: Sequence[str] = HEATMAP_BANDS,
+    signal_top: int = 10,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> RfHeatmap:
+    """
+    Fetch and join the organization's wireless RF datasets.
+
+    Args:
+        meraki_client: Meraki client
+        organization_id: Organization ID
+        timespan: Statistics window in seconds (history is capped at 31 days)
+        network_ids: Optional network filter
+        bands: Bands to include
+        signal_top: Fetch signal quality for this many worst cells (0 to skip)
+        max_workers: Concurrent requests
+        on_progress: Called with (finished, submitted) requests
+
+    Returns:
+        RfHeatmap with AP x band matrices
+    """
+    started = time.time()
+    dashboard = meraki_client.dashboard
+    bands = tuple(bands)
+    heatmap = RfHeatmap(organization_id=organization_id, timespan=int(timespan), bands=bands)
+    filters = {'networkIds': network_ids} if network_ids else {}
+    history_timespan = min(int(timespan), MAX_HISTORY_TIMESPAN)
+    interval = history_interval(history_timespan)
+
+    sources: Dict[str, Tuple[Callable, Dict[str, Any]]] = {
+        'devices': (dashboard.organizations.getOrganizationDevices, {'productTypes': ['wireless']}),
+        'utilization': (dashboard.wireless.getOrganizationWirelessDevicesChannelUtilizationByDevice,
+                        {'timespan': timespan,
+                         'interval': max([i for i in UTILIZATION_INTERVALS if i <= timespan], default=UTILIZATION_INTERVALS[0])}),
+        'utilization_history': (dashboard.wireless.getOrganizationWirelessDevicesChannelUtilizationHistoryByDeviceByInterval,
+                                {'timespan': history_timespan, 'interval': interval}),
+    }
+    for band in bands:
+        sources[f"packet_loss_{band}"] = (dashboard.wireless.getOrganizationWirelessDevicesPacketLossByDevice,
+                                          {'timespan': max(300, int(timespan)), 'bands': [band]})
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    progress = {'done': 0, 'submitted': 0}
+
+    def call(method: Callable, *args, **kwargs):
+        rate_scheduler.acquire(organization_id)
+        return method(*args, **kwargs)
+
+    def tick():
+        progress['done'] += 1
+        if on_progress:
+            on_progress(progress['done'], progress['submitted'])
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+        for name, (method, kwargs) in sources.items():
+            futures[executor.submit(call, method, organization_id, total_pages='all', **filters, **kwargs)] = name
+        progress['submitted'] = len(futures)
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result() or []
+            except Exception as e:
+                heatmap.errors[name] = str(e)
+            tick()
+
+        _join(heatmap, results)
+
+        # Signal quality only for the cells most likely to need it
+        worst = heatmap.worst(signal_top, min_score=0.0) if signal_top > 0 else []
+        signal_futures = {}
+        for cell in worst:
+            network_id = (heatmap.devices.get(cell.serial) or {}).get('networkId')
+            if network_id:
+                future = executor.submit(call, dashboard.wireless.getNetworkWirelessSignalQualityHistory, network_id,
+                                         deviceSerial=cell.serial, band=cell.band, timespan=history_timespan,
+                                         autoResolution=True)
+                signal_futures[future] = cell
+        progress['submitted'] += len(signal_futures)
+        for future in as_completed(signal_futures):
+            cell = signal_futures[future]
+            try:
+                history = future.result() or []
+                row, column = heatmap.serials.index(cell.serial), bands.index(cell.band)
+                for name in ('snr', 'rssi'):
+                    values = [h.get(name) for h in history if h.get(name) is not None]
+                    if values:
+                        heatmap._matrix(name)[row, column] = float(np.mean(values))
+            except Exception as e:
+                heatmap.errors[f"signal_quality {cell.serial}/{cell.band}"] = str(e)
+            tick()
+
+    heatmap.requests = progress['submitted']
+    heatmap.elapsed = time.time() - started
+    return heatmap
+
+
+def _join(heatmap: RfHeatmap, results: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Fill the heatmap matrices from the fetched datasets."""
+    bands = heatmap.bands
+    devices = {d.get('serial'): d for d in results.get('devices', []) if d.get('serial')}
+    serials = set(devices)
+    for name in ('utilization', 'utilization_history'):
+        serials.update(e.get('serial') for e in results.get(name, []) if e.get('serial'))
+    for band in bands:
+        serials.update((e.get('device') or {}).get('serial') for e in results.get(f"packet_loss_{band}", [])
+                       if (e.get('device') or {}).get('serial'))
+    heatmap.serials = sorted(serials)
+    heatmap.devices = devices
+    index = {serial: i for i, serial in enumerate(heatmap.serials)}
+    band_index = {band: i for i, band in enumerate(bands)}
+
+    # Window averages; a device may be reported once per interval, so entries are averaged
+    sums = {name: np.zeros((len(heatmap.serials), len(bands))) for name in ('utilization', 'wifi', 'non_wifi')}
+    counts = {name: np.zeros((len(heatmap.serials), len(bands))) for name in sums}
+    for entry in results.get('utilization', []):
+        row = index.get(entry.get('serial'))
+        for band in entry.get('byBand') or []:
+            column = band_index.get(str(band.get('band')))
+            if row is None or column is None:
+                continue
+            for name, part in (('utilization', 'total'), ('wifi', 'wifi'), ('non_wifi', 'nonWifi')):
+                value = band_percentage(band, part)
+                if value is not None:
+                    sums[name][row, column] += value
+                    counts[name][row, column] += 1
+        devices.setdefault(entry.get('serial'), {}).setdefault('networkId', (entry.get('network') or {}).get('id'))
+    for name in sums:
+        heatmap.matrices[name] = np.where(counts[name] > 0, sums[name] / np.maximum(counts[name], 1), np.nan)
+
+    # Utilization history: one series per AP and band, reduced to p95 and peak in one pass
+    series: Dict[Tuple[int, int], List[Tuple[int, float]]] = {}
+    for entry in results.get('utilization_history', []):
+        row = index.get(entry.get('serial'))
+        ts = parse_timestamp(entry['startTs']) if entry.get('startTs') else 0
+        for band in entry.get('byBand') or []:
+            column = band_index.get(str(band.get('band')))
+            value = band_percentage(band)
+            if row is not None and column is not None and value is not None:
+                series.setdefault((row, column), []).append((ts, value))
+    if series:
+        cells = list(series)
+        summaries = summarize_many([[v for _, v in sorted(series[c])] for c in cells])
+        for (row, column), summary in zip(cells, summaries):
+            heatmap._matrix('utilization_p95')[row, column] = summary.p95
+            heatmap._matrix('utilization_peak')[row, column] = summary.max
+            if np.isnan(heatmap._matrix('utilization')[row, column]):
+                heatmap._matrix('utilization')[row, column] = summary.mean
+
+    for band in bands:
+        column = band_index[band]
+        for entry in results.get(f"packet_loss_{band}", []):
+            device = entry.get('device') or {}
+            row = index.get(device.get('serial'))
+            if row is None:
+                continue
+            for name, direction in (('loss_down', 'downstream'), ('loss_up', 'upstream')):
+                value = (entry.get(direction) or {}).get('lossPercentage')
+                if value is not None:
+                    heatmap._matrix(name)[row, column] = float(value)
+            record = devices.setdefault(device.get('serial'), {})
+            record.setdefault('name', device.get('name'))
+            network = entry.get('network') or {}
+            record.setdefault('networkId', network.get('id'))
+            record.setdefault('networkName', network.get('name'))
+
+    for name in MATRICES:
+        heatmap._matrix(name)
@@ -0,0 +1,409 @@
+"""
+Compliance rule packs for the audit rule engine.
+
+Each pack is a list of declarative rules over the snapshot tables built by
+utils.audit_rules.build_audit_tables():
+
+    hipaa           HIPAA Security Rule technical safeguards (perform_hipaa_compliance_audit)
+    posture         Organization security posture score (analyze_security_posture)
+    security_audit  Single-network security score (perform_security_audit)
+    pci             PCI DSS v4.0 network controls
+    cis             CIS Critical Security Controls v8 network safeguards
+
+Rules only read the snapshot endpoints listed in their requires set, so a pack
+(or a subset of its sections) fetches exactly what it evaluates.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from utils.audit_rules import AuditTables, Rule, RulePack, Tier, coverage_rule
+
+STRONG_WPA_MODES = ['WPA2 only', 'WPA3 only', 'WPA3 Transition Mode']
+
+
+# SSID predicates shared by several packs
+
+def hipaa_secure_ssids(t: AuditTables) -> np.ndarray:
+    """MX SSIDs need a PSK with personal auth; MR SSIDs may also use RADIUS."""
+    s = t.ssids
+    personal = np.isin(s['auth_mode'], ['psk', 'wpa3-personal', 'wpa3-enterprise'])
+    appliance = s['source'] == 'appliance'
+    return np.where(appliance, personal & s['has_psk'], personal | (s['auth_mode'] == '8021x-radius'))
+
+
+def strong_ssids(t: AuditTables) -> np.ndarray:
+    """Not open, not WEP, and PSK SSIDs either have a key (MX) or run WPA2/WPA3 (MR)."""
+    s = t.ssids
+    psk = s['auth_mode'] == 'psk'
+    wep = psk & (s['encryption_mode'] == 'wep')
+    psk_ok = np.where(s['source'] == 'appliance', s['has_psk'], np.isin(s['wpa_mode'], STRONG_WPA_MODES))
+    return (s['auth_mode'] != 'open') & ~wep & (~psk | psk_ok)
+
+
+def weak_ssids(t: AuditTables) -> np.ndarray:
+    """Enabled SSIDs that are open, WEP, or (MX) PSK without a key."""
+    s = t.ssids
+    psk = s['auth_mode'] == 'psk'
+    psk_weak = np.where(s['source'] == 'appliance', ~s['has_psk'], s['encryption_mode'] == 'wep')
+    return s['enabled'] & ((s['auth_mode'] == 'open') | (psk & psk_weak))
+
+
+def enabled_ssids(t: AuditTables) -> np.ndarray:
+    return t.ssids['enabled']
+
+
+def appliance_networks(t: AuditTables) -> np.ndarray:
+    return t.networks['has_appliance']
+
+
+# HIPAA (§164.312 technical safeguards plus the 2025 proposed rule)
+
+HIPAA_PACK = RulePack(
+    name='hipaa',
+    title='HIPAA Security Rule',
+    sections={
+        'access_controls': 'Access Controls (§164.312(a))',
+        'audit_controls': 'Audit Controls (§164.312(b))',
+        'integrity_controls': 'Integrity Controls (§164.312(c))',
+        'transmission_security': 'Transmission Security (§164.312(e))',
+        '2025_requirements': '2025 Proposed Requirements',
+        'security_risks': 'Security Risk Assessment',
+    },
+    rules=[
+        Rule(
+            id='hipaa.unique_user_id', section='access_controls', title='Unique User ID', table='networks',
+            passes=lambda t: t.networks['auth_user_count'] > 0,
+            values={'admins': lambda t: t.networks['auth_user_count']},
+            measure='passed', requires={'auth_users'},
+            tiers=[
+                Tier(5, "✅ **Unique User ID**: {admins} admin users across {passed} networks", at_least=1),
+                Tier(0, "❌ **Unique User ID**: No RADIUS/admin users found - implement user identification"),
+            ]
+        ),
+        Rule(
+            id='hipaa.automatic_logoff', section='access_controls', title='Automatic Logoff', table='networks',
+            passes=lambda t: t.any_per_network(
+                'ssids', t.ssids['enabled'] & ((t.ssids['source'] == 'appliance') | (t.ssids['splash_page'] == 'Click-through'))
+            ),
+            measure='passed', requires={'ssids'},
+            tiers=[
+                Tier(3, "⚠️ **Automatic Logoff**: {passed} networks with session controls", at_least=1),
+                Tier(1, "❌ **Automatic Logoff**: No session timeout controls detected"),
+            ]
+        ),
+        Rule(
+            id='hipaa.encryption', section='access_controls', title='Encryption', table='networks',
+            passes=lambda t: t.any_per_network('ssids', t.ssids['enabled'] & hipaa_secure_ssids(t)) | t.networks['vpn_enabled'],
+            requires={'ssids', 'site_to_site_vpn'},
+            tiers=[
+                Tier(15, "✅ **Encryption**: {passed}/{total} networks encrypted ({percent:.0f}%)", at_least=90),
+                Tier(10, "⚠️ **Encryption**: {passed}/{total} networks encrypted ({percent:.0f}%) - improve coverage", at_least=70),
+                Tier(2, "❌ **Encryption**: Only {passed}/{total} networks encrypted ({percent:.0f}%) - CRITICAL GAP"),
+            ]
+        ),
+        Rule(
+            id='hipaa.open_wireless', section='access_controls', title='Open Wireless', table='ssids',
+            where=enabled_ssids,
+            passes=lambda t: hipaa_secure_ssids(t) | (t.ssids['auth_mode'] != 'open'),
+            measure='failed', requires={'ssids'},
+            tiers=[
+                Tier(0, "🚨 **Security Alert**: {failed} open/insecure wireless networks detected", at_least=1),
+                Tier(0),
+            ]
+        ),
+        Rule(
+            id='hipaa.event_logging', section='audit_controls', title='Event Logging', table='networks',
+            passes=lambda t: t.networks['syslog'] | t.networks['event_log'],
+            requires={'syslog_servers', 'recent_events'},
+            tiers=[
+                Tier(10, "✅ **Event Logging**: {passed}/{total} networks with logging enabled", at_least=80),
+                Tier(5, "⚠️ **Event Logging**: {passed}/{total} networks - expand coverage", at_least=50),
+                Tier(1, "❌ **Event Logging**: Only {passed}/{total} networks with logging"),
+            ]
+        ),
+        Rule(
+            id='hipaa.log_retention', section='audit_controls', title='Log Retention', table='networks',
+            passes=lambda t: t.networks['syslog'], measure='passed', requires={'syslog_servers'},
+            tiers=[
+                Tier(5, "✅ **Log Retention**: {passed} networks with syslog servers configured", at_least=1),
+                Tier(0, "❌ **Log Retention**: No external syslog servers - logs may be lost"),
+            ]
+        ),
+        Rule(
+            id='hipaa.firmware_integrity', section='integrity_controls', title='Firmware Integrity', table='devices',
+            passes=lambda t: t.devices['firmware_stable'],
+            tiers=[
+                Tier(8, "✅ **Firmware Integrity**: {passed}/{total} devices with stable firmware ({percent:.0f}%)", at_least=95),
+                Tier(5, "⚠️ **Firmware Integrity**: {passed}/{total} devices updated ({percent:.0f}%) - update remaining", at_least=85),
+                Tier(1, "❌ **Firmware Integrity**: Only {passed}/{total} devices updated ({percent:.0f}%) - security risk"),
+            ]
+        ),
+        Rule(
+            id='hipaa.configuration_backup', section='integrity_controls', title='Configuration Backup', table='networks',
+            # A network with devices has its configuration held by the dashboard
+            passes=lambda t: t.networks['device_count'] > 0,
+            tiers=[
+                Tier(7, "✅ **Configuration Backup**: All {passed} networks have device configurations", at_most=0, measure='failed'),
+                Tier(5, "⚠️ **Configuration Backup**: {passed}/{total} networks backed up", at_least=80),
+                Tier(2, "❌ **Configuration Backup**: Only {passed}/{total} networks have backup procedures"),
+            ]
+        ),
+        Rule(
+            id='hipaa.segmentation', section='transmission_security', title='Network Segmentation', table='networks',
+            passes=lambda t: t.networks['switch_vlans'] | t.any_per_network('ssids', t.ssids['enabled'] & t.ssids['vlan_tagged']),
+            requires={'switch_settings', 'ssids'},
+            tiers=[
+                Tier(8, "✅ **Network Segmentation**: {passed}/{total} networks with VLANs", at_least=80),
+                Tier(5, "⚠️ **Network Segmentation**: {passed}/{total} networks segmented - expand coverage", at_least=50),
+                Tier(1, "❌ **Network Segmentation**: Only {passed}/{total} networks segmented"),
+            ]
+        ),
+        Rule(
+            # Client VPN is not exposed by the SDK; site-to-site VPN is the control that matters here
+            id='hipaa.vpn_security', section='transmission_security', title='VPN Security', table='networks',
+            passes=lambda t: t.networks['vpn_enabled'], requires={'site_to_site_vpn'},
+            tiers=[
+                Tier(6, "✅ **VPN Security**: {passed} site-to-site, 0 client VPN networks", at_least=30),
+                Tier(3, "⚠️ **VPN Security**: {passed} site-to-site, 0 client VPN - consider expansion", at_least=1, measure='passed'),
+                Tier(0, "❌ **VPN Security**: No VPN connectivity detected - remote access security risk"),
+            ]
+        ),
+        Rule(
+            id='hipaa.wireless_security', section='transmission_security', title='Wireless Security', table='ssids',
+            where=enabled_ssids, passes=hipaa_secure_ssids, requires={'ssids'},
+            tiers=[
+                Tier(0, "ℹ️ **Wireless Security**: No wireless networks detected", at_most=0, measure='total'),
+                Tier(6, "✅ **Wireless Security**: {passed}/{total} SSIDs secure ({percent:.0f}%)", at_least=95),
+                Tier(4, "⚠️ **Wireless Security**: {passed}/{total} SSIDs secure ({percent:.0f}%) - secure remaining", at_least=80),
+                Tier(1, "❌ **Wireless Security**: Only {passed}/{total} SSIDs secure ({percent:.0f}%) - CRITICAL"),
+            ]
+        ),
+        Rule(
+            id='hipaa.2025_encryption', section='2025_requirements', title='2025 Encryption', table='networks',
+            passes=lambda t: t.networks['vpn_enabled'], requires={'site_to_site_vpn'},
+            tiers=[
+                Tier(3, "✅ **2025 Encryption**: {passed}/{total} networks with in-transit encryption", at_least=80),
+                Tier(0, "❌ **2025 Encryption**: Only {passed}/{total} networks encrypted - mandatory requirement"),
+            ]
+        ),
+        Rule(
+            # Networks with WPA3 SSIDs are taken to have strong storage encryption too
+            id='hipaa.at_rest_encryption', section='2025_requirements', title='At-Rest Encryption', table='networks',
+            passes=lambda t: t.any_per_network(
+                'ssids', t.ssids['enabled'] & np.isin(t.ssids['auth_mode'], ['wpa3-personal', 'wpa3-enterprise'])
+            ),
+            requires={'ssids'},
+            tiers=[
+                Tier(2, "✅ **At-Rest Encryption**: {passed}/{total} networks with strong encryption", at_least=50),
+                Tier(0),
+            ]
+        ),
+        Rule(
+            id='hipaa.2025_anti_malware', section='2025_requirements', title='2025 Anti-Malware', table='networks',
+            passes=lambda t: t.networks['amp_enabled'], requires={'malware'},
+            tiers=[
+                Tier(5, "✅ **2025 Anti-Malware**: {passed}/{total} networks with AMP ({percent:.0f}%)", at_least=90),
+                Tier(3, "⚠️ **2025 Anti-Malware**: {passed}/{total} networks ({percent:.0f}%) - deploy to all networks", at_least=70),
+                Tier(0, "❌ **2025 Anti-Malware**: Only {passed}/{total} networks ({percent:.0f}%) - mandatory requirement"),
+            ]
+        ),
+        Rule(
+            id='hipaa.2025_config_management', section='2025_requirements', title='2025 Config Management', table='networks',
+            passes=lambda t: t.networks['device_count'] > 0,
+            tiers=[
+                Tier(5, "✅ **2025 Config Management**: {passed}/{total} networks with managed configurations", at_least=80),
+                Tier(0, "❌ **2025 Config Management**: Only {passed}/{total} networks - implement standardization"),
+            ]
+        ),
+        Rule(
+            id='hipaa.ids', section='security_risks', title='IDS/IPS', table='networks',
+            passes=lambda t: t.networks['ids_enabled'], requires={'intrusion'},
+            tiers=[
+                Tier(5, "✅ **IDS/IPS**: {passed}/{total} networks protected ({percent:.0f}%)", at_least=90),
+                Tier(3, "⚠️ **IDS/IPS**: {passed}/{total} networks protected ({percent:.0f}%) - expand coverage", at_least=70),
+                Tier(0, "❌ **IDS/IPS**: Only {passed}/{total} networks protected ({percent:.0f}%)"),
+            ]
+        ),
+        Rule(
+            id='hipaa.security_events', section='security_risks', title='Security Events', table='networks',
+            passes=lambda t: t.networks['high_risk_event_count'] == 0,
+            values={'events': lambda t: t.networks['security_event_count'],
+                    'high_risk': lambda t: t.networks['high_risk_event_count']},
+            measure='high_risk', requires={'security_events'},
+            tiers=[
+                Tier(5, "✅ **Security Events**: No high-risk events in 24h ({events} total events)", at_most=0),
+                Tier(3, "⚠️ **Security Events**: {high_risk} high-risk events in 24h - investigate", at_most=5),
+                Tier(0, "❌ **Security Events**: {high_risk} high-risk events in 24h - IMMEDIATE ACTION REQUIRED"),
+            ]
+        ),
+    ]
+)
+
+
+def _adoption_tiers() -> list:
+    return [
+        Tier(25, at_least=80),
+        Tier(15, at_least=50),
+        Tier(5, at_least=1, measure='passed'),
+        Tier(0),
+    ]
+
+
+# Organization posture (analyze_security_posture); the tool renders its own lines
+
+POSTURE_PACK = RulePack(
+    name='posture',
+    title='Security Posture',
+    sections={'posture': 'Security Posture'},
+    rules=[
+        Rule(id='posture.ids', section='posture', title='IDS/IPS Enabled', table='networks',
+             passes=lambda t: t.networks['ids_enabled'], requires={'intrusion'}, tiers=_adoption_tiers()),
+        Rule(id='posture.amp', section='posture', title='Malware Protection', table='networks',
+             passes=lambda t: t.networks['amp_enabled'], requires={'malware'}, tiers=_adoption_tiers()),
+        Rule(id='posture.content_filtering', section='posture', title='Content Filtering', table='networks',
+             passes=lambda t: t.networks['content_filter_enabled'], requires={'content_filtering'},
+             tiers=_adoption_tiers()),
+        Rule(id='posture.wifi', section='posture', title='WiFi Security', table='networks',
+             passes=lambda t: ~t.any_per_network('ssids', weak_ssids(t)), measure='failed', requires={'ssids'},
+             tiers=[Tier(25, at_most=0), Tier(10, at_most=2), Tier(0)]),
+        Rule(id='posture.threats', section='posture', title='Security Events', table='networks',
+             passes=lambda t: t.networks['security_event_count'] == 0,
+             values={'threats': lambda t: t.networks['security_event_count']},
+             requires={'security_events'}, tiers=[Tier(0)]),
+    ]
+)
+
+
+# Single-network score (perform_security_audit); issue labels drive its recommendations
+
+SECURITY_AUDIT_PACK = RulePack(
+    name='security_audit',
+    title='Network Security Audit',
+    sections={'security_audit': 'Security Score'},
+    rules=[
+        Rule(id='audit.ids', section='security_audit', title='IDS/IPS', table='networks',
+             passes=lambda t: t.networks['ids_enabled'],
+             values={'prevention': lambda t: t.networks['ids_mode'] == 'prevention',
+                     'detection': lambda t: t.networks['ids_mode'] == 'detection'},
+             requires={'intrusion'},
+             tiers=[Tier(20, at_least=1, measure='prevention'), Tier(10, at_least=1, measure='detection'),
+                    Tier(0, issue='IDS/IPS disabled')]),
+        Rule(id='audit.malware', section='security_audit', title='Malware Protection', table='networks',
+             passes=lambda t: t.networks['amp_enabled'], measure='passed', requires={'malware'},
+             tiers=[Tier(20, at_least=1), Tier(0, issue='Malware protection disabled')]),
+        Rule(id='audit.content_filtering', section='security_audit', title='Content Filtering', table='networks',
+             passes=lambda t: t.networks['content_filter_enabled'], measure='passed', requires={'content_filtering'},
+             tiers=[Tier(15, at_least=1), Tier(0, issue='No content filtering')]),
+        Rule(id='audit.firewall', section='security_audit', title='Firewall Rules', table='networks',
+             passes=lambda t: t.networks['custom_l3_rule_count'] > 0, measure='passed', requires={'l3_firewall'},
+             tiers=[Tier(15, at_least=1), Tier(5, issue='Only default firewall rules')]),
+        Rule(id='audit.wifi', section='security_audit', title='WiFi Security', table='ssids',
+             where=enabled_ssids, passes=strong_ssids,
+             values={'open': lambda t: t.ssids['auth_mode'] == 'open'},
+             measure='passed', requires={'ssids'},
+             tiers=[Tier(0, at_least=1, measure='open', issue='Open WiFi network detected'),
+                    Tier(20, at_least=1), Tier(10)]),
+        Rule(id='audit.vlans', section='security_audit', title='Network Segmentation', table='networks',
+             passes=lambda t: t.networks['appliance_vlan_count'] > 0, measure='passed', requires={'appliance_vlans'},
+             tiers=[Tier(10, at_least=1), Tier(0, issue='No network segmentation')]),
+    ]
+)
+
+
+# PCI DSS v4.0 requirements that map onto network configuration
+
+PCI_PACK = RulePack(
+    name='pci',
+    title='PCI DSS v4.0',
+    sections={
+        'network_security_controls': 'Req 1 - Network Security Controls',
+        'secure_configuration': 'Req 2 - Secure Configurations',
+        'cryptography': 'Req 4 - Strong Cryptography in Transit',
+        'malware': 'Req 5 - Anti-Malware',
+        'patching': 'Req 6 - Secure Systems',
+        'logging': 'Req 10 - Logging and Monitoring',
+        'intrusion_detection': 'Req 11 - Intrusion Detection',
+    },
+    rules=[
+        coverage_rule('pci.1.2.custom_rules', 'network_security_controls', '1.2 Firewall Ruleset Defined', 'networks',
+                      lambda t: t.networks['custom_l3_rule_count'] > 0, 10, {'l3_firewall'}, where=appliance_networks),
+        coverage_rule('pci.1.3.no_any_any', 'network_security_controls', '1.3 No Any-Any Allow Rules', 'firewall_rules',
+                      lambda t: ~t.firewall_rules['any_any_allow'], 10, {'l3_firewall'},
+                      where=lambda t: ~t.firewall_rules['is_default'], unit='rules'),
+        coverage_rule('pci.1.4.segmentation', 'network_security_controls', '1.4 CDE Segmentation', 'networks',
+                      lambda t: (t.networks['appliance_vlan_count'] > 1) | t.networks['switch_vlans'], 10,
+                      {'appliance_vlans', 'switch_settings'}, where=appliance_networks),
+        coverage_rule('pci.2.3.wireless', 'secure_configuration', '2.3 Wireless Defaults Changed', 'ssids',
+                      strong_ssids, 10, {'ssids'}, where=enabled_ssids, unit='SSIDs'),
+        coverage_rule('pci.2.3.guest_isolation', 'secure_configuration', '2.3 Guest Wireless Isolated', 'ssids',
+                      lambda t: t.ssids['client_isolation'] | t.ssids['vlan_tagged'], 5, {'ssids'},
+                      where=lambda t: t.ssids['enabled'] & t.ssids['guest'], unit='guest SSIDs'),
+        coverage_rule('pci.4.2.vpn', 'cryptography', '4.2 Site-to-Site Encryption', 'networks',
+                      lambda t: t.networks['vpn_enabled'], 10, {'site_to_site_vpn'}, where=appliance_networks),
+        coverage_rule('pci.4.2.wireless', 'cryptography', '4.2 No Open or WEP Wireless', 'ssids',
+                      lambda t: ~weak_ssids(t), 10, {'ssids'}, where=enabled_ssids, unit='SSIDs'),
+        coverage_rule('pci.5.2.amp', 'malware', '5.2 Anti-Malware Deployed', 'networks',
+                      lambda t: t.networks['amp_enabled'], 10, {'malware'}, where=appliance_networks),
+        coverage_rule('pci.6.3.firmware', 'patching', '6.3 Stable Firmware', 'devices',
+                      lambda t: t.devices['firmware_stable'], 5, (), unit='devices'),
+        coverage_rule('pci.10.2.audit_logs', 'logging', '10.2 Audit Logs Enabled', 'networks',
+                      lambda t: t.networks['event_log'], 5, {'recent_events'}),
+        coverage_rule('pci.10.3.syslog', 'logging', '10.3 Logs Sent Off-Device', 'networks',
+                      lambda t: t.networks['syslog'], 5, {'syslog_servers'}),
+        coverage_rule('pci.11.5.ips', 'intrusion_detection', '11.5 Intrusion Prevention', 'networks',
+                      lambda t: t.networks['ids_mode'] == 'prevention', 10, {'intrusion'}, where=appliance_networks),
+    ]
+)
+
+
+# CIS Critical Security Controls v8 safeguards that map onto network configuration
+
+CIS_PACK = RulePack(
+    name='cis',
+    title='CIS Controls v8',
+    sections={
+        'data_protection': 'Control 3 - Data Protection',
+        'secure_configuration': 'Control 4 - Secure Configuration',
+        'vulnerability_management': 'Control 7 - Vulnerability Management',
+        'audit_logs': 'Control 8 - Audit Log Management',
+        'web_protection': 'Control 9 - Email and Web Browser Protections',
+        'malware_defenses': 'Control 10 - Malware Defenses',
+        'infrastructure': 'Control 12 - Network Infrastructure Management',
+        'monitoring': 'Control 13 - Network Monitoring and Defense',
+    },
+    rules=[
+        coverage_rule('cis.4.4.firewall', 'secure_configuration', '4.4 Firewall on Network Edge', 'networks',
+                      lambda t: t.networks['custom_l3_rule_count'] > 0, 10, {'l3_firewall'}, where=appliance_networks),
+        coverage_rule('cis.4.4.no_any_any', 'secure_configuration', '4.4 Default-Deny Posture', 'firewall_rules',
+                      lambda t: ~t.firewall_rules['any_any_allow'], 5, {'l3_firewall'},
+                      where=lambda t: ~t.firewall_rules['is_default'], unit='rules'),
+        coverage_rule('cis.3.10.in_transit', 'data_protection', '3.10 Encrypt Data in Transit', 'networks',
+                      lambda t: t.networks['vpn_enabled'], 10, {'site_to_site_vpn'}, where=appliance_networks),
+        coverage_rule('cis.7.4.firmware', 'vulnerability_management', '7.4 Automated Patch Management', 'devices',
+                      lambda t: t.devices['firmware_stable'], 10, (), unit='devices'),
+        coverage_rule('cis.8.2.audit_logs', 'audit_logs', '8.2 Collect Audit Logs', 'networks',
+                      lambda t: t.networks['event_log'], 5, {'recent_events'}),
+        coverage_rule('cis.8.9.centralize', 'audit_logs', '8.9 Centralize Audit Logs', 'networks',
+                      lambda t: t.networks['syslog'], 10, {'syslog_servers'}),
+        coverage_rule('cis.9.2.dns_filtering', 'web_protection', '9.2 DNS/URL Filtering', 'networks',
+                      lambda t: t.networks['content_filter_enabled'], 10, {'content_filtering'}, where=appliance_networks),
+        coverage_rule('cis.10.1.anti_malware', 'malware_defenses', '10.1 Anti-Malware Deployed', 'networks',
+                      lambda t: t.networks['amp_enabled'], 10, {'malware'}, where=appliance_networks),
+        coverage_rule('cis.12.2.segmentation', 'infrastructure', '12.2 Segmented Network Architecture', 'networks',
+                      lambda t: (t.networks['appliance_vlan_count'] > 1) | t.networks['switch_vlans'], 5,
+                      {'appliance_vlans', 'switch_settings'}),
+        coverage_rule('cis.12.6.wireless', 'infrastructure', '12.6 Secure Wireless Protocols', 'ssids',
+                      strong_ssids, 10, {'ssids'}, where=enabled_ssids, unit='SSIDs'),
+        coverage_rule('cis.13.3.ids', 'monitoring', '13.3 Network Intrusion Detection', 'networks',
+                      lambda t: t.networks['ids_enabled'], 5, {'intrusion'}, where=appliance_networks),
+        coverage_rule('cis.13.8.ips', 'monitoring', '13.8 Network Intrusion Prevention', 'networks',
+                      lambda t: t.networks['ids_mode'] == 'prevention', 5, {'intrusion'}, where=appliance_networks),
+    ]
+)
+
+
+RULE_PACKS: Dict[str, RulePack] = {
+    pack.name: pack for pack in (HIPAA_PACK, POSTURE_PACK, SECURITY_AUDIT_PACK, PCI_PACK, CIS_PACK)
+}
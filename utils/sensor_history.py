@@ -0,0 +1,466 @@
+"""
+Windowed, parallel retrieval of MT sensor reading history.
+
+getOrganizationSensorReadingsHistory accepts at most seven days per call and
+pages through every reading in the window one page after another, so thirty
+days across hundreds of sensors used to mean one long serial crawl. Here the
+range is split into windows (one day by default) that are fetched
+concurrently under the organization's rate budget, and the readings are
+merged into one sorted NumPy array pair (timestamps, values) per sensor and
+metric. Summaries are computed for all series at once with
+utils.timeseries_stats, and long series are reduced with LTTB or min-max
+downsampling for display.
+
+SensorReadingsCache keeps the merged series on disk per organization together
+with the time ranges already fetched for each filter (serials, networks,
+metrics). A repeated "last 24 hours" query then only fetches readings newer
+than the last fetch; everything else is served from the cache.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import MCP_AUDIT_CONCURRENCY, MCP_SENSOR_CACHE_RETENTION, MCP_STATE_DIR
+from utils.rate_limit import rate_scheduler
+from utils.timeseries_stats import SeriesSummary, lttb_indices, min_max_indices, summarize_many
+from utils.uplink_history import format_timestamp, parse_timestamp
+
+# Longest t0..t1 the endpoint accepts, and the window used to split longer ranges
+MAX_WINDOW = 7 * 86400
+DEFAULT_WINDOW = 86400
+
+# Metric -> (path to the numeric value inside a reading, unit)
+SENSOR_METRICS = {
+    'temperature': (('temperature', 'celsius'), '°C'),
+    'humidity': (('humidity', 'relativePercentage'), '%'),
+    'water': (('water', 'present'), ''),
+    'door': (('door', 'open'), ''),
+    'tvoc': (('tvoc', 'concentration'), 'ppb'),
+    'pm25': (('pm25', 'concentration'), 'µg/m³'),
+    'co2': (('co2', 'concentration'), 'ppm'),
+    'noise': (('noise', 'ambient', 'level'), 'dBA'),
+    'indoorAirQuality': (('indoorAirQuality', 'score'), ''),
+    'battery': (('battery', 'percentage'), '%'),
+    'voltage': (('voltage', 'level'), 'V'),
+    'current': (('current', 'draw'), 'A'),
+    'realPower': (('realPower', 'draw'), 'W'),
+    'apparentPower': (('apparentPower', 'draw'), 'VA'),
+    'powerFactor': (('powerFactor', 'percentage'), '%'),
+    'frequency': (('frequency', 'level'), 'Hz'),
+}
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+# Readings can arrive a few minutes late; ranges this close to the fetch time are not marked as covered
+REPORTING_DELAY = 600
+
+
+def reading_value(reading: Dict[str, Any], metric: str) -> Optional[float]:
+    """Numeric value of one history reading (booleans such as door/water become 0/1)."""
+    path = SENSOR_METRICS.get(metric, ((metric,), ''))[0]
+    value: Any = reading
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    if isinstance(value, bool):
+        return float(value)
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def split_windows(t0: int, t1: int, window: int = DEFAULT_WINDOW) -> List[Tuple[int, int]]:
+    """Consecutive [start, end) windows covering t0..t1, none longer than the API allows."""
+    window = max(60, min(int(window), MAX_WINDOW))
+    return [(start, min(start + window, t1)) for start in range(int(t0), int(t1), window)]
+
+
+@dataclass
+class SensorSeries:
+    """Readings of one metric from one sensor, sorted by time."""
+
+    serial: str
+    metric: str
+    network_id: Optional[str]
+    network_name: Optional[str]
+    ts: np.ndarray
+    values: np.ndarray
+
+    @property
+    def unit(self) -> str:
+        return SENSOR_METRICS.get(self.metric, ((), ''))[1]
+
+    def downsample(self, points: int, method: str = 'lttb') -> 'SensorSeries':
+        """A copy reduced to about `points` readings (LTTB keeps the shape, minmax keeps every extreme)."""
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Unknown downsampling method '{method}' (use {' or '.join(DOWNSAMPLE_METHODS)})")
+        if method == 'lttb':
+            index = lttb_indices(self.ts, self.values, points)
+        else:
+            index = min_max_indices(self.values, max(1, points // 2))
+        return SensorSeries(self.serial, self.metric, self.network_id, self.network_name,
+                            self.ts[index], self.values[index])
+
+
+@dataclass
+class SensorHistory:
+    """Merged history of an organization's sensors over t0..t1."""
+
+    organization_id: str
+    t0: int
+    t1: int
+    windows: int = 0
+    readings: int = 0
+    series: Dict[Tuple[str, str], SensorSeries] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    # Windows fetched successfully, and readings answered from the local cache instead of the API
+    fetched: List[Tuple[int, int]] = field(default_factory=list)
+    cached: int = 0
+
+    @property
+    def serials(self) -> List[str]:
+        return sorted({serial for serial, _ in self.series})
+
+    @property
+    def metrics(self) -> List[str]:
+        return sorted({metric for _, metric in self.series})
+
+    def select(self, serial: Optional[str] = None, metric: Optional[str] = None) -> List[SensorSeries]:
+        return [s for (sr, m), s in sorted(self.series.items())
+                if (serial is None or sr == serial) and (metric is None or m == metric)]
+
+    def summaries(self, metric: Optional[str] = None) -> List[Tuple[SensorSeries, SeriesSummary]]:
+        """Every series (optionally of one metric) with its statistics, computed in one pass."""
+        selected = self.select(metric=metric)
+        return list(zip(selected, summarize_many([s.values for s in selected])))
+
+
+def _merge(pages: Iterable[List[Dict[str, Any]]]) -> Dict[Tuple[str, str], SensorSeries]:
+    columns: Dict[Tuple[str, str], Tuple[List[int], List[float]]] = {}
+    networks: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    for readings in pages:
+        for reading in readings or []:
+            metric = reading.get('metric')
+            value = reading_value(reading, metric) if metric else None
+            if value is None or not reading.get('ts'):
+                continue
+            serial = reading.get('serial', '')
+            network = reading.get('network') or {}
+            networks.setdefault(serial, (network.get('id'), network.get('name')))
+            ts_list, value_list = columns.setdefault((serial, metric), ([], []))
+            ts_list.append(parse_timestamp(reading['ts']))
+            value_list.append(value)
+
+    series = {}
+    for (serial, metric), (ts_list, value_list) in columns.items():
+        ts = np.asarray(ts_list, dtype=np.int64)
+        values = np.asarray(value_list, dtype=np.float64)
+        order = np.argsort(ts, kind='stable')
+        ts, values = ts[order], values[order]
+        # Readings on a window boundary can be returned by both neighbours
+        keep = np.concatenate(([True], np.diff(ts) > 0)) if len(ts) else np.empty(0, dtype=bool)
+        series[(serial, metric)] = SensorSeries(serial, metric, *networks[serial], ts[keep], values[keep])
+    return series
+
+
+def fetch_sensor_history(
+    meraki_client,
+    organization_id: str,
+    t0: int,
+    t1: int,
+    serials: Optional[List[str]] = None,
+    network_ids: Optional[List[str]] = None,
+    metrics: Optional[List[str]] = None,
+    window: int = DEFAULT_WINDOW,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> SensorHistory:
+    """
+    Fetch sensor readings between t0 and t1 (epoch seconds) in parallel windows.
+
+    Args:
+        meraki_client: Meraki client
+        organization_id: Organization ID
+        t0, t1: Range to fetch; t0 may be up to 365 days back
+        serials, network_ids, metrics: Optional API filters
+        window: Seconds per request window (at most seven days)
+        max_workers: Concurrent windows
+        on_progress: Called with (finished, total) windows
+
+    Returns:
+        SensorHistory with one sorted series per sensor and metric
+    """
+    started = time.time()
+    t0, t1 = int(t0), int(t1)
+    if t0 >= t1:
+        raise ValueError("t0 must be before t1")
+    windows = split_windows(t0, t1, window)
+    history = SensorHistory(organization_id=organization_id, t0=t0, t1=t1, windows=len(windows))
+
+    filters: Dict[str, Any] = {}
+    if serials:
+        filters['serials'] = serials
+    if network_ids:
+        filters['networkIds'] = network_ids
+    if metrics:
+        filters['metrics'] = metrics
+
+    def fetch(start: int, end: int) -> List[Dict[str, Any]]:
+        rate_scheduler.acquire(organization_id)
+        return meraki_client.dashboard.sensor.getOrganizationSensorReadingsHistory(
+            organization_id, total_pages='all', perPage=1000,
+            t0=format_timestamp(start), t1=format_timestamp(end), **filters
+        )
+
+    pages = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(fetch, start, end): (start, end) for start, end in windows}
+        for done, future in enumerate(as_completed(futures), 1):
+            start, end = futures[future]
+            try:
+                readings = future.result() or []
+                pages.append(readings)
+                history.readings += len(readings)
+                history.fetched.append((start, end))
+            except Exception as e:
+                history.errors.append(f"{format_timestamp(start)} → {format_timestamp(end)}: {e}")
+            if on_progress:
+                on_progress(done, len(windows))
+
+    if len(history.errors) == len(windows):
+        raise RuntimeError(history.errors[0])
+    history.series = _merge(pages)
+    history.fetched.sort()
+    history.elapsed = time.time() - started
+    return history
+
+
+Interval = Tuple[int, int]
+# (serials, network IDs, metrics) a range was fetched with; None means unfiltered
+Scope = Tuple[Optional[Tuple[str, ...]], Optional[Tuple[str, ...]], Optional[Tuple[str, ...]]]
+
+
+def _scope(serials: Optional[List[str]], network_ids: Optional[List[str]], metrics: Optional[List[str]]) -> Scope:
+    return tuple(tuple(sorted(set(f))) if f else None for f in (serials, network_ids, metrics))
+
+
+def _covers(scope: Scope, query: Scope) -> bool:
+    """True when data fetched with `scope` includes everything `query` asks for."""
+    return all(have is None or (want is not None and set(want) <= set(have)) for have, want in zip(scope, query))
+
+
+def _union(intervals: Iterable[Interval]) -> List[Interval]:
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def _gaps(covered: List[Interval], t0: int, t1: int) -> List[Interval]:
+    """Parts of [t0, t1] not in the (merged) covered intervals."""
+    gaps, cursor = [], t0
+    for start, end in covered:
+        if end <= cursor or start >= t1:
+            continue
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < t1:
+        gaps.append((cursor, t1))
+    return gaps
+
+
+def _combine(old: SensorSeries, new: SensorSeries) -> SensorSeries:
+    """Union of two series of the same sensor and metric; readings already cached win."""
+    if not len(old.ts) or (len(new.ts) and new.ts[0] > old.ts[-1]):
+        ts, values = np.concatenate((old.ts, new.ts)), np.concatenate((old.values, new.values))
+    else:
+        # Backfill or gap repair: merge, keeping the first reading per timestamp
+        ts, order = np.unique(np.concatenate((old.ts, new.ts)), return_index=True)
+        values = np.concatenate((old.values, new.values))[order]
+    return SensorSeries(old.serial, old.metric, old.network_id or new.network_id,
+                        old.network_name or new.network_name, ts, values)
+
+
+class SensorReadingsCache:
+    """Per-organization on-disk cache of sensor series and of the ranges already fetched."""
+
+    def __init__(self, directory: Optional[str] = None, retention: int = MCP_SENSOR_CACHE_RETENTION):
+        self.directory = directory or os.path.join(MCP_STATE_DIR, 'sensor_cache')
+        self.retention = retention
+        self._series: Dict[str, Dict[Tuple[str, str], SensorSeries]] = {}
+        self._coverage: Dict[str, Dict[Scope, List[Interval]]] = {}
+        self._lock = threading.RLock()
+
+    def path(self, organization_id: str) -> str:
+        return os.path.join(self.directory, f"{organization_id}.npz")
+
+    def _org(self, organization_id: str) -> Tuple[Dict[Tuple[str, str], SensorSeries], Dict[Scope, List[Interval]]]:
+        with self._lock:
+            if organization_id not in self._series:
+                self._series[organization_id], self._coverage[organization_id] = self._load(organization_id)
+            return self._series[organization_id], self._coverage[organization_id]
+
+    def covered(self, organization_id: str, scope: Scope) -> List[Interval]:
+        """Ranges already fetched by any query whose filters include `scope`."""
+        _, coverage = self._org(organization_id)
+        with self._lock:
+            return _union(i for have, intervals in coverage.items() if _covers(have, scope) for i in intervals)
+
+    def history(
+        self,
+        meraki_client,
+        organization_id: str,
+        t0: int,
+        t1: int,
+        serials: Optional[List[str]] = None,
+        network_ids: Optional[List[str]] = None,
+        metrics: Optional[List[str]] = None,
+        window: int = DEFAULT_WINDOW,
+        max_workers: int = MCP_AUDIT_CONCURRENCY
+    ) -> SensorHistory:
+        """
+        Sensor history for t0..t1, fetching only the ranges not cached yet.
+
+        Same arguments and result as fetch_sensor_history; history.readings
+        counts readings fetched from the API and history.cached those served
+        from disk.
+        """
+        started = time.time()
+        t0, t1 = int(t0), int(t1)
+        if t0 >= t1:
+            raise ValueError("t0 must be before t1")
+        scope = _scope(serials, network_ids, metrics)
+        result = SensorHistory(organization_id=organization_id, t0=t0, t1=t1)
+
+        for start, end in _gaps(self.covered(organization_id, scope), t0, t1):
+            fetched = fetch_sensor_history(meraki_client, organization_id, start, end, serials, network_ids, metrics,
+                                           window=window, max_workers=max_workers)
+            result.windows += fetched.windows
+            result.readings += fetched.readings
+            result.errors += fetched.errors
+            self.add(organization_id, scope, fetched, now=started)
+
+        series, _ = self._org(organization_id)
+        with self._lock:
+            selected = [s for s in series.values()
+                        if (scope[0] is None or s.serial in scope[0])
+                        and (scope[1] is None or s.network_id in scope[1])
+                        and (scope[2] is None or s.metric in scope[2])]
+        for s in selected:
+            lo, hi = np.searchsorted(s.ts, t0, side='left'), np.searchsorted(s.ts, t1, side='right')
+            if hi > lo:
+                result.series[(s.serial, s.metric)] = SensorSeries(s.serial, s.metric, s.network_id, s.network_name,
+                                                                   s.ts[lo:hi], s.values[lo:hi])
+        total = sum(len(s.ts) for s in result.series.values())
+        result.cached = max(0, total - result.readings)
+        if result.windows:
+            # Persist after slicing, and keep what was just requested even if it is past the retention
+            self.save(organization_id, keep_from=t0)
+        result.elapsed = time.time() - started
+        return result
+
+    def add(self, organization_id: str, scope: Scope, fetched: SensorHistory, now: Optional[float] = None) -> None:
+        """Merge a fetched history and mark its successful windows as covered for `scope`."""
+        now = time.time() if now is None else now
+        series, coverage = self._org(organization_id)
+        with self._lock:
+            for key, new in fetched.series.items():
+                series[key] = _combine(series[key], new) if key in series else new
+            settled = [(start, min(end, int(now) - REPORTING_DELAY)) for start, end in fetched.fetched]
+            settled = [(start, end) for start, end in settled if end > start]
+            coverage[scope] = _union(coverage.get(scope, []) + settled)
+
+    def trim(self, organization_id: str, now: Optional[float] = None, keep_from: Optional[int] = None) -> None:
+        """Drop readings and coverage older than the retention (but nothing from keep_from on)."""
+        cutoff = int((time.time() if now is None else now) - self.retention)
+        if keep_from is not None:
+            cutoff = min(cutoff, int(keep_from))
+        series, coverage = self._org(organization_id)
+        with self._lock:
+            for key in list(series):
+                s = series[key]
+                keep = s.ts >= cutoff
+                if not keep.any():
+                    del series[key]
+                elif not keep.all():
+                    series[key] = SensorSeries(s.serial, s.metric, s.network_id, s.network_name,
+                                               s.ts[keep], s.values[keep])
+            for scope in list(coverage):
+                coverage[scope] = [(max(start, cutoff), end) for start, end in coverage[scope] if end > cutoff]
+                if not coverage[scope]:
+                    del coverage[scope]
+
+    def save(self, organization_id: str, keep_from: Optional[int] = None) -> None:
+        """Write an organization's cache atomically as flat columns plus a JSON index."""
+        self.trim(organization_id, keep_from=keep_from)
+        series, coverage = self._org(organization_id)
+        with self._lock:
+            items = list(series.values())
+            meta = {
+                'series': [[s.serial, s.metric, s.network_id, s.network_name] for s in items],
+                'coverage': [[list(f) if f else None for f in scope] + [intervals] for scope, intervals in coverage.items()],
+            }
+            arrays = {
+                'meta': np.array(json.dumps(meta)),
+                'index': np.concatenate([np.full(len(s.ts), i, dtype=np.int32) for i, s in enumerate(items)]
+                                        or [np.empty(0, np.int32)]),
+                'ts': np.concatenate([s.ts for s in items] or [np.empty(0, np.int64)]),
+                'values': np.concatenate([s.values for s in items] or [np.empty(0, np.float64)]),
+            }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(organization_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temp_path, path)
+
+    def _load(self, organization_id: str) -> Tuple[Dict[Tuple[str, str], SensorSeries], Dict[Scope, List[Interval]]]:
+        try:
+            with np.load(self.path(organization_id)) as data:
+                meta = json.loads(str(data['meta']))
+                index, ts, values = data['index'], data['ts'], data['values']
+                # Series are saved contiguously in index order: slice each one in a single pass
+                bounds = np.searchsorted(index, np.arange(len(meta['series']) + 1))
+                series = {}
+                for i, (serial, metric, network_id, network_name) in enumerate(meta['series']):
+                    rows = slice(bounds[i], bounds[i + 1])
+                    series[(serial, metric)] = SensorSeries(serial, metric, network_id, network_name, ts[rows], values[rows])
+                coverage = {
+                    tuple(tuple(f) if f else None for f in entry[:3]): [tuple(i) for i in entry[3]]
+                    for entry in meta['coverage']
+                }
+        except (OSError, KeyError, ValueError):
+            return {}, {}
+        return series, coverage
+
+    def stats(self, organization_id: str) -> Dict[str, Any]:
+        series, coverage = self._org(organization_id)
+        with self._lock:
+            return {
+                'series': len(series),
+                'readings': sum(len(s.ts) for s in series.values()),
+                'scopes': len(coverage),
+            }
+
+    def clear(self, organization_id: str) -> None:
+        with self._lock:
+            self._series[organization_id], self._coverage[organization_id] = {}, {}
+        try:
+            os.remove(self.path(organization_id))
+        except FileNotFoundError:
+            pass
+
+
+# Shared by the sensor tools
+sensor_readings_cache = SensorReadingsCache()
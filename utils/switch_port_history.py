@@ -0,0 +1,414 @@
+"""
+Switch port history.
+
+getOrganizationSwitchPortsStatusesBySwitch only returns the current state of
+every port, so "which ports keep flapping?" or "are CRC errors getting worse?"
+cannot be answered from one call. A background collector samples the endpoint
+per organization into a fixed-size ring buffer:
+
+    ts          one sample time per poll, shared by every port
+    status      connected / disconnected / disabled (missing when the port was not reported)
+    speed       negotiated speed in Mbps
+    errors      number of fault conditions reported on the port (CRC, PoE, STP, ...);
+                states such as "Port disconnected" on an idle port are not faults
+    power       PoE draw in watts (powerUsageInWh averaged over the last day)
+    traffic     throughput in Kbps
+
+Each column is a ports x MCP_SWITCH_PORT_SAMPLES matrix (12 bytes per port and
+sample), so the oldest sample is overwritten once the buffer is full and memory
+per port is constant.
+Flapping, error trends and PoE headroom are computed from the buffer without
+further API calls. Buffers are persisted per organization as compressed .npz
+files under MCP_STATE_DIR/switch_port_history.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import MCP_STATE_DIR, MCP_SWITCH_PORT_POLL_INTERVAL, MCP_SWITCH_PORT_SAMPLES
+from utils.collector import CollectionStatus, PollingCollector
+from utils.rate_limit import rate_scheduler
+
+MIN_POLL_INTERVAL = 60
+
+# Window covered by powerUsageInWh when no timespan is given
+POE_USAGE_WINDOW = 86400
+
+MISSING, DISCONNECTED, CONNECTED, DISABLED = -1, 0, 1, 2
+STATUS_CODES = {'connected': CONNECTED, 'disconnected': DISCONNECTED, 'disabled': DISABLED}
+
+COLUMNS = ('status', 'speed', 'errors', 'power', 'traffic')
+COLUMN_TYPES = {'status': np.int8, 'errors': np.int8, 'power': np.float16}
+COLUMN_MISSING = {'status': MISSING, 'errors': 0}
+
+# PoE budget (watts) of common MS models; other models are reported without headroom
+POE_BUDGETS = {
+    'MS120-8LP': 67, 'MS120-8FP': 124, 'MS120-24P': 370, 'MS120-48LP': 370, 'MS120-48FP': 740,
+    'MS125-24P': 370, 'MS125-48LP': 370, 'MS125-48FP': 740,
+    'MS130-8P': 120, 'MS130-12X': 240, 'MS130-24P': 370, 'MS130-24X': 370, 'MS130-48P': 740, 'MS130-48X': 740,
+    'MS210-24P': 370, 'MS210-48LP': 370, 'MS210-48FP': 740,
+    'MS225-24P': 370, 'MS225-48LP': 370, 'MS225-48FP': 740,
+    'MS250-24P': 370, 'MS250-48LP': 370, 'MS250-48FP': 740,
+    'MS350-24P': 740, 'MS350-24X': 740, 'MS350-48LP': 740, 'MS350-48FP': 740,
+    'MS355-24X': 740, 'MS355-24X2': 740, 'MS355-48X': 740, 'MS355-48X2': 740,
+}
+
+PortKey = Tuple[str, str]
+
+# Error/warning conditions describing a port's state rather than a fault; an unused
+# port reports them on every poll
+BENIGN_CONDITIONS = frozenset({'port disconnected', 'port disabled', 'not connected', 'link down', 'port down'})
+
+
+def parse_speed(value: Any) -> float:
+    """Mbps from the API's speed string ('1 Gbps', '100 Mbps'); NaN when unknown."""
+    match = re.match(r'\s*([\d.]+)\s*([GM])bps', str(value or ''), re.IGNORECASE)
+    if not match:
+        return np.nan
+    return float(match.group(1)) * (1000 if match.group(2).upper() == 'G' else 1)
+
+
+def port_faults(port: Dict[str, Any]) -> List[str]:
+    """Error and warning conditions of a port that indicate a fault, in reported order."""
+    conditions = list(port.get('errors') or []) + list(port.get('warnings') or [])
+    return [c for c in conditions if str(c).strip().rstrip('.').lower() not in BENIGN_CONDITIONS]
+
+
+def _switches(response: Any) -> List[Dict[str, Any]]:
+    if isinstance(response, dict):
+        return response.get('items') or []
+    return list(response or [])
+
+
+@dataclass
+class PortFlapping:
+    serial: str
+    switch: str
+    port_id: str
+    flaps: int
+    speed_changes: int
+    samples: int
+    status: str
+
+
+@dataclass
+class PortErrorTrend:
+    serial: str
+    switch: str
+    port_id: str
+    error_rate: float
+    earlier_rate: float
+    recent_rate: float
+    samples: int
+    traffic: Optional[float]
+    conditions: List[str]
+
+    @property
+    def trend(self) -> str:
+        if self.recent_rate > self.earlier_rate + 0.1:
+            return 'rising'
+        if self.recent_rate < self.earlier_rate - 0.1:
+            return 'falling'
+        return 'steady'
+
+
+@dataclass
+class PoeHeadroom:
+    serial: str
+    switch: str
+    model: str
+    budget: Optional[float]
+    average: float
+    peak: float
+    allocated_ports: int
+
+    @property
+    def headroom(self) -> Optional[float]:
+        return None if self.budget is None else self.budget - self.peak
+
+    @property
+    def utilization(self) -> Optional[float]:
+        return None if not self.budget else self.peak / self.budget * 100
+
+
+class SwitchPortRing:
+    """Ring buffer of port samples of one organization."""
+
+    def __init__(self, capacity: int = MCP_SWITCH_PORT_SAMPLES):
+        self.capacity = max(2, int(capacity))
+        self.ts = np.zeros(self.capacity, dtype=np.int64)
+        # Samples written so far; the next one goes to written % capacity
+        self.written = 0
+        self.ports: List[PortKey] = []
+        self.index: Dict[PortKey, int] = {}
+        self.columns = {column: self._fill(0, column) for column in COLUMNS}
+        # serial -> {'name', 'model', 'networkId'}
+        self.switches: Dict[str, Dict[str, Any]] = {}
+        # Conditions of each port in its latest sample, e.g. 'Very high proportion of CRC errors'
+        self.conditions: Dict[PortKey, List[str]] = {}
+        self.poe_allocated: Dict[str, int] = {}
+
+    def _fill(self, rows: int, column: str) -> np.ndarray:
+        return np.full((rows, self.capacity), COLUMN_MISSING.get(column, np.nan),
+                       dtype=COLUMN_TYPES.get(column, np.float32))
+
+    def _add_ports(self, keys: Iterable[PortKey]) -> None:
+        """Give new ports a row each, growing the matrices once per sample."""
+        new = [key for key in dict.fromkeys(keys) if key not in self.index]
+        if not new:
+            return
+        for key in new:
+            self.index[key] = len(self.ports)
+            self.ports.append(key)
+        for column in COLUMNS:
+            self.columns[column] = np.vstack([self.columns[column], self._fill(len(new), column)])
+
+    @property
+    def samples(self) -> int:
+        return min(self.written, self.capacity)
+
+    def append(self, ts: int, switches: Iterable[Dict[str, Any]]) -> int:
+        """Write one sample of every reported port; returns the number of ports sampled."""
+        if self.written and ts <= self.ts[(self.written - 1) % self.capacity]:
+            return 0
+        position = self.written % self.capacity
+        for column in COLUMNS:
+            self.columns[column][:, position] = COLUMN_MISSING.get(column, np.nan)
+        self.ts[position] = ts
+        self.written += 1
+
+        switches = list(switches)
+        self._add_ports((switch.get('serial', ''), str(port.get('portId', '')))
+                        for switch in switches for port in switch.get('ports') or [])
+        sampled = 0
+        for switch in switches:
+            serial = switch.get('serial', '')
+            self.switches[serial] = {'name': switch.get('name') or serial, 'model': switch.get('model') or '',
+                                     'networkId': (switch.get('network') or {}).get('id')}
+            allocated = 0
+            for port in switch.get('ports') or []:
+                key = (serial, str(port.get('portId', '')))
+                row = self.index[key]
+                conditions = port_faults(port)
+                status = STATUS_CODES.get(str(port.get('status', '')).lower(), MISSING)
+                if port.get('enabled') is False:
+                    status = DISABLED
+                power = port.get('powerUsageInWh')
+                traffic = (port.get('trafficInKbps') or {}).get('total')
+                self.columns['status'][row, position] = status
+                self.columns['speed'][row, position] = parse_speed(port.get('speed'))
+                self.columns['errors'][row, position] = min(len(conditions), 127)
+                self.columns['power'][row, position] = np.nan if power is None else power / (POE_USAGE_WINDOW / 3600)
+                self.columns['traffic'][row, position] = np.nan if traffic is None else traffic
+                self.conditions[key] = conditions
+                allocated += bool((port.get('poe') or {}).get('isAllocated'))
+                sampled += 1
+            self.poe_allocated[serial] = allocated
+        return sampled
+
+    def window(self, since: int = 0) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Sample times and port x sample matrices with ts >= since, oldest first."""
+        count = self.samples
+        order = (np.arange(self.written - count, self.written) % self.capacity)
+        order = order[self.ts[order] >= since]
+        return self.ts[order], {column: values[:, order] for column, values in self.columns.items()}
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        meta = {'capacity': self.capacity, 'written': self.written, 'ports': self.ports, 'switches': self.switches,
+                'conditions': [self.conditions.get(key, []) for key in self.ports],
+                'poe_allocated': self.poe_allocated}
+        return {'meta': np.array(json.dumps(meta)), 'ts': self.ts, **self.columns}
+
+    @classmethod
+    def from_arrays(cls, data, capacity: int) -> 'SwitchPortRing':
+        meta = json.loads(str(data['meta']))
+        ring = cls(meta['capacity'])
+        ring.ts = np.array(data['ts'])
+        ring.written = meta['written']
+        ring.ports = [tuple(key) for key in meta['ports']]
+        ring.index = {key: row for row, key in enumerate(ring.ports)}
+        ring.columns = {column: np.array(data[column]) for column in COLUMNS}
+        ring.switches = meta['switches']
+        ring.conditions = dict(zip(ring.ports, meta['conditions']))
+        ring.poe_allocated = meta['poe_allocated']
+        return ring.resized(capacity)
+
+    def resized(self, capacity: int) -> 'SwitchPortRing':
+        """Copy keeping the newest samples when MCP_SWITCH_PORT_SAMPLES changed."""
+        if capacity == self.capacity:
+            return self
+        ring = SwitchPortRing(capacity)
+        ts, columns = self.window()
+        keep = min(len(ts), ring.capacity)
+        ring.ts[:keep] = ts[len(ts) - keep:]
+        ring.written = keep
+        ring.ports, ring.index = self.ports, self.index
+        for column in COLUMNS:
+            ring.columns[column] = ring._fill(len(self.ports), column)
+            ring.columns[column][:, :keep] = columns[column][:, len(ts) - keep:]
+        ring.switches, ring.conditions, ring.poe_allocated = self.switches, self.conditions, self.poe_allocated
+        return ring
+
+
+class SwitchPortHistoryStore:
+    """Per-organization port rings, loaded lazily from and saved to MCP_STATE_DIR/switch_port_history."""
+
+    def __init__(self, directory: Optional[str] = None, capacity: int = MCP_SWITCH_PORT_SAMPLES):
+        self.directory = directory or os.path.join(MCP_STATE_DIR, 'switch_port_history')
+        self.capacity = capacity
+        self._orgs: Dict[str, SwitchPortRing] = {}
+        self._lock = threading.RLock()
+
+    def path(self, organization_id: str) -> str:
+        return os.path.join(self.directory, f"{organization_id}.npz")
+
+    def ring(self, organization_id: str) -> SwitchPortRing:
+        with self._lock:
+            if organization_id not in self._orgs:
+                self._orgs[organization_id] = self._load(organization_id)
+            return self._orgs[organization_id]
+
+    def ingest(self, organization_id: str, response: Any, ts: Optional[int] = None) -> int:
+        """Append a getOrganizationSwitchPortsStatusesBySwitch response; returns ports sampled."""
+        ts = int(time.time()) if ts is None else int(ts)
+        with self._lock:
+            return self.ring(organization_id).append(ts, _switches(response))
+
+    def coverage(self, organization_id: str) -> Optional[Tuple[int, int]]:
+        """(oldest, newest) sample time, or None without history."""
+        with self._lock:
+            ts, _ = self.ring(organization_id).window()
+        return (int(ts[0]), int(ts[-1])) if len(ts) else None
+
+    def port_count(self, organization_id: str) -> int:
+        return len(self.ring(organization_id).ports)
+
+    def flapping(self, organization_id: str, since: int = 0, min_flaps: int = 3) -> List[PortFlapping]:
+        """Ports going up and down (or renegotiating speed) at least min_flaps times, worst first."""
+        with self._lock:
+            ring = self.ring(organization_id)
+            _, columns = ring.window(since)
+            results = []
+            for row, (serial, port_id) in enumerate(ring.ports):
+                status = columns['status'][row]
+                link = status[(status == CONNECTED) | (status == DISCONNECTED)]
+                flaps = int(np.count_nonzero(np.diff(link)))
+                speeds = columns['speed'][row][(status == CONNECTED) & ~np.isnan(columns['speed'][row])]
+                speed_changes = int(np.count_nonzero(np.diff(speeds)))
+                if flaps + speed_changes < min_flaps:
+                    continue
+                last = status[status != MISSING]
+                state = {CONNECTED: 'connected', DISCONNECTED: 'disconnected', DISABLED: 'disabled'}.get(
+                    int(last[-1]) if len(last) else MISSING, 'unknown')
+                results.append(PortFlapping(serial, ring.switches.get(serial, {}).get('name', serial), port_id,
+                                            flaps, speed_changes, int(len(last)), state))
+        return sorted(results, key=lambda p: (-(p.flaps + p.speed_changes), p.serial, p.port_id))
+
+    def error_trends(self, organization_id: str, since: int = 0) -> List[PortErrorTrend]:
+        """Ports that reported fault conditions: share of samples with faults, earlier vs recent half."""
+        with self._lock:
+            ring = self.ring(organization_id)
+            _, columns = ring.window(since)
+            present = columns['status'] != MISSING
+            erroring = (columns['errors'] > 0) & present
+            rows = np.flatnonzero(erroring.any(axis=1))
+            results = []
+            for row in rows:
+                samples = np.flatnonzero(present[row])
+                flags = erroring[row, samples]
+                half = len(flags) // 2
+                earlier = float(flags[:half].mean()) if half else 0.0
+                recent = float(flags[half:].mean())
+                traffic = columns['traffic'][row, samples]
+                traffic = traffic[~np.isnan(traffic)]
+                serial, port_id = ring.ports[row]
+                results.append(PortErrorTrend(
+                    serial, ring.switches.get(serial, {}).get('name', serial), port_id,
+                    float(flags.mean()), earlier, recent, int(len(flags)),
+                    float(traffic.mean()) if len(traffic) else None, ring.conditions.get((serial, port_id), [])
+                ))
+        return sorted(results, key=lambda p: (-p.recent_rate, -p.error_rate, p.serial, p.port_id))
+
+    def poe_headroom(self, organization_id: str, since: int = 0) -> List[PoeHeadroom]:
+        """PoE draw per switch (sum of its ports per sample) against the model's budget, least headroom first."""
+        with self._lock:
+            ring = self.ring(organization_id)
+            ts, columns = ring.window(since)
+            serials = np.array([serial for serial, _ in ring.ports])
+            results = []
+            for serial, info in ring.switches.items():
+                power = columns['power'][serials == serial]
+                if not len(ts) or not len(power) or np.isnan(power).all():
+                    continue
+                reported = ~np.isnan(power).all(axis=0)
+                totals = np.nansum(power[:, reported], axis=0)
+                results.append(PoeHeadroom(serial, info.get('name', serial), info.get('model', ''),
+                                           POE_BUDGETS.get(info.get('model', '')), float(totals.mean()),
+                                           float(totals.max()), ring.poe_allocated.get(serial, 0)))
+
+        def order(h: PoeHeadroom):
+            return (h.utilization is None, -(h.utilization or 0), -h.peak)
+        return sorted(results, key=order)
+
+    def save(self, organization_id: str) -> None:
+        """Write an organization's ring atomically."""
+        with self._lock:
+            arrays = self.ring(organization_id).to_arrays()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(organization_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temp_path, path)
+
+    def _load(self, organization_id: str) -> SwitchPortRing:
+        try:
+            with np.load(self.path(organization_id)) as data:
+                return SwitchPortRing.from_arrays(data, self.capacity)
+        except (OSError, KeyError, ValueError):
+            return SwitchPortRing(self.capacity)
+
+    def clear(self, organization_id: str) -> None:
+        with self._lock:
+            self._orgs[organization_id] = SwitchPortRing(self.capacity)
+        try:
+            os.remove(self.path(organization_id))
+        except FileNotFoundError:
+            pass
+
+
+class SwitchPortCollector(PollingCollector):
+    """Background threads sampling org-wide switch port statuses, one per organization."""
+
+    thread_name = 'switch-port-collector'
+
+    def __init__(self, store: SwitchPortHistoryStore):
+        super().__init__()
+        self.store = store
+
+    def poll_once(self, meraki_client, organization_id: str) -> int:
+        """Fetch every switch's port statuses, append one sample and persist; returns ports sampled."""
+        rate_scheduler.acquire(organization_id)
+        response = meraki_client.dashboard.switch.getOrganizationSwitchPortsStatusesBySwitch(
+            organization_id, perPage=20, total_pages='all'
+        )
+        sampled = self.store.ingest(organization_id, response)
+        self.store.save(organization_id)
+        return sampled
+
+    def start(self, meraki_client, organization_id: str, interval: int = MCP_SWITCH_PORT_POLL_INTERVAL) -> CollectionStatus:
+        """Start sampling an organization (or change the interval of a running collection)."""
+        interval = max(MIN_POLL_INTERVAL, int(interval))
+        return self._start(meraki_client, organization_id, interval)
+
+
+# Shared by the monitoring tools
+switch_port_history = SwitchPortHistoryStore()
+switch_port_collector = SwitchPortCollector(switch_port_history)
@@ -0,0 +1,312 @@
+"""
+Vectorized statistics for loss and latency time series.
+
+The analytics tools reduced every uplink's timeSeries with Python list
+comprehensions and reported only avg/min/max. Here a batch of series (one per
+uplink or AP) is packed into a NaN-padded matrix once and reduced along the
+time axis with NumPy, so an organization with thousands of uplinks costs one
+pass per statistic:
+
+    summarize_many      count, mean, min, max, p50/p95/p99, jitter, latest
+    loss_bursts         runs of consecutive samples at or above a loss threshold
+    availability        share of samples in which the uplink passed traffic
+    distribution_percentiles_many
+                        percentiles of latency histograms (wireless rawDistribution)
+
+Missing samples (None) are NaN and ignored by every statistic.
+
+Long series are reduced for display with lttb_indices (Largest-Triangle-Three-
+Buckets, keeps the visual shape) or min_max_indices (keeps every extreme).
+"""
+
+import warnings
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+# Loss at or above this percentage is counted as the uplink being down
+DOWN_LOSS_PERCENT = 100.0
+
+# Loss burst defaults: at least this many consecutive samples at or above the threshold
+BURST_LOSS_PERCENT = 1.0
+BURST_MIN_SAMPLES = 2
+
+
+def to_matrix(series: Iterable[Sequence[Optional[float]]]) -> np.ndarray:
+    """Pack ragged series into a float64 matrix (one row per series), NaN-padded at the end."""
+    rows = [
+        values.astype(np.float64) if isinstance(values, np.ndarray)
+        else np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+        for values in series
+    ]
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix
+
+
+def column(points: Iterable[Dict[str, Any]], key: str) -> List[Optional[float]]:
+    """One field of an API timeSeries (list of dicts) as a list with None for missing values."""
+    return [point.get(key) for point in points or []]
+
+
+@dataclass
+class SeriesSummary:
+    """Statistics of one series; every value is None when the series has no samples."""
+
+    count: int = 0
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    jitter: Optional[float] = None
+    latest: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _value(x: float) -> Optional[float]:
+    return None if np.isnan(x) else float(x)
+
+
+def summarize_many(series: Any) -> List[SeriesSummary]:
+    """
+    Summarize every row of a matrix (or every series of a ragged list) at once.
+
+    Jitter is the mean absolute difference between consecutive samples
+    (RFC 3550 style), skipping gaps.
+    """
+    matrix = series if isinstance(series, np.ndarray) and series.ndim == 2 else to_matrix(series)
+    if matrix.size == 0:
+        return [SeriesSummary() for _ in range(matrix.shape[0])]
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis=1)
+    with warnings.catch_warnings():
+        # All-NaN rows yield NaN (reported as None) instead of a warning
+        warnings.simplefilter('ignore', RuntimeWarning)
+        means = np.nanmean(matrix, axis=1)
+        minima = np.nanmin(matrix, axis=1)
+        maxima = np.nanmax(matrix, axis=1)
+        percentiles = np.nanpercentile(matrix, PERCENTILES, axis=1)
+        jitter = np.nanmean(np.abs(np.diff(matrix, axis=1)), axis=1) if matrix.shape[1] > 1 else np.full(len(matrix), np.nan)
+
+    # Latest non-missing sample of each row
+    last_index = matrix.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    latest = np.where(counts > 0, matrix[np.arange(len(matrix)), last_index], np.nan)
+
+    return [
+        SeriesSummary(
+            count=int(counts[i]), mean=_value(means[i]), min=_value(minima[i]), max=_value(maxima[i]),
+            p50=_value(percentiles[0][i]), p95=_value(percentiles[1][i]), p99=_value(percentiles[2][i]),
+            jitter=_value(jitter[i]), latest=_value(latest[i])
+        )
+        for i in range(len(matrix))
+    ]
+
+
+def summarize(values: Sequence[Optional[float]]) -> SeriesSummary:
+    """Summarize a single series."""
+    return summarize_many([values])[0]
+
+
+@dataclass
+class LossBurst:
+    """Consecutive samples with loss at or above the burst threshold."""
+
+    start: int
+    length: int
+    peak: float
+
+
+def loss_bursts(
+    series: Any,
+    threshold: float = BURST_LOSS_PERCENT,
+    min_samples: int = BURST_MIN_SAMPLES
+) -> List[List[LossBurst]]:
+    """
+    Find loss bursts in every row.
+
+    Args:
+        series: Loss percentages, matrix or ragged list (one row per uplink)
+        threshold: Loss percentage a sample must reach to be part of a burst
+        min_samples: Shortest run reported as a burst
+
+    Returns:
+        One list of bursts (sample index, length, peak loss) per row
+    """
+    matrix = series if isinstance(series, np.ndarray) and series.ndim == 2 else to_matrix(series)
+    lossy = np.nan_to_num(matrix, nan=-1.0) >= threshold
+    # Run boundaries from the difference of the zero-padded mask
+    edges = np.diff(np.pad(lossy.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    bursts: List[List[LossBurst]] = [[] for _ in range(len(matrix))]
+    for row, start, end in zip(rows, starts, ends):
+        if end - start >= min_samples:
+            bursts[row].append(LossBurst(start=int(start), length=int(end - start),
+                                         peak=float(np.max(matrix[row, start:end]))))
+    return bursts
+
+
+def availability(series: Any, down_loss: float = DOWN_LOSS_PERCENT) -> List[Optional[float]]:
+    """Percentage of samples per row in which loss stayed below down_loss (None without samples)."""
+    matrix = series if isinstance(series, np.ndarray) and series.ndim == 2 else to_matrix(series)
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis=1)
+    up = (valid & (np.nan_to_num(matrix, nan=down_loss) < down_loss)).sum(axis=1)
+    return [float(u / c * 100) if c else None for u, c in zip(up, counts)]
+
+
+def distribution_percentiles_many(
+    distributions: Sequence[Dict[Any, Any]],
+    qs: Sequence[float] = PERCENTILES
+) -> List[Dict[float, Optional[float]]]:
+    """
+    Percentiles of many histograms such as wireless latencyStats rawDistribution.
+
+    The histograms are aligned on the union of their buckets into one count
+    matrix, so the percentiles of every AP are found with a single cumulative sum.
+
+    Args:
+        distributions: {bucket lower bound (ms): sample count} per series
+        qs: Percentiles to compute
+
+    Returns:
+        {q: lower bound of the bucket containing the q-th percentile} per series
+    """
+    buckets = sorted({float(b) for d in distributions for b in (d or {})})
+    if not buckets:
+        return [{q: None for q in qs} for _ in distributions]
+    index = {b: i for i, b in enumerate(buckets)}
+    counts = np.zeros((len(distributions), len(buckets)))
+    for row, distribution in enumerate(distributions):
+        for bucket, count in (distribution or {}).items():
+            counts[row, index[float(bucket)]] += float(count or 0)
+    cumulative = np.cumsum(counts, axis=1)
+    totals = cumulative[:, -1]
+    targets = totals[:, None] * (np.asarray(qs, dtype=np.float64)[None, :] / 100)
+    # First bucket whose cumulative count reaches each target
+    positions = (cumulative[:, None, :] < targets[:, :, None]).sum(axis=2)
+    positions = np.minimum(positions, len(buckets) - 1)
+    values = np.asarray(buckets)[positions]
+    return [
+        {q: (float(values[row, i]) if totals[row] > 0 else None) for i, q in enumerate(qs)}
+        for row in range(len(distributions))
+    ]
+
+
+def distribution_percentiles(raw_distribution: Dict[Any, Any], qs: Sequence[float] = PERCENTILES) -> Dict[float, Optional[float]]:
+    """Percentiles of a single latency histogram (see distribution_percentiles_many)."""
+    return distribution_percentiles_many([raw_distribution], qs)[0]
+
+
+def latency_category_stats_many(latency_stats: Sequence[Dict[str, Any]]) -> List[Dict[str, Dict[str, Any]]]:
+    """
+    Average, sample count and p50/p95/p99 per traffic category of wireless latencyStats payloads.
+
+    Accepts either the latencyStats object or a response that wraps it
+    ({'latencyStats': {...}} from the network and device endpoints).
+    """
+    unwrapped = []
+    for stats in latency_stats:
+        stats = stats or {}
+        stats = stats.get('latencyStats', stats) if isinstance(stats, dict) else {}
+        unwrapped.append({k: v for k, v in stats.items() if isinstance(v, dict)})
+    flat = [(row, category, values) for row, stats in enumerate(unwrapped) for category, values in stats.items()]
+    percentiles = distribution_percentiles_many([values.get('rawDistribution') or {} for _, _, values in flat])
+    results: List[Dict[str, Dict[str, Any]]] = [{} for _ in unwrapped]
+    for (row, category, values), pct in zip(flat, percentiles):
+        distribution = values.get('rawDistribution') or {}
+        results[row][category] = {
+            'avg': values.get('avg'),
+            'samples': int(sum(float(c or 0) for c in distribution.values())),
+            'p50': pct[50], 'p95': pct[95], 'p99': pct[99]
+        }
+    return results
+
+
+def latency_category_stats(latency_stats: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return latency_category_stats_many([latency_stats])[0]
+
+
+@dataclass
+class UplinkStats:
+    """Loss and latency statistics of one uplink."""
+
+    loss: SeriesSummary
+    latency: SeriesSummary
+    availability: Optional[float]
+    bursts: List[LossBurst]
+
+    @property
+    def worst_burst(self) -> Optional[LossBurst]:
+        return max(self.bursts, key=lambda b: (b.length, b.peak)) if self.bursts else None
+
+
+def uplink_stats(
+    loss_series: Any,
+    latency_series: Any,
+    burst_threshold: float = BURST_LOSS_PERCENT,
+    burst_min_samples: int = BURST_MIN_SAMPLES
+) -> List[UplinkStats]:
+    """Loss and latency statistics of many uplinks from parallel lists (or matrices) of series."""
+    loss = loss_series if isinstance(loss_series, np.ndarray) and loss_series.ndim == 2 else to_matrix(loss_series)
+    latency = (latency_series if isinstance(latency_series, np.ndarray) and latency_series.ndim == 2
+               else to_matrix(latency_series))
+    return [
+        UplinkStats(loss=l, latency=t, availability=a, bursts=b)
+        for l, t, a, b in zip(summarize_many(loss), summarize_many(latency), availability(loss),
+                              loss_bursts(loss, burst_threshold, burst_min_samples))
+    ]
+
+
+def lttb_indices(ts: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; from each of the threshold - 2
+    buckets in between, the point forming the largest triangle with the point
+    kept from the previous bucket and the average of the next bucket is kept.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(ts, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    # Bucket boundaries over the points between the first and last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_end = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        next_x = x[next_start:max(next_end, next_start + 1)].mean()
+        next_y = y[next_start:max(next_end, next_start + 1)].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = kept[i + 1] = start + int(np.argmax(areas))
+    return kept
+
+
+def min_max_indices(values: np.ndarray, buckets: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of `buckets` equal-sized buckets, in time order."""
+    n = len(values)
+    if buckets * 2 >= n or buckets < 1:
+        return np.arange(n)
+    y = np.asarray(values, dtype=np.float64)
+    starts = np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+    # Position of the extreme in each bucket from a stable sort by (bucket, value)
+    order = np.lexsort((y, bucket_of))
+    first = np.searchsorted(bucket_of[order], np.arange(buckets), side='left')
+    last = np.searchsorted(bucket_of[order], np.arange(buckets), side='right') - 1
+    return np.unique(np.concatenate([order[first], order[last]]))
@@ -0,0 +1,336 @@
+"""
+Streaming top-N usage across networks.
+
+Finding the top talkers of an organization meant loading every network's full
+client list and sorting it. Here the paged client and traffic data of many
+networks is consumed concurrently as a stream (the client's streaming
+dashboard yields one item at a time instead of building lists), and every
+dimension is reduced to a fixed-size heap:
+
+    client          one bounded min-heap of the largest clients, never more than `top` entries
+    application     usage summed per application (from getNetworkTraffic)
+    ssid, vlan      usage and client counts summed per SSID name / VLAN ID
+
+Grouped dimensions keep one running total per distinct value (a few dozen
+SSIDs, a few hundred VLANs or applications) before their own heap picks the
+top entries, so memory does not grow with the number of clients.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import MCP_AUDIT_CONCURRENCY
+from utils.rate_limit import rate_scheduler
+
+DIMENSIONS = ('client', 'application', 'ssid', 'vlan')
+
+# Product types whose networks report clients / application traffic
+CLIENT_PRODUCTS = ('appliance', 'wireless', 'switch')
+
+# getNetworkTraffic looks back at most 30 days
+MAX_TRAFFIC_TIMESPAN = 30 * 86400
+
+CLIENTS_PER_PAGE = 1000
+
+
+def format_kilobytes(kb: float) -> str:
+    """Human-readable size of a usage value reported in kilobytes."""
+    for unit in ('KB', 'MB', 'GB', 'TB'):
+        if abs(kb) < 1024 or unit == 'TB':
+            return f"{kb:.1f} {unit}"
+        kb /= 1024
+    return f"{kb:.1f} TB"
+
+
+@dataclass
+class UsageEntry:
+    """Usage of one client, application, SSID or VLAN (kilobytes)."""
+
+    key: Any
+    label: str
+    sent: float = 0.0
+    recv: float = 0.0
+    clients: int = 0
+    networks: int = 0
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def total(self) -> float:
+        return self.sent + self.recv
+
+
+class TopN:
+    """Fixed-size min-heap holding the `n` largest items pushed so far."""
+
+    def __init__(self, n: int):
+        self.n = max(1, int(n))
+        self._heap: List[Tuple[float, int, UsageEntry]] = []
+        # Tie-breaker so entries themselves are never compared
+        self._counter = itertools.count()
+
+    def push(self, entry: UsageEntry) -> None:
+        item = (entry.total, next(self._counter), entry)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, item)
+        elif item[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+
+    def merge(self, other: 'TopN') -> None:
+        for _, _, entry in other._heap:
+            self.push(entry)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> List[UsageEntry]:
+        """Entries, largest first."""
+        return [entry for _, _, entry in sorted(self._heap, key=lambda item: (-item[0], item[1]))]
+
+
+class UsageTally:
+    """Running usage totals per value of a grouped dimension."""
+
+    def __init__(self):
+        self.entries: Dict[Any, UsageEntry] = {}
+
+    def add(self, key: Any, label: str, sent: float, recv: float, clients: int = 1, networks: int = 0) -> None:
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = UsageEntry(key=key, label=label)
+        entry.sent += sent
+        entry.recv += recv
+        entry.clients += clients
+        entry.networks += networks
+
+    def merge(self, other: 'UsageTally') -> None:
+        for key, entry in other.entries.items():
+            self.add(key, entry.label, entry.sent, entry.recv, entry.clients, entry.networks)
+
+    def top(self, n: int) -> List[UsageEntry]:
+        heap = TopN(n)
+        for entry in self.entries.values():
+            heap.push(entry)
+        return heap.items()
+
+
+def _usage(value: Any) -> Tuple[float, float]:
+    usage = value or {}
+    return float(usage.get('sent') or 0), float(usage.get('recv') or 0)
+
+
+@dataclass
+class _NetworkUsage:
+    clients: TopN
+    tallies: Dict[str, UsageTally]
+    seen: int = 0
+    sent: float = 0.0
+    recv: float = 0.0
+
+
+@dataclass
+class TopUsage:
+    """Top-N usage per dimension across the scanned networks."""
+
+    organization_id: str
+    timespan: int
+    top: int
+    dimensions: Tuple[str, ...]
+    networks: int = 0
+    clients_seen: int = 0
+    sent: float = 0.0
+    recv: float = 0.0
+    leaders: Dict[str, List[UsageEntry]] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return self.sent + self.recv
+
+    def markdown(self) -> List[str]:
+        lines = [f"# 📊 Top Usage - Organization {self.organization_id}", ""]
+        lines.append(f"**Window**: {self.timespan / 3600:.1f} hours | **Networks**: {self.networks} | "
+                     f"**Clients Seen**: {self.clients_seen} | **Total**: {format_kilobytes(self.total)} "
+                     f"({self.elapsed:.1f}s)")
+        for network, error in list(self.errors.items())[:10]:
+            lines.append(f"⚠️ {network}: {error}")
+        if len(self.errors) > 10:
+            lines.append(f"⚠️ ...and {len(self.errors) - 10} more networks with errors")
+        lines.append("")
+
+        titles = {'client': '👤 Clients', 'application': '📱 Applications', 'ssid': '📶 SSIDs', 'vlan': '🏷️ VLANs'}
+        for dimension in self.dimensions:
+            entries = self.leaders.get(dimension, [])
+            lines += [f"## {titles[dimension]} (top {len(entries)})", ""]
+            if not entries:
+                lines += ["*No usage data*", ""]
+                continue
+            if dimension == 'client':
+                lines += ["| # | Client | IP | Network | SSID / VLAN | Total | Sent | Received | Share |",
+                          "|---|---|---|---|---|---|---|---|---|"]
+            else:
+                lines += ["| # | Name | Clients | Networks | Total | Sent | Received | Share |",
+                          "|---|---|---|---|---|---|---|---|"]
+            for rank, entry in enumerate(entries, 1):
+                share = f"{entry.total / self.total * 100:.1f}%" if self.total else "-"
+                usage = f"{format_kilobytes(entry.total)} | {format_kilobytes(entry.sent)} | {format_kilobytes(entry.recv)}"
+                if dimension == 'client':
+                    d = entry.detail
+                    where = d.get('ssid') or (f"VLAN {d['vlan']}" if d.get('vlan') not in (None, '') else '-')
+                    lines.append(f"| {rank} | {entry.label} | {d.get('ip') or '-'} | {d.get('network') or '-'} | "
+                                 f"{where} | {usage} | {share} |")
+                else:
+                    lines.append(f"| {rank} | {entry.label} | {entry.clients or '-'} | {entry.networks or '-'} | "
+                                 f"{usage} | {share} |")
+            lines.append("")
+        return lines
+
+
+def _paced(items: Iterable[Any], organization_id: str, per_page: int) -> Iterable[Any]:
+    """
+    Iterate a paged result, waiting for the organization's rate budget before every page after the first.
+
+    The streaming dashboard requests the next page when the previous one is used
+    up, so one slot is taken every `per_page` items (an exactly full last page
+    costs one unused slot). Lists were fetched in full by the call itself.
+    """
+    if items is None or isinstance(items, list):
+        yield from items or []
+        return
+    for count, item in enumerate(items, 1):
+        yield item
+        if count % per_page == 0:
+            rate_scheduler.acquire(organization_id)
+
+
+def _scan_network(
+    dashboard,
+    organization_id: str,
+    network: Dict[str, Any],
+    timespan: int,
+    top: int,
+    dimensions: Sequence[str]
+) -> _NetworkUsage:
+    """Stream one network's clients and traffic into a bounded heap and tallies."""
+    network_id = network['id']
+    result = _NetworkUsage(clients=TopN(top), tallies={d: UsageTally() for d in ('application', 'ssid', 'vlan')})
+
+    if {'client', 'ssid', 'vlan'} & set(dimensions):
+        rate_scheduler.acquire(organization_id)
+        clients: Iterable[Dict[str, Any]] = dashboard.networks.getNetworkClients(
+            network_id, timespan=timespan, perPage=CLIENTS_PER_PAGE, total_pages='all'
+        )
+        ssids, vlans = set(), set()
+        for client in _paced(clients, organization_id, CLIENTS_PER_PAGE):
+            sent, recv = _usage(client.get('usage'))
+            result.seen += 1
+            result.sent += sent
+            result.recv += recv
+            label = client.get('description') or client.get('recentDeviceName') or client.get('mac') or client.get('id')
+            result.clients.push(UsageEntry(
+                key=(network_id, client.get('id') or client.get('mac')), label=str(label), sent=sent, recv=recv,
+                clients=1, networks=1,
+                detail={'ip': client.get('ip'), 'mac': client.get('mac'), 'network': network.get('name', network_id),
+                        'ssid': client.get('ssid'), 'vlan': client.get('vlan'),
+                        'manufacturer': client.get('manufacturer')}
+            ))
+            if client.get('ssid'):
+                first = client['ssid'] not in ssids
+                ssids.add(client['ssid'])
+                result.tallies['ssid'].add(client['ssid'], client['ssid'], sent, recv, networks=int(first))
+            if client.get('vlan') not in (None, ''):
+                vlan = str(client['vlan'])
+                first = vlan not in vlans
+                vlans.add(vlan)
+                result.tallies['vlan'].add(vlan, f"VLAN {vlan}", sent, recv, networks=int(first))
+
+    if 'application' in dimensions:
+        rate_scheduler.acquire(organization_id)
+        rows = dashboard.networks.getNetworkTraffic(network_id, timespan=min(timespan, MAX_TRAFFIC_TIMESPAN))
+        applications = set()
+        for row in rows or []:
+            application = row.get('application') or 'Unknown'
+            first = application not in applications
+            applications.add(application)
+            result.tallies['application'].add(application, application, float(row.get('sent') or 0),
+                                              float(row.get('recv') or 0), clients=int(row.get('numClients') or 0),
+                                              networks=int(first))
+    return result
+
+
+def top_usage(
+    meraki_client,
+    organization_id: str,
+    timespan: int = 86400,
+    top: int = 20,
+    network_ids: Optional[List[str]] = None,
+    dimensions: Sequence[str] = DIMENSIONS,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> TopUsage:
+    """
+    Top clients, applications, SSIDs and VLANs by usage across an organization's networks.
+
+    Args:
+        meraki_client: Meraki client (its streaming dashboard is used when available)
+        organization_id: Organization ID
+        timespan: Usage window in seconds
+        top: Entries kept per dimension
+        network_ids: Only these networks (default: every network with clients)
+        dimensions: Subset of DIMENSIONS
+        max_workers: Networks scanned concurrently
+        on_progress: Called with (finished, total) networks
+
+    Returns:
+        TopUsage with the leaders of each dimension
+    """
+    started = time.time()
+    unknown = set(dimensions) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))} (use {', '.join(DIMENSIONS)})")
+    dimensions = tuple(d for d in DIMENSIONS if d in dimensions)
+    dashboard = getattr(meraki_client, 'streaming_dashboard', None) or meraki_client.dashboard
+    result = TopUsage(organization_id=organization_id, timespan=int(timespan), top=int(top), dimensions=dimensions)
+
+    rate_scheduler.acquire(organization_id)
+    networks = meraki_client.dashboard.organizations.getOrganizationNetworks(organization_id, total_pages='all')
+    if network_ids:
+        wanted = set(network_ids)
+        networks = [n for n in networks if n.get('id') in wanted]
+    else:
+        networks = [n for n in networks if set(n.get('productTypes') or CLIENT_PRODUCTS) & set(CLIENT_PRODUCTS)]
+    result.networks = len(networks)
+
+    clients = TopN(top)
+    tallies = {d: UsageTally() for d in ('application', 'ssid', 'vlan')}
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_scan_network, dashboard, organization_id, network, int(timespan), int(top), dimensions): network
+            for network in networks
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            network = futures[future]
+            try:
+                usage = future.result()
+                with lock:
+                    clients.merge(usage.clients)
+                    for name, tally in usage.tallies.items():
+                        tallies[name].merge(tally)
+                    result.clients_seen += usage.seen
+                    result.sent += usage.sent
+                    result.recv += usage.recv
+            except Exception as e:
+                result.errors[network.get('name') or network.get('id')] = str(e)
+            if on_progress:
+                on_progress(done, len(futures))
+
+    for dimension in dimensions:
+        result.leaders[dimension] = clients.items() if dimension == 'client' else tallies[dimension].top(top)
+    result.elapsed = time.time() - started
+    return result
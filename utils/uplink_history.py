@@ -0,0 +1,359 @@
+"""
+Long-horizon uplink loss and latency history.
+
+getOrganizationDevicesUplinksLossAndLatency only looks back five minutes, so
+"was there loss at 3am?" cannot be answered from the API. A background
+collector polls the endpoint per organization and appends the samples to a
+columnar store with two tiers:
+
+    raw       one row per API sample (one per minute), kept for MCP_UPLINK_RAW_RETENTION
+    rollup    MCP_UPLINK_ROLLUP_SECONDS buckets holding average and maximum loss
+              and latency, kept for MCP_UPLINK_RETENTION
+
+Each uplink (serial, uplink, ip) owns one NumPy column per field and tier, so a
+window is answered with two binary searches. Stores are persisted per
+organization as compressed .npz files under MCP_STATE_DIR/uplink_history.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    MCP_STATE_DIR, MCP_UPLINK_POLL_INTERVAL, MCP_UPLINK_RAW_RETENTION, MCP_UPLINK_RETENTION, MCP_UPLINK_ROLLUP_SECONDS
+)
+from utils.collector import CollectionStatus, PollingCollector
+from utils.rate_limit import rate_scheduler
+
+# Longest window the Dashboard endpoint accepts; polls must come at least this often to avoid gaps
+API_TIMESPAN = 300
+RAW_STEP = 60
+
+RAW_COLUMNS = ('ts', 'loss', 'latency')
+ROLLUP_COLUMNS = ('ts', 'loss', 'loss_max', 'latency', 'latency_max', 'count')
+COLUMN_TYPES = {'ts': np.int64, 'count': np.int32}
+
+UplinkKey = Tuple[str, str, str]
+
+
+def _empty(columns: Iterable[str]) -> Dict[str, np.ndarray]:
+    return {column: np.empty(0, dtype=COLUMN_TYPES.get(column, np.float32)) for column in columns}
+
+
+def parse_timestamp(value: Any) -> int:
+    """Epoch seconds from an ISO 8601 string ('2024-01-31T18:46:13Z') or a number."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = str(value).strip()
+    if value.replace('.', '', 1).isdigit():
+        return int(float(value))
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def format_timestamp(ts: int) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _bucket_reduce(values: np.ndarray, starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """NaN-ignoring mean and max of each contiguous bucket beginning at starts."""
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0), starts)
+    counts = np.add.reduceat(valid.astype(np.int32), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    maxima = np.fmax.reduceat(values, starts)
+    return means.astype(np.float32), maxima.astype(np.float32)
+
+
+@dataclass
+class UplinkWindow:
+    """Samples of one uplink inside a queried window, oldest first."""
+
+    serial: str
+    uplink: str
+    ip: str
+    network_id: Optional[str]
+    ts: np.ndarray
+    loss: np.ndarray
+    latency: np.ndarray
+    loss_max: np.ndarray
+    latency_max: np.ndarray
+    resolution: int = RAW_STEP
+
+    @property
+    def points(self) -> int:
+        return len(self.ts)
+
+    def to_time_series(self) -> List[Dict[str, Any]]:
+        """Samples in the API's timeSeries shape."""
+        return [
+            {'ts': format_timestamp(ts), 'lossPercent': None if np.isnan(loss) else float(loss),
+             'latencyMs': None if np.isnan(latency) else float(latency)}
+            for ts, loss, latency in zip(self.ts, self.loss, self.latency)
+        ]
+
+
+class UplinkSeries:
+    """Raw and rolled-up columns of one uplink."""
+
+    def __init__(self, serial: str, uplink: str, ip: str, network_id: Optional[str] = None):
+        self.serial = serial
+        self.uplink = uplink
+        self.ip = ip
+        self.network_id = network_id
+        self.raw = _empty(RAW_COLUMNS)
+        self.rollup = _empty(ROLLUP_COLUMNS)
+
+    @property
+    def key(self) -> UplinkKey:
+        return (self.serial, self.uplink, self.ip)
+
+    @property
+    def first_ts(self) -> Optional[int]:
+        for tier in (self.rollup, self.raw):
+            if len(tier['ts']):
+                return int(tier['ts'][0])
+        return None
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        for tier in (self.raw, self.rollup):
+            if len(tier['ts']):
+                return int(tier['ts'][-1])
+        return None
+
+    def append(self, ts: np.ndarray, loss: np.ndarray, latency: np.ndarray) -> int:
+        """Append samples newer than the last stored one (polls overlap); returns rows added."""
+        order = np.argsort(ts, kind='stable')
+        ts, loss, latency = ts[order], loss[order], latency[order]
+        last = self.last_ts
+        keep = np.ones(len(ts), dtype=bool) if last is None else ts > last
+        if len(ts) > 1:
+            keep[1:] &= ts[1:] != ts[:-1]
+        if not keep.any():
+            return 0
+        for column, values in (('ts', ts), ('loss', loss), ('latency', latency)):
+            self.raw[column] = np.concatenate([self.raw[column], values[keep].astype(self.raw[column].dtype)])
+        return int(keep.sum())
+
+    def compact(self, now: float, raw_retention: int, rollup_step: int, retention: int) -> None:
+        """Roll raw samples older than raw_retention into buckets and drop buckets older than retention."""
+        cutoff = int(now - raw_retention) // rollup_step * rollup_step
+        ts = self.raw['ts']
+        count = int(np.searchsorted(ts, cutoff))
+        if count:
+            old_ts = ts[:count]
+            buckets = old_ts // rollup_step * rollup_step
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            loss, loss_max = _bucket_reduce(self.raw['loss'][:count], starts)
+            latency, latency_max = _bucket_reduce(self.raw['latency'][:count], starts)
+            sizes = np.diff(np.r_[starts, count]).astype(np.int32)
+            new = {'ts': buckets[starts], 'loss': loss, 'loss_max': loss_max,
+                   'latency': latency, 'latency_max': latency_max, 'count': sizes}
+            for column in ROLLUP_COLUMNS:
+                self.rollup[column] = np.concatenate([self.rollup[column], new[column].astype(self.rollup[column].dtype)])
+            for column in RAW_COLUMNS:
+                self.raw[column] = self.raw[column][count:]
+
+        expired = int(np.searchsorted(self.rollup['ts'], int(now - retention)))
+        if expired:
+            for column in ROLLUP_COLUMNS:
+                self.rollup[column] = self.rollup[column][expired:]
+
+    def window(self, t0: int, t1: int, rollup_step: int = MCP_UPLINK_ROLLUP_SECONDS) -> UplinkWindow:
+        """Samples with t0 <= ts <= t1: rollup buckets for the old part, raw samples for the rest."""
+        rollup_ts = self.rollup['ts']
+        r0 = int(np.searchsorted(rollup_ts, t0 - rollup_step, side='right'))
+        r1 = int(np.searchsorted(rollup_ts, t1, side='right'))
+        raw_ts = self.raw['ts']
+        s0 = int(np.searchsorted(raw_ts, t0))
+        s1 = int(np.searchsorted(raw_ts, t1, side='right'))
+
+        def join(rollup_column: str, raw_column: str) -> np.ndarray:
+            return np.concatenate([self.rollup[rollup_column][r0:r1], self.raw[raw_column][s0:s1]])
+
+        return UplinkWindow(
+            serial=self.serial, uplink=self.uplink, ip=self.ip, network_id=self.network_id,
+            ts=np.concatenate([rollup_ts[r0:r1], raw_ts[s0:s1]]),
+            loss=join('loss', 'loss'), latency=join('latency', 'latency'),
+            loss_max=join('loss_max', 'loss'), latency_max=join('latency_max', 'latency'),
+            resolution=rollup_step if r1 > r0 else RAW_STEP
+        )
+
+
+class UplinkHistoryStore:
+    """Per-organization uplink series, loaded lazily from and saved to MCP_STATE_DIR/uplink_history."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        raw_retention: int = MCP_UPLINK_RAW_RETENTION,
+        rollup_step: int = MCP_UPLINK_ROLLUP_SECONDS,
+        retention: int = MCP_UPLINK_RETENTION
+    ):
+        self.directory = directory or os.path.join(MCP_STATE_DIR, 'uplink_history')
+        self.raw_retention = raw_retention
+        self.rollup_step = rollup_step
+        self.retention = retention
+        self._orgs: Dict[str, Dict[UplinkKey, UplinkSeries]] = {}
+        self._lock = threading.RLock()
+
+    def path(self, organization_id: str) -> str:
+        return os.path.join(self.directory, f"{organization_id}.npz")
+
+    def _series(self, organization_id: str) -> Dict[UplinkKey, UplinkSeries]:
+        with self._lock:
+            if organization_id not in self._orgs:
+                self._orgs[organization_id] = self._load(organization_id)
+            return self._orgs[organization_id]
+
+    def has(self, organization_id: str) -> bool:
+        """True when any history is stored for the organization."""
+        return bool(self._series(organization_id))
+
+    def ingest(self, organization_id: str, entries: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append a getOrganizationDevicesUplinksLossAndLatency response.
+
+        Returns:
+            Number of new samples (overlap with earlier polls is skipped)
+        """
+        added = 0
+        with self._lock:
+            series = self._series(organization_id)
+            for entry in entries or []:
+                points = entry.get('timeSeries') or []
+                if not points:
+                    continue
+                key = (entry.get('serial', ''), entry.get('uplink') or '', entry.get('ip') or '')
+                uplink = series.get(key)
+                if uplink is None:
+                    uplink = series[key] = UplinkSeries(*key, network_id=entry.get('networkId'))
+                ts = np.array([parse_timestamp(p['ts']) for p in points], dtype=np.int64)
+                loss = np.array([np.nan if p.get('lossPercent') is None else p['lossPercent'] for p in points],
+                                dtype=np.float32)
+                latency = np.array([np.nan if p.get('latencyMs') is None else p['latencyMs'] for p in points],
+                                   dtype=np.float32)
+                added += uplink.append(ts, loss, latency)
+        return added
+
+    def compact(self, organization_id: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            series = self._series(organization_id)
+            for key in list(series):
+                series[key].compact(now, self.raw_retention, self.rollup_step, self.retention)
+                if series[key].last_ts is None:
+                    del series[key]
+
+    def query(self, organization_id: str, t0: int, t1: int, serial: Optional[str] = None) -> List[UplinkWindow]:
+        """Windows of every uplink (or one device's uplinks) with at least one sample in [t0, t1]."""
+        with self._lock:
+            series = list(self._series(organization_id).values())
+            windows = [s.window(t0, t1, self.rollup_step) for s in series if serial is None or s.serial == serial]
+        return [w for w in windows if w.points]
+
+    def coverage(self, organization_id: str) -> Optional[Tuple[int, int]]:
+        """(oldest, newest) stored sample time, or None without history."""
+        with self._lock:
+            series = self._series(organization_id).values()
+            firsts = [s.first_ts for s in series if s.first_ts is not None]
+            lasts = [s.last_ts for s in series if s.last_ts is not None]
+        return (min(firsts), max(lasts)) if firsts else None
+
+    def uplink_count(self, organization_id: str) -> int:
+        return len(self._series(organization_id))
+
+    def save(self, organization_id: str) -> None:
+        """Write an organization's history atomically as one flat column per field and tier."""
+        with self._lock:
+            series = list(self._series(organization_id).values())
+            arrays = {'meta': np.array(json.dumps([[*s.key, s.network_id] for s in series]))}
+            for tier, columns in (('raw', RAW_COLUMNS), ('rollup', ROLLUP_COLUMNS)):
+                parts = [getattr(s, tier) for s in series]
+                arrays[f"{tier}_uplink"] = np.concatenate(
+                    [np.full(len(p['ts']), i, dtype=np.int32) for i, p in enumerate(parts)] or [np.empty(0, np.int32)]
+                )
+                for column in columns:
+                    arrays[f"{tier}_{column}"] = np.concatenate(
+                        [p[column] for p in parts] or [_empty([column])[column]]
+                    )
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(organization_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temp_path, path)
+
+    def _load(self, organization_id: str) -> Dict[UplinkKey, UplinkSeries]:
+        try:
+            with np.load(self.path(organization_id)) as data:
+                meta = json.loads(str(data['meta']))
+                series = [UplinkSeries(serial, uplink, ip, network_id) for serial, uplink, ip, network_id in meta]
+                for tier, columns in (('raw', RAW_COLUMNS), ('rollup', ROLLUP_COLUMNS)):
+                    # Uplinks are saved contiguously in index order: read each column once and slice
+                    bounds = np.searchsorted(data[f"{tier}_uplink"], np.arange(len(series) + 1))
+                    arrays = {column: data[f"{tier}_{column}"] for column in columns}
+                    for i, uplink in enumerate(series):
+                        rows = slice(bounds[i], bounds[i + 1])
+                        setattr(uplink, tier, {column: values[rows] for column, values in arrays.items()})
+        except (OSError, KeyError, ValueError):
+            return {}
+        return {uplink.key: uplink for uplink in series}
+
+    def clear(self, organization_id: str) -> None:
+        with self._lock:
+            self._orgs[organization_id] = {}
+        try:
+            os.remove(self.path(organization_id))
+        except FileNotFoundError:
+            pass
+
+
+class UplinkCollector(PollingCollector):
+    """Background threads polling uplink loss and latency, one per organization."""
+
+    thread_name = 'uplink-collector'
+
+    def __init__(self, store: UplinkHistoryStore):
+        super().__init__()
+        self.store = store
+        # Called with (organization_id, entries) after every poll, e.g. by the anomaly detector
+        self.listeners: List[Callable[[str, List[Dict[str, Any]]], None]] = []
+
+    def poll_once(self, meraki_client, organization_id: str) -> int:
+        """Fetch the last five minutes, append, compact and persist; returns new samples."""
+        rate_scheduler.acquire(organization_id)
+        entries = meraki_client.dashboard.organizations.getOrganizationDevicesUplinksLossAndLatency(
+            organization_id, timespan=API_TIMESPAN
+        )
+        added = self.store.ingest(organization_id, entries)
+        self.store.compact(organization_id)
+        self.store.save(organization_id)
+        for listener in list(self.listeners):
+            listener(organization_id, entries or [])
+        return added
+
+    def start(self, meraki_client, organization_id: str, interval: int = MCP_UPLINK_POLL_INTERVAL) -> CollectionStatus:
+        """
+        Start collecting an organization (or change the interval of a running collection).
+
+        The interval is clamped to 60-300 seconds: the endpoint only covers the
+        last five minutes, so longer intervals would leave gaps.
+        """
+        interval = max(RAW_STEP, min(API_TIMESPAN, int(interval)))
+        return self._start(meraki_client, organization_id, interval)
+
+
+# Shared by the analytics tools
+uplink_history = UplinkHistoryStore()
+uplink_collector = UplinkCollector(uplink_history)
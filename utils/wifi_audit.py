@@ -0,0 +1,515 @@
+"""
+Wireless site audit engine.
+
+The WiFi audit scripts and tools each gathered SSIDs, RF profiles, connection
+statistics and per-AP utilization one call after another, so a 100-AP site
+took minutes. This module runs one audit of a network in three overlapping
+stages:
+
+    prefetch        device inventory and statuses, SSIDs and RF profiles
+                    (the last two from a shared cache), and every network-level
+                    statistic, all submitted at once
+    per-AP          radio status and channel utilization per band for every AP,
+                    submitted as soon as the inventory arrives
+    findings        computed locally from the joined results
+
+Every request waits for the organization's rate budget (utils.rate_limit), and
+a failing source is recorded in WifiAudit.errors instead of aborting the audit.
+
+Run from the command line with:
+
+    python -m utils.wifi_audit <network_id> [--timespan 86400] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from config import MCP_AUDIT_CONCURRENCY, MCP_CACHE_TTL
+from utils.cache import TTLCache
+from utils.infrastructure import infrastructure_cache
+from utils.rate_limit import rate_scheduler
+from utils.timeseries_stats import latency_category_stats
+
+# Source name -> (SDK section, method, extra kwargs); sources marked with timespan get the audit window
+NETWORK_SOURCES = {
+    'connection_stats': ('wireless', 'getNetworkWirelessConnectionStats', {'timespan': True}),
+    'device_connection_stats': ('wireless', 'getNetworkWirelessDevicesConnectionStats', {'timespan': True}),
+    'latency_stats': ('wireless', 'getNetworkWirelessLatencyStats', {'timespan': True}),
+    'device_latency_stats': ('wireless', 'getNetworkWirelessDevicesLatencyStats', {'timespan': True}),
+    'failed_connections': ('wireless', 'getNetworkWirelessFailedConnections', {'timespan': True}),
+    'air_marshal': ('wireless', 'getNetworkWirelessAirMarshal', {'timespan': True}),
+    'clients': ('networks', 'getNetworkClients', {'timespan': True, 'perPage': 1000, 'total_pages': 'all'}),
+    'settings': ('wireless', 'getNetworkWirelessSettings', {}),
+    'alerts_settings': ('networks', 'getNetworkAlertsSettings', {}),
+}
+
+BANDS = ('2.4', '5')
+
+# Resolutions accepted by getNetworkWirelessChannelUtilizationHistory, largest first
+UTILIZATION_RESOLUTIONS = (86400, 14400, 3600, 1200, 600)
+
+# Finding thresholds
+HIGH_UTILIZATION = 50.0
+LOW_SUCCESS_RATE = 90.0
+AP_LOW_SUCCESS_RATE = 80.0
+HIGH_LATENCY_MS = 50.0
+
+SEVERITY_ORDER = {'critical': 0, 'warning': 1, 'info': 2}
+
+
+class WirelessConfigCache:
+    """Cached SSID and RF profile lists keyed by network ID."""
+
+    def __init__(self, ttl: float = MCP_CACHE_TTL):
+        self._cache = TTLCache(ttl)
+
+    def ssids(self, meraki_client, network_id: str) -> List[Dict[str, Any]]:
+        """MR SSIDs of a network (getNetworkWirelessSsids)."""
+        return self._cache.get_or_load(
+            (network_id, 'ssids'),
+            lambda: meraki_client.dashboard.wireless.getNetworkWirelessSsids(network_id)
+        )
+
+    def rf_profiles(self, meraki_client, network_id: str) -> List[Dict[str, Any]]:
+        """RF profiles of a network (getNetworkWirelessRfProfiles)."""
+        return self._cache.get_or_load(
+            (network_id, 'rf_profiles'),
+            lambda: meraki_client.dashboard.wireless.getNetworkWirelessRfProfiles(network_id)
+        )
+
+    def cached(self, network_id: str, kind: str) -> bool:
+        return (network_id, kind) in self._cache
+
+    def invalidate(self, network_id: str) -> None:
+        """Forget a network's SSIDs and RF profiles, e.g. after one of them was changed."""
+        self._cache.invalidate_where(lambda key: key[0] == network_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Shared by the audit engine and the SSID/RF profile tools
+wireless_config_cache = WirelessConfigCache()
+
+
+def utilization_resolution(timespan: int) -> int:
+    """Coarsest utilization resolution that still fits the window (one bucket per band if possible)."""
+    for resolution in UTILIZATION_RESOLUTIONS:
+        if resolution <= timespan:
+            return resolution
+    return UTILIZATION_RESOLUTIONS[-1]
+
+
+def _average_utilization(history: List[Dict[str, Any]]) -> Optional[float]:
+    values = [h.get('utilizationTotal', h.get('utilization')) for h in history or []]
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def _success_rate(stats: Dict[str, Any]) -> Optional[float]:
+    """Share of connection attempts that succeeded, in percent."""
+    stats = stats or {}
+    attempts = sum(stats.get(step, 0) or 0 for step in ('assoc', 'auth', 'dhcp', 'dns')) + (stats.get('success', 0) or 0)
+    return (stats.get('success', 0) or 0) / attempts * 100 if attempts else None
+
+
+@dataclass
+class AccessPointStats:
+    """One access point with its inventory, status and collected statistics."""
+
+    serial: str
+    name: str
+    model: str = ''
+    status: str = 'unknown'
+    firmware: str = ''
+    lan_ip: Optional[str] = None
+    connection: Dict[str, Any] = field(default_factory=dict)
+    latency: Dict[str, Any] = field(default_factory=dict)
+    utilization: Dict[str, float] = field(default_factory=dict)
+    radios: List[Dict[str, Any]] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        return _success_rate(self.connection)
+
+    @property
+    def channels(self) -> Dict[str, Any]:
+        """Band -> channel of the broadcasting radios."""
+        return {r.get('band'): r.get('channel') for r in self.radios
+                if r.get('enabled', True) and r.get('broadcasting', True) and r.get('band')}
+
+
+@dataclass
+class WifiAudit:
+    """Result of one wireless site audit."""
+
+    network_id: str
+    name: str = ''
+    organization_id: Optional[str] = None
+    timespan: int = 86400
+    access_points: List[AccessPointStats] = field(default_factory=list)
+    ssids: List[Dict[str, Any]] = field(default_factory=list)
+    rf_profiles: List[Dict[str, Any]] = field(default_factory=list)
+    clients: List[Dict[str, Any]] = field(default_factory=list)
+    failed_connections: List[Dict[str, Any]] = field(default_factory=list)
+    air_marshal: List[Dict[str, Any]] = field(default_factory=list)
+    connection_stats: Dict[str, Any] = field(default_factory=dict)
+    latency_stats: Dict[str, Any] = field(default_factory=dict)
+    settings: Dict[str, Any] = field(default_factory=dict)
+    alerts_settings: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    cached: List[str] = field(default_factory=list)
+    api_calls: int = 0
+    duration: float = 0.0
+
+    @property
+    def active_ssids(self) -> List[Dict[str, Any]]:
+        return [s for s in self.ssids if s.get('enabled')]
+
+    @property
+    def wireless_clients(self) -> List[Dict[str, Any]]:
+        return [c for c in self.clients if c.get('ssid')]
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        return _success_rate(self.connection_stats)
+
+    def aps_with_status(self, status: str) -> List[AccessPointStats]:
+        return [ap for ap in self.access_points if ap.status == status]
+
+    def failures_by_step(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for failure in self.failed_connections:
+            step = failure.get('failureStep', 'unknown')
+            counts[step] = counts.get(step, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+    @property
+    def rogue_ssids(self) -> List[Dict[str, Any]]:
+        """Air Marshal entries whose BSSIDs were seen on the wired LAN."""
+        return [entry for entry in self.air_marshal if entry.get('wiredMacs')]
+
+    def busiest(self, band: str, limit: int = 10) -> List[AccessPointStats]:
+        """APs with the highest channel utilization on a band."""
+        aps = [ap for ap in self.access_points if ap.utilization.get(band) is not None]
+        return sorted(aps, key=lambda ap: -ap.utilization[band])[:limit]
+
+    @property
+    def findings(self) -> List[Dict[str, str]]:
+        """Issues found, most severe first."""
+        findings = []
+
+        def add(severity: str, message: str):
+            findings.append({'severity': severity, 'message': message})
+
+        offline = self.aps_with_status('offline')
+        if offline:
+            add('critical', f"{len(offline)}/{len(self.access_points)} access points offline: "
+                            f"{', '.join(ap.name for ap in offline[:5])}")
+        if len(self.access_points) == 1:
+            add('warning', "Only 1 access point deployed - single point of failure")
+        elif not self.access_points:
+            add('info', "No MR access points in this network")
+
+        rate = self.success_rate
+        if rate is not None and rate < LOW_SUCCESS_RATE:
+            add('warning', f"Connection success rate {rate:.1f}% (below {LOW_SUCCESS_RATE:.0f}%)")
+        for ap in self.access_points:
+            if ap.success_rate is not None and ap.success_rate < AP_LOW_SUCCESS_RATE:
+                add('warning', f"{ap.name}: connection success rate {ap.success_rate:.1f}%")
+        steps = self.failures_by_step()
+        if steps:
+            step, count = next(iter(steps.items()))
+            add('info', f"{len(self.failed_connections)} failed connections, most at {step} ({count})")
+
+        for band in BANDS:
+            for ap in self.busiest(band):
+                if ap.utilization[band] > HIGH_UTILIZATION:
+                    add('warning', f"{ap.name}: {band}GHz channel utilization {ap.utilization[band]:.0f}%")
+
+        for category, values in latency_category_stats(self.latency_stats).items():
+            avg = values.get('avg')
+            if avg is not None and avg > HIGH_LATENCY_MS:
+                p95 = f", p95 {values['p95']:.0f}ms" if values.get('p95') is not None else ''
+                add('warning', f"{category} latency {avg:.0f}ms average{p95} (above {HIGH_LATENCY_MS:.0f}ms)")
+
+        for ssid in self.active_ssids:
+            if ssid.get('authMode') == 'open':
+                add('warning', f"SSID '{ssid.get('name')}' is open (no authentication)")
+
+        if self.rogue_ssids:
+            add('critical', f"{len(self.rogue_ssids)} rogue SSIDs seen on the wired LAN")
+
+        if self.alerts_settings:
+            alerts = self.alerts_settings.get('alerts', [])
+            if alerts and not any(a.get('enabled') for a in alerts):
+                add('info', "No network alerts enabled")
+
+        return sorted(findings, key=lambda f: SEVERITY_ORDER[f['severity']])
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['findings'] = self.findings
+        data['success_rate'] = self.success_rate
+        return data
+
+    def markdown(self, max_aps: int = 25) -> List[str]:
+        """Report lines shared by the MCP tool and the CLI."""
+        lines = [f"# 📡 Wireless Audit: {self.name or self.network_id}"]
+        lines.append(f"**Window**: {self.timespan // 3600}h | **APs**: {len(self.access_points)} | "
+                     f"**API Calls**: {self.api_calls} | **Duration**: {self.duration:.1f}s")
+        if self.cached:
+            lines.append(f"**From cache**: {', '.join(self.cached)}")
+        lines.append("")
+
+        lines.append("## 📊 Summary")
+        online = len(self.aps_with_status('online'))
+        lines.append(f"- Access Points Online: {online}/{len(self.access_points)}")
+        lines.append(f"- SSIDs: {len(self.active_ssids)} active of {len(self.ssids)} configured")
+        lines.append(f"- Wireless Clients: {len(self.wireless_clients)}")
+        rate = self.success_rate
+        lines.append(f"- Connection Success Rate: {f'{rate:.1f}%' if rate is not None else 'N/A'}")
+        lines.append(f"- Failed Connections: {len(self.failed_connections)}")
+        lines.append(f"- RF Profiles: {len(self.rf_profiles) or 'default'}")
+        lines.append(f"- Rogue SSIDs: {len(self.rogue_ssids)} of {len(self.air_marshal)} detected")
+        for source, error in self.errors.items():
+            lines.append(f"- ⚠️ {source} unavailable: {error}")
+        lines.append("")
+
+        findings = self.findings
+        if findings:
+            icons = {'critical': '🔴', 'warning': '🟡', 'info': 'ℹ️'}
+            lines.append("## ⚠️ Findings")
+            for finding in findings:
+                lines.append(f"- {icons[finding['severity']]} {finding['message']}")
+            lines.append("")
+
+        if self.active_ssids:
+            lines.append("## 📶 Active SSIDs")
+            for ssid in self.active_ssids:
+                lines.append(f"- #{ssid.get('number')} **{ssid.get('name')}** - auth: {ssid.get('authMode')}, "
+                             f"encryption: {ssid.get('encryptionMode', 'n/a')}")
+            lines.append("")
+
+        if self.access_points:
+            lines.append("## 📡 Access Points")
+            lines.append("| Status | AP | Model | Success | 2.4GHz Util | 5GHz Util | Channels |")
+            lines.append("|---|---|---|---|---|---|---|")
+            ranked = sorted(self.access_points, key=lambda ap: (ap.status == 'online', -(max(ap.utilization.values(), default=0))))
+            for ap in ranked[:max_aps]:
+                icon = '🟢' if ap.status == 'online' else '🔴' if ap.status == 'offline' else '🟡'
+                success = f"{ap.success_rate:.0f}%" if ap.success_rate is not None else '-'
+                util = [f"{ap.utilization[b]:.0f}%" if ap.utilization.get(b) is not None else '-' for b in BANDS]
+                channels = ', '.join(f"{band}: {channel}" for band, channel in ap.channels.items()) or '-'
+                lines.append(f"| {icon} | {ap.name} | {ap.model} | {success} | {util[0]} | {util[1]} | {channels} |")
+            if len(ranked) > max_aps:
+                lines.append(f"\n... and {len(ranked) - max_aps} more access points")
+            lines.append("")
+
+        steps = self.failures_by_step()
+        if steps:
+            lines.append("## ❌ Failed Connections by Step")
+            for step, count in steps.items():
+                lines.append(f"- {step}: {count}")
+            lines.append("")
+
+        return lines
+
+
+def audit_wireless_network(
+    meraki_client,
+    network_id: str,
+    timespan: int = 86400,
+    organization_id: Optional[str] = None,
+    per_ap: bool = True,
+    max_workers: int = MCP_AUDIT_CONCURRENCY,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> WifiAudit:
+    """
+    Audit the wireless side of one network.
+
+    Args:
+        meraki_client: MerakiClient instance
+        network_id: Network to audit
+        timespan: Statistics window in seconds
+        organization_id: Organization of the network (looked up with getNetwork if empty)
+        per_ap: Also collect radio status and channel utilization for every AP
+        max_workers: Concurrent requests
+        on_progress: Called with (finished, submitted) requests as they complete
+
+    Returns:
+        WifiAudit; failing sources are recorded in errors and the rest still joined.
+    """
+    started = time.time()
+    dashboard = meraki_client.dashboard
+    audit = WifiAudit(network_id=network_id, organization_id=organization_id, timespan=timespan)
+
+    if not organization_id:
+        rate_scheduler.acquire()
+        network = dashboard.networks.getNetwork(network_id)
+        audit.api_calls += 1
+        audit.name = network.get('name', network_id)
+        audit.organization_id = network.get('organizationId')
+    org_id = audit.organization_id
+
+    for kind in ('ssids', 'rf_profiles'):
+        if wireless_config_cache.cached(network_id, kind):
+            audit.cached.append(kind)
+
+    def call(method: Callable, *args, **kwargs):
+        rate_scheduler.acquire(org_id)
+        return method(*args, **kwargs)
+
+    def network_source(source: str):
+        section, method, options = NETWORK_SOURCES[source]
+        kwargs = {k: v for k, v in options.items() if k != 'timespan'}
+        if options.get('timespan'):
+            kwargs['timespan'] = timespan
+        return call(getattr(getattr(dashboard, section), method), network_id, **kwargs)
+
+    def cached_source(kind: str):
+        if kind not in audit.cached:
+            rate_scheduler.acquire(org_id)
+        return getattr(wireless_config_cache, kind)(meraki_client, network_id)
+
+    tasks = {
+        'devices': lambda: call(dashboard.networks.getNetworkDevices, network_id),
+        'ssids': lambda: cached_source('ssids'),
+        'rf_profiles': lambda: cached_source('rf_profiles'),
+    }
+    if org_id:
+        tasks['statuses'] = lambda: call(
+            dashboard.organizations.getOrganizationDevicesStatuses, org_id,
+            networkIds=[network_id], productTypes=['wireless'], total_pages='all'
+        )
+    for source in NETWORK_SOURCES:
+        tasks[source] = lambda source=source: network_source(source)
+
+    results: Dict[str, Any] = {}
+    aps: Dict[str, AccessPointStats] = {}
+    submitted = 0
+    finished = 0
+
+    def ap_status(ap: AccessPointStats):
+        status = call(dashboard.wireless.getDeviceWirelessStatus, ap.serial)
+        return status.get('basicServiceSets', []) if isinstance(status, dict) else []
+
+    def ap_utilization(ap: AccessPointStats, band: str):
+        return _average_utilization(call(
+            dashboard.wireless.getNetworkWirelessChannelUtilizationHistory, network_id,
+            deviceSerial=ap.serial, band=band, timespan=timespan,
+            resolution=utilization_resolution(timespan)
+        ))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(task): name for name, task in tasks.items()}
+        submitted = len(futures)
+        while futures:
+            future = next(as_completed(futures))
+            name = futures.pop(future)
+            finished += 1
+            try:
+                value = future.result()
+            except Exception as e:
+                value = None
+                error = str(e)
+            else:
+                error = None
+
+            if isinstance(name, tuple):
+                # Per-AP result: (serial, kind[, band])
+                ap = aps[name[0]]
+                if error is not None:
+                    ap.errors['/'.join(name[1:])] = error
+                elif name[1] == 'radios':
+                    ap.radios = value
+                elif value is not None:
+                    ap.utilization[name[2]] = value
+            else:
+                if error is not None:
+                    audit.errors[name] = error
+                results[name] = value
+                if name == 'devices' and value is not None:
+                    infrastructure_cache.update(network_id, value)
+                    for device in value:
+                        model = device.get('model', '') or ''
+                        if not (model.startswith('MR') or model.startswith('CW')):
+                            continue
+                        ap = AccessPointStats(
+                            serial=device.get('serial'), name=device.get('name') or device.get('serial'),
+                            model=model, firmware=device.get('firmware', ''), lan_ip=device.get('lanIp')
+                        )
+                        aps[ap.serial] = ap
+                        if per_ap:
+                            futures[executor.submit(ap_status, ap)] = (ap.serial, 'radios')
+                            for band in BANDS:
+                                futures[executor.submit(ap_utilization, ap, band)] = (ap.serial, 'utilization', band)
+                    submitted = finished + len(futures)
+
+            if on_progress is not None:
+                on_progress(finished, submitted)
+
+    audit.api_calls += sum(1 for name in tasks if not (name in ('ssids', 'rf_profiles') and name in audit.cached))
+    audit.api_calls += sum(1 + len(BANDS) for _ in aps) if per_ap else 0
+
+    if 'devices' in audit.errors:
+        raise Exception(f"Unable to list devices: {audit.errors['devices']}")
+
+    for status in results.get('statuses') or []:
+        ap = aps.get(status.get('serial'))
+        if ap is not None:
+            ap.status = status.get('status', 'unknown')
+            ap.lan_ip = ap.lan_ip or status.get('lanIp')
+    for entry in results.get('device_connection_stats') or []:
+        ap = aps.get(entry.get('serial'))
+        if ap is not None:
+            ap.connection = entry.get('connectionStats', {})
+    for entry in results.get('device_latency_stats') or []:
+        ap = aps.get(entry.get('serial'))
+        if ap is not None:
+            ap.latency = entry.get('latencyStats', {})
+
+    audit.access_points = sorted(aps.values(), key=lambda ap: ap.name)
+    for name in ('ssids', 'rf_profiles', 'clients', 'failed_connections', 'air_marshal'):
+        setattr(audit, name, results.get(name) or [])
+    for name in ('connection_stats', 'latency_stats', 'settings', 'alerts_settings'):
+        setattr(audit, name, results.get(name) or {})
+    audit.duration = time.time() - started
+    return audit
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Audit the wireless side of a Meraki network")
+    parser.add_argument('network_id', help="Network ID (L_... or N_...)")
+    parser.add_argument('--timespan', type=int, default=86400, help="Statistics window in seconds (default: 86400)")
+    parser.add_argument('--organization-id', default=None, help="Organization of the network (looked up if omitted)")
+    parser.add_argument('--no-per-ap', action='store_true', help="Skip per-AP radio status and utilization")
+    parser.add_argument('--workers', type=int, default=MCP_AUDIT_CONCURRENCY, help="Concurrent requests")
+    parser.add_argument('--json', action='store_true', help="Print the raw audit as JSON")
+    args = parser.parse_args(argv)
+
+    from meraki_client import MerakiClient
+
+    def progress(done: int, total: int):
+        print(f"\r  {done}/{total} requests", end='', file=sys.stderr, flush=True)
+
+    audit = audit_wireless_network(
+        MerakiClient(), args.network_id, timespan=args.timespan, organization_id=args.organization_id,
+        per_ap=not args.no_per_ap, max_workers=args.workers, on_progress=progress
+    )
+    print(file=sys.stderr)
+    if args.json:
+        print(json.dumps(audit.to_dict(), indent=2, default=str))
+    else:
+        print("\n".join(audit.markdown(max_aps=1000)))
+    return 1 if any(f['severity'] == 'critical' for f in audit.findings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())